@@ -0,0 +1,115 @@
+"""LLM response cache: calls saved on repeats, and replay without a model
+
+Runs the pipeline workflow from ``confluence.agent.build_root_agent`` with
+the scripted model from ``workflow_calls.py`` against the stand-in MCP
+server, three times:
+
+1. ``on`` mode for every agent, each question asked twice; the second pass
+   is answered from the cache
+2. ``record`` mode into a SQLite file
+3. ``replay`` mode from a fresh cache on that file, with a model that fails
+   the run if it is ever called; the answers must match the recorded ones
+
+Usage:
+    python benchmarks/llm_cache.py [--llm-latency 0.3]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("ANSWER_CACHE_ENABLED", "false")
+os.environ.setdefault("FAST_ANALYZER_ENABLED", "false")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from google.adk.runners import InMemoryRunner  # noqa: E402
+from google.adk.tools.mcp_tool import McpToolset  # noqa: E402
+from google.adk.tools.mcp_tool.mcp_session_manager import SseConnectionParams  # noqa: E402
+from google.genai import types  # noqa: E402
+
+from confluence import llm_cache as llm_cache_module  # noqa: E402
+from confluence.agent import build_root_agent  # noqa: E402
+from confluence.llm_cache import LlmCachePolicy, LlmResponseCache  # noqa: E402
+from mock_mcp_server import create_app, serve_in_background  # noqa: E402
+from workflow_calls import QUESTIONS, ScriptedLlm  # noqa: E402
+
+logging.getLogger("google_adk").setLevel(logging.ERROR)
+
+AGENTS = ["coordinator", "query_analyzer", "document_searcher", "answer_synthesizer"]
+
+
+class OfflineLlm(ScriptedLlm):
+    """Model that must not be reached in replay mode."""
+
+    async def generate_content_async(self, llm_request, stream=False):
+        raise AssertionError("replay mode called the model")
+        yield  # pragma: no cover
+
+
+def use_cache(mode, db_path=None):
+    llm_cache_module.llm_cache = LlmResponseCache(db_path=db_path)
+    llm_cache_module.llm_cache_policy = LlmCachePolicy(mode, AGENTS)
+    return llm_cache_module.llm_cache
+
+
+async def run(url, model, questions):
+    toolset = McpToolset(connection_params=SseConnectionParams(url=url))
+    runner = InMemoryRunner(agent=build_root_agent("pipeline", model=model, toolset=toolset), app_name="bench")
+    rows = []
+    try:
+        for question in questions:
+            session = await runner.session_service.create_session(app_name="bench", user_id="bench")
+            before = model.calls
+            started = time.perf_counter()
+            answer = ""
+            async for event in runner.run_async(
+                user_id="bench", session_id=session.id,
+                new_message=types.Content(role="user", parts=[types.Part(text=question)])
+            ):
+                if event.content and event.content.parts and event.content.parts[0].text:
+                    answer = event.content.parts[0].text
+            rows.append((model.calls - before, time.perf_counter() - started, answer))
+    finally:
+        await toolset.close()
+    return rows
+
+
+async def main(latency):
+    async with serve_in_background(create_app()) as url:
+        print(f"Scripted LLM latency: {latency * 1000:.0f} ms per call; pipeline workflow\n")
+
+        cache = use_cache("on")
+        rows = await run(url, ScriptedLlm(model="scripted", latency=latency), QUESTIONS + QUESTIONS)
+        first, second = rows[:len(QUESTIONS)], rows[len(QUESTIONS):]
+        print(f"{'pass':8} {'LLM calls':>9} {'time/question':>14}")
+        for name, part in (("cold", first), ("repeat", second)):
+            print(f"{name:8} {sum(r[0] for r in part):9d} {statistics.mean(r[1] for r in part):13.2f}s")
+        print(f"llm_cache.stats(): {cache.stats()}\n")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "llm_cache.sqlite")
+            use_cache("record", db_path)
+            recorded = await run(url, ScriptedLlm(model="scripted", latency=latency), QUESTIONS)
+            cache = use_cache("replay", db_path)
+            replayed = await run(url, OfflineLlm(model="scripted", latency=latency), QUESTIONS)
+
+        same = sum(r[2] == p[2] for r, p in zip(recorded, replayed))
+        print(f"record: {sum(r[0] for r in recorded)} LLM calls, "
+              f"{statistics.mean(r[1] for r in recorded):.2f}s per question")
+        print(f"replay: {sum(r[0] for r in replayed)} LLM calls, "
+              f"{statistics.mean(r[1] for r in replayed):.2f}s per question, "
+              f"{same}/{len(QUESTIONS)} answers identical to the recording")
+        print(f"llm_cache.stats() (replay): {cache.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    args = parser.parse_args()
+    asyncio.run(main(args.llm_latency))
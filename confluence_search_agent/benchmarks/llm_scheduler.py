@@ -0,0 +1,162 @@
+"""Request latency under a burst, with and without the LLM call scheduler
+
+Sends a burst of concurrent questions through the pipeline workflow
+(``build_root_agent``) with the scripted model from ``workflow_calls.py``
+in front of a simulated LLM proxy. The proxy serves ``--proxy-limit``
+calls at once and answers the rest with 429, which the client retries
+after an exponential backoff starting at ``--backoff`` (like LiteLLM's
+retries against our proxy).
+
+Runs:
+
+- unscheduled: every model call goes straight to the proxy
+- FIFO: LlmScheduler capped at the proxy limit, no priorities
+- priority: same cap, answer_synthesizer first and query_analyzer last
+- admission: a burst twice as large with ``LLM_MAX_QUEUE``-style admission;
+  rejected requests get their answer (429) immediately
+
+Usage:
+    python benchmarks/llm_scheduler.py [--burst 24] [--proxy-limit 4]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+os.environ.setdefault("ANSWER_CACHE_ENABLED", "false")
+os.environ.setdefault("FAST_ANALYZER_ENABLED", "false")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from google.adk.runners import InMemoryRunner  # noqa: E402
+from google.adk.tools.mcp_tool import McpToolset  # noqa: E402
+from google.adk.tools.mcp_tool.mcp_session_manager import SseConnectionParams  # noqa: E402
+from google.genai import types  # noqa: E402
+
+from confluence.agent import build_root_agent  # noqa: E402
+from confluence.scheduler import LlmScheduler, parse_priorities  # noqa: E402
+from mock_mcp_server import create_app, serve_in_background  # noqa: E402
+from workflow_calls import QUESTIONS, ScriptedLlm  # noqa: E402
+
+logging.getLogger("google_adk").setLevel(logging.ERROR)
+
+PRIORITIES = parse_priorities("answer_synthesizer:0,query_analyzer:2")
+
+
+class Proxy:
+    """Concurrency-limited LLM proxy that answers excess calls with 429."""
+
+    def __init__(self, limit, backoff):
+        self.limit = limit
+        self.backoff = backoff
+        self.in_flight = 0
+        self.rejected = 0
+
+    async def call(self, latency):
+        attempt = 0
+        while self.in_flight >= self.limit:
+            self.rejected += 1
+            await asyncio.sleep(self.backoff * 2 ** min(attempt, 3))
+            attempt += 1
+        self.in_flight += 1
+        try:
+            await asyncio.sleep(latency)
+        finally:
+            self.in_flight -= 1
+
+
+class ProxiedScriptedLlm(ScriptedLlm):
+    """ScriptedLlm behind the simulated proxy, optionally scheduled."""
+
+    latency: float = 0.0  # paid at the proxy instead
+    call_latency: float = 0.2
+    proxy: Optional[Proxy] = None
+    scheduler: Optional[LlmScheduler] = None
+
+    async def generate_content_async(self, llm_request, stream=False):
+        if self.scheduler is None:
+            async for response in self._generate(llm_request, stream):
+                yield response
+            return
+        async for response in self.scheduler.schedule(llm_request, lambda: self._generate(llm_request, stream)):
+            yield response
+
+    async def _generate(self, llm_request, stream):
+        await self.proxy.call(self.call_latency)
+        async for response in super().generate_content_async(llm_request, stream):
+            yield response
+
+
+async def run(url, args, scheduler, burst):
+    proxy = Proxy(args.proxy_limit, args.backoff)
+    model = ProxiedScriptedLlm(model="scripted", call_latency=args.llm_latency, proxy=proxy, scheduler=scheduler)
+    toolset = McpToolset(connection_params=SseConnectionParams(url=url))
+    runner = InMemoryRunner(agent=build_root_agent("pipeline", model=model, toolset=toolset), app_name="bench")
+
+    async def ask(question):
+        started = time.perf_counter()
+        if scheduler is not None and not scheduler.try_admit():
+            return "rejected", time.perf_counter() - started
+        try:
+            session = await runner.session_service.create_session(app_name="bench", user_id="bench")
+            async for _ in runner.run_async(
+                user_id="bench", session_id=session.id,
+                new_message=types.Content(role="user", parts=[types.Part(text=question)])
+            ):
+                pass
+        finally:
+            if scheduler is not None:
+                scheduler.request_done()
+        return "answered", time.perf_counter() - started
+
+    try:
+        await ask(QUESTIONS[0])  # MCP session handshake
+        questions = [QUESTIONS[i % 4] for i in range(burst)]
+        started = time.perf_counter()
+        results = await asyncio.gather(*(ask(question) for question in questions))
+        elapsed = time.perf_counter() - started
+    finally:
+        await toolset.close()
+    return results, elapsed, proxy.rejected
+
+
+def report(name, results, elapsed, proxy_rejected):
+    answered = sorted(seconds for status, seconds in results if status == "answered")
+    rejected = [seconds for status, seconds in results if status == "rejected"]
+    p95 = answered[min(len(answered) - 1, round(0.95 * len(answered)) - 1)]
+    line = (f"{name:12} {len(answered):8d} {statistics.mean(answered):9.2f}s {p95:8.2f}s "
+            f"{elapsed:8.2f}s {proxy_rejected:10d}")
+    if rejected:
+        line += f"   {len(rejected)} got 429 after {statistics.mean(rejected) * 1000:.2f} ms"
+    print(line)
+
+
+async def main(args):
+    async with serve_in_background(create_app()) as url:
+        print(f"Burst of {args.burst} questions; proxy serves {args.proxy_limit} calls at once, "
+              f"{args.llm_latency * 1000:.0f} ms per call, 429 backoff from {args.backoff * 1000:.0f} ms\n")
+        print(f"{'scheduler':12} {'answered':>8} {'mean':>10} {'p95':>9} {'burst':>9} {'proxy 429s':>10}")
+        report("unscheduled", *await run(url, args, None, args.burst))
+        report("FIFO", *await run(url, args, LlmScheduler(args.proxy_limit, max_queue=10 ** 6), args.burst))
+        scheduler = LlmScheduler(args.proxy_limit, max_queue=10 ** 6, priorities=PRIORITIES)
+        report("priority", *await run(url, args, scheduler, args.burst))
+        print(f"\nllm_scheduler.stats() (priority): {scheduler.stats()}\n")
+
+        scheduler = LlmScheduler(args.proxy_limit, max_queue=args.max_queue, priorities=PRIORITIES)
+        report("admission", *await run(url, args, scheduler, args.burst * 2))
+        print(f"\nllm_scheduler.stats() (admission, max_queue={args.max_queue}): {scheduler.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--burst", type=int, default=24)
+    parser.add_argument("--proxy-limit", type=int, default=4)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--backoff", type=float, default=0.5)
+    parser.add_argument("--max-queue", type=int, default=8)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,69 @@
+"""Exercise the local mirror against the stand-in MCP server
+
+Runs a full sync, an incremental sync after a few simulated edits, and
+compares search latency from the mirror with a search over MCP.
+
+Usage:
+    python benchmarks/mirror_sync.py [--pages-per-space 200] [--latency 0.02]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from confluence.tools.mcp_client import ConfluenceMCPClient  # noqa: E402
+from confluence.tools.mirror import ConfluenceMirror, MirrorSync  # noqa: E402
+from mock_mcp_server import build_corpus, create_app, serve_in_background, touch_page  # noqa: E402
+
+QUERIES = ["vpn access request", "deployment pipeline", "incident response escalate", "sso login"]
+
+
+async def main(pages_per_space: int, latency: float):
+    corpus = build_corpus(pages_per_space=pages_per_space)
+    app = create_app(corpus, latency=latency)
+
+    async with serve_in_background(app) as url:
+        client = ConfluenceMCPClient(url)
+        client.cache = None
+        mirror = ConfluenceMirror(":memory:")
+        sync = MirrorSync(mirror, client=client)
+
+        full = await sync.sync_all()
+        print(f"Full sync:        {sum(full['fetched'].values())} pages "
+              f"in {full['duration_s']:.2f}s  calls={dict(app.state.confluence.calls)}")
+
+        for page_id in ("eng-1", "hr-2", "sec-3"):
+            touch_page(corpus, page_id, content=corpus[page_id]["content"] + "\n\nUpdated text.")
+        app.state.confluence.calls.clear()
+
+        incremental = await sync.sync_all()
+        print(f"Incremental sync: {sum(incremental['fetched'].values())} pages "
+              f"in {incremental['duration_s']:.2f}s  calls={dict(app.state.confluence.calls)}")
+
+        for query in QUERIES:
+            started = time.perf_counter()
+            local = mirror.search(query, max_results=5)
+            local_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            await client.search_content(query, max_results=5)
+            remote_ms = (time.perf_counter() - started) * 1000
+
+            hits = len(local["results"]) if local else 0
+            print(f"  {query!r:32} mirror {local_ms:7.2f} ms ({hits} hits)   mcp {remote_ms:7.2f} ms")
+
+        print(f"Mirror stats: {mirror.stats()}")
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages-per-space", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02,
+                        help="Simulated MCP latency per tool call (seconds)")
+    args = parser.parse_args()
+    asyncio.run(main(args.pages_per_space, args.latency))
@@ -0,0 +1,354 @@
+"""Local stand-in for the Confluence MCP server
+
+Serves a synthetic Confluence corpus over the same JSON-RPC endpoint
+(``POST /mcp/v1/call``) that ConfluenceMCPClient talks to, including
+JSON-RPC batch arrays. The same tools are also exposed over the MCP SSE
+transport (``GET /`` event stream, ``POST /messages``) used by McpToolset.
+Used by the benchmarks in this directory and handy for running the agent
+without a real Confluence.
+
+Usage:
+    python benchmarks/mock_mcp_server.py            # serves on :3000
+    CONFLUENCE_MCP_SERVER_URL=http://localhost:3000 python server.py
+"""
+
+import asyncio
+import contextlib
+import json
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+SPACES = {
+    "ENG": "Engineering",
+    "PROD": "Product",
+    "HR": "Human Resources",
+    "SEC": "Security",
+    "OPS": "Operations",
+}
+
+_TOPICS = [
+    "vpn access", "onboarding checklist", "deployment pipeline", "code review",
+    "incident response", "api authentication", "expense policy", "vacation policy",
+    "release process", "database migrations", "oncall rotation", "laptop setup",
+    "python coding standards", "kubernetes cluster", "feature flags", "sso login",
+]
+
+_STRING = {"type": "string"}
+_INTEGER = {"type": "integer"}
+
+# MCP tool schemas advertised over the SSE transport
+TOOL_SCHEMAS = [
+    {"name": "confluence_search", "description": "Search Confluence pages",
+     "inputSchema": {"type": "object", "required": ["query"],
+                     "properties": {"query": _STRING, "spaceKey": _STRING, "limit": _INTEGER}}},
+    {"name": "confluence_get_page", "description": "Get a page by id",
+     "inputSchema": {"type": "object", "required": ["pageId"],
+                     "properties": {"pageId": _STRING}}},
+    {"name": "confluence_get_page_by_title", "description": "Get a page by title",
+     "inputSchema": {"type": "object", "required": ["title"],
+                     "properties": {"title": _STRING, "spaceKey": _STRING}}},
+    {"name": "confluence_list_recent_pages", "description": "List recently updated pages",
+     "inputSchema": {"type": "object",
+                     "properties": {"spaceKey": _STRING, "limit": _INTEGER, "start": _INTEGER}}},
+    {"name": "confluence_list_spaces", "description": "List Confluence spaces",
+     "inputSchema": {"type": "object", "properties": {}}},
+]
+
+_WORDS = (
+    "request approval manager team service access policy process step guide "
+    "configure install review deploy monitor ticket account password token "
+    "network security production staging document owner support escalate"
+).split()
+
+
+def build_corpus(
+    pages_per_space: int = 200,
+    seed: int = 7
+) -> Dict[str, Dict[str, Any]]:
+    """Generate a deterministic synthetic corpus.
+
+    Args:
+        pages_per_space: Pages generated in each space
+        seed: Random seed
+
+    Returns:
+        Mapping of page id to page dictionary (get_page format)
+    """
+    rng = random.Random(seed)
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    corpus: Dict[str, Dict[str, Any]] = {}
+
+    for space in SPACES:
+        for i in range(pages_per_space):
+            topic = rng.choice(_TOPICS)
+            page_id = f"{space.lower()}-{i}"
+            title = f"{topic.title()} ({space} {i})"
+            sections = []
+            for heading in ("Overview", "Prerequisites", "Steps", "Troubleshooting"):
+                body = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(40, 120)))
+                sections.append(f"## {heading}\n\nThis section covers {topic}. {body}.")
+            corpus[page_id] = {
+                "id": page_id,
+                "title": title,
+                "url": f"https://confluence.company.com/display/{space}/{page_id}",
+                "content": f"# {title}\n\n" + "\n\n".join(sections),
+                "space": space,
+                "lastModified": (base + timedelta(minutes=rng.randint(0, 500_000))).isoformat(),
+                "author": rng.choice(["Alice Kim", "Bob Lee", "Documentation Team"]),
+                "labels": topic.split(),
+            }
+
+    return corpus
+
+
+def touch_page(corpus: Dict[str, Dict[str, Any]], page_id: str, content: Optional[str] = None):
+    """Simulate an edit: bump lastModified (and optionally replace content)."""
+    page = corpus[page_id]
+    page["lastModified"] = datetime.now(timezone.utc).isoformat()
+    if content is not None:
+        page["content"] = content
+
+
+def _summary(page: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: page[key] for key in ("id", "title", "url", "space", "lastModified", "author")}
+
+
+class MockConfluence:
+    """Tool implementations over an in-memory corpus."""
+
+    def __init__(
+        self,
+        corpus: Dict[str, Dict[str, Any]],
+        latency: float = 0.0,
+        tail_latency: float = 0.0,
+        tail_probability: float = 0.0
+    ):
+        self.corpus = corpus
+        self.latency = latency
+        self.tail_latency = tail_latency
+        self.tail_probability = tail_probability
+        self._rng = random.Random(11)
+        self.calls: Dict[str, int] = {}
+
+    async def call(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls[name] = self.calls.get(name, 0) + 1
+        delay = self.latency
+        if self.tail_probability and self._rng.random() < self.tail_probability:
+            delay = self.tail_latency  # a slow backend response
+        if delay:
+            await asyncio.sleep(delay)
+
+        if name == "confluence_list_spaces":
+            return {"spaces": [{"key": key, "name": label} for key, label in SPACES.items()]}
+
+        if name == "confluence_get_page":
+            page = self.corpus.get(arguments.get("pageId"))
+            if page is None:
+                raise KeyError(f"Page {arguments.get('pageId')} not found")
+            return dict(page)
+
+        if name == "confluence_get_page_by_title":
+            title = arguments.get("title", "").lower()
+            for page in self._pages(arguments.get("spaceKey")):
+                if page["title"].lower() == title:
+                    return dict(page)
+            raise KeyError(f"Page '{arguments.get('title')}' not found")
+
+        if name == "confluence_list_recent_pages":
+            pages = sorted(
+                self._pages(arguments.get("spaceKey")),
+                key=lambda page: page["lastModified"],
+                reverse=True
+            )
+            start = int(arguments.get("start", 0))
+            limit = int(arguments.get("limit", 10))
+            return {
+                "pages": [_summary(page) for page in pages[start:start + limit]],
+                "space_filter": arguments.get("spaceKey"),
+            }
+
+        if name == "confluence_search":
+            terms = arguments.get("query", "").lower().split()
+            scored = []
+            for page in self._pages(arguments.get("spaceKey")):
+                text = f"{page['title']} {page['content']}".lower()
+                score = sum(text.count(term) for term in terms)
+                if score:
+                    scored.append((score, page))
+            scored.sort(key=lambda item: item[0], reverse=True)
+            limit = int(arguments.get("limit", 5))
+            return {
+                "results": [
+                    {**_summary(page), "excerpt": page["content"][:200], "score": score}
+                    for score, page in scored[:limit]
+                ],
+                "total": len(scored),
+                "query": arguments.get("query"),
+            }
+
+        raise KeyError(f"Unknown tool {name}")
+
+    def _pages(self, space_key: Optional[str]) -> List[Dict[str, Any]]:
+        return [
+            page for page in self.corpus.values()
+            if not space_key or page["space"] == space_key
+        ]
+
+
+def create_app(
+    corpus: Optional[Dict[str, Dict[str, Any]]] = None,
+    latency: float = 0.0,
+    batch: bool = True,
+    handshake_latency: float = 0.0,
+    tail_latency: float = 0.0,
+    tail_probability: float = 0.0
+) -> Starlette:
+    """Build the stand-in MCP server app.
+
+    Args:
+        corpus: Pages to serve (default: build_corpus())
+        latency: Artificial delay per tool call in seconds
+        batch: Whether JSON-RPC batch arrays are accepted
+        handshake_latency: Artificial delay of the MCP initialize and
+                           tools/list responses in seconds (slow server)
+        tail_latency: Delay of the occasional slow tool call in seconds
+        tail_probability: Fraction of tool calls that take ``tail_latency``
+
+    Returns:
+        Starlette app; the MockConfluence instance is at ``app.state.confluence``
+    """
+    confluence = MockConfluence(
+        corpus if corpus is not None else build_corpus(),
+        latency,
+        tail_latency=tail_latency,
+        tail_probability=tail_probability
+    )
+
+    async def handle(payload: Dict[str, Any]) -> Dict[str, Any]:
+        params = payload.get("params") or {}
+        try:
+            result = await confluence.call(params.get("name"), params.get("arguments") or {})
+        except KeyError as e:
+            return {"jsonrpc": "2.0", "id": payload.get("id"),
+                    "error": {"code": -32602, "message": str(e)}}
+        return {"jsonrpc": "2.0", "id": payload.get("id"), "result": result}
+
+    async def call(request: Request) -> JSONResponse:
+        body = await request.json()
+        if isinstance(body, list):
+            if not batch:
+                return JSONResponse({"jsonrpc": "2.0", "id": None,
+                                     "error": {"code": -32600, "message": "Batch not supported"}})
+            return JSONResponse(list(await asyncio.gather(*(handle(item) for item in body))))
+        return JSONResponse(await handle(body))
+
+    async def health(request: Request) -> JSONResponse:
+        return JSONResponse({"status": "ok", "pages": len(confluence.corpus)})
+
+    # MCP over SSE: the client opens the event stream, learns the message
+    # endpoint from the first event, then posts JSON-RPC messages whose
+    # responses arrive on the stream
+    sessions: Dict[str, "asyncio.Queue[Optional[Dict[str, Any]]]"] = {}
+
+    async def mcp_message(message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        method = message.get("method")
+        params = message.get("params") or {}
+        if "id" not in message:
+            return None  # notification
+        if method in ("initialize", "tools/list") and handshake_latency:
+            await asyncio.sleep(handshake_latency)
+        if method == "initialize":
+            result = {
+                "protocolVersion": params.get("protocolVersion", "2024-11-05"),
+                "capabilities": {"tools": {"listChanged": False}},
+                "serverInfo": {"name": "confluence-stand-in", "version": "1.0"},
+            }
+        elif method == "tools/list":
+            result = {"tools": TOOL_SCHEMAS}
+        elif method == "tools/call":
+            try:
+                payload = await confluence.call(params.get("name"), params.get("arguments") or {})
+                result = {"content": [{"type": "text", "text": json.dumps(payload)}], "isError": False}
+            except KeyError as e:
+                result = {"content": [{"type": "text", "text": str(e)}], "isError": True}
+        elif method == "ping":
+            result = {}
+        else:
+            return {"jsonrpc": "2.0", "id": message["id"],
+                    "error": {"code": -32601, "message": f"Method {method} not found"}}
+        return {"jsonrpc": "2.0", "id": message["id"], "result": result}
+
+    async def sse(request: Request) -> StreamingResponse:
+        session_id = uuid.uuid4().hex
+        queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue()
+        sessions[session_id] = queue
+
+        async def events():
+            try:
+                yield f"event: endpoint\ndata: /messages?session_id={session_id}\n\n"
+                while True:
+                    message = await queue.get()
+                    if message is None:
+                        break
+                    yield f"event: message\ndata: {json.dumps(message)}\n\n"
+            finally:
+                sessions.pop(session_id, None)
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    async def messages(request: Request) -> Response:
+        queue = sessions.get(request.query_params.get("session_id", ""))
+        if queue is None:
+            return Response("Unknown session", status_code=404)
+        message = await request.json()
+
+        async def respond():
+            reply = await mcp_message(message)
+            if reply is not None:
+                await queue.put(reply)
+
+        asyncio.get_running_loop().create_task(respond())
+        return Response("Accepted", status_code=202)
+
+    app = Starlette(routes=[
+        Route("/mcp/v1/call", call, methods=["POST"]),
+        Route("/health", health),
+        Route("/", sse),
+        Route("/messages", messages, methods=["POST"]),
+    ])
+    app.state.confluence = confluence
+    app.state.mcp_sessions = sessions
+    return app
+
+
+@contextlib.asynccontextmanager
+async def serve_in_background(app: Starlette, port: int = 3999):
+    """Run an app with uvicorn on the current loop for the duration of the block.
+
+    Yields:
+        Base URL of the running server
+    """
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    task = asyncio.get_running_loop().create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        # Close open MCP event streams so uvicorn can shut down
+        for queue in getattr(app.state, "mcp_sessions", {}).values():
+            queue.put_nowait(None)
+        server.should_exit = True
+        await task
+
+
+if __name__ == "__main__":
+    uvicorn.run(create_app(), host="0.0.0.0", port=3000)
@@ -0,0 +1,126 @@
+"""Prompt tokens per question with and without the session document store
+
+Replays one question's agent transcript: document_searcher runs a search
+and fetches the top pages (MCP CallToolResult dumps built from the stand-in
+corpus), then writes its findings; root_agent reads the transcript and
+hands over to answer_synthesizer. Every LLM call's prompt contains the
+whole transcript so far, as ADK builds it.
+
+- inline: page bodies stay in the tool responses and the searcher quotes
+  the passages it found
+- handles: responses pass through document_store_tool_callback and the
+  searcher cites ``[[doc:...]]`` handles, which resolve_documents_callback
+  expands in the synthesizer's prompt only
+
+The synthesizer must see the same passages in both modes; the benchmark
+checks that before reporting.
+
+Usage:
+    python benchmarks/prompt_tokens.py [--pages 3] [--page-scale 6]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from google.adk.models import LlmRequest  # noqa: E402
+from google.genai import types  # noqa: E402
+
+from confluence.document_store import (  # noqa: E402
+    document_store,
+    document_store_tool_callback,
+    resolve_documents_callback,
+)
+from confluence.tools.chunking import estimate_tokens, select_sections, split_sections  # noqa: E402
+from mock_mcp_server import build_corpus  # noqa: E402
+
+QUESTION = "How do I set up the deployment pipeline and what are the prerequisites?"
+
+
+def scale_page(page, factor):
+    """Repeat a page's sections under new headings to reach realistic sizes."""
+    head, _, body = page["content"].partition("\n\n")
+    parts = [head] + [body.replace("## ", f"## Part {i + 1} ") for i in range(factor)]
+    return {**page, "content": "\n\n".join(parts)}
+
+
+def mcp_result(payload):
+    return {"content": [{"type": "text", "text": json.dumps(payload)}], "isError": False}
+
+
+def transcript_tokens(transcript):
+    return sum(estimate_tokens(text) for text in transcript)
+
+
+def replay(pages, use_handles):
+    context = SimpleNamespace(session=SimpleNamespace(id=f"bench-{use_handles}"), invocation_id="turn-1")
+    transcript = [QUESTION, "query_analyzer: keywords deployment pipeline prerequisites"]
+    prompts = {}
+
+    search = mcp_result({"results": [
+        {key: page[key] for key in ("id", "title", "url", "lastModified")} | {"excerpt": page["content"][:200]}
+        for page in pages
+    ], "total": len(pages)})
+    responses = [search] + [mcp_result(page) for page in pages]
+
+    # document_searcher: one LLM call per tool round trip
+    searcher_calls = 0
+    for response in responses:
+        if use_handles:
+            response = document_store_tool_callback(None, {}, context, response) or response
+        transcript.append(json.dumps(response))
+        searcher_calls += transcript_tokens(transcript)
+    prompts["document_searcher"] = searcher_calls
+
+    findings = []
+    for page in pages:
+        chosen = select_sections(split_sections(page["content"]), QUESTION, token_budget=400)
+        if use_handles:
+            findings.append(f"- {page['title']}: [[doc:{page['id']}#{','.join(s.id for s in chosen)}]]")
+        else:
+            findings.append(f"- {page['title']} ({page['url']}):\n" + "\n\n".join(s.text for s in chosen))
+    transcript.append("document_searcher findings:\n" + "\n".join(findings))
+
+    prompts["root_agent"] = transcript_tokens(transcript)
+
+    request = LlmRequest(contents=[types.Content(role="user", parts=[types.Part(text=text)]) for text in transcript])
+    if use_handles:
+        resolve_documents_callback(context, request)
+    synthesizer_prompt = [part.text for content in request.contents for part in content.parts]
+    prompts["answer_synthesizer"] = transcript_tokens(synthesizer_prompt)
+    return prompts, "\n".join(synthesizer_prompt)
+
+
+def main(page_count, page_scale):
+    corpus = build_corpus(pages_per_space=20)
+    pages = [scale_page(page, page_scale) for page in list(corpus.values())[:page_count]]
+    page_tokens = sum(estimate_tokens(page["content"]) for page in pages)
+    print(f"{page_count} pages fetched, {page_tokens} tokens of page text\n")
+
+    inline, inline_prompt = replay(pages, use_handles=False)
+    handles, handles_prompt = replay(pages, use_handles=True)
+
+    # The synthesizer must get every passage the inline searcher quoted
+    for page in pages:
+        for section in select_sections(split_sections(page["content"]), QUESTION, token_budget=400):
+            assert section.text in inline_prompt and section.text in handles_prompt, section.id
+
+    print(f"{'LLM call':20} {'inline':>9} {'handles':>9} {'saved':>7}")
+    for name in inline:
+        saved = 1 - handles[name] / inline[name]
+        print(f"{name:20} {inline[name]:9d} {handles[name]:9d} {saved:7.0%}")
+    total_inline, total_handles = sum(inline.values()), sum(handles.values())
+    print(f"{'total':20} {total_inline:9d} {total_handles:9d} {1 - total_handles / total_inline:7.0%}")
+    print(f"\ndocument_store.stats(): {document_store.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--page-scale", type=int, default=6)
+    args = parser.parse_args()
+    main(args.pages, args.page_scale)
@@ -0,0 +1,101 @@
+"""Cold-start time of server.py with and without the MCP tool-schema cache
+
+Starts the stand-in MCP server (with an artificially slow MCP handshake),
+then launches fresh Python processes that import server.py, run its
+lifespan startup hooks and list the agent's MCP tools, as the first
+request does. Three configurations are measured:
+
+- no cache:   CONFLUENCE_MCP_TOOL_CACHE_ENABLED=false (tools listed over SSE)
+- cold cache: cache enabled, empty cache file (first deployment)
+- warm cache: cache enabled, cache file written by a previous run
+
+Usage:
+    python benchmarks/startup_time.py [--runs 3] [--handshake-latency 0.5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from mock_mcp_server import create_app, serve_in_background  # noqa: E402
+
+# Runs in the child process, from the project root
+CHILD = """
+import asyncio, json, time
+started = time.perf_counter()
+import server
+imported = time.perf_counter()
+
+async def main():
+    async with server.lifespan(server.app):
+        ready = time.perf_counter()
+        tools = await server.confluence_mcp_toolset.get_tools()
+        listed = time.perf_counter()
+        print(json.dumps({
+            "import": imported - started,
+            "startup": ready - imported,
+            "first_get_tools": listed - ready,
+            "time_to_tools": listed - started,
+            "tools": len(tools),
+        }))
+
+asyncio.run(main())
+"""
+
+
+async def run_child(env):
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-c", CHILD,
+        cwd=str(ROOT), env=env,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await process.communicate()
+    lines = [line for line in stdout.decode().splitlines() if line.startswith("{")]
+    if process.returncode != 0 or not lines:
+        raise RuntimeError(f"server startup failed:\n{stderr.decode()[-2000:]}")
+    return json.loads(lines[-1])
+
+
+async def main(runs: int, handshake_latency: float):
+    app = create_app(handshake_latency=handshake_latency)
+    cache_dir = tempfile.mkdtemp(prefix="mcp-tool-cache-")
+
+    async with serve_in_background(app) as url:
+        base_env = {**os.environ, "CONFLUENCE_MCP_SERVER_URL": url}
+        results = {"no cache": [], "cold cache": [], "warm cache": []}
+
+        for run in range(runs):
+            cache_path = os.path.join(cache_dir, f"tools-{run}.json")
+            cached_env = {**base_env, "CONFLUENCE_MCP_TOOL_CACHE_ENABLED": "true",
+                          "CONFLUENCE_MCP_TOOL_CACHE_PATH": cache_path}
+            results["no cache"].append(await run_child(
+                {**base_env, "CONFLUENCE_MCP_TOOL_CACHE_ENABLED": "false"}
+            ))
+            results["cold cache"].append(await run_child(cached_env))
+            results["warm cache"].append(await run_child(cached_env))
+
+    print(f"MCP handshake latency: {handshake_latency * 1000:.0f} ms per initialize/tools/list; "
+          f"median of {runs} runs\n")
+    print(f"{'configuration':14} {'import':>9} {'startup':>9} {'get_tools':>10} {'to tools':>9} {'tools':>6}")
+    for name, samples in results.items():
+        median = {key: statistics.median(sample[key] for sample in samples)
+                  for key in ("import", "startup", "first_get_tools", "time_to_tools")}
+        print(f"{name:14} {median['import'] * 1000:7.0f}ms {median['startup'] * 1000:7.0f}ms "
+              f"{median['first_get_tools'] * 1000:8.0f}ms {median['time_to_tools'] * 1000:7.0f}ms "
+              f"{samples[-1]['tools']:6d}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--handshake-latency", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(main(args.runs, args.handshake_latency))
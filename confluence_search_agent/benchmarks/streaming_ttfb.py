@@ -0,0 +1,153 @@
+"""Time to first answer token over A2A, with and without streaming
+
+Serves the real agent tree (``build_root_agent``) with ``to_a2a`` against
+the stand-in MCP server and sends ``SendStreamingMessage`` requests. The
+scripted model from ``workflow_calls.py`` waits ``--llm-latency`` before
+its first token and ``--token-delay`` between tokens, and streams word by
+word when ADK asks for a stream.
+
+For each executor the client records when the first event arrives, when
+the first progress update arrives, when the first answer text arrives and
+when the task completes. A second pass reads the SSE stream slowly
+(``--slow-client`` seconds per event) to show deltas being coalesced
+instead of stalling the run.
+
+Usage:
+    python benchmarks/streaming_ttfb.py [--llm-latency 0.3] [--token-delay 0.03]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import uuid
+import warnings
+from pathlib import Path
+
+os.environ.setdefault("ANSWER_CACHE_ENABLED", "false")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+warnings.filterwarnings("ignore")
+
+import httpx  # noqa: E402
+from google.adk.a2a.utils.agent_to_a2a import to_a2a  # noqa: E402
+from google.adk.models import LlmResponse  # noqa: E402
+from google.adk.tools.mcp_tool import McpToolset  # noqa: E402
+from google.adk.tools.mcp_tool.mcp_session_manager import SseConnectionParams  # noqa: E402
+from google.genai import types  # noqa: E402
+
+from confluence.agent import build_root_agent  # noqa: E402
+from confluence.streaming import STREAM_METADATA_KEY, StreamingA2aAgentExecutor, stream_stats  # noqa: E402
+from mock_mcp_server import create_app, serve_in_background  # noqa: E402
+from workflow_calls import ScriptedLlm  # noqa: E402
+
+logging.getLogger("google_adk").setLevel(logging.ERROR)
+
+QUESTIONS = [
+    "How do I request VPN access?",
+    "What is the deployment pipeline process?",
+    "Where is the incident response runbook?",
+]
+
+
+class StreamingScriptedLlm(ScriptedLlm):
+    """ScriptedLlm that emits text word by word."""
+
+    token_delay: float = 0.03
+
+    async def generate_content_async(self, llm_request, stream=False):
+        async for response in super().generate_content_async(llm_request, stream):
+            parts = response.content.parts
+            words = parts[0].text.split(" ") if len(parts) == 1 and parts[0].text else []
+            for word in words:
+                await asyncio.sleep(self.token_delay)
+                if stream:
+                    yield LlmResponse(
+                        content=types.Content(role="model", parts=[types.Part(text=word + " ")]), partial=True
+                    )
+            yield response
+
+
+async def ask(url, question, slow_client):
+    body = {
+        "jsonrpc": "2.0", "id": 1, "method": "SendStreamingMessage",
+        "params": {"message": {
+            "messageId": str(uuid.uuid4()), "role": "ROLE_USER", "parts": [{"text": question}]
+        }},
+    }
+    marks = {}
+    events = 0
+    started = time.perf_counter()
+    async with httpx.AsyncClient(timeout=60) as client:
+        async with client.stream("POST", url + "/", json=body, headers={"A2A-Version": "1.0"}) as response:
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                events += 1
+                now = time.perf_counter() - started
+                marks.setdefault("first event", now)
+                result = json.loads(line[5:])["result"]
+                update = result.get("statusUpdate") or {}
+                message = update.get("status", {}).get("message")
+                kind = (update.get("metadata") or {}).get(STREAM_METADATA_KEY)
+                if kind == "progress":
+                    marks.setdefault("first progress", now)
+                author = (update.get("metadata") or {}).get("adk_author")
+                answer_text = message and author == "answer_synthesizer" and kind != "progress"
+                if answer_text or "artifactUpdate" in result:
+                    marks.setdefault("first answer text", now)
+                if slow_client:
+                    await asyncio.sleep(slow_client)
+    marks["completed"] = time.perf_counter() - started
+    return marks, events
+
+
+async def run(executor, mcp_url, args, port, slow_client=0.0):
+    model = StreamingScriptedLlm(model="scripted", latency=args.llm_latency, token_delay=args.token_delay)
+    toolset = McpToolset(connection_params=SseConnectionParams(url=mcp_url))
+    factory = (lambda runner: StreamingA2aAgentExecutor(runner=runner)) if executor == "streaming" else None
+    app = to_a2a(build_root_agent("pipeline", model=model, toolset=toolset), port=port, agent_executor_factory=factory)
+    rows = []
+    try:
+        async with serve_in_background(app, port=port) as url:
+            # The first question also pays for the MCP session handshake
+            for question in [QUESTIONS[0]] + QUESTIONS:
+                rows.append(await ask(url, question, slow_client))
+    finally:
+        await toolset.close()
+    return rows[1:]
+
+
+async def main(args):
+    columns = ["first event", "first progress", "first answer text", "completed"]
+    async with serve_in_background(create_app()) as mcp_url:
+        print(f"Scripted LLM: {args.llm_latency * 1000:.0f} ms to first token, "
+              f"{args.token_delay * 1000:.0f} ms per token; pipeline workflow\n")
+        print(f"{'executor':10} " + " ".join(f"{c:>17}" for c in columns) + f" {'SSE events':>10}")
+        for port, executor in enumerate(("default", "streaming"), start=3990):
+            rows = await run(executor, mcp_url, args, port)
+            cells = []
+            for column in columns:
+                seen = [marks[column] for marks, _ in rows if column in marks]
+                cells.append(f"{statistics.mean(seen):16.2f}s" if seen else f"{'-':>17}")
+            events = statistics.mean(count for _, count in rows)
+            print(f"{executor:10} " + " ".join(cells) + f" {events:10.0f}")
+
+        stats_before = stream_stats.stats()
+        rows = await run("streaming", mcp_url, args, 3992, slow_client=args.slow_client)
+        stats = {key: value - stats_before.get(key, 0) for key, value in stream_stats.stats().items()}
+        print(f"\nSlow client ({args.slow_client * 1000:.0f} ms per SSE event): "
+              f"{statistics.mean(count for _, count in rows):.0f} events, "
+              f"completed in {statistics.mean(marks['completed'] for marks, _ in rows):.2f}s")
+        print(f"stream_stats (slow client pass): {stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--token-delay", type=float, default=0.03)
+    parser.add_argument("--slow-client", type=float, default=0.1)
+    asyncio.run(main(parser.parse_args()))
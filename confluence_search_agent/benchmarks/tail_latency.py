@@ -0,0 +1,106 @@
+"""Tail latency of MCP tool calls with and without the resilience layer
+
+The stand-in server answers most calls quickly but makes a small fraction
+very slow, like an overloaded Confluence backend. The same stream of
+concurrent searches and page fetches is sent with hedging/retries off and
+on, and p50/p95/p99/max latencies are compared. A final phase stops
+answering altogether to show the circuit breaker serving stale cache
+entries.
+
+Usage:
+    python benchmarks/tail_latency.py [--calls 400] [--tail-probability 0.03]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from confluence.tools.cache import ToolResultCache  # noqa: E402
+from confluence.tools.mcp_client import ConfluenceMCPClient  # noqa: E402
+from confluence.tools.resilience import ResiliencePolicy, ResilientCaller  # noqa: E402
+from mock_mcp_server import build_corpus, create_app, serve_in_background  # noqa: E402
+
+QUERIES = ["vpn access", "deployment pipeline", "incident response", "sso login", "laptop setup"]
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+async def run_load(client: ConfluenceMCPClient, calls: int, concurrency: int = 8):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            if i % 2:
+                await client.call_tool("confluence_search", {"query": QUERIES[i % len(QUERIES)], "limit": 5})
+            else:
+                await client.call_tool("confluence_get_page", {"pageId": f"eng-{i % 50}"})
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    return latencies
+
+
+def report(label, latencies):
+    print(f"{label:24} p50={statistics.median(latencies) * 1000:7.1f}ms "
+          f"p95={percentile(latencies, 95) * 1000:7.1f}ms "
+          f"p99={percentile(latencies, 99) * 1000:7.1f}ms "
+          f"max={max(latencies) * 1000:7.1f}ms")
+
+
+async def main(calls: int, latency: float, tail_latency: float, tail_probability: float):
+    app = create_app(build_corpus(pages_per_space=50), latency=latency,
+                     tail_latency=tail_latency, tail_probability=tail_probability)
+    print(f"Server: {latency * 1000:.0f} ms typical, {tail_probability:.0%} of calls take "
+          f"{tail_latency * 1000:.0f} ms; {calls} calls, 8 concurrent\n")
+
+    async with serve_in_background(app) as url:
+        plain = ConfluenceMCPClient(url)
+        plain.coalesce = False
+        plain.resilience = None
+        report("no hedging", await run_load(plain, calls))
+
+        hedged = ConfluenceMCPClient(url)
+        hedged.coalesce = False
+        hedged.resilience = ResilientCaller(ResiliencePolicy(hedge_min_samples=20))
+        await run_load(hedged, 40)  # collect latency samples first
+        report("hedged (p95 trigger)", await run_load(hedged, calls))
+        stats = hedged.resilience_stats()
+        print(f"{'':24} hedges={stats['hedges']} wins={stats['hedge_wins']} "
+              f"retry_tokens={stats['retry_tokens']}\n")
+
+        # Outage: every call times out; the breaker opens and cached pages are served stale
+        cached = ConfluenceMCPClient(url, cache=ToolResultCache(ttl=0.01))
+        cached.resilience = ResilientCaller(ResiliencePolicy(
+            tool_timeouts={"confluence_get_page": 0.2}, breaker_failures=3, max_retries=0
+        ))
+        for i in range(5):
+            await cached.get_page(f"eng-{i}")
+        await asyncio.sleep(0.05)
+        app.state.confluence.latency = 5.0
+        started = time.perf_counter()
+        outcomes = [await cached.get_page(f"eng-{i % 5}") for i in range(20)]
+        elapsed = time.perf_counter() - started
+        tools = cached.resilience_stats()["tools"]["confluence_get_page"]
+        print(f"Outage: 20 get_page calls in {elapsed:.2f}s, "
+              f"{sum(1 for page in outcomes if page.get('stale'))} served stale, "
+              f"circuit={tools['circuit']}, fast failures={cached.resilience_stats()['fast_failures']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--tail-latency", type=float, default=1.0)
+    parser.add_argument("--tail-probability", type=float, default=0.03)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls, args.latency, args.tail_latency, args.tail_probability))
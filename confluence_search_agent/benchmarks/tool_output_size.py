@@ -0,0 +1,88 @@
+"""Bytes and tokens per tool response for each output encoding
+
+Encodes representative responses of search_confluence, get_page_content,
+list_recent_pages and get_page_by_title (built from the stand-in corpus)
+with every encoder mode, with and without a typical ``fields`` projection.
+
+Tokens are counted with tiktoken (cl100k_base) when installed, otherwise
+with the approximate counter from chunking.py.
+
+Usage:
+    python benchmarks/tool_output_size.py
+"""
+
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from confluence.tools.chunking import estimate_tokens  # noqa: E402
+from confluence.tools.encoding import ToolOutputEncoder, orjson  # noqa: E402
+from mock_mcp_server import build_corpus  # noqa: E402
+
+try:
+    import tiktoken
+
+    _encoding = tiktoken.get_encoding("cl100k_base")
+
+    def count_tokens(text: str) -> int:
+        return len(_encoding.encode(text))
+
+    TOKENIZER = "tiktoken cl100k_base"
+except Exception:  # not installed, or the BPE file cannot be downloaded
+    count_tokens = estimate_tokens
+    TOKENIZER = "approximate (chunking.estimate_tokens)"
+
+
+def sample_responses():
+    corpus = build_corpus(pages_per_space=20)
+    pages = list(corpus.values())
+    summary = ("id", "title", "url", "space", "lastModified", "author")
+
+    search = {
+        "results": [
+            {**{k: page[k] for k in summary}, "excerpt": page["content"][:200]}
+            for page in pages[:5]
+        ],
+        "total": 5,
+        "query": "vpn access request",
+        "space_filter": None,
+    }
+    recent = {"pages": [{k: page[k] for k in summary} for page in pages[:10]], "space_filter": None}
+
+    return [
+        ("search_confluence", search, ["title", "url", "excerpt"]),
+        ("get_page_content", pages[0], ["title", "url", "content"]),
+        ("list_recent_pages", recent, ["title", "lastModified"]),
+        ("get_page_by_title", pages[1], ["title", "url", "content"]),
+    ]
+
+
+def main():
+    encoders = {mode: ToolOutputEncoder(mode) for mode in ToolOutputEncoder.MODES}
+    print(f"Tokenizer: {TOKENIZER}; JSON backend: {'orjson' if orjson else 'json'}\n")
+    print(f"{'tool':20} {'encoding':18} {'bytes':>7} {'tokens':>7} {'vs pretty':>10}")
+
+    for tool, payload, fields in sample_responses():
+        baseline = encoders["pretty"].encode(payload)
+        base_tokens = count_tokens(baseline)
+        variants = [(mode, None) for mode in encoders] + [
+            ("compact", fields), ("table", fields)
+        ]
+        for mode, projection in variants:
+            text = encoders[mode].encode(payload, projection)
+            tokens = count_tokens(text)
+            label = mode + ("+fields" if projection else "")
+            print(f"{tool:20} {label:18} {len(text.encode()):7d} {tokens:7d} "
+                  f"{tokens / base_tokens:9.0%}")
+        print()
+
+    payload = sample_responses()[0][1]
+    for mode, encoder in encoders.items():
+        seconds = timeit.timeit(lambda: encoder.encode(payload), number=2000) / 2000
+        print(f"encode search_confluence ({mode}): {seconds * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""LLM calls and wall time per question: LLM-routed vs pipeline workflow
+
+Runs the real agent trees from ``confluence.agent.build_root_agent`` with
+an ADK runner against the stand-in MCP server. The model is a scripted
+stand-in that sleeps ``--llm-latency`` per call and answers like the real
+agents would:
+
+- coordinator (llm workflow): transfers to the next stage, one call per
+  routing decision; stages hand control back with ``transfer_to_agent``
+- query_analyzer: one analysis
+- document_searcher: search, fetch the top hit, report a handle
+- answer_synthesizer: a cited answer quoting the resolved page text
+
+The fast query analyzer and the answer cache are disabled so that both
+workflows run the same stages; with the fast analyzer the pipeline also
+skips the analyzer call for confident questions.
+
+Usage:
+    python benchmarks/workflow_calls.py [--llm-latency 0.3]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("ANSWER_CACHE_ENABLED", "false")
+os.environ.setdefault("FAST_ANALYZER_ENABLED", "false")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from google.adk.models import BaseLlm, LlmResponse  # noqa: E402
+from google.adk.runners import InMemoryRunner  # noqa: E402
+from google.adk.tools.mcp_tool import McpToolset  # noqa: E402
+from google.adk.tools.mcp_tool.mcp_session_manager import SseConnectionParams  # noqa: E402
+from google.genai import types  # noqa: E402
+
+from confluence.agent import ROOT_AGENT_NAME, build_root_agent  # noqa: E402
+from mock_mcp_server import create_app, serve_in_background  # noqa: E402
+
+logging.getLogger("google_adk").setLevel(logging.ERROR)
+
+QUESTIONS = [
+    "How do I request VPN access?",
+    "What is the deployment pipeline process?",
+    "Where is the incident response runbook?",
+    "How do I set up SSO login?",
+    "thanks!",
+]
+
+STAGES = ["query_analyzer", "document_searcher", "answer_synthesizer"]
+_AGENT_RE = re.compile(r'internal name is "(\w+)"')
+_DOCUMENT_RE = re.compile(r'<document handle="doc:[^"]+" title="([^"]*)" url="([^"]*)"[^>]*>\n(.*?)</document>', re.S)
+
+
+class ScriptedLlm(BaseLlm):
+    """Deterministic stand-in model that plays every agent's part."""
+
+    latency: float = 0.3
+    calls: int = 0
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        instruction = str(llm_request.config.system_instruction or "")
+        match = _AGENT_RE.search(instruction)
+        agent = match.group(1) if match else ""
+        can_transfer = "transfer_to_agent" in llm_request.tools_dict
+        parts = getattr(self, f"_{agent}", self._coordinator)(llm_request)
+        if can_transfer and agent in STAGES[:2] and not any(part.function_call for part in parts):
+            # LLM-routed workflow: hand control back to the coordinator
+            parts.append(_transfer(ROOT_AGENT_NAME))
+        yield LlmResponse(content=types.Content(role="model", parts=parts))
+
+    def _confluence_documentation_assistant(self, llm_request):
+        question = _question(llm_request)
+        if question in ("thanks!",):
+            return [types.Part(text="You're welcome! Ask me anything about our Confluence documentation.")]
+        said = _text(llm_request)
+        for stage in STAGES:
+            if f"[{stage}]" not in said:
+                return [_transfer(stage)]
+        return [types.Part(text="Done.")]
+
+    def _coordinator(self, llm_request):
+        return [types.Part(text="You're welcome! Ask me anything about our Confluence documentation.")]
+
+    def _query_analyzer(self, llm_request):
+        question = _question(llm_request)
+        return [types.Part(text=f"- Intent: how-to\n- Keywords: {question.rstrip('?').lower()}")]
+
+    def _document_searcher(self, llm_request):
+        responses = _function_responses(llm_request)
+        if "confluence_search" not in responses:
+            query = " ".join(_question(llm_request).rstrip("?").split()[-3:])
+            return [types.Part(function_call=types.FunctionCall(
+                name="confluence_search", args={"query": query, "limit": 3}))]
+        results = _payload(responses["confluence_search"]).get("results") or []
+        if results and "confluence_get_page" not in responses:
+            return [types.Part(function_call=types.FunctionCall(
+                name="confluence_get_page", args={"pageId": results[0]["id"]}))]
+        page = _payload(responses.get("confluence_get_page", {}))
+        handle = f"[[doc:{page['id']}]]" if page.get("id") else "no relevant pages"
+        return [types.Part(text=f"Relevant page: {page.get('title', '')} {handle}")]
+
+    def _answer_synthesizer(self, llm_request):
+        match = _DOCUMENT_RE.search(_text(llm_request))
+        if not match:
+            return [types.Part(text="I could not find this information in the available Confluence documentation.")]
+        title, url, body = match.groups()
+        text = " ".join(line for line in body.splitlines() if not line.startswith("#"))
+        quote = " ".join(text.split()[:12])
+        return [types.Part(text=f'## Answer\n"{quote}"\n- Source: [{title}]({url})')]
+
+
+def _transfer(agent_name):
+    return types.Part(function_call=types.FunctionCall(name="transfer_to_agent", args={"agent_name": agent_name}))
+
+
+def _text(llm_request):
+    return "\n".join(part.text for content in llm_request.contents for part in content.parts or [] if part.text)
+
+
+def _question(llm_request):
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            if content.role == "user" and part.text and not part.text.startswith("For context"):
+                return part.text.strip()
+    return ""
+
+
+def _function_responses(llm_request):
+    responses = {}
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            if part.function_response:
+                responses[part.function_response.name] = part.function_response.response
+    return responses
+
+
+def _payload(response):
+    for part in response.get("content") or []:
+        try:
+            return json.loads(part.get("text") or "")
+        except ValueError:
+            continue
+    return {}
+
+
+async def run_workflow(workflow, url, latency):
+    model = ScriptedLlm(model="scripted", latency=latency)
+    toolset = McpToolset(connection_params=SseConnectionParams(url=url))
+    runner = InMemoryRunner(agent=build_root_agent(workflow, model=model, toolset=toolset), app_name="bench")
+    rows = []
+    try:
+        # The first question also pays for the MCP session handshake
+        for question in [QUESTIONS[0]] + QUESTIONS:
+            session = await runner.session_service.create_session(app_name="bench", user_id="bench")
+            before = model.calls
+            started = time.perf_counter()
+            answer = ""
+            async for event in runner.run_async(
+                user_id="bench", session_id=session.id,
+                new_message=types.Content(role="user", parts=[types.Part(text=question)])
+            ):
+                if event.content and event.content.parts and event.content.parts[0].text:
+                    answer = event.content.parts[0].text
+            rows.append((question, model.calls - before, time.perf_counter() - started, answer))
+    finally:
+        await toolset.close()
+    return rows[1:]
+
+
+async def main(latency):
+    async with serve_in_background(create_app()) as url:
+        print(f"Scripted LLM latency: {latency * 1000:.0f} ms per call\n")
+        results = {workflow: await run_workflow(workflow, url, latency) for workflow in ("llm", "pipeline")}
+
+    print(f"{'question':44} {'llm calls':>9} {'time':>7} {'pipeline calls':>14} {'time':>7}")
+    for (question, llm_calls, llm_time, _), (_, pipe_calls, pipe_time, answer) in zip(*results.values()):
+        print(f"{question:44} {llm_calls:9d} {llm_time:6.2f}s {pipe_calls:14d} {pipe_time:6.2f}s")
+    for workflow, rows in results.items():
+        print(f"\n{workflow:9} mean {statistics.mean(r[1] for r in rows):.1f} LLM calls, "
+              f"{statistics.mean(r[2] for r in rows):.2f}s per question")
+    print(f"\nLast pipeline answer: {results['pipeline'][-2][3]!r}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    args = parser.parse_args()
+    asyncio.run(main(args.llm_latency))
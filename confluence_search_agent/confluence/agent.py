@@ -6,6 +6,11 @@ This agent uses a hierarchical multi-agent structure:
 - Document Searcher: Searches Confluence via MCP tools
 - Answer Synthesizer: Creates accurate, cited responses
 
+The root is selected by AGENT_WORKFLOW: an LLM coordinator that routes with
+agent transfers ("llm"), or a fixed analyzer -> searcher -> synthesizer
+pipeline that only uses the coordinator for non-documentation turns
+("pipeline", see workflow.py).
+
 MCP Integration:
 - Uses ADK's official McpToolset with streamable-http (SSE) connection
 - Dynamically discovers tools from the MCP server at runtime
@@ -16,59 +21,193 @@ References:
 - MCP Integration: https://google.github.io/adk-docs/tools-custom/mcp-tools/
 """
 
-from google.adk.agents import LlmAgent
+from typing import Any
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.tools import FunctionTool
 
-from .config import llm_model, confluence_mcp_toolset
+from .answer_cache import (
+    answer_cache_lookup_callback,
+    answer_cache_store_callback,
+    answer_cache_tool_callback,
+)
+from .citations import citation_check_callback
+from .config import (
+    llm_model,
+    confluence_mcp_toolset,
+    AGENT_WORKFLOW,
+    ANSWER_CACHE_ENABLED,
+    DOCUMENT_STORE_ENABLED,
+    FAST_ANALYZER_ENABLED,
+)
+from .document_store import document_store_tool_callback, resolve_documents_callback
+from .fast_analyzer import fast_path_model_callback
+from .llm_cache import llm_cache_lookup_callback, llm_cache_store_callback
+from .scheduler import llm_schedule_callback
+from .tools.confluence_mcp import get_page_sections, search_across_spaces
+from .tools.prefetch import (
+    cancel_prefetch_callback,
+    prefetch_lookup_callback,
+    prefetch_tool_callback,
+)
 from .prompt import (
     root_coordinator_instruction,
+    workflow_coordinator_instruction,
     query_analyzer_instruction,
     document_searcher_instruction,
+    document_searcher_handles_instruction,
     answer_synthesizer_instruction
 )
+from .workflow import ConfluenceWorkflowAgent
 
-# Sub-Agent 1: Query Analyzer
-# Analyzes user questions and formulates search strategy
-query_analyzer = LlmAgent(
-    model=llm_model,
-    name="query_analyzer",
-    description="Analyzes user questions to extract search intent, keywords, and strategy",
-    instruction=query_analyzer_instruction,
-    tools=[]  # Pure reasoning agent, no tools needed
+ROOT_AGENT_NAME = "confluence_documentation_assistant"
+ROOT_AGENT_DESCRIPTION = (
+    "Expert assistant for searching and understanding company Confluence documentation. "
+    "Provides accurate, well-cited answers by coordinating specialized sub-agents. "
+    "Always cites sources and quotes exact text from documents."
 )
 
-# Sub-Agent 2: Document Searcher
-# Executes searches and retrieves Confluence content via MCP
-# Uses McpToolset which dynamically discovers tools from the MCP server
-document_searcher = LlmAgent(
-    model=llm_model,
-    name="document_searcher",
-    description="Searches Confluence documentation using MCP tools and retrieves relevant pages",
-    instruction=document_searcher_instruction,
-    tools=[confluence_mcp_toolset]  # ADK's official MCP integration
-)
 
-# Sub-Agent 3: Answer Synthesizer
-# Creates accurate, well-cited responses from retrieved documents
-answer_synthesizer = LlmAgent(
-    model=llm_model,
-    name="answer_synthesizer",
-    description="Synthesizes accurate answers with proper citations from Confluence documents",
-    instruction=answer_synthesizer_instruction,
-    tools=[]  # Synthesis and reasoning only
-)
+def build_root_agent(
+    workflow: str = AGENT_WORKFLOW,
+    model: Any = llm_model,
+    toolset: Any = confluence_mcp_toolset
+) -> BaseAgent:
+    """Build the agent tree for a workflow.
 
-# Root Agent: Coordinator
-# Orchestrates the multi-agent workflow
-root_agent = LlmAgent(
-    model=llm_model,
-    name="confluence_documentation_assistant",
-    description="Expert assistant for searching and understanding company Confluence documentation. "
-                "Provides accurate, well-cited answers by coordinating specialized sub-agents. "
-                "Always cites sources and quotes exact text from documents.",
-    instruction=root_coordinator_instruction,
-    sub_agents=[
-        query_analyzer,
-        document_searcher,
-        answer_synthesizer
-    ]
-)
+    Args:
+        workflow: ``llm`` (coordinator routes with transfers) or ``pipeline``
+        model: Model used by every LLM agent
+        toolset: Confluence MCP toolset for the document searcher
+
+    Returns:
+        The root agent
+    """
+    if workflow not in ("llm", "pipeline"):
+        raise ValueError(f"Unknown AGENT_WORKFLOW {workflow!r}; use 'llm' or 'pipeline'")
+    pipeline = workflow == "pipeline"
+
+    # Model calls are attributed to their session for fair scheduling
+    # (see scheduler.py), and repeated model requests are answered from the
+    # LLM response cache (see llm_cache.py; LLM_CACHE_MODE selects the agents)
+    model_callbacks = dict(
+        before_model_callback=[llm_schedule_callback, llm_cache_lookup_callback],
+        after_model_callback=llm_cache_store_callback,
+    )
+
+    # Sub-Agent 1: Query Analyzer
+    # Analyzes user questions and formulates search strategy
+    # The pipeline skips this agent for confident local analyses (see
+    # workflow.py); in the llm workflow the analyzer must still answer to hand
+    # control back, so the local analysis is only passed to it as a draft
+    # (see fast_analyzer.py)
+    analyzer_callbacks = model_callbacks
+    if FAST_ANALYZER_ENABLED and not pipeline:
+        analyzer_callbacks = dict(
+            model_callbacks,
+            before_model_callback=[llm_schedule_callback, fast_path_model_callback, llm_cache_lookup_callback],
+        )
+    query_analyzer = LlmAgent(
+        model=model,
+        name="query_analyzer",
+        description="Analyzes user questions to extract search intent, keywords, and strategy",
+        instruction=query_analyzer_instruction,
+        tools=[],  # Pure reasoning agent, no tools needed
+        **analyzer_callbacks
+    )
+
+    # Sub-Agent 2: Document Searcher
+    # Executes searches and retrieves Confluence content via MCP
+    # Uses McpToolset which dynamically discovers tools from the MCP server,
+    # plus get_page_sections, which returns only the sections of a page
+    # that match the question, and search_across_spaces, which fans one
+    # query out over several spaces concurrently
+    document_searcher = LlmAgent(
+        model=model,
+        name="document_searcher",
+        description="Searches Confluence documentation using MCP tools and retrieves relevant pages",
+        instruction=document_searcher_instruction + (
+            document_searcher_handles_instruction if DOCUMENT_STORE_ENABLED else ""
+        ),
+        tools=[
+            toolset,  # ADK's official MCP integration
+            FunctionTool(get_page_sections),
+            FunctionTool(search_across_spaces),
+        ],
+        before_tool_callback=prefetch_lookup_callback,  # prefetched pages
+        after_tool_callback=[
+            prefetch_tool_callback,  # prefetch the top search hits
+            answer_cache_tool_callback,  # page versions for the answer cache
+            document_store_tool_callback,  # page bodies -> doc: handles
+        ],
+        **model_callbacks
+    )
+
+    # Sub-Agent 3: Answer Synthesizer
+    # Creates accurate, well-cited responses from retrieved documents
+    # Document handles are expanded to the full section text only in this
+    # agent's prompt (see document_store.py); quotes in the answer are checked
+    # against the retrieved pages (see citations.py)
+    answer_synthesizer = LlmAgent(
+        model=model,
+        name="answer_synthesizer",
+        description="Synthesizes accurate answers with proper citations from Confluence documents",
+        instruction=answer_synthesizer_instruction,
+        tools=[],  # Synthesis and reasoning only
+        before_model_callback=[llm_schedule_callback, resolve_documents_callback, llm_cache_lookup_callback],
+        after_model_callback=[llm_cache_store_callback, citation_check_callback]
+    )
+
+    # Paraphrases of recently answered questions are served from the
+    # semantic answer cache (see answer_cache.py)
+    root_callbacks = dict(
+        before_agent_callback=answer_cache_lookup_callback if ANSWER_CACHE_ENABLED else None,
+        after_agent_callback=[
+            cancel_prefetch_callback,  # drop unused page prefetches
+            answer_cache_store_callback,
+        ],
+    )
+
+    if pipeline:
+        # Root Agent: fixed workflow
+        # Documentation questions run the three stages in order; the
+        # coordinator LLM only answers small talk, follow-ups and
+        # out-of-scope turns
+        coordinator = LlmAgent(
+            model=model,
+            name="coordinator",
+            description="Handles greetings, follow-ups and out-of-scope requests",
+            instruction=workflow_coordinator_instruction,
+            tools=[],
+            **model_callbacks
+        )
+        return ConfluenceWorkflowAgent(
+            name=ROOT_AGENT_NAME,
+            description=ROOT_AGENT_DESCRIPTION,
+            stages=[query_analyzer, document_searcher, answer_synthesizer],
+            coordinator=coordinator,
+            fast_path_stage=query_analyzer.name if FAST_ANALYZER_ENABLED else None,
+            **root_callbacks
+        )
+
+    # Root Agent: Coordinator
+    # Orchestrates the multi-agent workflow
+    return LlmAgent(
+        model=model,
+        name=ROOT_AGENT_NAME,
+        description=ROOT_AGENT_DESCRIPTION,
+        instruction=root_coordinator_instruction,
+        sub_agents=[
+            query_analyzer,
+            document_searcher,
+            answer_synthesizer
+        ],
+        **root_callbacks,
+        **model_callbacks
+    )
+
+
+root_agent = build_root_agent()
+query_analyzer = root_agent.find_sub_agent("query_analyzer")
+document_searcher = root_agent.find_sub_agent("document_searcher")
+answer_synthesizer = root_agent.find_sub_agent("answer_synthesizer")
@@ -0,0 +1,478 @@
+"""Semantic answer cache in front of the root agent
+
+Many questions are paraphrases of each other ("how do I request VPN
+access" / "VPN access request process"), yet each one runs the full
+analyzer -> searcher -> synthesizer chain. The answer cache stores final,
+cited answers and serves them for sufficiently similar questions:
+
+- Questions are normalized (lowercase, stopwords removed, light stemming)
+  and embedded as signed hashed feature vectors: word unigrams,
+  order-insensitive word pairs and character trigrams. Everything is
+  CPU-only NumPy; no external embedding service
+- Lookup is a cosine similarity scan (one matrix-vector product) over
+  every cached question; a hit needs ``threshold`` similarity
+- Only answers that cite at least one page seen during the turn are
+  stored. Each entry remembers the ``lastModified`` of its cited pages and
+  is dropped as soon as a different version of any of them is observed
+  (tool results, MCP client results, mirror sync listings)
+- Version changes are only noticed when a cited page is seen again, so
+  a hit on an entry not confirmed within ``revalidate_after`` seconds
+  first fetches its cited pages in one batched call; if any version
+  changed (or a page cannot be fetched) the entry is dropped and the
+  question is answered normally
+- Capacity is bounded (least recently used entries are evicted) and
+  entries expire after ``ttl`` seconds
+
+``answer_cache_lookup_callback`` (root before_agent_callback) serves hits,
+``answer_cache_store_callback`` (root after_agent_callback) stores answers
+and ``answer_cache_tool_callback`` (document_searcher after_tool_callback)
+records the pages seen during the turn.
+
+Configuration:
+- ANSWER_CACHE_ENABLED: Serve cached answers (default: true)
+- ANSWER_CACHE_THRESHOLD: Cosine similarity needed for a hit (default: 0.85)
+- ANSWER_CACHE_MAX_ENTRIES: Capacity (default: 512)
+- ANSWER_CACHE_TTL: Entry lifetime in seconds (default: 86400)
+- ANSWER_CACHE_REVALIDATE_AFTER: Seconds a hit is served without re-fetching
+  its cited pages (default: 300)
+"""
+
+import json
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+from .config import (
+    ANSWER_CACHE_ENABLED,
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_REVALIDATE_AFTER,
+    ANSWER_CACHE_THRESHOLD,
+    ANSWER_CACHE_TTL,
+)
+from .fast_analyzer import STOPWORDS
+from .tools.cache import page_versions
+from .tools.encoding import decode
+from .tools.mcp_client import get_mcp_client
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Words that carry no meaning for "same question?" beyond the stopwords
+_FILLER = frozenset({"process", "procedure", "steps", "way", "guide", "instructions"})
+
+
+def _stem(word: str) -> str:
+    for suffix in ("ing", "ed", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 and not word.endswith("ss"):
+            return word[:-len(suffix)]
+    return word
+
+
+def normalize_question(question: str) -> List[str]:
+    """Lowercased, stemmed content words of a question."""
+    return [
+        _stem(token) for token in _TOKEN_RE.findall(question.lower())
+        if len(token) > 1 and token not in STOPWORDS and token not in _FILLER
+    ]
+
+
+class QuestionVectorizer:
+    """Signed feature hashing of normalized questions into unit vectors."""
+
+    def __init__(self, dim: int = 4096):
+        self.dim = dim
+
+    def vectorize(self, question: str) -> np.ndarray:
+        """Embed a question; the zero vector if it has no content words."""
+        tokens = normalize_question(question)
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self._features(tokens):
+            h = zlib.crc32(feature.encode())
+            vector[h % self.dim] += weight if h & 0x80000000 else -weight
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    @staticmethod
+    def _features(tokens: List[str]):
+        for token in tokens:
+            yield "w:" + token, 1.0
+            padded = f"#{token}#"
+            for i in range(len(padded) - 2):
+                yield "c:" + padded[i:i + 3], 0.25
+        for first, second in zip(tokens, tokens[1:]):
+            yield "p:" + "|".join(sorted((first, second))), 0.5
+
+
+@dataclass
+class CachedAnswer:
+    """A stored answer and the page versions it was built from."""
+
+    question: str
+    answer: str
+    pages: Dict[str, str]
+    created_at: float = field(default_factory=time.time)
+    validated_at: float = field(default_factory=time.time)
+    hits: int = 0
+
+
+class AnswerCache:
+    """Bounded semantic cache of cited answers keyed by question similarity."""
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        threshold: float = 0.85,
+        ttl: float = 86400,
+        revalidate_after: float = 300,
+        vectorizer: Optional[QuestionVectorizer] = None
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum stored answers (least recently used evicted)
+            threshold: Cosine similarity needed to serve a cached answer
+            ttl: Entry lifetime in seconds
+            revalidate_after: Seconds since the cited page versions were last
+                confirmed after which a hit must re-fetch them
+            vectorizer: Question embedding (default: 4096-dim hashed features)
+        """
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+        self.revalidate_after = revalidate_after
+        self.vectorizer = vectorizer or QuestionVectorizer()
+
+        # Row i of the matrix is the vector of the entry in slot i
+        self._matrix = np.zeros((max_entries, self.vectorizer.dim), dtype=np.float32)
+        self._slots: List[Optional[CachedAnswer]] = [None] * max_entries
+        self._free = list(range(max_entries - 1, -1, -1))
+        self._lru: "OrderedDict[int, None]" = OrderedDict()
+        self._by_page: Dict[str, set] = {}
+        self._turn_pages: "OrderedDict[str, Dict[str, Dict[str, str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.hits = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.revalidations = 0
+        self.revalidation_misses = 0
+        self._hit_similarity = 0.0
+
+    def lookup(self, question: str) -> Optional[Tuple[CachedAnswer, float]]:
+        """Find the most similar cached question.
+
+        Returns:
+            (entry, similarity) if the best match passes the threshold
+        """
+        vector = self.vectorizer.vectorize(question)
+        with self._lock:
+            self.lookups += 1
+            if not self._lru or not vector.any():
+                return None
+
+            scores = self._matrix @ vector
+            now = time.time()
+            for slot in np.argsort(scores)[::-1]:
+                similarity = float(scores[slot])
+                if similarity < self.threshold:
+                    return None
+                entry = self._slots[slot]
+                if entry is None:
+                    continue
+                if now - entry.created_at > self.ttl:
+                    self._remove(int(slot))
+                    self.expirations += 1
+                    continue
+                entry.hits += 1
+                self._lru.move_to_end(int(slot))
+                self.hits += 1
+                self._hit_similarity += similarity
+                return entry, similarity
+            return None
+
+    def store(self, question: str, answer: str, pages: Dict[str, str]) -> bool:
+        """Store an answer with the versions of the pages it cites.
+
+        Returns:
+            False if the answer was not cacheable (no cited pages)
+        """
+        vector = self.vectorizer.vectorize(question)
+        if not pages or not answer.strip() or not vector.any():
+            return False
+
+        with self._lock:
+            # A near-identical question replaces the older answer
+            if self._lru:
+                scores = self._matrix @ vector
+                best = int(np.argmax(scores))
+                if self._slots[best] is not None and scores[best] >= 0.99:
+                    self._remove(best)
+
+            if not self._free:
+                oldest = next(iter(self._lru))
+                self._remove(oldest)
+                self.evictions += 1
+
+            slot = self._free.pop()
+            self._matrix[slot] = vector
+            self._slots[slot] = CachedAnswer(question=question, answer=answer, pages=dict(pages))
+            self._lru[slot] = None
+            for page_id in pages:
+                self._by_page.setdefault(page_id, set()).add(slot)
+            self.stores += 1
+            return True
+
+    def needs_revalidation(self, entry: CachedAnswer) -> bool:
+        """True if the entry's page versions were confirmed too long ago."""
+        return time.time() - entry.validated_at > self.revalidate_after
+
+    def confirm(self, entry: CachedAnswer, similarity: float, versions: Dict[str, str]) -> bool:
+        """Check a hit against freshly fetched page versions.
+
+        Args:
+            entry: Entry returned by lookup()
+            similarity: Similarity returned with it
+            versions: Current ``lastModified`` of the cited pages (pages that
+                could not be fetched are missing)
+
+        Returns:
+            True if every cited page is unchanged; otherwise the entry is
+            dropped and the hit is not counted
+        """
+        with self._lock:
+            self.revalidations += 1
+            if all(versions.get(page_id) == version for page_id, version in entry.pages.items()):
+                entry.validated_at = time.time()
+                return True
+            self.revalidation_misses += 1
+            self.hits -= 1
+            self._hit_similarity -= similarity
+            slot = next((slot for slot in self._lru if self._slots[slot] is entry), None)
+            if slot is not None:
+                self._remove(slot)
+            return False
+
+    def observe_version(self, page_id: str, last_modified: str):
+        """Drop every answer that cites a different version of the page."""
+        with self._lock:
+            for slot in list(self._by_page.get(page_id, ())):
+                entry = self._slots[slot]
+                if entry is not None and entry.pages.get(page_id) != last_modified:
+                    self._remove(slot)
+                    self.invalidations += 1
+
+    def observe_result(self, result: Any):
+        """Feed every page version in a tool result to observe_version()."""
+        for page_id, last_modified in page_versions(result):
+            self.observe_version(page_id, last_modified)
+
+    def record_pages(self, turn_id: str, result: Any):
+        """Remember the pages (id, url, title, version) seen during a turn."""
+        pages = self._turn_pages.setdefault(turn_id, {})
+        self._turn_pages.move_to_end(turn_id)
+        while len(self._turn_pages) > 1024:
+            self._turn_pages.popitem(last=False)
+        for record in _page_records(result):
+            pages[str(record["id"])] = {
+                "url": str(record.get("url") or ""),
+                "title": str(record.get("title") or ""),
+                "lastModified": str(record["lastModified"]),
+            }
+
+    def cited_pages(self, turn_id: str, answer: str) -> Dict[str, str]:
+        """Versions of the turn's pages that the answer cites (by URL or title)."""
+        seen = self._turn_pages.pop(turn_id, {})
+        return {
+            page_id: page["lastModified"]
+            for page_id, page in seen.items()
+            if (page["url"] and page["url"] in answer)
+            or (len(page["title"]) > 8 and page["title"] in answer)
+        }
+
+    def clear(self):
+        with self._lock:
+            for slot in list(self._lru):
+                self._remove(slot)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return capacity, hit rate and eviction/invalidation counters."""
+        with self._lock:
+            return {
+                "entries": len(self._lru),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "avg_hit_similarity": self._hit_similarity / self.hits if self.hits else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "revalidations": self.revalidations,
+                "revalidation_misses": self.revalidation_misses,
+            }
+
+    def _remove(self, slot: int):
+        entry = self._slots[slot]
+        if entry is None:
+            return
+        for page_id in entry.pages:
+            slots = self._by_page.get(page_id)
+            if slots is not None:
+                slots.discard(slot)
+                if not slots:
+                    del self._by_page[page_id]
+        self._slots[slot] = None
+        self._matrix[slot] = 0.0
+        self._lru.pop(slot, None)
+        self._free.append(slot)
+
+
+def _page_records(result: Any):
+    """Page dictionaries in a tool result (plain dict, function tool result or MCP CallToolResult dump)."""
+    if isinstance(result, str):
+        # Function tool result: the encoded response string
+        yield from _page_records(decode(result))
+        return
+    if isinstance(result, dict) and isinstance(result.get("content"), list):
+        # MCP tool result: JSON payloads inside text content parts
+        for part in result["content"]:
+            text = part.get("text") if isinstance(part, dict) else None
+            if text:
+                try:
+                    yield from _page_records(json.loads(text))
+                except ValueError:
+                    continue
+        return
+    if not isinstance(result, dict):
+        return
+    if result.get("id") and result.get("lastModified"):
+        yield result
+    for list_key in ("results", "pages"):
+        for item in result.get(list_key) or []:
+            if isinstance(item, dict) and item.get("id") and item.get("lastModified"):
+                yield item
+
+
+# Shared answer cache
+answer_cache = AnswerCache(
+    max_entries=ANSWER_CACHE_MAX_ENTRIES,
+    threshold=ANSWER_CACHE_THRESHOLD,
+    ttl=ANSWER_CACHE_TTL,
+    revalidate_after=ANSWER_CACHE_REVALIDATE_AFTER,
+)
+_observing_client = False
+
+
+def _observe_client_results():
+    # Results fetched by the MCP client (function tools, mirror sync) also
+    # carry page versions. Registered on first use rather than at import,
+    # so importing this module does not create the client; no answer is
+    # cached before the first callback runs
+    global _observing_client
+    if not _observing_client:
+        get_mcp_client().result_observers.append(answer_cache.observe_result)
+        _observing_client = True
+
+
+async def _current_versions(page_ids: List[str]) -> Dict[str, str]:
+    """lastModified of pages fetched in one batched call (missing on failure)."""
+    try:
+        results = await get_mcp_client().get_pages(page_ids)
+    except Exception as e:
+        print(f"⚠️  Could not revalidate cached answer pages: {e}")
+        return {}
+    return {
+        page_id: str(result["lastModified"])
+        for page_id, result in zip(page_ids, results)
+        if isinstance(result, dict) and result.get("lastModified")
+    }
+
+
+def _question(callback_context: CallbackContext) -> str:
+    user_content = callback_context.user_content
+    if not user_content:
+        return ""
+    return " ".join(part.text for part in (user_content.parts or []) if getattr(part, "text", None))
+
+
+def _final_answer(callback_context: CallbackContext) -> str:
+    """Text of the last model event of the current invocation."""
+    invocation = getattr(callback_context, "_invocation_context", None)
+    session = getattr(invocation, "session", None)
+    for event in reversed(getattr(session, "events", None) or []):
+        if event.invocation_id != callback_context.invocation_id:
+            break
+        if event.author == "user" or getattr(event, "partial", False) or not event.content:
+            continue
+        text = "".join(part.text for part in (event.content.parts or []) if getattr(part, "text", None))
+        if text.strip():
+            return text
+    return ""
+
+
+async def answer_cache_lookup_callback(callback_context: CallbackContext) -> Optional[types.Content]:
+    """before_agent_callback for the root agent: answer from the cache on a hit."""
+    if not ANSWER_CACHE_ENABLED:
+        return None
+    _observe_client_results()
+    question = _question(callback_context)
+    if not question.strip():
+        return None
+    match = answer_cache.lookup(question)
+    if match is None:
+        return None
+    entry, similarity = match
+    if answer_cache.needs_revalidation(entry):
+        versions = await _current_versions(list(entry.pages))
+        if not answer_cache.confirm(entry, similarity, versions):
+            return None
+    callback_context.state["answer_cache"] = {
+        "question": entry.question,
+        "similarity": round(similarity, 3),
+    }
+    return types.Content(role="model", parts=[types.Part(text=entry.answer)])
+
+
+def answer_cache_store_callback(callback_context: CallbackContext) -> None:
+    """after_agent_callback for the root agent: cache the turn's cited answer."""
+    if not ANSWER_CACHE_ENABLED:
+        return None
+    _observe_client_results()
+    question = _question(callback_context)
+    answer = _final_answer(callback_context)
+    pages = answer_cache.cited_pages(callback_context.invocation_id, answer)
+    if question.strip() and answer:
+        answer_cache.store(question, answer, pages)
+    return None
+
+
+def answer_cache_tool_callback(tool: Any, args: Dict[str, Any], tool_context: Any, tool_response: Any):
+    """after_tool_callback for document_searcher: track pages and their versions."""
+    if not ANSWER_CACHE_ENABLED:
+        return None
+    _observe_client_results()
+    answer_cache.observe_result(_as_result(tool_response))
+    answer_cache.record_pages(tool_context.invocation_id, tool_response)
+    return None
+
+
+def _as_result(tool_response: Any) -> Any:
+    # Plain dict results pass through; MCP results are unpacked into their
+    # JSON payloads so page_versions() can read them
+    if isinstance(tool_response, str) or (
+        isinstance(tool_response, dict) and isinstance(tool_response.get("content"), list)
+    ):
+        return {"results": list(_page_records(tool_response))}
+    return tool_response
@@ -0,0 +1,470 @@
+"""Deterministic verification of quoted spans in synthesized answers
+
+The answer synthesizer must quote Confluence pages exactly, and until now
+the only check was the LLM re-reading its sources. ``CitationVerifier``
+checks every quote in the final answer against the pages retrieved in the
+session (kept by document_store.py):
+
+- Quotes and their source links are extracted from the answer
+  (``"..."`` or ``“...”`` and a ``[Title](URL)``). A quote belongs to a
+  link on its own line, then to a link of the list item it sits in (e.g.
+  a ``- Relevant excerpt: "..."`` under ``1. [Title](URL)``), and only
+  then to the next link after it (``- Source: [Title](URL)`` below it)
+- Text is normalized to words (Unicode NFKD, accents and case folded,
+  punctuation and whitespace ignored), so curly quotes, non-breaking
+  spaces or changed line wrapping never cause a mismatch
+- All quotes, and their 3-word shingles, are compiled into one
+  Aho-Corasick automaton over words; each page is scanned once, so the
+  check is linear in page text plus quotes
+- A quote found in its cited page is verified. Otherwise the shingle hits
+  vote for the most likely alignment and the quote is compared with that
+  window; near misses (``CITATION_REPAIR_THRESHOLD`` of the words match)
+  are repaired to the exact page text
+- Quotes that still cannot be found are flagged or stripped, depending on
+  ``CITATION_VERIFY_MODE``. With ``CITATION_REQUIRED`` an answer whose
+  quotes all fail is replaced by the "could not find" answer (strip) or
+  flagged; an answer without any quote is only flagged
+
+``citation_check_callback`` is installed as the answer_synthesizer's
+``after_model_callback``, so the answer is fixed before it reaches the user
+or the answer cache.
+
+Configuration:
+- CITATION_VERIFY_MODE: off, flag or strip (default: flag)
+- CITATION_REPAIR_THRESHOLD: Fraction of quote words that must match for
+  a repair (default: 0.85)
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmResponse
+
+from .config import CITATION_REPAIR_THRESHOLD, CITATION_REQUIRED, CITATION_VERIFY_MODE
+from .document_store import StoredPage, document_store
+from .tools.prefetch import session_id_of
+
+_QUOTE_RE = re.compile(r"\"([^\"\n]+)\"|“([^”\n]+)”")
+_LINK_RE = re.compile(r"\[([^\]\n]+)\]\((\S+?)\)")
+_LIST_ITEM_RE = re.compile(r"[ \t]*(?:[-*+]|\d+[.)])\s")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Shorter quoted spans are names or terms, not quotes of the page
+MIN_QUOTE_WORDS = 4
+
+# Words per shingle used to locate near-miss quotes
+SHINGLE = 3
+
+# A source link this far (characters) after a quote still belongs to it
+_LINK_REACH = 400
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip(" \t"))
+
+
+def _lines(text: str) -> List[Tuple[int, str]]:
+    """(start offset, line) for every line of a text."""
+    lines, start = [], 0
+    for line in text.split("\n"):
+        lines.append((start, line))
+        start += len(line) + 1
+    return lines
+
+NOT_FOUND_ANSWER = "I could not find this information in the available Confluence documentation."
+
+
+def _fold(word: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", word)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def tokenize(text: str) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """Normalized words of a text and their character spans in it.
+
+    Args:
+        text: Original text
+
+    Returns:
+        (words, spans) with ``spans[i]`` the (start, end) of ``words[i]``
+    """
+    words, spans = [], []
+    for match in _WORD_RE.finditer(text):
+        words.append(_fold(match.group()))
+        spans.append(match.span())
+    return words, spans
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton over word sequences."""
+
+    def __init__(self, patterns: Sequence[Sequence[str]]):
+        """Compile the patterns.
+
+        Args:
+            patterns: Word sequences; matches report their index here
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self._lengths = [len(pattern) for pattern in patterns]
+
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for word in pattern:
+                nxt = self._goto[state].get(word)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][word] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(index)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and word not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(word, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def search(self, words: Sequence[str]) -> Iterator[Tuple[int, int]]:
+        """Yield (start index, pattern index) for every occurrence in ``words``."""
+        goto, fail, out, lengths = self._goto, self._fail, self._out, self._lengths
+        state = 0
+        for position, word in enumerate(words):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for index in out[state]:
+                yield position - lengths[index] + 1, index
+
+
+@dataclass
+class Quote:
+    """A quoted span of the answer and what the verifier made of it."""
+
+    start: int  # span of the quoted text (inside the quote marks)
+    end: int
+    text: str
+    url: Optional[str]
+    words: List[str] = field(default_factory=list)
+    status: str = "unverified"  # verified | repaired | misattributed | unverified
+    page_id: Optional[str] = None
+    repaired: Optional[str] = None
+    similarity: float = 0.0
+
+
+class CitationVerifier:
+    """Checks, repairs and enforces quoted citations in answers."""
+
+    def __init__(
+        self,
+        mode: str = "flag",
+        repair_threshold: float = 0.85,
+        citation_required: bool = True,
+        token_cache_pages: int = 256
+    ):
+        """Initialize the verifier.
+
+        Args:
+            mode: ``flag`` marks unverifiable quotes, ``strip`` removes their
+                lines, ``off`` disables checking
+            repair_threshold: Fraction of quote words that must match the
+                page for a near miss to be repaired
+            citation_required: Flag answers without a verified quote; in
+                ``strip`` mode an answer whose quotes all fail is replaced
+            token_cache_pages: Tokenized pages kept between answers
+        """
+        self.mode = mode
+        self.repair_threshold = repair_threshold
+        self.citation_required = citation_required
+        self.token_cache_pages = token_cache_pages
+        self._tokens: "OrderedDict[Tuple[str, str, int], Tuple[str, List[str], List[Tuple[int, int]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.answers = 0
+        self.counts: Counter = Counter()
+        self.enforced = 0
+        self.total_time = 0.0
+
+    def extract_quotes(self, answer: str) -> List[Quote]:
+        """Quoted spans of at least MIN_QUOTE_WORDS words with their source links."""
+        links = [(match.start(), match.group(2)) for match in _LINK_RE.finditer(answer)]
+        lines = _lines(answer)
+        quotes = []
+        for match in _QUOTE_RE.finditer(answer):
+            group = 1 if match.group(1) is not None else 2
+            text = match.group(group)
+            words, _ = tokenize(text)
+            if len(words) < MIN_QUOTE_WORDS:
+                continue
+            url = self._source_url(links, lines, match.start(), match.end())
+            quotes.append(Quote(match.start(group), match.end(group), text, url, words))
+        return quotes
+
+    @staticmethod
+    def _source_url(
+        links: List[Tuple[int, str]],
+        lines: List[Tuple[int, str]],
+        start: int,
+        end: int
+    ) -> Optional[str]:
+        def links_in(line_start: int, line: str) -> List[str]:
+            return [url for pos, url in links if line_start <= pos < line_start + len(line)]
+
+        index = next(i for i, (line_start, line) in reversed(list(enumerate(lines))) if line_start <= start)
+        line_start, line = lines[index]
+
+        # 1. Its own line: the first link after the quote, else the last before it
+        after = [url for pos, url in links if end <= pos < line_start + len(line)]
+        if after:
+            return after[0]
+        before = [url for pos, url in links if line_start <= pos < start]
+        if before:
+            return before[-1]
+
+        # 2. Its list item: lines nested below the quote's line, then the
+        #    enclosing items above it
+        indent = _indent(line)
+        for child_start, child in lines[index + 1:]:
+            if not child.strip() or _indent(child) <= indent:
+                break
+            found = links_in(child_start, child)
+            if found:
+                return found[0]
+        for parent_start, parent in reversed(lines[:index]):
+            if not parent.strip() or indent == 0:
+                break
+            if _indent(parent) >= indent:
+                continue
+            indent = _indent(parent)
+            found = links_in(parent_start, parent)
+            if found and _LIST_ITEM_RE.match(parent):
+                return found[0]
+
+        # 3. The next link after it (a "Source:" line), else the last before it
+        following = [url for pos, url in links if end <= pos <= end + _LINK_REACH]
+        if following:
+            return following[0]
+        preceding = [url for pos, url in links if pos < start]
+        return preceding[-1] if preceding else None
+
+    def verify(self, answer: str, pages: List[StoredPage]) -> Tuple[str, List[Quote]]:
+        """Check every quote of an answer against the retrieved pages.
+
+        Args:
+            answer: Synthesized answer text
+            pages: Pages (and search excerpts) retrieved in the session
+
+        Returns:
+            (answer with repairs and flags/strips applied, quotes)
+        """
+        if self.mode == "off":
+            return answer, []
+        started = time.perf_counter()
+        quotes = self.extract_quotes(answer)
+        if quotes and pages:
+            self._match(quotes, pages)
+
+        checked = self._rewrite(answer, quotes)
+        if self.citation_required and not any(q.status in ("verified", "repaired") for q in quotes):
+            if NOT_FOUND_ANSWER not in answer:
+                checked = self._enforce(checked, pages, quoted=bool(quotes))
+
+        with self._lock:
+            self.answers += 1
+            self.counts.update(quote.status for quote in quotes)
+            self.total_time += time.perf_counter() - started
+        return checked, quotes
+
+    def _match(self, quotes: List[Quote], pages: List[StoredPage]):
+        # One automaton for every quote and every quote shingle
+        patterns: List[Tuple[str, ...]] = []
+        pattern_index: Dict[Tuple[str, ...], int] = {}
+        owners: List[List[Tuple[int, int, bool]]] = []  # (quote, offset in quote, is full quote)
+
+        def add(words: Tuple[str, ...], owner: Tuple[int, int, bool]):
+            index = pattern_index.get(words)
+            if index is None:
+                index = pattern_index[words] = len(patterns)
+                patterns.append(words)
+                owners.append([])
+            owners[index].append(owner)
+
+        for q, quote in enumerate(quotes):
+            add(tuple(quote.words), (q, 0, True))
+            for offset in range(len(quote.words) - SHINGLE + 1):
+                add(tuple(quote.words[offset:offset + SHINGLE]), (q, offset, False))
+        automaton = AhoCorasick(patterns)
+
+        exact: Dict[int, List[Tuple[StoredPage, int]]] = {}
+        votes: Dict[int, Counter] = {q: Counter() for q in range(len(quotes))}
+        page_tokens = {}
+        for page in pages:
+            text, words, spans = self._tokenized(page)
+            page_tokens[page.id] = (text, words, spans)
+            for start, index in automaton.search(words):
+                for q, offset, full in owners[index]:
+                    if full:
+                        exact.setdefault(q, []).append((page, start))
+                    else:
+                        votes[q][(page.id, start - offset)] += 1
+
+        for q, quote in enumerate(quotes):
+            allowed = self._cited_pages(quote, pages)
+            hits = exact.get(q, [])
+            cited_hits = [hit for hit in hits if hit[0].id in allowed]
+            if cited_hits:
+                quote.status, quote.page_id, quote.similarity = "verified", cited_hits[0][0].id, 1.0
+                continue
+
+            for (page_id, offset), _ in votes[q].most_common(3):
+                if page_id not in allowed:
+                    continue
+                repaired, similarity = self._repair(quote, page_tokens[page_id], offset)
+                if repaired is not None:
+                    quote.status, quote.page_id = "repaired", page_id
+                    quote.repaired, quote.similarity = repaired, similarity
+                    break
+            else:
+                if hits:
+                    # Exact text exists, but in a page the answer does not cite
+                    quote.status, quote.page_id, quote.similarity = "misattributed", hits[0][0].id, 1.0
+
+    def _cited_pages(self, quote: Quote, pages: List[StoredPage]) -> set:
+        if quote.url:
+            url = quote.url.rstrip("/")
+            cited = {page.id for page in pages if page.url and page.url.rstrip("/") == url}
+            if cited:
+                return cited
+        # Unlinked quotes (or links to pages we never saw) may match any page
+        return {page.id for page in pages}
+
+    def _repair(self, quote: Quote, tokens, offset: int) -> Tuple[Optional[str], float]:
+        text, words, spans = tokens
+        size = len(quote.words)
+        slack = max(2, size // 4)
+        lo, hi = max(0, offset - slack), min(len(words), offset + size + slack)
+        window = words[lo:hi]
+        matcher = SequenceMatcher(None, quote.words, window, autojunk=False)
+        blocks = [block for block in matcher.get_matching_blocks() if block.size]
+        if not blocks:
+            return None, 0.0
+        matched = sum(block.size for block in blocks)
+        first, last = lo + blocks[0].b, lo + blocks[-1].b + blocks[-1].size - 1
+        span_words = last - first + 1
+        similarity = matched / max(size, span_words)
+        if similarity < self.repair_threshold:
+            return None, similarity
+        return text[spans[first][0]:spans[last][1]], similarity
+
+    def _rewrite(self, answer: str, quotes: List[Quote]) -> str:
+        stripped_lines = set()
+        for quote in sorted(quotes, key=lambda q: q.start, reverse=True):
+            if quote.status == "repaired":
+                answer = answer[:quote.start] + quote.repaired + answer[quote.end:]
+            elif quote.status in ("unverified", "misattributed"):
+                if self.mode == "strip":
+                    line_start = answer.rfind("\n", 0, quote.start) + 1
+                    line_end = answer.find("\n", quote.end)
+                    line_end = len(answer) if line_end == -1 else line_end + 1
+                    if line_start not in stripped_lines:
+                        stripped_lines.add(line_start)
+                        answer = answer[:line_start] + answer[line_end:]
+                else:
+                    close = quote.end + 1
+                    note = " _(quote not found in the cited page)_" if quote.status == "unverified" \
+                        else " _(quote is from a different page than the one cited)_"
+                    answer = answer[:close] + note + answer[close:]
+        return answer
+
+    def _enforce(self, answer: str, pages: List[StoredPage], quoted: bool) -> str:
+        with self._lock:
+            self.enforced += 1
+        if not quoted:
+            # Nothing was checked, so nothing is known to be wrong
+            return answer + "\n\n_Note: this answer quotes no Confluence page, so it could not be verified._"
+        if self.mode == "flag":
+            return answer + "\n\n_Note: no quote in this answer could be verified against the retrieved Confluence pages._"
+        checked = [page for page in pages if not page.partial and page.url]
+        if not checked:
+            return NOT_FOUND_ANSWER
+        return NOT_FOUND_ANSWER + "\n\nPages checked:\n" + "\n".join(
+            f"- [{page.title or page.id}]({page.url})" for page in checked
+        )
+
+    def _tokenized(self, page: StoredPage) -> Tuple[str, List[str], List[Tuple[int, int]]]:
+        key = (page.id, page.last_modified, page.size)
+        with self._lock:
+            cached = self._tokens.get(key)
+            if cached is not None:
+                self._tokens.move_to_end(key)
+                return cached
+        text = page.text
+        cached = (text, *tokenize(text))
+        with self._lock:
+            self._tokens[key] = cached
+            while len(self._tokens) > self.token_cache_pages:
+                self._tokens.popitem(last=False)
+        return cached
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-status quote counts and verification time."""
+        with self._lock:
+            quotes = sum(self.counts.values())
+            return {
+                "mode": self.mode,
+                "answers": self.answers,
+                "quotes": quotes,
+                "verified": self.counts["verified"],
+                "repaired": self.counts["repaired"],
+                "misattributed": self.counts["misattributed"],
+                "unverified": self.counts["unverified"],
+                "enforced": self.enforced,
+                "avg_ms": self.total_time / self.answers * 1000 if self.answers else 0.0,
+            }
+
+
+# Shared verifier
+citation_verifier = CitationVerifier(
+    mode=CITATION_VERIFY_MODE,
+    repair_threshold=CITATION_REPAIR_THRESHOLD,
+    citation_required=CITATION_REQUIRED,
+)
+
+
+def citation_check_callback(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+    """after_model_callback for answer_synthesizer: verify the final answer's quotes."""
+    if citation_verifier.mode == "off" or llm_response.partial:
+        return None
+    content = llm_response.content
+    if not content or not content.parts or any(part.function_call for part in content.parts):
+        return None
+    text_parts = [part for part in content.parts if part.text and not part.thought]
+    if not text_parts:
+        return None
+
+    session_id = session_id_of(callback_context)
+    pages = document_store.session_pages(session_id) if session_id else []
+    answer = "".join(part.text for part in text_parts)
+    checked, quotes = citation_verifier.verify(answer, pages)
+
+    callback_context.state["citation_check"] = dict(Counter(quote.status for quote in quotes))
+    if checked == answer:
+        return None
+    text_parts[0].text = checked
+    merged = {id(part) for part in text_parts[1:]}
+    content.parts = [part for part in content.parts if id(part) not in merged]
+    return llm_response
@@ -2,23 +2,39 @@
 
 import os
 from typing import Optional
-from google.adk.models.lite_llm import LiteLlm
-from google.adk.tools.mcp_tool import McpToolset
 from google.adk.tools.mcp_tool.mcp_session_manager import SseConnectionParams
+from .scheduler import LlmScheduler, ScheduledLiteLlm, parse_priorities
+from .tools.mcp_toolset import CachedMcpToolset
 
 # Get model configuration from environment variables
 AGENT_MODEL = os.getenv("AGENT_MODEL", "gemini/gemini-2.5-flash-lite")
 AGENT_API_KEY = os.getenv("AGENT_API_KEY", "sk-4444")
 AGENT_API_BASE = os.getenv("AGENT_API_BASE", "http://localhost:4444")
 
+# Admission control and fair scheduling of model calls across A2A sessions
+# (see scheduler.py)
+LLM_SCHEDULER_ENABLED = os.getenv("LLM_SCHEDULER_ENABLED", "true").lower() == "true"
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))
+LLM_PRIORITIES = parse_priorities(os.getenv("LLM_PRIORITIES", "answer_synthesizer:0,query_analyzer:2"))
+
+llm_scheduler = LlmScheduler(
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+    max_queue=LLM_MAX_QUEUE,
+    priorities=LLM_PRIORITIES,
+)
+
 # Create LiteLLM model
 # Note: custom_llm_provider="openai" forces OpenAI-compatible API call to proxy
 # api_base should include /v1 for OpenAI-compatible endpoints
-llm_model = LiteLlm(
+llm_model = ScheduledLiteLlm(
     model=AGENT_MODEL,
     api_key=AGENT_API_KEY,
     api_base=f"{AGENT_API_BASE}/v1" if not AGENT_API_BASE.endswith("/v1") else AGENT_API_BASE,
     custom_llm_provider="openai",
+    scheduler=llm_scheduler if LLM_SCHEDULER_ENABLED else None,
 )
 
 # Confluence MCP Server Configuration
@@ -33,7 +49,10 @@ CONFLUENCE_MCP_SERVER_URL = os.getenv(
 # Create MCP toolset for Confluence
 # Uses streamable-http (SSE) connection to MCP server
 # All Confluence credentials are managed by the MCP server itself
-confluence_mcp_toolset = McpToolset(
+# Tool schemas are served from a persisted cache (see tools/mcp_toolset.py);
+# the SSE connection opens on the first tool call
+confluence_mcp_toolset = CachedMcpToolset.from_env(
+    server_url=CONFLUENCE_MCP_SERVER_URL,
     connection_params=SseConnectionParams(url=CONFLUENCE_MCP_SERVER_URL),
 )
 
@@ -41,3 +60,56 @@ confluence_mcp_toolset = McpToolset(
 MAX_SEARCH_RESULTS = int(os.getenv("MAX_SEARCH_RESULTS", "5"))
 CITATION_REQUIRED = os.getenv("CITATION_REQUIRED", "true").lower() == "true"
 USE_REASONING = os.getenv("USE_REASONING", "true").lower() == "true"
+# How the root agent runs the sub-agents: "llm" (the coordinator LLM routes
+# with transfer_to_agent) or "pipeline" (fixed analyzer -> searcher ->
+# synthesizer order; the coordinator only handles non-documentation turns)
+AGENT_WORKFLOW = os.getenv("AGENT_WORKFLOW", "llm").lower()
+
+# Fast-path query analysis: answer the query_analyzer step locally when the
+# rule-based analysis is confident, skipping one LLM round trip
+FAST_ANALYZER_ENABLED = os.getenv("FAST_ANALYZER_ENABLED", "true").lower() == "true"
+FAST_ANALYZER_MIN_CONFIDENCE = float(os.getenv("FAST_ANALYZER_MIN_CONFIDENCE", "0.6"))
+
+# Semantic answer cache in front of the root agent (see answer_cache.py)
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.85"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "512"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "86400"))
+ANSWER_CACHE_REVALIDATE_AFTER = float(os.getenv("ANSWER_CACHE_REVALIDATE_AFTER", "300"))
+
+# Per-session document store: sub-agents pass page handles, full text is
+# resolved only in the synthesizer's prompt (see document_store.py)
+DOCUMENT_STORE_ENABLED = os.getenv("DOCUMENT_STORE_ENABLED", "true").lower() == "true"
+DOCUMENT_STORE_MAX_SESSIONS = int(os.getenv("DOCUMENT_STORE_MAX_SESSIONS", "256"))
+DOCUMENT_STORE_MAX_SESSION_BYTES = int(os.getenv("DOCUMENT_STORE_MAX_SESSION_BYTES", "2000000"))
+
+# Local verification of quoted citations in the synthesized answer
+# (see citations.py): off | flag | strip
+CITATION_VERIFY_MODE = os.getenv("CITATION_VERIFY_MODE", "flag").lower()
+CITATION_REPAIR_THRESHOLD = float(os.getenv("CITATION_REPAIR_THRESHOLD", "0.85"))
+
+# Streaming A2A responses: token deltas of user-facing agents and progress
+# updates, with coalescing for slow clients (see streaming.py)
+A2A_STREAMING_ENABLED = os.getenv("A2A_STREAMING_ENABLED", "true").lower() == "true"
+# The answer_synthesizer's raw deltas would reach the client before
+# citation_check_callback verifies them, so they are only streamed with
+# citation verification off
+A2A_STREAM_AGENTS = [
+    name.strip() for name in os.getenv(
+        "A2A_STREAM_AGENTS", "confluence_documentation_assistant,coordinator,answer_synthesizer"
+    ).split(",")
+    if name.strip() and not (name.strip() == "answer_synthesizer" and CITATION_VERIFY_MODE != "off")
+]
+A2A_STREAM_MAX_PENDING = int(os.getenv("A2A_STREAM_MAX_PENDING", "64"))
+A2A_STREAM_FLUSH_MS = float(os.getenv("A2A_STREAM_FLUSH_MS", "50"))
+
+# LLM response cache for repeated model requests, with record/replay for
+# regression runs without the LLM proxy (see llm_cache.py):
+# off | on | record | replay
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "off").lower()
+LLM_CACHE_AGENTS = [
+    name.strip() for name in os.getenv("LLM_CACHE_AGENTS", "query_analyzer").split(",") if name.strip()
+]
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB") or None
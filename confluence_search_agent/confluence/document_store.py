@@ -0,0 +1,460 @@
+"""Per-session document store for passing page handles between sub-agents
+
+Without it, every page body that ``document_searcher`` fetches becomes part
+of the session history and is re-sent in the prompt of every later LLM
+call: the searcher's own follow-up calls, the root coordinator (as "for
+context" transcript) and finally the answer synthesizer. Long pages are
+paid for several times per question.
+
+With the store:
+
+- ``document_store_tool_callback`` (document_searcher after_tool_callback)
+  moves full page bodies out of tool responses into the session's store.
+  The response the LLM sees keeps the page metadata, a ``doc:<page id>``
+  handle and an outline of the page's sections (id, heading, size and a
+  short preview)
+- Agents pass the passages they mean as handles,
+  ``[[doc:<page id>#<section id>,<section id>]]`` (or ``[[doc:<page id>]]``
+  for the whole page)
+- ``resolve_documents_callback`` (answer_synthesizer before_model_callback)
+  replaces the handles in the synthesizer's prompt with the exact section
+  text, each section at most once. If the prompt contains no handles, the
+  pages stored during the current turn are attached instead, so the
+  synthesizer never answers without the documents
+
+Sections come from chunking.split_sections, so the text is never rewritten
+and exact quotes stay valid. The store also keeps short pages and search
+excerpts (left inline in the responses) so that citations.py can check the
+answer's quotes against everything the agents saw. Memory is bounded per session (bytes, least
+recently used pages evicted) and in the number of sessions kept.
+
+Configuration:
+- DOCUMENT_STORE_ENABLED: Pass handles instead of page bodies (default: true)
+- DOCUMENT_STORE_MAX_SESSIONS: Sessions kept (default: 256)
+- DOCUMENT_STORE_MAX_SESSION_BYTES: Page text kept per session (default: 2 MB)
+"""
+
+import copy
+import json
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest
+from google.genai import types
+
+from .config import (
+    CITATION_VERIFY_MODE,
+    DOCUMENT_STORE_ENABLED,
+    DOCUMENT_STORE_MAX_SESSION_BYTES,
+    DOCUMENT_STORE_MAX_SESSIONS,
+)
+from .tools.chunking import Section, estimate_tokens, split_sections
+from .tools.encoding import decode
+from .tools.prefetch import session_id_of
+
+HANDLE_RE = re.compile(r"\[\[doc:([^\]#\s]+)(?:#([^\]\s]+))?\]\]")
+
+# Page bodies shorter than this stay inline; a handle would not save anything
+MIN_STORED_CHARS = 600
+
+# Words of section text shown in the outline
+PREVIEW_WORDS = 12
+
+_BODY_KEYS = ("content", "body")
+
+
+@dataclass
+class StoredPage:
+    """A page body held in a session's store, split into sections."""
+
+    id: str
+    title: str
+    url: str
+    last_modified: str
+    sections: List[Section]
+    size: int
+    invocation_id: Optional[str] = None
+    partial: bool = False  # only a search excerpt is known
+    tokens: int = field(init=False)
+
+    def __post_init__(self):
+        self.tokens = sum(section.tokens for section in self.sections)
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join(section.text for section in self.sections)
+
+    def section(self, section_id: str) -> Optional[Section]:
+        for section in self.sections:
+            if section.id == section_id:
+                return section
+        return None
+
+
+class DocumentStore:
+    """Bounded per-session page store addressed by ``doc:`` handles."""
+
+    def __init__(self, max_sessions: int = 256, max_session_bytes: int = 2_000_000):
+        """Initialize the store.
+
+        Args:
+            max_sessions: Sessions kept (least recently used dropped)
+            max_session_bytes: Page text kept per session (least recently
+                used pages evicted)
+        """
+        self.max_sessions = max_sessions
+        self.max_session_bytes = max_session_bytes
+        self._sessions: "OrderedDict[str, OrderedDict[str, StoredPage]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.pages_stored = 0
+        self.page_evictions = 0
+        self.session_evictions = 0
+        self.tokens_stored = 0
+        self.tokens_returned = 0
+        self.handles_resolved = 0
+        self.tokens_resolved = 0
+        self.unknown_handles = 0
+        self.fallbacks = 0
+
+    def put(
+        self,
+        session_id: str,
+        page: Dict[str, Any],
+        invocation_id: Optional[str] = None,
+        partial: bool = False
+    ) -> StoredPage:
+        """Store a page body for a session, replacing an older copy.
+
+        Args:
+            session_id: ADK session id
+            page: Page dictionary with ``id`` and a ``content``/``body`` string
+                (or an ``excerpt`` when ``partial``)
+            invocation_id: Turn that fetched the page
+            partial: Only a search excerpt is known; never replaces a full body
+
+        Returns:
+            The stored page
+        """
+        body = (page.get("excerpt") if partial else _body_of(page)) or ""
+        stored = StoredPage(
+            id=str(page["id"]),
+            title=str(page.get("title") or ""),
+            url=str(page.get("url") or ""),
+            last_modified=str(page.get("lastModified") or ""),
+            sections=split_sections(body),
+            size=len(body.encode()),
+            invocation_id=invocation_id,
+            partial=partial,
+        )
+
+        with self._lock:
+            existing = (self._sessions.get(session_id) or {}).get(stored.id)
+            if partial and existing is not None and not existing.partial:
+                return existing
+            pages = self._sessions.pop(session_id, None)
+            if pages is None:
+                pages = OrderedDict()
+                while len(self._sessions) >= self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.session_evictions += 1
+            self._sessions[session_id] = pages
+
+            pages.pop(stored.id, None)
+            pages[stored.id] = stored
+            used = sum(p.size for p in pages.values())
+            while used > self.max_session_bytes and len(pages) > 1:
+                _, evicted = pages.popitem(last=False)
+                used -= evicted.size
+                self.page_evictions += 1
+            self.pages_stored += 1
+            self.tokens_stored += stored.tokens
+        return stored
+
+    def get(self, session_id: str, page_id: str) -> Optional[StoredPage]:
+        """Look up a stored page (marks it recently used)."""
+        with self._lock:
+            pages = self._sessions.get(session_id)
+            if not pages or page_id not in pages:
+                return None
+            pages.move_to_end(page_id)
+            return pages[page_id]
+
+    def session_pages(self, session_id: str) -> List[StoredPage]:
+        """Every page (and search excerpt) stored for a session."""
+        with self._lock:
+            return list((self._sessions.get(session_id) or {}).values())
+
+    def turn_documents(self, session_id: str, invocation_id: str) -> Optional[str]:
+        """Full text of the pages stored during one turn, for prompts without handles."""
+        with self._lock:
+            pages = [
+                page for page in (self._sessions.get(session_id) or {}).values()
+                if page.invocation_id == invocation_id and not page.partial
+            ]
+            if not pages:
+                return None
+            self.fallbacks += 1
+        return "\n\n".join(render_sections(page, page.sections) for page in pages)
+
+    def compact(
+        self,
+        session_id: str,
+        response: Any,
+        invocation_id: Optional[str] = None,
+        outline: bool = True
+    ) -> Any:
+        """Store the pages of a tool response and replace long bodies with outlines.
+
+        Handles plain page dictionaries, ``results``/``pages`` lists of them,
+        MCP CallToolResult dumps carrying them as JSON text parts and
+        function tool results (the encoded response string). Short
+        bodies, search excerpts and selected sections are stored but left
+        inline.
+
+        Args:
+            session_id: ADK session id
+            response: Tool response
+            invocation_id: Turn that fetched the pages
+            outline: Replace long bodies with handles and outlines; with
+                False the pages are only recorded
+
+        Returns:
+            The compacted response, or None if nothing was replaced
+        """
+        if isinstance(response, str):
+            # Function tool result: the encoded response string. These tools
+            # already return trimmed pages, so their pages are only recorded
+            self._compact_payload(session_id, decode(response), invocation_id, False)
+            return None
+
+        if not isinstance(response, dict):
+            return None
+
+        if isinstance(response.get("content"), list):
+            # MCP tool result: page JSON inside text content parts
+            compacted, changed = copy.deepcopy(response), False
+            for part in compacted["content"]:
+                text = part.get("text") if isinstance(part, dict) else None
+                if not text:
+                    continue
+                try:
+                    payload = json.loads(text)
+                except ValueError:
+                    continue
+                replaced = self._compact_payload(session_id, payload, invocation_id, outline)
+                if replaced is not None:
+                    part["text"] = json.dumps(replaced, ensure_ascii=False)
+                    changed = True
+            return compacted if changed else None
+
+        return self._compact_payload(session_id, response, invocation_id, outline)
+
+    def _compact_payload(
+        self,
+        session_id: str,
+        payload: Any,
+        invocation_id: Optional[str],
+        outline: bool
+    ) -> Optional[Any]:
+        if not isinstance(payload, dict):
+            return None
+        replaced = self._compact_page(session_id, payload, invocation_id, outline)
+        if replaced is not None:
+            return replaced
+
+        compacted, changed = dict(payload), False
+        for list_key in ("results", "pages"):
+            items = payload.get(list_key)
+            if not isinstance(items, list):
+                continue
+            new_items = []
+            for item in items:
+                replaced = self._compact_page(session_id, item, invocation_id, outline)
+                if replaced is not None:
+                    item, changed = replaced, True
+                new_items.append(item)
+            compacted[list_key] = new_items
+        return compacted if changed else None
+
+    def _compact_page(
+        self,
+        session_id: str,
+        page: Any,
+        invocation_id: Optional[str],
+        outline: bool
+    ) -> Optional[Dict[str, Any]]:
+        if not isinstance(page, dict) or not page.get("id"):
+            return None
+        body = _body_of(page)
+        if body is None:
+            sections = page.get("sections")
+            if isinstance(sections, list) and any(
+                isinstance(section, dict) and isinstance(section.get("text"), str)
+                for section in sections
+            ):
+                # get_page_sections: only the selected sections are known
+                texts = [
+                    section["text"] for section in sections
+                    if isinstance(section, dict) and isinstance(section.get("text"), str)
+                ]
+                page = {**page, "excerpt": "\n\n".join(texts)}
+            if isinstance(page.get("excerpt"), str):
+                self.put(session_id, page, invocation_id, partial=True)
+            return None
+        stored = self.put(session_id, page, invocation_id)
+        if outline and len(body) >= MIN_STORED_CHARS:
+            return self._outline(stored, page)
+        return None
+
+    def _outline(self, page: StoredPage, original: Dict[str, Any]) -> Dict[str, Any]:
+        outline = {key: value for key, value in original.items() if key not in _BODY_KEYS}
+        outline["handle"] = f"doc:{page.id}"
+        outline["tokens"] = page.tokens
+        outline["sections"] = [
+            {
+                "id": section.id,
+                "heading": " > ".join(section.path) if section.path else section.heading,
+                "tokens": section.tokens,
+                "preview": _preview(section),
+            }
+            for section in page.sections
+        ]
+        with self._lock:
+            self.tokens_returned += estimate_tokens(json.dumps(outline, ensure_ascii=False))
+        return outline
+
+    def resolve(self, session_id: str, text: str, expanded: Optional[set] = None) -> str:
+        """Replace ``[[doc:...]]`` handles in a text with the section text.
+
+        Args:
+            session_id: ADK session id
+            text: Text containing handles
+            expanded: (page id, section id) pairs already expanded in this
+                prompt; repeated references are left as handles
+
+        Returns:
+            Text with known handles expanded
+        """
+        expanded = set() if expanded is None else expanded
+
+        def replace(match: "re.Match[str]") -> str:
+            page = self.get(session_id, match.group(1))
+            if page is None:
+                with self._lock:
+                    self.unknown_handles += 1
+                return match.group(0)
+            if match.group(2):
+                wanted = [page.section(section_id) for section_id in match.group(2).split(",")]
+                sections = [section for section in wanted if section is not None]
+            else:
+                sections = page.sections
+            sections = [s for s in sections if (page.id, s.id) not in expanded]
+            if not sections:
+                return match.group(0)
+            expanded.update((page.id, s.id) for s in sections)
+            with self._lock:
+                self.handles_resolved += 1
+                self.tokens_resolved += sum(s.tokens for s in sections)
+            return render_sections(page, sections)
+
+        return HANDLE_RE.sub(replace, text)
+
+    def drop_session(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size, eviction and token-saving counters."""
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "pages": sum(len(pages) for pages in self._sessions.values()),
+                "bytes": sum(p.size for pages in self._sessions.values() for p in pages.values()),
+                "pages_stored": self.pages_stored,
+                "page_evictions": self.page_evictions,
+                "session_evictions": self.session_evictions,
+                "tokens_stored": self.tokens_stored,
+                "tokens_returned": self.tokens_returned,
+                "handles_resolved": self.handles_resolved,
+                "tokens_resolved": self.tokens_resolved,
+                "unknown_handles": self.unknown_handles,
+                "fallbacks": self.fallbacks,
+            }
+
+
+def _body_of(page: Dict[str, Any]) -> Optional[str]:
+    for key in _BODY_KEYS:
+        if isinstance(page.get(key), str):
+            return page[key]
+    return None
+
+
+def _preview(section: Section) -> str:
+    lines = section.text.splitlines()
+    if lines and lines[0].lstrip().startswith("#"):
+        lines = lines[1:]
+    words = " ".join(lines).split()
+    preview = " ".join(words[:PREVIEW_WORDS])
+    return preview + " ..." if len(words) > PREVIEW_WORDS else preview
+
+
+def render_sections(page: StoredPage, sections: List[Section]) -> str:
+    """Exact section text of a page, framed with its citation metadata."""
+    header = f'<document handle="doc:{page.id}" title="{page.title}" url="{page.url}"'
+    if page.last_modified:
+        header += f' lastModified="{page.last_modified}"'
+    body = "\n\n".join(section.text for section in sections)
+    return f"{header}>\n{body}\n</document>"
+
+
+# Shared document store
+document_store = DocumentStore(
+    max_sessions=DOCUMENT_STORE_MAX_SESSIONS,
+    max_session_bytes=DOCUMENT_STORE_MAX_SESSION_BYTES,
+)
+
+
+def document_store_tool_callback(tool: Any, args: Dict[str, Any], tool_context: Any, tool_response: Any):
+    """after_tool_callback for document_searcher: store page bodies, return handles."""
+    if not DOCUMENT_STORE_ENABLED and CITATION_VERIFY_MODE == "off":
+        return None
+    session_id = session_id_of(tool_context)
+    if not session_id:
+        return None
+    # With handles disabled, pages are still recorded for the citation verifier
+    return document_store.compact(
+        session_id, tool_response, getattr(tool_context, "invocation_id", None),
+        outline=DOCUMENT_STORE_ENABLED
+    )
+
+
+def resolve_documents_callback(callback_context: CallbackContext, llm_request: LlmRequest) -> None:
+    """before_model_callback for answer_synthesizer: expand handles in the prompt."""
+    if not DOCUMENT_STORE_ENABLED:
+        return None
+    session_id = session_id_of(callback_context)
+    if not session_id:
+        return None
+
+    expanded: set = set()
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            if part.text and "[[doc:" in part.text:
+                part.text = document_store.resolve(session_id, part.text, expanded)
+
+    if not expanded:
+        # The searcher passed no handles; attach what it fetched this turn
+        documents = document_store.turn_documents(session_id, callback_context.invocation_id)
+        if documents:
+            text = "Documents retrieved for this question:\n\n" + documents
+            llm_request.contents.append(types.Content(role="user", parts=[types.Part(text=text)]))
+    return None
+
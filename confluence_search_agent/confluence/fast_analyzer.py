@@ -0,0 +1,322 @@
+"""Deterministic fast-path query analysis
+
+The query_analyzer sub-agent is a pure-reasoning LLM call that only picks
+keywords and a space. For most questions that can be done locally in
+microseconds:
+
+- Stopword removal and keyword extraction
+- Quoted phrase and acronym extraction (VPN, SSO, API, ...)
+- Space detection against the cached ``list_spaces`` result
+- IDF weighting of keywords from the local mirror corpus, when available
+
+Each analysis carries a confidence score. In the pipeline workflow
+(workflow.py), confident analyses replace the query_analyzer's turn and the
+LLM call is skipped; vague or complex questions fall through to the LLM
+analyzer. In the ``llm`` workflow the analyzer cannot be skipped: a
+before_agent_callback returning content ends the whole invocation, so the
+coordinator would never reach the searcher. There ``fast_path_model_callback``
+stores the analysis in session state and hands it to the LLM analyzer as a
+draft instead.
+
+References:
+- ADK callbacks: https://google.github.io/adk-docs/callbacks/
+"""
+
+import math
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest
+
+from .config import FAST_ANALYZER_MIN_CONFIDENCE
+from .tools.mirror import get_mirror
+
+_WORD_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9_\-\.]*[A-Za-z0-9]|[A-Za-z0-9]")
+_QUOTED_RE = re.compile(r"[\"“]([^\"”]{3,80})[\"”]")
+_ACRONYM_RE = re.compile(r"\b[A-Z][A-Z0-9]{1,6}s?\b")
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been
+before being below between both but by can could did do does doing down during each
+few for from further get got had has have having he her here hers him his how i if
+in into is it its itself just let me more most my myself need no nor not now of off
+on once only or other our ours out over own please same she should show so some such
+tell than that the their theirs them then there these they this those through to too
+under until up very want was we were what when where which while who whom why will
+with would you your yours confluence documentation docs doc page pages find know
+anyone someone something anything explain find where's what's how's i'm
+""".split())
+
+# Question openers mapped to a coarse intent
+_INTENTS = [
+    (re.compile(r"^\s*(how (do|can|should|to)|steps|process|procedure)", re.I), "how-to"),
+    (re.compile(r"^\s*(what is|what's|what are|define|meaning)", re.I), "definition"),
+    (re.compile(r"^\s*(where)", re.I), "location"),
+    (re.compile(r"^\s*(who)", re.I), "owner/contact"),
+    (re.compile(r"^\s*(when)", re.I), "timing/schedule"),
+    (re.compile(r"\b(policy|policies|allowed|rule|rules|must|required)\b", re.I), "policy"),
+]
+
+# Signals that the question needs real reasoning rather than keyword lookup
+_COMPLEX_RE = re.compile(
+    r"\b(compare|difference|versus|vs\.?|why|should i|recommend|pros and cons|and also)\b",
+    re.I
+)
+
+
+@dataclass
+class QueryAnalysis:
+    """Result of a local query analysis."""
+
+    question: str
+    intent: str
+    keywords: List[str]
+    weights: Dict[str, float]
+    phrases: List[str] = field(default_factory=list)
+    acronyms: List[str] = field(default_factory=list)
+    space_key: Optional[str] = None
+    confidence: float = 0.0
+    elapsed_us: float = 0.0
+
+    @property
+    def search_query(self) -> str:
+        """Keywords ordered by weight, with phrases quoted."""
+        ordered = sorted(self.keywords, key=lambda k: self.weights.get(k, 0.0), reverse=True)
+        return " ".join([f'"{p}"' for p in self.phrases] + ordered)
+
+    def to_text(self) -> str:
+        """Render in the same structured format the LLM analyzer produces."""
+        space = f"restrict to space {self.space_key}" if self.space_key else "search all spaces"
+        return (
+            f"- Intent: {self.intent} question about {', '.join(self.keywords[:4]) or 'the topic'}\n"
+            f"- Keywords: {', '.join(self.phrases + self.keywords)}\n"
+            f"- Context needed: {'definitions of ' + ', '.join(self.acronyms) if self.acronyms else 'none beyond the matched pages'}\n"
+            f"- Search strategy: query \"{self.search_query}\", {space}; "
+            f"widen to related terms if fewer than 2 relevant pages are found"
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "intent": self.intent,
+            "keywords": self.keywords,
+            "phrases": self.phrases,
+            "acronyms": self.acronyms,
+            "space_key": self.space_key,
+            "search_query": self.search_query,
+            "confidence": round(self.confidence, 3),
+        }
+
+
+class FastQueryAnalyzer:
+    """Rule- and statistics-based replacement for the LLM query analyzer."""
+
+    def __init__(self, min_confidence: float = 0.6, spaces_ttl: float = 3600):
+        """Initialize the analyzer.
+
+        Args:
+            min_confidence: Analyses below this fall back to the LLM analyzer
+            spaces_ttl: Seconds before the cached space list is refreshed
+        """
+        self.min_confidence = min_confidence
+        self.spaces_ttl = spaces_ttl
+
+        self._spaces: Dict[str, str] = {}
+        self._space_names: Dict[str, str] = {}
+        self._spaces_loaded_at = 0.0
+        self._df_cache: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.total = 0
+        self.fast_path = 0
+
+    # Space list
+
+    def set_spaces(self, spaces: List[Dict[str, Any]]):
+        """Install the known spaces ({"key", "name"} dictionaries)."""
+        with self._lock:
+            self._spaces = {s["key"].upper(): s.get("name") or s["key"] for s in spaces if s.get("key")}
+            self._space_names = {name.lower(): key for key, name in self._spaces.items()}
+            self._spaces_loaded_at = time.time()
+
+    async def refresh_spaces(self, force: bool = False):
+        """Reload the space list from the mirror, or via MCP list_spaces.
+
+        Args:
+            force: Reload even if the cached list is still fresh
+        """
+        if not force and self._spaces and time.time() - self._spaces_loaded_at < self.spaces_ttl:
+            return
+
+        mirror = get_mirror()
+        spaces = mirror.list_spaces() if mirror is not None else []
+        if not spaces:
+            from .tools.mcp_client import get_mcp_client
+
+            listing = await get_mcp_client().list_spaces()
+            spaces = listing.get("spaces") or listing.get("results") or []
+        self.set_spaces(spaces)
+        self._df_cache.clear()
+
+    # Analysis
+
+    def analyze(self, question: str) -> QueryAnalysis:
+        """Analyze a user question.
+
+        Args:
+            question: Raw user question
+
+        Returns:
+            QueryAnalysis with keywords, space and a confidence in [0, 1]
+        """
+        started = time.perf_counter()
+
+        phrases = [p.strip() for p in _QUOTED_RE.findall(question)]
+        space_key = self._detect_space(question)
+
+        acronyms = []
+        for match in _ACRONYM_RE.findall(question):
+            acronym = match.rstrip("s") if match.endswith("s") and match[:-1].isupper() else match
+            if acronym not in self._spaces and acronym not in acronyms and acronym.lower() not in STOPWORDS:
+                acronyms.append(acronym)
+
+        keywords: List[str] = []
+        for word in _WORD_RE.findall(question):
+            lowered = word.lower()
+            if lowered in STOPWORDS or len(lowered) < 2:
+                continue
+            if space_key and (word.upper() == space_key or lowered in self._space_name_words(space_key)):
+                continue
+            if lowered == "space":
+                continue
+            if lowered not in keywords:
+                keywords.append(lowered)
+
+        idf = self._idf_weights(keywords)
+        weights = idf if idf is not None else {keyword: 1.0 for keyword in keywords}
+        intent = next((name for regex, name in _INTENTS if regex.search(question)), "information lookup")
+        confidence = self._confidence(question, keywords, idf)
+
+        return QueryAnalysis(
+            question=question,
+            intent=intent,
+            keywords=keywords,
+            weights=weights,
+            phrases=phrases,
+            acronyms=acronyms,
+            space_key=space_key,
+            confidence=confidence,
+            elapsed_us=(time.perf_counter() - started) * 1e6,
+        )
+
+    def try_fast_path(self, question: str) -> Optional[QueryAnalysis]:
+        """Analyze and return the result only if it is confident enough.
+
+        Also updates the fast-path counters.
+        """
+        analysis = self.analyze(question)
+        with self._lock:
+            self.total += 1
+            if analysis.confidence >= self.min_confidence:
+                self.fast_path += 1
+                return analysis
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the fraction of queries that took the fast path."""
+        with self._lock:
+            return {
+                "queries": self.total,
+                "fast_path": self.fast_path,
+                "fast_path_rate": self.fast_path / self.total if self.total else 0.0,
+                "known_spaces": len(self._spaces),
+            }
+
+    def _space_name_words(self, space_key: str) -> List[str]:
+        return self._spaces.get(space_key, "").lower().split()
+
+    def _detect_space(self, question: str) -> Optional[str]:
+        for token in re.findall(r"\b[A-Za-z][A-Za-z0-9]{1,15}\b", question):
+            if token.isupper() and token in self._spaces:
+                return token
+        lowered = question.lower()
+        for name, key in self._space_names.items():
+            if re.search(rf"\b{re.escape(name)}\b", lowered):
+                return key
+        match = re.search(r"\b(?:in|from) (?:the )?([A-Za-z]{2,10}) space\b", question, re.I)
+        if match and match.group(1).upper() in self._spaces:
+            return match.group(1).upper()
+        return None
+
+    def _idf_weights(self, keywords: List[str]) -> Optional[Dict[str, float]]:
+        """IDF of each keyword over the mirror, or None without a local corpus."""
+        mirror = get_mirror()
+        total = mirror.page_count() if mirror is not None else 0
+        if not total:
+            return None
+
+        weights = {}
+        for keyword in keywords:
+            df = self._df_cache.get(keyword)
+            if df is None:
+                df = mirror.document_frequency(keyword)
+                self._df_cache[keyword] = df
+            weights[keyword] = math.log(1 + (total - df + 0.5) / (df + 0.5)) if df else 0.0
+        return weights
+
+    def _confidence(
+        self,
+        question: str,
+        keywords: List[str],
+        idf: Optional[Dict[str, float]]
+    ) -> float:
+        if not keywords:
+            return 0.0
+
+        words = len(question.split())
+        confidence = 0.9
+        if len(keywords) == 1 and not _ACRONYM_RE.search(question):
+            confidence -= 0.3          # a single generic word is too vague
+        if words > 30:
+            confidence -= 0.3          # long, multi-part questions need reasoning
+        if _COMPLEX_RE.search(question):
+            confidence -= 0.4          # comparisons / advice
+        if question.count("?") > 1:
+            confidence -= 0.2          # several questions at once
+        if idf is not None and not any(idf.values()):
+            confidence -= 0.4          # nothing in the corpus matches any keyword
+        return max(0.0, min(1.0, confidence))
+
+
+# Shared analyzer instance
+fast_analyzer = FastQueryAnalyzer(min_confidence=FAST_ANALYZER_MIN_CONFIDENCE)
+
+
+def fast_path_model_callback(callback_context: CallbackContext, llm_request: LlmRequest) -> None:
+    """before_model_callback for query_analyzer in the ``llm`` workflow.
+
+    When the local analysis is confident, stores it in session state under
+    ``query_analysis`` and appends it to the request as a draft for the LLM
+    analyzer to confirm or correct. Always returns None, so the analyzer
+    still answers and hands control back to the coordinator.
+    """
+    user_content = callback_context.user_content
+    question = " ".join(
+        part.text for part in (user_content.parts or []) if getattr(part, "text", None)
+    ) if user_content else ""
+    if not question.strip():
+        return None
+
+    analysis = fast_analyzer.try_fast_path(question)
+    if analysis is None:
+        return None
+
+    callback_context.state["query_analysis"] = analysis.to_dict()
+    llm_request.append_instructions([
+        "A local keyword analysis of the question produced this draft. Keep it unless it misses "
+        "the user's intent:\n" + analysis.to_text()
+    ])
+    return None
@@ -0,0 +1,334 @@
+"""LLM response cache for deterministic sub-agent calls
+
+Identical model requests are sent over and over: the query_analyzer sees
+the same instruction and question for every repeat of a question, and
+sub-agents re-read the same tool outputs. The LLM cache answers those
+requests locally:
+
+- Requests are keyed by a SHA-256 over a canonical JSON dump of the model
+  name, the conversation contents, the system instruction, the tool
+  declarations and the sampling parameters (temperature, top_p, max
+  tokens, ...). Client-generated function call ids and thought signatures
+  differ on every run and are left out of the key
+- Responses live in an in-memory LRU (optionally with a TTL) and, when
+  LLM_CACHE_DB is set, in a SQLite tier that survives restarts
+- Only complete responses without an error code are stored; streamed
+  partial chunks are not. A hit replays the stored response as a single
+  complete response, so streaming clients get it in one piece
+
+Modes (LLM_CACHE_MODE):
+
+- ``off``: no caching
+- ``on``: cache calls of the agents listed in LLM_CACHE_AGENTS
+- ``record``: call the model for every agent and store every response,
+  overwriting older ones (refreshes recorded fixtures)
+- ``replay``: answer every agent's calls from the cache only; a request
+  that was never recorded raises LlmCacheMissError instead of reaching
+  the LLM proxy. Regression tests record once against the proxy, then
+  replay from LLM_CACHE_DB without it
+
+``llm_cache_lookup_callback`` (before_model_callback) serves hits and
+``llm_cache_store_callback`` (after_model_callback) stores responses. A
+hit skips the model call and with it the agent's after_model callbacks,
+so the lookup runs the agent's other after_model callbacks (e.g. the
+citation check) on the cached response itself.
+
+Configuration:
+- LLM_CACHE_MODE: off | on | record | replay (default: off)
+- LLM_CACHE_AGENTS: Agents cached in ``on`` mode (default: query_analyzer)
+- LLM_CACHE_MAX_ENTRIES: In-memory capacity (default: 1024)
+- LLM_CACHE_TTL: Entry lifetime in seconds, 0 for no expiry (default: 86400;
+  recorded entries never expire in record/replay mode)
+- LLM_CACHE_DB: SQLite file for the persistent tier (default: none)
+"""
+
+import hashlib
+import inspect
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+
+from .config import (
+    LLM_CACHE_AGENTS,
+    LLM_CACHE_DB,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_MODE,
+    LLM_CACHE_TTL,
+)
+
+# Config fields that do not change the model's answer
+_IGNORED_CONFIG_FIELDS = {"labels", "http_options"}
+
+
+class LlmCacheMissError(RuntimeError):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+def _canonical(value: Any) -> Any:
+    """Drop run-specific fields (function call ids, thought signatures)."""
+    if isinstance(value, dict):
+        result = {}
+        for key, item in value.items():
+            if key == "thought_signature":
+                continue
+            if key in ("function_call", "function_response") and isinstance(item, dict):
+                item = {k: v for k, v in item.items() if k != "id"}
+            result[key] = _canonical(item)
+        return result
+    if isinstance(value, list):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def make_request_key(llm_request: LlmRequest) -> str:
+    """Build the cache key for a model request.
+
+    Args:
+        llm_request: Fully assembled request (contents, instruction, tools)
+
+    Returns:
+        Hex SHA-256 of the canonical request
+    """
+    config = llm_request.config.model_dump(
+        mode="json", exclude_none=True, exclude=_IGNORED_CONFIG_FIELDS
+    ) if llm_request.config else {}
+    payload = {
+        "model": llm_request.model or "",
+        "contents": [content.model_dump(mode="json", exclude_none=True) for content in llm_request.contents],
+        "config": config,
+    }
+    canonical = json.dumps(_canonical(payload), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LlmResponseCache:
+    """LRU (+ optional SQLite) store of model responses by request key.
+
+    Thread-safe. Values are LlmResponse JSON dumps.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 86400,
+        db_path: Optional[str] = None
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of in-memory entries (LRU beyond that)
+            ttl: Entry lifetime in seconds; 0 keeps entries until evicted
+            db_path: Optional SQLite file for the persistent tier
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._hits: Counter = Counter()
+        self._misses: Counter = Counter()
+        self.disk_hits = 0
+        self.evictions = 0
+        self.stores = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY,"
+                " agent TEXT NOT NULL,"
+                " response TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key: str, agent: str, ttl: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Return the stored response for a request key, or None on a miss.
+
+        Args:
+            key: Key from make_request_key()
+            agent: Agent making the call (for per-agent metrics)
+            ttl: Override of the cache TTL (0 = no expiry)
+        """
+        ttl = self.ttl if ttl is None else ttl
+        oldest = time.time() - ttl if ttl else 0.0
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] >= oldest:
+                    self._entries.move_to_end(key)
+                    self._hits[agent] += 1
+                    return entry[0]
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT response, created_at FROM llm_cache WHERE key = ? AND created_at >= ?",
+                    (key, oldest)
+                ).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._store(key, value, row[1])
+                    self._hits[agent] += 1
+                    self.disk_hits += 1
+                    return value
+
+            self._misses[agent] += 1
+            return None
+
+    def set(self, key: str, agent: str, response: Dict[str, Any]):
+        """Store a response (memory and, if configured, disk)."""
+        now = time.time()
+        with self._lock:
+            self._store(key, response, now)
+            self.stores += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, agent, response, created_at) VALUES (?, ?, ?, ?)",
+                    (key, agent, json.dumps(response), now)
+                )
+                self._db.commit()
+
+    def clear(self):
+        """Remove every entry from memory and disk."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters, overall and per agent."""
+        with self._lock:
+            hits, misses = sum(self._hits.values()), sum(self._misses.values())
+            agents = sorted(set(self._hits) | set(self._misses))
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "disk_hits": self.disk_hits,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "agents": {
+                    agent: {"hits": self._hits[agent], "misses": self._misses[agent]}
+                    for agent in agents
+                },
+            }
+
+    def _store(self, key: str, value: Dict[str, Any], created_at: float):
+        self._entries[key] = (value, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+class LlmCachePolicy:
+    """Which agents are cached, and how, for a cache mode."""
+
+    MODES = ("off", "on", "record", "replay")
+
+    def __init__(self, mode: str = "off", agents: Iterable[str] = ()):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown LLM_CACHE_MODE {mode!r}; use one of {', '.join(self.MODES)}")
+        self.mode = mode
+        self.agents = frozenset(agents)
+
+    def applies_to(self, agent: str) -> bool:
+        if self.mode in ("record", "replay"):
+            return True
+        return self.mode == "on" and agent in self.agents
+
+    @property
+    def reads(self) -> bool:
+        return self.mode in ("on", "replay")
+
+    @property
+    def ttl(self) -> Optional[float]:
+        # Recorded fixtures never expire
+        return 0 if self.mode in ("record", "replay") else None
+
+
+# Shared LLM response cache and policy
+llm_cache = LlmResponseCache(
+    max_entries=LLM_CACHE_MAX_ENTRIES,
+    ttl=LLM_CACHE_TTL,
+    db_path=LLM_CACHE_DB,
+)
+llm_cache_policy = LlmCachePolicy(LLM_CACHE_MODE, LLM_CACHE_AGENTS)
+
+# Request keys of model calls in flight, by (invocation, agent); the
+# after_model callback has no access to the request
+_pending_keys: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+_MAX_PENDING = 1024
+
+
+async def llm_cache_lookup_callback(
+    callback_context: CallbackContext,
+    llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """before_model_callback: answer from the LLM cache on a hit."""
+    agent = callback_context.agent_name
+    if not llm_cache_policy.applies_to(agent):
+        return None
+
+    key = make_request_key(llm_request)
+    if llm_cache_policy.reads:
+        cached = llm_cache.get(key, agent, ttl=llm_cache_policy.ttl)
+        if cached is not None:
+            response = LlmResponse.model_validate(cached)
+            response.custom_metadata = {**(response.custom_metadata or {}), "llm_cache": "hit"}
+            return await _after_model_callbacks(callback_context, response)
+        if llm_cache_policy.mode == "replay":
+            raise LlmCacheMissError(
+                f"No recorded LLM response for agent {agent!r} (request {key[:12]}); "
+                "record it with LLM_CACHE_MODE=record"
+            )
+
+    _pending_keys[(callback_context.invocation_id, agent)] = key
+    while len(_pending_keys) > _MAX_PENDING:
+        _pending_keys.popitem(last=False)
+    return None
+
+
+def llm_cache_store_callback(
+    callback_context: CallbackContext,
+    llm_response: LlmResponse
+) -> Optional[LlmResponse]:
+    """after_model_callback: store complete responses of cached agents."""
+    if llm_response.partial:
+        return None
+    key = _pending_keys.pop((callback_context.invocation_id, callback_context.agent_name), None)
+    if key is None or llm_response.error_code or not llm_response.content:
+        return None
+
+    value = llm_response.model_dump(mode="json", exclude_none=True, exclude={"usage_metadata"})
+    # ADK assigns fresh ids to function calls that have none
+    for part in (value.get("content") or {}).get("parts") or []:
+        (part.get("function_call") or {}).pop("id", None)
+    llm_cache.set(key, callback_context.agent_name, value)
+    return None
+
+
+async def _after_model_callbacks(callback_context: CallbackContext, response: LlmResponse) -> LlmResponse:
+    """Run the agent's other after_model callbacks on a cached response."""
+    invocation = getattr(callback_context, "_invocation_context", None)
+    agent = getattr(invocation, "agent", None)
+    for callback in getattr(agent, "canonical_after_model_callbacks", None) or []:
+        if callback is llm_cache_store_callback:
+            continue
+        altered = callback(callback_context=callback_context, llm_response=response)
+        if inspect.isawaitable(altered):
+            altered = await altered
+        if altered is not None:
+            return altered
+    return response
@@ -0,0 +1,340 @@
+"""Result cache for Confluence MCP tool calls
+
+Bounded in-process cache with TTL expiry and LRU eviction, keyed on the MCP
+tool name and normalized arguments. Page entries remember the page's
+``lastModified`` value; whenever a newer version of a page is observed (in a
+search result, a recent-pages listing or a fresh fetch) every cached entry
+for that page is dropped.
+
+An optional SQLite tier keeps entries across restarts. It is written
+through on every store and consulted on an in-memory miss.
+
+Expired entries linger for ``max_stale`` seconds so that get_stale() can
+answer while the MCP server is unavailable (see resilience.py).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+# Argument names whose values are compared case-insensitively
+_CASE_INSENSITIVE_ARGS = {"query"}
+
+
+def _normalize(name: str, value: Any) -> Any:
+    if isinstance(value, str):
+        value = " ".join(value.split())
+        if name in _CASE_INSENSITIVE_ARGS:
+            value = value.lower()
+    return value
+
+
+def make_cache_key(tool_name: str, arguments: Dict[str, Any]) -> str:
+    """Build a cache key from a tool name and its arguments.
+
+    Whitespace is collapsed in string arguments, search queries are
+    lower-cased, ``None`` values are dropped and keys are sorted, so
+    equivalent calls share one entry.
+
+    Args:
+        tool_name: MCP tool name
+        arguments: Tool arguments
+
+    Returns:
+        Cache key string
+    """
+    normalized = {
+        name: _normalize(name, value)
+        for name, value in arguments.items()
+        if value is not None
+    }
+    return f"{tool_name}:{json.dumps(normalized, sort_keys=True, default=str)}"
+
+
+def page_versions(result: Dict[str, Any]) -> Iterable[Tuple[str, str]]:
+    """Yield (page_id, lastModified) pairs found in an MCP tool result.
+
+    Understands single page results as well as ``results``/``pages`` lists.
+    """
+    if not isinstance(result, dict):
+        return
+    if result.get("id") and result.get("lastModified"):
+        yield str(result["id"]), str(result["lastModified"])
+    for list_key in ("results", "pages"):
+        for item in result.get(list_key) or []:
+            if isinstance(item, dict) and item.get("id") and item.get("lastModified"):
+                yield str(item["id"]), str(item["lastModified"])
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "page_id", "version", "expired")
+
+    def __init__(
+        self,
+        value: Any,
+        expires_at: float,
+        page_id: Optional[str],
+        version: Optional[str]
+    ):
+        self.value = value
+        self.expires_at = expires_at
+        self.page_id = page_id
+        self.version = version
+        self.expired = False  # counted in ToolResultCache.expirations
+
+
+class ToolResultCache:
+    """TTL + LRU cache for MCP tool results with page version tracking.
+
+    Thread-safe; all operations are O(1) apart from invalidation, which is
+    proportional to the number of entries for the affected page.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 300,
+        db_path: Optional[str] = None,
+        max_stale: float = 3600
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of in-memory entries (LRU beyond that)
+            ttl: Entry lifetime in seconds
+            db_path: Optional SQLite file for the persistent tier
+            max_stale: Seconds past expiry an entry is kept for get_stale()
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_stale = max_stale
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._page_keys: Dict[str, Set[str]] = {}
+        self._versions: Dict[str, str] = {}
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.disk_hits = 0
+        self.stale_hits = 0
+        self._writes = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS tool_cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " page_id TEXT,"
+                " version TEXT)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS tool_cache_page ON tool_cache(page_id)"
+            )
+            self._db.commit()
+
+    @classmethod
+    def from_env(cls) -> Optional["ToolResultCache"]:
+        """Create a cache from CONFLUENCE_CACHE_* variables, or None if disabled."""
+        if os.getenv("CONFLUENCE_CACHE_ENABLED", "true").lower() != "true":
+            return None
+        return cls(
+            max_entries=int(os.getenv("CONFLUENCE_CACHE_MAX_ENTRIES", "1024")),
+            ttl=float(os.getenv("CONFLUENCE_CACHE_TTL", "300")),
+            db_path=os.getenv("CONFLUENCE_CACHE_DB") or None,
+            max_stale=float(os.getenv("CONFLUENCE_CACHE_MAX_STALE", "3600")),
+        )
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a fresh cached value, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.value
+                # Expired entries are kept a while longer for get_stale();
+                # each one counts as a single expiration however often it
+                # is looked up
+                if not entry.expired:
+                    entry.expired = True
+                    self.expirations += 1
+                if now - entry.expires_at > self.max_stale:
+                    self._drop(key)
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at, page_id, version FROM tool_cache WHERE key = ?",
+                    (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    value = json.loads(row[0])
+                    self._store(key, _Entry(value, row[1], row[2], row[3]))
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def get_stale(self, key: str) -> Optional[Any]:
+        """Return a value even if expired (up to max_stale past expiry).
+
+        Used when the MCP server is unavailable; entries invalidated by a
+        newer page version are gone and never served.
+        """
+        oldest = time.time() - self.max_stale
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > oldest:
+                self.stale_hits += 1
+                return entry.value
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value FROM tool_cache WHERE key = ? AND expires_at > ?",
+                    (key, oldest)
+                ).fetchone()
+                if row is not None:
+                    self.stale_hits += 1
+                    return json.loads(row[0])
+            return None
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        page_id: Optional[str] = None,
+        version: Optional[str] = None
+    ):
+        """Store a value.
+
+        Args:
+            key: Cache key from make_cache_key()
+            value: JSON-serializable tool result
+            page_id: Page the result belongs to, for version invalidation
+            version: The page's lastModified value at fetch time
+        """
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            if page_id and version:
+                self.observe_version(page_id, version)
+            self._store(key, _Entry(value, expires_at, page_id, version))
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO tool_cache (key, value, expires_at, page_id, version)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, json.dumps(value, default=str), expires_at, page_id, version)
+                )
+                self._writes += 1
+                if self._writes % 256 == 0:
+                    self._db.execute(
+                        "DELETE FROM tool_cache WHERE expires_at <= ?", (now - self.max_stale,)
+                    )
+                self._db.commit()
+
+    def observe_version(self, page_id: str, last_modified: str) -> bool:
+        """Record a page version seen in any MCP response.
+
+        Cached entries for the page that were fetched at a different
+        ``lastModified`` (in memory or on disk) are invalidated.
+
+        Returns:
+            True if cached entries were invalidated
+        """
+        with self._lock:
+            if self._versions.get(page_id) == last_modified:
+                return False
+            self._versions[page_id] = last_modified
+
+            stale = [
+                key for key in self._page_keys.get(page_id, ())
+                if self._entries[key].version != last_modified
+            ]
+            for key in stale:
+                self._drop(key)
+                self.invalidations += 1
+
+            if self._db is not None:
+                cursor = self._db.execute(
+                    "DELETE FROM tool_cache WHERE page_id = ? AND version IS NOT ?",
+                    (page_id, last_modified)
+                )
+                self._db.commit()
+                return bool(stale) or cursor.rowcount > 0
+            return bool(stale)
+
+    def observe_result(self, result: Dict[str, Any]):
+        """Feed every page version contained in a tool result to observe_version()."""
+        for page_id, last_modified in page_versions(result):
+            self.observe_version(page_id, last_modified)
+
+    def invalidate_page(self, page_id: str):
+        """Drop every cached entry belonging to a page."""
+        with self._lock:
+            for key in list(self._page_keys.get(page_id, ())):
+                self._drop(key)
+                self.invalidations += 1
+            if self._db is not None:
+                self._db.execute("DELETE FROM tool_cache WHERE page_id = ?", (page_id,))
+                self._db.commit()
+
+    def clear(self):
+        """Remove every entry from memory and disk."""
+        with self._lock:
+            self._entries.clear()
+            self._page_keys.clear()
+            self._versions.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM tool_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "disk_hits": self.disk_hits,
+                "stale_hits": self.stale_hits,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def _store(self, key: str, entry: _Entry):
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = entry
+        if entry.page_id:
+            self._page_keys.setdefault(entry.page_id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry.page_id:
+            keys = self._page_keys.get(entry.page_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._page_keys[entry.page_id]
@@ -0,0 +1,285 @@
+"""Section-level chunking and ranking of Confluence pages
+
+Whole page bodies are often tens of thousands of tokens. This module splits
+a page on its markdown headings, ranks the sections against the user's
+query with BM25 and picks the best ones that fit a token budget. Section
+text is never rewritten, so exact quotes taken from it stay valid.
+
+Chunked pages are cached by (page id, lastModified), so a page is only
+re-chunked after it changes.
+"""
+
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+# Sections larger than this are split further on paragraph boundaries
+MAX_SECTION_TOKENS = 800
+
+# BM25 parameters
+_K1 = 1.2
+_B = 0.75
+_HEADING_WEIGHT = 3
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the LLM token count of a text.
+
+    Uses the larger of ~4 characters per token and ~1.3 tokens per word,
+    which tracks BPE tokenizers closely enough for budgeting while costing
+    only a split and a len().
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count
+    """
+    if not text:
+        return 0
+    return int(max(len(text) / 4, len(text.split()) * 1.3)) + 1
+
+
+def _terms(text: str) -> List[str]:
+    return _TERM_RE.findall(text.lower())
+
+
+@dataclass
+class Section:
+    """A contiguous piece of a page under one heading."""
+
+    id: str
+    heading: str
+    level: int
+    path: List[str]
+    text: str
+    tokens: int
+    term_counts: Counter = field(default_factory=Counter, repr=False)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "id": self.id,
+            "heading": " > ".join(self.path) if self.path else self.heading,
+            "text": self.text,
+            "tokens": self.tokens,
+        }
+
+
+def _slug(text: str) -> str:
+    slug = re.sub(r"[^\w]+", "-", text.lower()).strip("-")
+    return slug or "section"
+
+
+def split_sections(content: str, max_tokens: int = MAX_SECTION_TOKENS) -> List[Section]:
+    """Split markdown page content into heading-delimited sections.
+
+    Headings inside fenced code blocks are ignored. Oversized sections are
+    split on blank lines into parts that each stay under ``max_tokens``
+    where possible.
+
+    Args:
+        content: Page body in markdown format
+        max_tokens: Soft size limit per section
+
+    Returns:
+        Sections in document order
+    """
+    raw: List[Tuple[str, int, List[str], List[str]]] = []
+    heading, level = "Introduction", 0
+    stack: List[Tuple[int, str]] = []
+    lines: List[str] = []
+    in_fence = False
+
+    for line in content.splitlines():
+        if _FENCE_RE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING_RE.match(line)
+        if match:
+            if any(part.strip() for part in lines):
+                raw.append((heading, level, [h for _, h in stack], lines))
+            level = len(match.group(1))
+            heading = match.group(2)
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            stack.append((level, heading))
+            lines = [line]
+        else:
+            lines.append(line)
+    if any(part.strip() for part in lines):
+        raw.append((heading, level, [h for _, h in stack], lines))
+
+    sections: List[Section] = []
+    seen: Counter = Counter()
+    for heading, level, path, body in raw:
+        for part in _split_oversized("\n".join(body).strip("\n"), max_tokens):
+            base = _slug(heading)
+            seen[base] += 1
+            section_id = base if seen[base] == 1 else f"{base}-{seen[base]}"
+            terms = Counter(_terms(part))
+            for term in _terms(heading):
+                terms[term] += _HEADING_WEIGHT
+            sections.append(Section(
+                id=section_id,
+                heading=heading,
+                level=level,
+                path=path,
+                text=part,
+                tokens=estimate_tokens(part),
+                term_counts=terms,
+            ))
+    return sections
+
+
+def _split_oversized(text: str, max_tokens: int) -> List[str]:
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+
+    parts: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for paragraph in re.split(r"\n\s*\n", text):
+        size = estimate_tokens(paragraph)
+        if current and current_tokens + size > max_tokens:
+            parts.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(paragraph)
+        current_tokens += size
+    if current:
+        parts.append("\n\n".join(current))
+    return parts
+
+
+def rank_sections(sections: List[Section], query: str) -> List[Tuple[float, Section]]:
+    """Score sections against a query with BM25 over the page's sections.
+
+    Args:
+        sections: Sections of one page
+        query: User query or search keywords
+
+    Returns:
+        (score, section) pairs, best first
+    """
+    query_terms = set(_terms(query))
+    if not sections:
+        return []
+    if not query_terms:
+        return [(0.0, section) for section in sections]
+
+    n = len(sections)
+    avg_len = sum(sum(s.term_counts.values()) for s in sections) / n or 1.0
+    doc_freq = {
+        term: sum(1 for s in sections if term in s.term_counts)
+        for term in query_terms
+    }
+
+    scored = []
+    for section in sections:
+        length = sum(section.term_counts.values())
+        score = 0.0
+        for term in query_terms:
+            tf = section.term_counts.get(term, 0)
+            if not tf:
+                continue
+            idf = math.log(1 + (n - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            score += idf * tf * (_K1 + 1) / (tf + _K1 * (1 - _B + _B * length / avg_len))
+        scored.append((score, section))
+
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return scored
+
+
+def select_sections(
+    sections: List[Section],
+    query: str,
+    token_budget: int
+) -> List[Section]:
+    """Pick the best-ranked sections that fit within a token budget.
+
+    Sections with no query match are only used when nothing matches. The
+    selection is returned in document order so the page still reads
+    naturally. At least one section is always returned.
+
+    Args:
+        sections: Sections of one page
+        query: User query or search keywords
+        token_budget: Maximum total tokens to return
+
+    Returns:
+        Selected sections in document order
+    """
+    ranked = rank_sections(sections, query)
+    if not ranked:
+        return []
+
+    matching = [item for item in ranked if item[0] > 0] or ranked
+
+    chosen: List[Section] = []
+    used = 0
+    for _, section in matching:
+        if used + section.tokens > token_budget and chosen:
+            continue
+        chosen.append(section)
+        used += section.tokens
+        if used >= token_budget:
+            break
+
+    order = {id(section): index for index, section in enumerate(sections)}
+    chosen.sort(key=lambda section: order[id(section)])
+    return chosen
+
+
+class SectionCache:
+    """LRU cache of chunked pages keyed by (page id, lastModified)."""
+
+    def __init__(self, max_pages: int = 512):
+        self.max_pages = max_pages
+        self._pages: "OrderedDict[Tuple[str, str], List[Section]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_sections(self, page_id: str, version: Optional[str], content: str) -> List[Section]:
+        """Return the chunked page, chunking it on a miss.
+
+        Args:
+            page_id: Confluence page ID
+            version: Page lastModified (older versions are dropped)
+            content: Page body, used only on a miss
+
+        Returns:
+            Sections of the page
+        """
+        key = (page_id, version or "")
+        with self._lock:
+            sections = self._pages.get(key)
+            if sections is not None:
+                self._pages.move_to_end(key)
+                self.hits += 1
+                return sections
+            self.misses += 1
+
+        sections = split_sections(content)
+
+        with self._lock:
+            for stale in [k for k in self._pages if k[0] == page_id]:
+                del self._pages[stale]
+            self._pages[key] = sections
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        return sections
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and size."""
+        with self._lock:
+            return {"pages": len(self._pages), "hits": self.hits, "misses": self.misses}
+
+
+# Shared cache instance
+section_cache = SectionCache()
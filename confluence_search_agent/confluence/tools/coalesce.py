@@ -0,0 +1,100 @@
+"""Single-flight coalescing for concurrent identical MCP calls
+
+When many sessions issue the same tool call at the same moment, only the
+first caller (the leader) actually sends it; everyone else awaits the same
+in-flight task. The shared task is shielded from individual callers: one
+caller being cancelled does not cancel the request for the others. The
+request is only cancelled once every caller waiting on it has gone away.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+def _consume_result(task: "asyncio.Task[Any]"):
+    # Mark the exception as retrieved so an abandoned flight does not log
+    # "Task exception was never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+class SingleFlight:
+    """Deduplicates concurrent awaits of the same key.
+
+    Flights are tracked per event loop, since a task can only be awaited
+    from the loop that created it.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Tuple[int, Hashable], _Flight] = {}
+
+        self.calls = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn`` once for all concurrent callers with the same key.
+
+        Args:
+            key: Identity of the call (e.g. tool name + normalized arguments)
+            fn: Coroutine factory that performs the call
+
+        Returns:
+            The shared result
+
+        Raises:
+            Whatever ``fn`` raises, re-raised in every waiting caller
+        """
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+
+        self.calls += 1
+        flight = self._inflight.get(flight_key)
+        if flight is None:
+            flight = _Flight(loop.create_task(fn()))
+            self._inflight[flight_key] = flight
+            flight.task.add_done_callback(
+                lambda task: self._finish(flight_key, task)
+            )
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is left to receive the result. Forget the flight now,
+                # so a caller arriving before the cancellation completes
+                # starts a new call instead of joining the cancelled one.
+                if self._inflight.get(flight_key) is flight:
+                    del self._inflight[flight_key]
+                flight.task.cancel()
+                self.abandoned += 1
+
+    def _finish(self, flight_key: Tuple[int, Hashable], task: "asyncio.Task[Any]"):
+        flight = self._inflight.get(flight_key)
+        if flight is not None and flight.task is task:
+            del self._inflight[flight_key]
+        _consume_result(task)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return coalescing counters."""
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalesce_rate": self.coalesced / self.calls if self.calls else 0.0,
+            "abandoned": self.abandoned,
+            "in_flight": len(self._inflight),
+        }
@@ -3,27 +3,100 @@
 This module provides tools to interact with Confluence via the MCP (Model Context Protocol) server.
 For more information about MCP integration with ADK, see:
 https://github.com/google/adk-docs/blob/main/docs/mcp/index.md
+
+Lookups are answered from the local mirror (see mirror.py) when it is
+enabled and has the answer; otherwise they go to the MCP server.
+
+Responses are encoded by encoding.py (compact JSON with short keys by
+default); the structures documented below use the full field names.
 """
 
 from typing import List, Dict, Any, Optional
-import json
-from datetime import datetime
+import asyncio
+import os
+import time
+
+import httpx
+from google.adk.tools import ToolContext
+
+from .chunking import section_cache, select_sections
+from .encoding import encoder
+from .mcp_client import MCPError, get_mcp_client
+from .mirror import get_mirror
+from .prefetch import prefetcher, session_id_of
+
+# Maximum concurrent per-space searches in search_across_spaces
+FANOUT_CONCURRENCY = int(os.getenv("CONFLUENCE_FANOUT_CONCURRENCY", "4"))
+
+
+def _error(message: str, **details: Any) -> str:
+    return encoder.encode({"error": message, **details})
+
+
+async def _fetch_page(page_id: str) -> Dict[str, Any]:
+    """Load a page from the mirror, or from the MCP server on a miss."""
+    prefetcher.record_access(page_id)
+
+    mirror = get_mirror()
+    if mirror is not None:
+        page = mirror.get_page(page_id)
+        if page is not None:
+            return page
+
+    return await get_mcp_client().get_page(page_id)
+
+
+async def _search(
+    query: str,
+    space_key: Optional[str],
+    max_results: int
+) -> Dict[str, Any]:
+    """Search the mirror, or the MCP server when the mirror has no matches."""
+    mirror = get_mirror()
+    if mirror is not None:
+        results = mirror.search(query, space_key=space_key, max_results=max_results)
+        if results is not None:
+            return results
+
+    return await get_mcp_client().search_content(
+        query=query, space_key=space_key, max_results=max_results
+    )
+
+
+def _normalized_scores(results: List[Dict[str, Any]]) -> List[float]:
+    """Map one space's result scores onto [0, 1] so spaces are comparable.
+
+    Uses min-max scaling of the backend "score" when every result has one,
+    otherwise falls back to rank position.
+    """
+    scores = [result.get("score") for result in results]
+    if results and all(isinstance(score, (int, float)) for score in scores):
+        low, high = min(scores), max(scores)
+        if high > low:
+            return [(score - low) / (high - low) for score in scores]
+        return [1.0] * len(results)
+    return [1.0 - index / len(results) for index in range(len(results))]
 
 
-def search_confluence(
+async def search_confluence(
     query: str,
     space_key: Optional[str] = None,
-    max_results: int = 5
+    max_results: int = 5,
+    fields: Optional[List[str]] = None,
+    tool_context: Optional[ToolContext] = None
 ) -> str:
     """Search for content in Confluence.
 
-    This function interfaces with the Confluence MCP server to search for pages
-    matching the given query.
+    This function searches the local Confluence mirror first and falls back
+    to the Confluence MCP server when the mirror has no matches.
 
     Args:
         query: Search query string
         space_key: Optional Confluence space key to limit search scope
         max_results: Maximum number of results to return (default: 5)
+        fields: Optional list of fields to return per page/result (e.g.
+                ["title", "url"]); "id" is always included
+        tool_context: Injected by ADK; used to scope page prefetching
 
     Returns:
         JSON string containing search results with the following structure:
@@ -42,39 +115,23 @@ def search_confluence(
             "total": 10,
             "query": "original search query"
         }
-
-    Note: In production, this would call the actual Confluence MCP server.
-    For now, it returns a mock response structure.
     """
-    # TODO: Implement actual MCP server communication
-    # This is a placeholder that shows the expected response format
-
-    mock_results = {
-        "results": [
-            {
-                "id": f"page_{i}",
-                "title": f"Example Page {i} matching '{query}'",
-                "url": f"https://confluence.company.com/display/SPACE/Page{i}",
-                "space": space_key or "GENERAL",
-                "excerpt": f"This page contains information about {query}...",
-                "lastModified": datetime.now().isoformat(),
-                "author": "Documentation Team"
-            }
-            for i in range(min(max_results, 3))
-        ],
-        "total": 3,
-        "query": query,
-        "space_filter": space_key
-    }
+    try:
+        results = await _search(query, space_key, max_results)
+    except (MCPError, httpx.HTTPError) as e:
+        return _error(f"Confluence search failed: {e}", query=query)
 
-    return json.dumps(mock_results, indent=2)
+    prefetcher.schedule(results.get("results") or [], session_id_of(tool_context))
+    return encoder.encode(results, fields)
 
 
-def get_page_content(page_id: str) -> str:
+async def get_page_content(page_id: str, fields: Optional[List[str]] = None) -> str:
     """Retrieve full content of a Confluence page.
 
     Args:
         page_id: Confluence page ID
+        fields: Optional list of fields to return per page/result (e.g.
+                ["title", "url"]); "id" is always included
 
     Returns:
         JSON string containing page details:
@@ -89,26 +146,78 @@ def get_page_content(page_id: str) -> str:
             "labels": ["tag1", "tag2"]
         }
     """
-    # TODO: Implement actual MCP server communication
+    try:
+        page = await _fetch_page(page_id)
+    except (MCPError, httpx.HTTPError) as e:
+        return _error(f"Could not retrieve page {page_id}: {e}", page_id=page_id)
 
-    mock_content = {
-        "id": page_id,
-        "title": f"Page {page_id}",
-        "url": f"https://confluence.company.com/display/SPACE/{page_id}",
-        "content": f"# Page {page_id}\n\nThis is the full content of the page...\n\n## Section 1\nDetailed information here...",
-        "space": "GENERAL",
-        "lastModified": datetime.now().isoformat(),
-        "author": "Documentation Team",
-        "labels": ["documentation", "guide"]
-    }
+    return encoder.encode(page, fields)
 
-    return json.dumps(mock_content, indent=2)
 
+async def get_page_sections(
+    page_id: str,
+    query: str,
+    token_budget: int = 1500,
+    fields: Optional[List[str]] = None
+) -> str:
+    """Retrieve only the sections of a page most relevant to a query.
 
-def search_in_space(
+    Prefer this over get_page_content for long pages. The page is split on
+    its headings, sections are ranked against the query and the best ones
+    that fit in the token budget are returned verbatim, in page order, so
+    they can be quoted exactly.
+
+    Args:
+        page_id: Confluence page ID
+        query: The question or keywords the sections should answer
+        token_budget: Approximate maximum tokens of section text to return
+        fields: Optional list of page and section fields to return (e.g.
+                ["url", "heading", "text"]); "id" is always included
+
+    Returns:
+        JSON string containing the selected sections:
+        {
+            "id": "page_id",
+            "title": "Page Title",
+            "url": "https://confluence.../display/...",
+            "lastModified": "2024-01-15T10:30:00Z",
+            "sections": [
+                {"id": "section-id", "heading": "Parent > Heading",
+                 "text": "Exact section text", "tokens": 120}
+            ],
+            "total_sections": 12,
+            "page_tokens": 9000,
+            "returned_tokens": 1400
+        }
+    """
+    try:
+        page = await _fetch_page(page_id)
+    except (MCPError, httpx.HTTPError) as e:
+        return _error(f"Could not retrieve page {page_id}: {e}", page_id=page_id)
+
+    sections = section_cache.get_sections(
+        page_id, page.get("lastModified"), page.get("content") or ""
+    )
+    chosen = select_sections(sections, query, token_budget)
+
+    return encoder.encode({
+        "id": page.get("id", page_id),
+        "title": page.get("title"),
+        "url": page.get("url"),
+        "lastModified": page.get("lastModified"),
+        "sections": [section.to_dict() for section in chosen],
+        "total_sections": len(sections),
+        "page_tokens": sum(section.tokens for section in sections),
+        "returned_tokens": sum(section.tokens for section in chosen),
+    }, fields)
+
+
+async def search_in_space(
     space_key: str,
     query: str,
-    max_results: int = 5
+    max_results: int = 5,
+    fields: Optional[List[str]] = None,
+    tool_context: Optional[ToolContext] = None
 ) -> str:
     """Search within a specific Confluence space.
 
@@ -116,22 +225,107 @@ def search_in_space(
         space_key: Confluence space key (e.g., "ENG", "PROD", "HR")
         query: Search query string
         max_results: Maximum number of results to return
+        fields: Optional list of fields to return per page/result (e.g.
+                ["title", "url"]); "id" is always included
+        tool_context: Injected by ADK; used to scope page prefetching
 
     Returns:
         JSON string with search results (same format as search_confluence)
     """
-    return search_confluence(query=query, space_key=space_key, max_results=max_results)
+    return await search_confluence(
+        query=query, space_key=space_key, max_results=max_results,
+        fields=fields, tool_context=tool_context
+    )
+
+
+async def search_across_spaces(
+    query: str,
+    space_keys: List[str],
+    max_results: int = 5,
+    fields: Optional[List[str]] = None,
+    tool_context: Optional[ToolContext] = None
+) -> str:
+    """Search several Confluence spaces at once and merge the results.
+
+    Use this instead of calling search_in_space once per space. The
+    per-space searches run concurrently; scores are normalized per space,
+    duplicate pages are merged and a single ranked list is returned.
+
+    Args:
+        query: Search query string
+        space_keys: Space keys to search (e.g., ["ENG", "PROD", "HR"])
+        max_results: Maximum number of merged results to return
+        fields: Optional list of fields to return per page/result (e.g.
+                ["title", "url"]); "id" is always included
+        tool_context: Injected by ADK; used to scope page prefetching
+
+    Returns:
+        JSON string with merged search results:
+        {
+            "results": [ {... search_confluence result fields ..., "score": 0.93} ],
+            "total": 7,
+            "query": "original search query",
+            "spaces": {
+                "ENG": {"results": 4, "latency_ms": 12.5},
+                "HR": {"results": 0, "latency_ms": 8.1, "error": "..."}
+            }
+        }
+    """
+    semaphore = asyncio.Semaphore(FANOUT_CONCURRENCY)
+
+    async def search_space(space_key: str):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                found = await _search(query, space_key, max_results)
+                error = None
+            except (MCPError, httpx.HTTPError) as e:
+                found, error = {}, str(e)
+            return space_key, found, error, (time.perf_counter() - started) * 1000
+
+    unique_spaces = list(dict.fromkeys(space_keys))
+    outcomes = await asyncio.gather(*(search_space(key) for key in unique_spaces))
+
+    merged: Dict[str, Dict[str, Any]] = {}
+    breakdown: Dict[str, Dict[str, Any]] = {}
+    for space_key, found, error, latency_ms in outcomes:
+        results = found.get("results") or []
+        breakdown[space_key] = {"results": len(results), "latency_ms": round(latency_ms, 1)}
+        if error:
+            breakdown[space_key]["error"] = error
+
+        for result, score in zip(results, _normalized_scores(results)):
+            page_id = str(result.get("id"))
+            existing = merged.get(page_id)
+            if existing is None or score > existing["score"]:
+                merged[page_id] = {**result, "space": result.get("space") or space_key,
+                                   "score": round(score, 4)}
+
+    ranked = sorted(merged.values(), key=lambda result: result["score"], reverse=True)
+    prefetcher.schedule(ranked, session_id_of(tool_context))
+
+    return encoder.encode({
+        "results": ranked[:max_results],
+        "total": len(ranked),
+        "query": query,
+        "spaces": breakdown,
+    }, fields)
 
 
-def list_recent_pages(
+async def list_recent_pages(
     space_key: Optional[str] = None,
-    limit: int = 10
+    limit: int = 10,
+    fields: Optional[List[str]] = None
 ) -> str:
     """List recently updated pages.
 
+    Always asks the MCP server, since the point is to see the latest changes.
+
     Args:
         space_key: Optional space key to filter results
         limit: Maximum number of pages to return
+        fields: Optional list of fields to return per page/result (e.g.
+                ["title", "url"]); "id" is always included
 
     Returns:
         JSON string containing list of recent pages:
@@ -149,48 +343,41 @@ def list_recent_pages(
             "space_filter": "SPACE_KEY" or null
         }
     """
-    # TODO: Implement actual MCP server communication
-
-    mock_pages = {
-        "pages": [
-            {
-                "id": f"recent_{i}",
-                "title": f"Recently Updated Page {i}",
-                "url": f"https://confluence.company.com/display/SPACE/Recent{i}",
-                "space": space_key or "GENERAL",
-                "lastModified": datetime.now().isoformat(),
-                "author": "Documentation Team"
-            }
-            for i in range(min(limit, 5))
-        ],
-        "space_filter": space_key
-    }
+    try:
+        pages = await get_mcp_client().list_recent_pages(space_key=space_key, limit=limit)
+    except (MCPError, httpx.HTTPError) as e:
+        return _error(f"Could not list recent pages: {e}", space_filter=space_key)
 
-    return json.dumps(mock_pages, indent=2)
+    pages.setdefault("space_filter", space_key)
+    return encoder.encode(pages, fields)
 
 
-def get_page_by_title(title: str, space_key: Optional[str] = None) -> str:
+async def get_page_by_title(
+    title: str,
+    space_key: Optional[str] = None,
+    fields: Optional[List[str]] = None
+) -> str:
     """Find a page by its exact title.
 
     Args:
         title: Exact page title to search for
         space_key: Optional space key to narrow search
+        fields: Optional list of fields to return per page/result (e.g.
+                ["title", "url"]); "id" is always included
 
     Returns:
         JSON string with page details (same format as get_page_content)
         or error message if page not found
     """
-    # TODO: Implement actual MCP server communication
-
-    mock_page = {
-        "id": "found_page",
-        "title": title,
-        "url": f"https://confluence.company.com/display/SPACE/{title.replace(' ', '+')}",
-        "content": f"# {title}\n\nContent of the page titled '{title}'...",
-        "space": space_key or "GENERAL",
-        "lastModified": datetime.now().isoformat(),
-        "author": "Documentation Team",
-        "labels": []
-    }
-
-    return json.dumps(mock_page, indent=2)
+    mirror = get_mirror()
+    if mirror is not None:
+        page = mirror.get_page_by_title(title, space_key=space_key)
+        if page is not None:
+            return encoder.encode(page, fields)
+
+    try:
+        page = await get_mcp_client().get_page_by_title(title, space_key=space_key)
+    except (MCPError, httpx.HTTPError) as e:
+        return _error(f"Page '{title}' not found: {e}", title=title, space_filter=space_key)
+
+    return encoder.encode(page, fields)
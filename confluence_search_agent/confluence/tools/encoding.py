@@ -0,0 +1,243 @@
+"""Output encoding for Confluence tool responses
+
+Tool responses are fed back into the LLM context on every call, so their
+size matters. Encoders:
+
+- ``pretty``: indented JSON (the original format)
+- ``compact``: minified JSON; responses holding lists of records also
+  get short keys plus a legend of the short keys used, so the model can
+  still read the fields (for a single page the legend would cost more
+  than it saves)
+- ``table``: compact, plus lists of records (search results, recent
+  pages) rendered as tab-separated rows under a single header line
+
+Every tool also accepts a ``fields`` projection so the model can ask for
+just the fields it needs. JSON serialization uses orjson when installed.
+
+Configuration:
+- CONFLUENCE_TOOL_OUTPUT: pretty | compact | table (default: compact)
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+# Long field name -> short key used by the compact encoders
+SHORT_KEYS = {
+    "id": "id",
+    "title": "t",
+    "url": "u",
+    "space": "s",
+    "excerpt": "x",
+    "lastModified": "m",
+    "author": "a",
+    "content": "c",
+    "labels": "l",
+    "score": "sc",
+    "results": "r",
+    "pages": "p",
+    "total": "n",
+    "query": "q",
+    "space_filter": "sf",
+    "source": "src",
+    "sections": "sec",
+    "heading": "h",
+    "text": "tx",
+    "tokens": "tk",
+}
+
+# Keys holding lists of records that the table encoder renders as rows
+_RECORD_LISTS = ("results", "pages")
+
+# Fields always kept by a projection, so results stay addressable
+_ALWAYS_KEPT = ("id",)
+
+# Page fields a projection may drop from a get_page_sections response; its
+# other top-level keys (sections, total_sections, ...) are always kept
+_PAGE_FIELDS = ("title", "url", "space", "lastModified", "author", "labels", "content", "excerpt")
+
+
+def dumps(value: Any, indent: bool = False) -> str:
+    """Serialize to JSON, using orjson when available.
+
+    Args:
+        value: JSON-serializable value
+        indent: Pretty-print with 2-space indentation
+
+    Returns:
+        JSON string
+    """
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(value, option=option, default=str).decode()
+    if indent:
+        return json.dumps(value, indent=2, default=str)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def project(payload: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """Keep only the requested fields of a page or of each listed record.
+
+    Top-level bookkeeping keys (total, query, error, ...) are kept; the
+    projection applies to page dictionaries and to the records inside
+    ``results``/``pages``. For a get_page_sections response it applies to
+    the page fields and to each entry of ``sections``. ``id`` is always
+    kept.
+
+    Args:
+        payload: Tool response dictionary
+        fields: Field names to keep (None or empty keeps everything)
+
+    Returns:
+        Projected copy of the payload
+    """
+    if not fields or not isinstance(payload, dict):
+        return payload
+
+    keep = set(fields) | set(_ALWAYS_KEPT)
+
+    def pick(record: Any) -> Any:
+        if not isinstance(record, dict):
+            return record
+        return {key: value for key, value in record.items() if key in keep}
+
+    if isinstance(payload.get("sections"), list):
+        projected = {
+            key: value for key, value in payload.items() if key in keep or key not in _PAGE_FIELDS
+        }
+        projected["sections"] = [pick(section) for section in payload["sections"]]
+        return projected
+
+    if any(isinstance(payload.get(key), list) for key in _RECORD_LISTS):
+        projected = dict(payload)
+        for key in _RECORD_LISTS:
+            if isinstance(payload.get(key), list):
+                projected[key] = [pick(record) for record in payload[key]]
+        return projected
+
+    if "error" in payload:
+        return payload
+
+    return pick(payload)
+
+
+def _shorten(value: Any, used: Dict[str, str]) -> Any:
+    if isinstance(value, dict):
+        shortened = {}
+        for key, item in value.items():
+            short = SHORT_KEYS.get(key, key)
+            if short != key:
+                used[short] = key
+            shortened[short] = _shorten(item, used)
+        return shortened
+    if isinstance(value, list):
+        return [_shorten(item, used) for item in value]
+    return value
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        value = dumps(value)
+    return " ".join(str(value).split())
+
+
+def _table(records: List[Dict[str, Any]]) -> str:
+    columns: List[str] = []
+    for record in records:
+        for key in record:
+            if key not in columns:
+                columns.append(key)
+    lines = ["\t".join(columns)]
+    lines.extend("\t".join(_cell(record.get(column)) for column in columns) for record in records)
+    return "\n".join(lines)
+
+
+class ToolOutputEncoder:
+    """Encodes tool response dictionaries into strings for the LLM."""
+
+    MODES = ("pretty", "compact", "table")
+
+    def __init__(self, mode: str = "compact"):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown tool output mode {mode!r}; expected one of {self.MODES}")
+        self.mode = mode
+
+    @classmethod
+    def from_env(cls) -> "ToolOutputEncoder":
+        """Create an encoder from CONFLUENCE_TOOL_OUTPUT."""
+        return cls(os.getenv("CONFLUENCE_TOOL_OUTPUT", "compact").lower())
+
+    def encode(self, payload: Dict[str, Any], fields: Optional[List[str]] = None) -> str:
+        """Project and encode a tool response.
+
+        Args:
+            payload: Tool response dictionary
+            fields: Optional projection (see project())
+
+        Returns:
+            Encoded response string
+        """
+        payload = project(payload, fields)
+
+        if self.mode == "pretty":
+            return dumps(payload, indent=True)
+
+        if self.mode == "table" and isinstance(payload, dict):
+            list_key = next(
+                (key for key in _RECORD_LISTS
+                 if isinstance(payload.get(key), list) and payload[key]
+                 and all(isinstance(record, dict) for record in payload[key])),
+                None
+            )
+            if list_key is not None:
+                header = {key: value for key, value in payload.items() if key != list_key}
+                head = dumps(header) if header else ""
+                return f"{head}\n{list_key}:\n{_table(payload[list_key])}".lstrip("\n")
+
+        has_records = isinstance(payload, dict) and any(
+            isinstance(payload.get(key), list) and len(payload[key]) > 1 for key in _RECORD_LISTS
+        )
+        if not has_records:
+            return dumps(payload)
+
+        used: Dict[str, str] = {}
+        shortened = _shorten(payload, used)
+        return dumps({"keys": used, **shortened})
+
+
+def _expand(value: Any, legend: Dict[str, str]) -> Any:
+    if isinstance(value, dict):
+        return {legend.get(key, key): _expand(item, legend) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_expand(item, legend) for item in value]
+    return value
+
+
+def decode(text: str) -> Optional[Any]:
+    """Parse a ``pretty`` or ``compact`` tool response back into long keys.
+
+    Args:
+        text: Encoded tool response
+
+    Returns:
+        The response payload, or None if it is not JSON (e.g. ``table``)
+    """
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        return None
+    if isinstance(payload, dict) and isinstance(payload.get("keys"), dict):
+        legend = payload.pop("keys")
+        return _expand(payload, legend)
+    return payload
+
+
+# Shared encoder instance used by the tools
+encoder = ToolOutputEncoder.from_env()
@@ -8,10 +8,21 @@ References:
 
 import os
 import json
-from typing import Dict, Any, Optional, List
+import asyncio
+from typing import Dict, Any, Callable, Optional, List, Tuple, Union
 import httpx
 from datetime import datetime
 
+from .cache import ToolResultCache, make_cache_key
+from .coalesce import SingleFlight
+from .resilience import (
+    CircuitOpenError,
+    DeadlineExceededError,
+    ResiliencePolicy,
+    ResilientCaller,
+)
+from .transport import MCPTransport, TransportConfig
+
 
 class ConfluenceMCPClient:
     """Client for communicating with Confluence MCP Server.
@@ -22,6 +33,18 @@ class ConfluenceMCPClient:
     Configuration:
     - CONFLUENCE_MCP_SERVER_URL: URL of your MCP server (e.g., http://mcp-server:3000)
     - CONFLUENCE_MCP_API_TOKEN: Optional auth token for MCP server
+    - CONFLUENCE_MCP_MAX_CONNECTIONS / CONFLUENCE_MCP_MAX_KEEPALIVE /
+      CONFLUENCE_MCP_KEEPALIVE_EXPIRY / CONFLUENCE_MCP_POOL_TIMEOUT /
+      CONFLUENCE_MCP_HTTP2: Connection pool tuning (see transport.py)
+    - CONFLUENCE_CACHE_ENABLED / CONFLUENCE_CACHE_TTL /
+      CONFLUENCE_CACHE_MAX_ENTRIES / CONFLUENCE_CACHE_DB: Result cache
+      for search and page fetches (see cache.py)
+    - CONFLUENCE_MCP_COALESCE: Share one in-flight request between
+      concurrent identical tool calls (see coalesce.py)
+    - CONFLUENCE_MCP_RESILIENCE / CONFLUENCE_MCP_HEDGE* /
+      CONFLUENCE_MCP_MAX_RETRIES / CONFLUENCE_MCP_BREAKER_* /
+      CONFLUENCE_MCP_TOOL_TIMEOUTS: Hedged requests, retries, circuit
+      breaking and per-tool deadlines (see resilience.py)
 
     The MCP server itself needs these configured internally:
     - CONFLUENCE_BASE_URL
@@ -33,7 +56,9 @@ class ConfluenceMCPClient:
         self,
         mcp_server_url: Optional[str] = None,
         api_token: Optional[str] = None,
-        timeout: int = 30
+        timeout: int = 30,
+        transport_config: Optional[TransportConfig] = None,
+        cache: Optional[ToolResultCache] = None
     ):
         """Initialize MCP client.
 
@@ -43,6 +68,10 @@ class ConfluenceMCPClient:
                            All Confluence operations go through this MCP server.
             api_token: Optional authentication token for MCP server
             timeout: Request timeout in seconds
+            transport_config: Connection pool settings
+                              (defaults to CONFLUENCE_MCP_* environment variables)
+            cache: Result cache for search/page calls
+                   (defaults to ToolResultCache.from_env(), None if disabled)
         """
         self.server_url = mcp_server_url or os.getenv(
             "CONFLUENCE_MCP_SERVER_URL",
@@ -56,12 +85,42 @@ class ConfluenceMCPClient:
         if self.api_token:
             headers["Authorization"] = f"Bearer {self.api_token}"
 
-        self.client = httpx.AsyncClient(
+        # Pooled transport shared by every session using this client;
+        # one underlying httpx client is kept per event loop
+        self.transport = MCPTransport(
             base_url=self.server_url,
             headers=headers,
-            timeout=timeout
+            timeout=timeout,
+            config=transport_config
         )
 
+        # JSON-RPC batching; switched off automatically if the server
+        # rejects batch arrays
+        self.batch_supported = os.getenv("CONFLUENCE_MCP_BATCH", "true").lower() == "true"
+        self.max_batch_size = int(os.getenv("CONFLUENCE_MCP_MAX_BATCH", "20"))
+
+        # Search and page results are cached; see cache.py
+        self.cache = cache if cache is not None else ToolResultCache.from_env()
+
+        # Callables fed every search/page/listing result, e.g. to invalidate
+        # answers built from pages that changed (see answer_cache.py)
+        self.result_observers: List[Callable[[Dict[str, Any]], None]] = []
+
+        # Concurrent identical tool calls share one request; every
+        # Confluence MCP tool is read-only, so this is always safe
+        self.coalesce = os.getenv("CONFLUENCE_MCP_COALESCE", "true").lower() == "true"
+        self._single_flight = SingleFlight()
+
+        # Hedging, retries, circuit breaking and deadlines; see resilience.py
+        self.resilience: Optional[ResilientCaller] = None
+        if os.getenv("CONFLUENCE_MCP_RESILIENCE", "true").lower() == "true":
+            self.resilience = ResilientCaller(ResiliencePolicy.from_env(timeout))
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client for the current event loop."""
+        return self.transport.client
+
     async def call_tool(
         self,
         tool_name: str,
@@ -73,40 +132,56 @@ class ConfluenceMCPClient:
             tool_name: Name of the MCP tool to call
             arguments: Tool arguments as dictionary
 
+        Concurrent calls with the same tool name and normalized arguments
+        are coalesced into a single request, which then runs under the
+        resilience policy (hedging, retries, circuit breaker, deadline).
+
         Returns:
             Tool response as dictionary
 
         Raises:
             httpx.HTTPError: If the request fails
+            MCPUnavailableError: If the call timed out, the tool's circuit
+                                 is open or the request budget is exhausted
         """
-        # MCP protocol format
-        request_payload = {
-            "jsonrpc": "2.0",
-            "id": self._generate_request_id(),
-            "method": "tools/call",
-            "params": {
-                "name": tool_name,
-                "arguments": arguments
-            }
-        }
+        try:
+            if not self.coalesce:
+                return await self._resilient_call(tool_name, arguments)
+
+            return await self._single_flight.do(
+                make_cache_key(tool_name, arguments),
+                lambda: self._resilient_call(tool_name, arguments)
+            )
+        except (CircuitOpenError, DeadlineExceededError, asyncio.TimeoutError) as e:
+            raise MCPUnavailableError(f"MCP Unavailable: {e}") from e
+
+    async def _resilient_call(
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        if self.resilience is None:
+            return await self._send_tool_call(tool_name, arguments)
+        return await self.resilience.call(
+            tool_name, lambda: self._send_tool_call(tool_name, arguments)
+        )
+
+    async def _send_tool_call(
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Send one tools/call request to the MCP server."""
+        request_payload = self._build_request(tool_name, arguments)
 
         try:
-            response = await self.client.post(
+            response = await self.transport.post(
                 "/mcp/v1/call",
                 json=request_payload
             )
             response.raise_for_status()
 
-            result = response.json()
-
-            # Handle MCP error responses
-            if "error" in result:
-                error = result["error"]
-                raise MCPError(
-                    f"MCP Error {error.get('code')}: {error.get('message')}"
-                )
-
-            return result.get("result", {})
+            return self._unwrap_response(response.json())
 
         except httpx.HTTPError as e:
             print(f"MCP Client HTTP Error: {e}")
@@ -115,11 +190,164 @@ class ConfluenceMCPClient:
             print(f"MCP Client Error: {e}")
             raise
 
+    async def call_tools_many(
+        self,
+        calls: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Union[Dict[str, Any], "MCPError"]]:
+        """Call several MCP tools in as few round trips as possible.
+
+        The calls are sent as JSON-RPC 2.0 batch arrays (split into chunks of
+        at most ``max_batch_size``). Responses are matched back to calls by
+        ``id``, so the server may answer in any order. If the server says it
+        does not support batches (404/405/501, or a single error object in
+        reply to an array), the client remembers that and falls back to
+        concurrent single calls. A chunk that is too large (413) is split and
+        retried; a chunk rejected for any other reason is sent as single calls
+        without giving up on batching.
+
+        Args:
+            calls: List of (tool_name, arguments) pairs
+
+        Returns:
+            One entry per call, in the same order as ``calls``: the tool
+            response dictionary, or an MCPError instance if that item failed
+
+        Raises:
+            httpx.HTTPError: If a batch request fails at the transport level
+        """
+        if not calls:
+            return []
+
+        if not self.batch_supported or len(calls) == 1:
+            return await self._call_tools_concurrently(calls)
+
+        results: List[Union[Dict[str, Any], MCPError]] = []
+        for start in range(0, len(calls), self.max_batch_size):
+            chunk = calls[start:start + self.max_batch_size]
+            chunk_results = await self._call_batch(chunk)
+            if chunk_results is None:
+                # Server does not accept batches; finish with single calls
+                self.batch_supported = False
+                results.extend(await self._call_tools_concurrently(calls[start:]))
+                break
+            results.extend(chunk_results)
+
+        return results
+
+    async def _call_batch(
+        self,
+        calls: List[Tuple[str, Dict[str, Any]]]
+    ) -> Optional[List[Union[Dict[str, Any], "MCPError"]]]:
+        """Send one JSON-RPC batch array.
+
+        Returns:
+            Per-call results in call order, or None if the server does not
+            support the batch format
+        """
+        payloads = [self._build_request(name, args) for name, args in calls]
+
+        try:
+            response = await self.transport.post("/mcp/v1/call", json=payloads)
+            if response.status_code in _BATCH_UNSUPPORTED_STATUS:
+                return None
+            if response.status_code == 413 and len(calls) > 1:
+                # Too large: split the chunk and retry both halves
+                middle = len(calls) // 2
+                first = await self._call_batch(calls[:middle])
+                second = await self._call_batch(calls[middle:]) if first is not None else None
+                return None if second is None else first + second
+            if 400 <= response.status_code < 500:
+                # This batch was rejected (malformed, unsupported item, ...);
+                # answer it with single calls and keep batching the next ones
+                return await self._call_tools_concurrently(calls)
+            response.raise_for_status()
+            body = response.json()
+        except httpx.HTTPError as e:
+            print(f"MCP Client HTTP Error: {e}")
+            raise
+        except ValueError:
+            # Unparseable reply to this batch only
+            return await self._call_tools_concurrently(calls)
+
+        # A single error object in reply to an array means the server only
+        # understands single requests
+        if not isinstance(body, list):
+            return None
+
+        by_id = {item.get("id"): item for item in body if isinstance(item, dict)}
+
+        results: List[Union[Dict[str, Any], MCPError]] = []
+        for payload in payloads:
+            item = by_id.get(payload["id"])
+            if item is None:
+                results.append(MCPError(
+                    f"MCP Error: no response for request {payload['id']}"
+                ))
+                continue
+            try:
+                results.append(self._unwrap_response(item))
+            except MCPError as e:
+                results.append(e)
+
+        return results
+
+    async def _call_tools_concurrently(
+        self,
+        calls: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Union[Dict[str, Any], "MCPError"]]:
+        """Fallback for servers without batch support."""
+        outcomes = await asyncio.gather(
+            *(self.call_tool(name, args) for name, args in calls),
+            return_exceptions=True
+        )
+        results: List[Union[Dict[str, Any], MCPError]] = []
+        for outcome in outcomes:
+            if isinstance(outcome, MCPError):
+                results.append(outcome)
+            elif isinstance(outcome, BaseException):
+                results.append(MCPError(f"MCP Client Error: {outcome}"))
+            else:
+                results.append(outcome)
+        return results
+
+    def _build_request(
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Build a JSON-RPC 2.0 tools/call envelope."""
+        # MCP protocol format
+        return {
+            "jsonrpc": "2.0",
+            "id": self._generate_request_id(),
+            "method": "tools/call",
+            "params": {
+                "name": tool_name,
+                "arguments": arguments
+            }
+        }
+
+    def _unwrap_response(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract the result from a JSON-RPC response.
+
+        Raises:
+            MCPError: If the response carries an MCP error
+        """
+        # Handle MCP error responses
+        if "error" in result:
+            error = result["error"]
+            raise MCPError(
+                f"MCP Error {error.get('code')}: {error.get('message')}"
+            )
+
+        return result.get("result", {})
+
     async def search_content(
         self,
         query: str,
         space_key: Optional[str] = None,
-        max_results: int = 5
+        max_results: int = 5,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """Search Confluence content via MCP.
 
@@ -127,6 +355,7 @@ class ConfluenceMCPClient:
             query: Search query
             space_key: Optional space to search in
             max_results: Maximum results to return
+            use_cache: Set to False to bypass the result cache
 
         Returns:
             Search results dictionary
@@ -139,29 +368,34 @@ class ConfluenceMCPClient:
         if space_key:
             arguments["spaceKey"] = space_key
 
-        return await self.call_tool("confluence_search", arguments)
+        return await self._cached_call("confluence_search", arguments, use_cache)
 
-    async def get_page(self, page_id: str) -> Dict[str, Any]:
+    async def get_page(self, page_id: str, use_cache: bool = True) -> Dict[str, Any]:
         """Get page content by ID.
 
         Args:
             page_id: Confluence page ID
+            use_cache: Set to False to bypass the result cache
 
         Returns:
             Page content dictionary
         """
-        return await self.call_tool("confluence_get_page", {"pageId": page_id})
+        return await self._cached_call(
+            "confluence_get_page", {"pageId": page_id}, use_cache, page_scoped=True
+        )
 
     async def get_page_by_title(
         self,
         title: str,
-        space_key: Optional[str] = None
+        space_key: Optional[str] = None,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """Get page by title.
 
         Args:
             title: Page title
             space_key: Optional space key
+            use_cache: Set to False to bypass the result cache
 
         Returns:
             Page content dictionary
@@ -170,7 +404,108 @@ class ConfluenceMCPClient:
         if space_key:
             arguments["spaceKey"] = space_key
 
-        return await self.call_tool("confluence_get_page_by_title", arguments)
+        return await self._cached_call(
+            "confluence_get_page_by_title", arguments, use_cache, page_scoped=True
+        )
+
+    async def _cached_call(
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        use_cache: bool,
+        page_scoped: bool = False
+    ) -> Dict[str, Any]:
+        """Call a tool through the result cache.
+
+        Bypassing the cache skips the lookup but still refreshes the entry.
+        Page versions seen in any result are fed to the cache so stale page
+        entries are dropped as soon as a newer lastModified shows up.
+
+        If the server is unavailable (circuit open, budget exhausted or the
+        call failed), an expired entry is returned marked ``"stale": True``.
+        """
+        if self.cache is None:
+            result = await self.call_tool(tool_name, arguments)
+            self._observe(result)
+            return result
+
+        key = make_cache_key(tool_name, arguments)
+        if use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        try:
+            result = await self.call_tool(tool_name, arguments)
+        except (MCPUnavailableError, httpx.HTTPError) as e:
+            stale = self.cache.get_stale(key)
+            if stale is None:
+                raise
+            print(f"⚠️  Serving stale {tool_name} result: {e}")
+            return {**stale, "stale": True} if isinstance(stale, dict) else stale
+        self._observe(result)
+
+        page_id = result.get("id") if page_scoped else None
+        self.cache.set(
+            key,
+            result,
+            page_id=str(page_id) if page_id else None,
+            version=result.get("lastModified") if page_id else None
+        )
+        return result
+
+    async def get_pages(self, page_ids: List[str]) -> List[Union[Dict[str, Any], "MCPError"]]:
+        """Get several pages in one batched round trip.
+
+        Args:
+            page_ids: Confluence page IDs
+
+        Returns:
+            Page content dictionaries (or MCPError per failed page), in order
+        """
+        results = await self.call_tools_many(
+            [("confluence_get_page", {"pageId": page_id}) for page_id in page_ids]
+        )
+        for result in results:
+            if isinstance(result, dict):
+                self._observe(result)
+        return results
+
+    async def list_recent_pages(
+        self,
+        space_key: Optional[str] = None,
+        limit: int = 10,
+        start: int = 0
+    ) -> Dict[str, Any]:
+        """List pages ordered by last modification, newest first.
+
+        Never cached: callers use it to detect changes. Page versions in the
+        listing still invalidate stale cache entries.
+
+        Args:
+            space_key: Optional space to list
+            limit: Maximum pages to return
+            start: Offset for paging through the listing
+
+        Returns:
+            Dictionary with a "pages" list
+        """
+        arguments: Dict[str, Any] = {"limit": limit}
+        if start:
+            arguments["start"] = start
+        if space_key:
+            arguments["spaceKey"] = space_key
+
+        result = await self.call_tool("confluence_list_recent_pages", arguments)
+        self._observe(result)
+        return result
+
+    def _observe(self, result: Dict[str, Any]):
+        """Feed page versions in a result to the cache and result observers."""
+        if self.cache is not None:
+            self.cache.observe_result(result)
+        for observer in self.result_observers:
+            observer(result)
 
     async def list_spaces(self) -> Dict[str, Any]:
         """List available Confluence spaces.
@@ -180,9 +515,41 @@ class ConfluenceMCPClient:
         """
         return await self.call_tool("confluence_list_spaces", {})
 
+    def cache_stats(self) -> Dict[str, Any]:
+        """Result cache hit/miss/eviction counters.
+
+        Returns:
+            Cache statistics dictionary (empty if caching is disabled)
+        """
+        return self.cache.stats() if self.cache is not None else {}
+
+    def coalesce_stats(self) -> Dict[str, Any]:
+        """Single-flight counters (calls, coalesced, abandoned).
+
+        Returns:
+            Coalescing statistics dictionary
+        """
+        return self._single_flight.stats()
+
+    def resilience_stats(self) -> Dict[str, Any]:
+        """Hedging/retry counters, per-tool latency percentiles and circuit states.
+
+        Returns:
+            Resilience statistics dictionary (empty if disabled)
+        """
+        return self.resilience.stats() if self.resilience is not None else {}
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool statistics (in-use, idle, wait time).
+
+        Returns:
+            Pool statistics dictionary
+        """
+        return self.transport.stats()
+
     async def close(self):
         """Close the HTTP client."""
-        await self.client.aclose()
+        await self.transport.aclose()
 
     def _generate_request_id(self) -> str:
         """Generate unique request ID."""
@@ -195,6 +562,16 @@ class MCPError(Exception):
     pass
 
 
+class MCPUnavailableError(MCPError):
+    """The MCP server is considered unavailable (timeout, circuit open or no time left)."""
+    pass
+
+
+# HTTP statuses that mean "this endpoint does not accept JSON-RPC batches";
+# other 4xx replies only reject the batch that was sent
+_BATCH_UNSUPPORTED_STATUS = {404, 405, 501}
+
+
 # Singleton instance for reuse
 _mcp_client: Optional[ConfluenceMCPClient] = None
 
@@ -0,0 +1,318 @@
+"""McpToolset with a persisted tool-schema cache
+
+ADK's McpToolset discovers tools by opening an SSE session and calling
+``tools/list``, so a cold container or a slow MCP server delays the first
+request. CachedMcpToolset keeps the discovered tool schemas in a JSON
+file, keyed by server URL and stored with a hash of the schemas:
+
+- ``get_tools`` builds the ADK tools from the cached schemas without
+  touching the network; the SSE session is opened on the first tool call
+- After a cache hit, the schemas are revalidated in the background (at
+  most once per revalidation interval) and the file is rewritten only if
+  the schema hash changed
+- ``warm_up`` runs at server startup: it loads the cache, or performs the
+  discovery right away so the first request does not pay for it
+- With a session pool (see session_pool.py), tool calls and discovery
+  check out pooled SSE sessions instead of sharing the toolset's single
+  session; ``warm_up`` then also opens the pool's minimum sessions
+
+Configuration:
+- CONFLUENCE_MCP_TOOL_CACHE_ENABLED: Persist tool schemas (default: true)
+- CONFLUENCE_MCP_TOOL_CACHE_PATH: Cache file (default: <tmpdir>/confluence_mcp_tools.json)
+- CONFLUENCE_MCP_TOOL_CACHE_REVALIDATE: Seconds between background revalidations (default: 3600)
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from google.adk.tools.mcp_tool import McpToolset
+from google.adk.tools.mcp_tool.mcp_tool import MCPTool
+from mcp.types import Tool as McpBaseTool
+
+from .coalesce import SingleFlight
+from .session_pool import MCPSessionPool
+
+
+def schema_hash(schemas: List[Dict[str, Any]]) -> str:
+    """Stable hash of a list of tool schemas (order-independent)."""
+    canonical = json.dumps(
+        sorted(schemas, key=lambda schema: schema.get("name", "")),
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ToolSchemaCache:
+    """JSON file of MCP tool schemas, one entry per server URL."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self, server_url: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry ({"hash", "fetched_at", "tools"}) for a server."""
+        entry = self._read().get(server_url)
+        if not entry or not isinstance(entry.get("tools"), list):
+            return None
+        if entry.get("hash") != schema_hash(entry["tools"]):
+            return None  # hand-edited or truncated file
+        return entry
+
+    def store(self, server_url: str, schemas: List[Dict[str, Any]]) -> str:
+        """Persist the schemas of a server and return their hash."""
+        digest = schema_hash(schemas)
+        entries = self._read()
+        entries[server_url] = {"hash": digest, "fetched_at": time.time(), "tools": schemas}
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return digest
+
+    def touch(self, server_url: str):
+        """Mark a server's entry as freshly validated."""
+        entries = self._read()
+        if server_url in entries:
+            self.store(server_url, entries[server_url]["tools"])
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+
+class PooledMcpTool(MCPTool):
+    """MCPTool whose calls run on a session checked out from an MCPSessionPool.
+
+    Per-call auth and header providers are not supported; Confluence
+    credentials live on the MCP server.
+    """
+
+    def __init__(self, *, session_pool: MCPSessionPool, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._session_pool = session_pool
+
+    async def _run_async_impl(self, *, args, tool_context, credential) -> Dict[str, Any]:
+        response = await self._session_pool.call_tool(self.name, args)
+        return response.model_dump(mode="json", by_alias=True, exclude_none=True)
+
+
+class CachedMcpToolset(McpToolset):
+    """McpToolset that serves tool discovery from a persisted schema cache."""
+
+    def __init__(
+        self,
+        *,
+        server_url: str,
+        cache: Optional[ToolSchemaCache] = None,
+        revalidate_interval: float = 3600,
+        session_pool: Optional[MCPSessionPool] = None,
+        **kwargs: Any
+    ):
+        """Initialize the toolset. No connection is opened here.
+
+        Args:
+            server_url: MCP server URL, used as the cache key
+            cache: Schema cache (None disables caching)
+            revalidate_interval: Minimum seconds between background revalidations
+            session_pool: Pool of SSE sessions for tool calls (None uses
+                          McpToolset's own session)
+            **kwargs: Passed to McpToolset (connection_params, tool_filter, ...)
+        """
+        super().__init__(**kwargs)
+        self.server_url = server_url
+        self.schema_cache = cache
+        self.revalidate_interval = revalidate_interval
+        self.session_pool = session_pool
+
+        self._schemas: Optional[List[McpBaseTool]] = None
+        self._hash: Optional[str] = None
+        self._fetched_at = 0.0
+        self._revalidation: Optional["asyncio.Task[Any]"] = None
+        # Concurrent sessions starting on a cold cache share one discovery
+        self._single_flight = SingleFlight()
+
+        self.hits = 0
+        self.discoveries = 0
+        self.revalidations = 0
+        self.changes = 0
+        self.last_discovery_ms = 0.0
+
+    @classmethod
+    def from_env(cls, server_url: str, **kwargs: Any) -> "CachedMcpToolset":
+        """Create a toolset configured from CONFLUENCE_MCP_TOOL_CACHE_* and
+        CONFLUENCE_MCP_SESSION_* variables."""
+        cache = None
+        if os.getenv("CONFLUENCE_MCP_TOOL_CACHE_ENABLED", "true").lower() == "true":
+            cache = ToolSchemaCache(os.getenv(
+                "CONFLUENCE_MCP_TOOL_CACHE_PATH",
+                os.path.join(tempfile.gettempdir(), "confluence_mcp_tools.json")
+            ))
+        return cls(
+            server_url=server_url,
+            cache=cache,
+            revalidate_interval=float(os.getenv("CONFLUENCE_MCP_TOOL_CACHE_REVALIDATE", "3600")),
+            session_pool=MCPSessionPool.from_env(server_url),
+            **kwargs
+        )
+
+    async def get_tools(self, readonly_context: Optional[Any] = None) -> List[Any]:
+        """Return the toolset's tools, from the schema cache when possible."""
+        if self.schema_cache is None and self.session_pool is None:
+            return await super().get_tools(readonly_context)
+
+        if self._schemas is None:
+            self._load_cached()
+        if self._schemas is None:
+            await self._discover()
+        else:
+            self.hits += 1
+            self._schedule_revalidation()
+
+        tools = [tool for tool in map(self._build_tool, self._schemas)
+                 if self._is_tool_selected(tool, readonly_context)]
+        tools.sort(key=lambda tool: tool.name)
+        return tools
+
+    async def warm_up(self):
+        """Startup hook: open pooled sessions, then load the cached schemas
+        or discover the tools now."""
+        if self.session_pool is not None:
+            await self.session_pool.start()
+        if self.schema_cache is None and self.session_pool is None:
+            return
+        if self._schemas is None:
+            self._load_cached()
+        if self._schemas is None:
+            await self._discover()
+        else:
+            self._schedule_revalidation()
+
+    async def revalidate(self) -> bool:
+        """List the server's tools and refresh the cache.
+
+        Returns:
+            True if the tool schemas changed
+        """
+        changed = await self._list_tools()
+        self.revalidations += 1
+        if not changed and self.schema_cache is not None:
+            self.schema_cache.touch(self.server_url)
+        return changed
+
+    async def close(self):
+        if self._revalidation is not None and not self._revalidation.done():
+            self._revalidation.cancel()
+        if self.session_pool is not None:
+            await self.session_pool.close()
+        await super().close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return tool discovery counters, the cached schema hash and pool metrics."""
+        return {
+            "enabled": self.schema_cache is not None,
+            "path": self.schema_cache.path if self.schema_cache is not None else None,
+            "tools": len(self._schemas) if self._schemas is not None else 0,
+            "schema_hash": self._hash,
+            "cache_hits": self.hits,
+            "discoveries": self.discoveries,
+            "revalidations": self.revalidations,
+            "schema_changes": self.changes,
+            "last_discovery_ms": round(self.last_discovery_ms, 1),
+            "session_pool": self.session_pool.stats() if self.session_pool is not None else None,
+        }
+
+    async def _discover(self):
+        await self._single_flight.do("tools/list", self._list_tools)
+        self.discoveries += 1
+
+    async def _list_tools(self) -> bool:
+        started = time.perf_counter()
+        if self.session_pool is not None:
+            result = await self.session_pool.list_tools()
+        else:
+            session = await self._mcp_session_manager.create_session()
+            result = await session.list_tools()
+        self.last_discovery_ms = (time.perf_counter() - started) * 1000
+        return self._remember(result.tools)
+
+    def _load_cached(self):
+        if self.schema_cache is None:
+            return
+        try:
+            entry = self.schema_cache.load(self.server_url)
+            if entry is None:
+                return
+            self._schemas = [McpBaseTool.model_validate(schema) for schema in entry["tools"]]
+        except Exception as e:
+            print(f"⚠️  Ignoring MCP tool cache {self.schema_cache.path}: {e}")
+            return
+        self._hash = entry["hash"]
+        self._fetched_at = entry.get("fetched_at", 0.0)
+
+    def _remember(self, mcp_tools: List[McpBaseTool]) -> bool:
+        schemas = [tool.model_dump(mode="json", by_alias=True, exclude_none=True)
+                   for tool in mcp_tools]
+        digest = schema_hash(schemas)
+        changed = digest != self._hash
+        if changed and self._hash is not None:
+            self.changes += 1
+        self._schemas = list(mcp_tools)
+        self._hash = digest
+        self._fetched_at = time.time()
+        if changed and self.schema_cache is not None:
+            try:
+                self.schema_cache.store(self.server_url, schemas)
+            except OSError as e:
+                print(f"⚠️  Could not write MCP tool cache {self.schema_cache.path}: {e}")
+        return changed
+
+    def _schedule_revalidation(self):
+        if self._revalidation is not None and not self._revalidation.done():
+            return
+        if time.time() - self._fetched_at < self.revalidate_interval:
+            return  # listed (here or by another process) within the interval
+
+        async def run():
+            try:
+                await self.revalidate()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  MCP tool revalidation failed, keeping cached schemas: {e}")
+
+        self._revalidation = asyncio.get_running_loop().create_task(run())
+
+    def _build_tool(self, mcp_tool: McpBaseTool) -> MCPTool:
+        # Same construction as McpToolset.get_tools; the session manager (or
+        # pool) only connects when the tool is first called
+        if self.session_pool is not None:
+            return PooledMcpTool(
+                session_pool=self.session_pool,
+                mcp_tool=mcp_tool,
+                mcp_session_manager=self._mcp_session_manager,
+            )
+        return MCPTool(
+            mcp_tool=mcp_tool,
+            mcp_session_manager=self._mcp_session_manager,
+            auth_scheme=self._auth_scheme,
+            auth_credential=self._auth_credential,
+            require_confirmation=getattr(self, "_require_confirmation", False),
+            header_provider=getattr(self, "_header_provider", None),
+        )
@@ -0,0 +1,533 @@
+"""Local Confluence mirror backed by SQLite FTS5
+
+Keeps a local copy of Confluence pages so searches and page lookups are
+answered in milliseconds without an MCP round trip. The mirror is filled
+by MirrorSync, which talks to the MCP server:
+
+1. ``list_spaces`` enumerates the spaces to mirror
+2. ``list_recent_pages`` pages through each space, newest first, until it
+   reaches the space's ``lastModified`` watermark from the previous run
+3. ``get_page`` (batched) fetches the bodies of new or changed pages
+
+The first sync of a space has no watermark and copies everything; later
+syncs only fetch what changed since. The watermark never moves past a page
+whose fetch failed, so the next sync retries it. Deleted pages do not show
+up in the newest-first listing, so every CONFLUENCE_MIRROR_RECONCILE_INTERVAL
+seconds a sync walks the space's whole listing and drops mirrored pages
+that are no longer in it.
+
+Tools fall back to MCP whenever the mirror has no answer, and for searches
+across all spaces unless every space is mirrored.
+
+Configuration:
+- CONFLUENCE_MIRROR_DB: SQLite file for the mirror (unset = mirror disabled)
+- CONFLUENCE_MIRROR_SYNC_INTERVAL: Seconds between incremental syncs
+- CONFLUENCE_MIRROR_SPACES: Optional comma-separated space keys to mirror
+- CONFLUENCE_MIRROR_RECONCILE_INTERVAL: Seconds between deleted-page checks
+  of a space (default: 3600)
+"""
+
+import asyncio
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from .mcp_client import ConfluenceMCPClient, MCPError, get_mcp_client
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS spaces (
+    key TEXT PRIMARY KEY,
+    name TEXT
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    space TEXT,
+    url TEXT,
+    author TEXT,
+    last_modified TEXT,
+    labels TEXT,
+    content TEXT
+);
+CREATE INDEX IF NOT EXISTS pages_title ON pages(title COLLATE NOCASE, space);
+CREATE INDEX IF NOT EXISTS pages_recent ON pages(space, last_modified);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+    page_id UNINDEXED,
+    space UNINDEXED,
+    title,
+    content,
+    tokenize = 'porter unicode61'
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    space TEXT PRIMARY KEY,
+    watermark TEXT,
+    synced_at REAL
+);
+"""
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _fts_query(query: str) -> str:
+    """Turn free text into a safe FTS5 OR-query of quoted terms."""
+    terms = _TOKEN_RE.findall(query.lower())
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+class ConfluenceMirror:
+    """SQLite store holding mirrored pages and a full-text index over them."""
+
+    def __init__(self, db_path: str):
+        """Open (or create) the mirror database.
+
+        Args:
+            db_path: SQLite file path (":memory:" for a throwaway mirror)
+        """
+        self.db_path = db_path
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    # Writes
+
+    def upsert_page(self, page: Dict[str, Any]):
+        """Insert or replace a page and its full-text index entry."""
+        self.upsert_pages([page])
+
+    def upsert_pages(self, pages: List[Dict[str, Any]]):
+        """Insert or replace several pages in one transaction."""
+        with self._lock, self._db:
+            for page in pages:
+                page_id = str(page["id"])
+                self._db.execute(
+                    "INSERT OR REPLACE INTO pages"
+                    " (id, title, space, url, author, last_modified, labels, content)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        page_id,
+                        page.get("title", ""),
+                        page.get("space"),
+                        page.get("url"),
+                        page.get("author"),
+                        page.get("lastModified"),
+                        json.dumps(page.get("labels") or []),
+                        page.get("content", ""),
+                    )
+                )
+                self._db.execute("DELETE FROM pages_fts WHERE page_id = ?", (page_id,))
+                self._db.execute(
+                    "INSERT INTO pages_fts (page_id, space, title, content) VALUES (?, ?, ?, ?)",
+                    (page_id, page.get("space"), page.get("title", ""), page.get("content", ""))
+                )
+
+    def delete_pages(self, page_ids: List[str]):
+        """Remove pages and their full-text index entries."""
+        with self._lock, self._db:
+            for page_id in page_ids:
+                self._db.execute("DELETE FROM pages WHERE id = ?", (page_id,))
+                self._db.execute("DELETE FROM pages_fts WHERE page_id = ?", (page_id,))
+
+    def upsert_spaces(self, spaces: List[Dict[str, Any]]):
+        """Record the known spaces."""
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO spaces (key, name) VALUES (?, ?)",
+                [(space["key"], space.get("name")) for space in spaces if space.get("key")]
+            )
+
+    def set_watermark(self, space_key: str, watermark: Optional[str]):
+        """Store the newest lastModified seen for a space."""
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sync_state (space, watermark, synced_at) VALUES (?, ?, ?)",
+                (space_key, watermark, time.time())
+            )
+
+    # Reads
+
+    def watermark(self, space_key: str) -> Optional[str]:
+        """Return the lastModified watermark of the previous sync of a space."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT watermark FROM sync_state WHERE space = ?", (space_key,)
+            ).fetchone()
+        return row["watermark"] if row else None
+
+    def is_synced(self, space_key: Optional[str] = None) -> bool:
+        """Whether a space (or, if None, every known space) has completed a sync.
+
+        Spaces left out by CONFLUENCE_MIRROR_SPACES are known but never
+        synced, so searches across all spaces then go to MCP.
+        """
+        with self._lock:
+            if space_key:
+                row = self._db.execute(
+                    "SELECT 1 FROM sync_state WHERE space = ?", (space_key,)
+                ).fetchone()
+                return row is not None
+            synced = self._db.execute("SELECT COUNT(*) FROM sync_state").fetchone()[0]
+            missing = self._db.execute(
+                "SELECT COUNT(*) FROM spaces WHERE key NOT IN (SELECT space FROM sync_state)"
+            ).fetchone()[0]
+        return synced > 0 and missing == 0
+
+    def page_ids(self, space_key: str) -> List[str]:
+        """Ids of the mirrored pages of a space."""
+        with self._lock:
+            rows = self._db.execute("SELECT id FROM pages WHERE space = ?", (space_key,)).fetchall()
+        return [row["id"] for row in rows]
+
+    def list_spaces(self) -> List[Dict[str, Any]]:
+        """Return mirrored spaces as {"key", "name"} dictionaries."""
+        with self._lock:
+            rows = self._db.execute("SELECT key, name FROM spaces ORDER BY key").fetchall()
+        return [{"key": row["key"], "name": row["name"]} for row in rows]
+
+    def search(
+        self,
+        query: str,
+        space_key: Optional[str] = None,
+        max_results: int = 5
+    ) -> Optional[Dict[str, Any]]:
+        """Full-text search over mirrored pages.
+
+        Args:
+            query: Search query
+            space_key: Optional space to restrict the search to
+            max_results: Maximum results to return
+
+        Returns:
+            Results in the search_confluence format (with a BM25 "score" per
+            result), or None if the mirror cannot answer (no matches or the
+            space has not been synced yet)
+        """
+        match = _fts_query(query)
+        if not match or not self.is_synced(space_key):
+            self.misses += 1
+            return None
+
+        sql = (
+            "SELECT p.id, p.title, p.url, p.space, p.last_modified, p.author,"
+            " snippet(pages_fts, 3, '', '', '...', 24) AS excerpt,"
+            " bm25(pages_fts, 0.0, 0.0, 5.0, 1.0) AS rank"
+            " FROM pages_fts JOIN pages p ON p.id = pages_fts.page_id"
+            " WHERE pages_fts MATCH ?"
+        )
+        params: List[Any] = [match]
+        if space_key:
+            sql += " AND pages_fts.space = ?"
+            params.append(space_key)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(max_results)
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+
+        if not rows:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return {
+            "results": [
+                {
+                    "id": row["id"],
+                    "title": row["title"],
+                    "url": row["url"],
+                    "space": row["space"],
+                    "excerpt": row["excerpt"],
+                    "lastModified": row["last_modified"],
+                    "author": row["author"],
+                    "score": -row["rank"],
+                }
+                for row in rows
+            ],
+            "total": len(rows),
+            "query": query,
+            "space_filter": space_key,
+            "source": "mirror",
+        }
+
+    def get_page(self, page_id: str) -> Optional[Dict[str, Any]]:
+        """Return a mirrored page in the get_page_content format, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT * FROM pages WHERE id = ?", (page_id,)).fetchone()
+        return self._page_or_miss(row)
+
+    def get_page_by_title(
+        self,
+        title: str,
+        space_key: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Return a mirrored page by exact (case-insensitive) title, or None."""
+        sql = "SELECT * FROM pages WHERE title = ? COLLATE NOCASE"
+        params: List[Any] = [title]
+        if space_key:
+            sql += " AND space = ?"
+            params.append(space_key)
+        with self._lock:
+            row = self._db.execute(sql + " LIMIT 1", params).fetchone()
+        return self._page_or_miss(row)
+
+    def page_count(self) -> int:
+        """Number of mirrored pages."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def document_frequency(self, term: str) -> int:
+        """Number of mirrored pages matching a term (stemmed like searches)."""
+        match = _fts_query(term)
+        if not match:
+            return 0
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM pages_fts WHERE pages_fts MATCH ?", (match,)
+            ).fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return page/space counts and hit/miss counters."""
+        with self._lock:
+            pages = self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            spaces = self._db.execute("SELECT COUNT(*) FROM sync_state").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "pages": pages,
+            "synced_spaces": spaces,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._db.close()
+
+    def _page_or_miss(self, row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {
+            "id": row["id"],
+            "title": row["title"],
+            "url": row["url"],
+            "content": row["content"],
+            "space": row["space"],
+            "lastModified": row["last_modified"],
+            "author": row["author"],
+            "labels": json.loads(row["labels"] or "[]"),
+            "source": "mirror",
+        }
+
+
+class MirrorSync:
+    """Fills and refreshes a ConfluenceMirror from the MCP server."""
+
+    def __init__(
+        self,
+        mirror: ConfluenceMirror,
+        client: Optional[ConfluenceMCPClient] = None,
+        spaces: Optional[List[str]] = None,
+        interval: float = 300,
+        page_size: int = 50,
+        reconcile_interval: float = 3600
+    ):
+        """Initialize the sync engine.
+
+        Args:
+            mirror: Mirror to write into
+            client: MCP client (defaults to the shared singleton)
+            spaces: Space keys to mirror (default: every space from list_spaces)
+            interval: Seconds between background incremental syncs
+            page_size: Pages requested per list_recent_pages / batch call
+            reconcile_interval: Seconds between full listings of a space
+                                that remove deleted pages (the first sync
+                                of each space in a process always does one)
+        """
+        self.mirror = mirror
+        self.client = client or get_mcp_client()
+        self.spaces = spaces
+        self.interval = interval
+        self.page_size = page_size
+        self.reconcile_interval = reconcile_interval
+
+        self._task: Optional[asyncio.Task] = None
+        self._reconciled_at: Dict[str, float] = {}
+        self.last_sync: Optional[Dict[str, Any]] = None
+
+    async def sync_all(self) -> Dict[str, Any]:
+        """Sync every configured space once.
+
+        Returns:
+            Per-space count of pages fetched plus total duration
+        """
+        started = time.perf_counter()
+
+        listing = await self.client.list_spaces()
+        spaces = listing.get("spaces") or listing.get("results") or []
+        self.mirror.upsert_spaces(spaces)
+
+        keys = self.spaces or [space["key"] for space in spaces if space.get("key")]
+        fetched = {}
+        for space_key in keys:
+            fetched[space_key] = await self.sync_space(space_key)
+
+        self.last_sync = {
+            "fetched": fetched,
+            "duration_s": time.perf_counter() - started,
+            "finished_at": time.time(),
+        }
+        return self.last_sync
+
+    async def sync_space(self, space_key: str) -> int:
+        """Bring one space up to date.
+
+        Walks list_recent_pages newest-first and stops at the first page
+        not newer than the previous watermark, then fetches the changed
+        page bodies in JSON-RPC batches. When the space is due for
+        reconciliation the walk covers the whole listing, and mirrored
+        pages missing from it are deleted.
+
+        The new watermark stays below the oldest page that failed to
+        fetch, so the next sync fetches it again.
+
+        Returns:
+            Number of pages fetched
+        """
+        watermark = self.mirror.watermark(space_key)
+        reconcile = time.monotonic() - self._reconciled_at.get(space_key, -math.inf) >= self.reconcile_interval
+        changed: Dict[str, str] = {}
+        listed: Set[str] = set()
+
+        start = 0
+        while True:
+            listing = await self.client.list_recent_pages(
+                space_key=space_key, limit=self.page_size, start=start
+            )
+            pages = listing.get("pages") or []
+
+            reached_watermark = False
+            for page in pages:
+                page_id, modified = str(page["id"]), page.get("lastModified") or ""
+                listed.add(page_id)
+                if watermark and modified <= watermark:
+                    reached_watermark = True
+                    if not reconcile:
+                        break
+                    continue
+                changed[page_id] = modified
+
+            if (reached_watermark and not reconcile) or len(pages) < self.page_size:
+                break
+            start += len(pages)
+
+        fetched = 0
+        failed: List[str] = []
+        ids = list(changed)
+        for offset in range(0, len(ids), self.page_size):
+            batch = ids[offset:offset + self.page_size]
+            results = await self.client.get_pages(batch)
+            pages = []
+            for page_id, result in zip(batch, results):
+                if isinstance(result, MCPError):
+                    print(f"Mirror sync error in {space_key} for page {page_id}: {result}")
+                    failed.append(changed[page_id])
+                else:
+                    pages.append(result)
+            self.mirror.upsert_pages(pages)
+            fetched += len(pages)
+
+        if reconcile:
+            deleted = [page_id for page_id in self.mirror.page_ids(space_key) if page_id not in listed]
+            if deleted:
+                self.mirror.delete_pages(deleted)
+            self._reconciled_at[space_key] = time.monotonic()
+
+        # Only pages older than every failed one are known to be mirrored
+        oldest_failed = min(failed) if failed else None
+        newest = max(
+            (modified for modified in changed.values() if oldest_failed is None or modified < oldest_failed),
+            default=None
+        )
+        if newest is not None and (watermark is None or newest > watermark):
+            watermark = newest
+        self.mirror.set_watermark(space_key, watermark)
+        return fetched
+
+    def start(self):
+        """Start periodic background syncing on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop background syncing."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sync_all()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Mirror sync failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+# Singleton instances, created from the environment on first use
+_mirror: Optional[ConfluenceMirror] = None
+_mirror_sync: Optional[MirrorSync] = None
+
+
+def get_mirror() -> Optional[ConfluenceMirror]:
+    """Get the mirror singleton, or None if CONFLUENCE_MIRROR_DB is unset.
+
+    Returns:
+        ConfluenceMirror instance or None
+    """
+    global _mirror
+
+    db_path = os.getenv("CONFLUENCE_MIRROR_DB")
+    if _mirror is None and db_path:
+        _mirror = ConfluenceMirror(db_path)
+
+    return _mirror
+
+
+def get_mirror_sync() -> Optional[MirrorSync]:
+    """Get the sync engine singleton, or None if the mirror is disabled.
+
+    Returns:
+        MirrorSync instance or None
+    """
+    global _mirror_sync
+
+    mirror = get_mirror()
+    if _mirror_sync is None and mirror is not None:
+        spaces = [s.strip() for s in os.getenv("CONFLUENCE_MIRROR_SPACES", "").split(",") if s.strip()]
+        _mirror_sync = MirrorSync(
+            mirror,
+            spaces=spaces or None,
+            interval=float(os.getenv("CONFLUENCE_MIRROR_SYNC_INTERVAL", "300")),
+            reconcile_interval=float(os.getenv("CONFLUENCE_MIRROR_RECONCILE_INTERVAL", "3600")),
+        )
+
+    return _mirror_sync
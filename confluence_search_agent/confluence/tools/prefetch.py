@@ -0,0 +1,235 @@
+"""Speculative prefetch of top-ranked page bodies after a search
+
+After a search, the agent usually reads the first one to three hits in its
+next LLM turn. The prefetcher starts fetching those pages in the background
+as soon as search results arrive. The fetch goes through
+ConfluenceMCPClient.get_page, so each page lands in the page cache. If
+get_page_content runs while a prefetch is still in flight, request
+coalescing joins it to the same request.
+
+The function tools (confluence_mcp.py) schedule prefetches themselves.
+For the MCP toolset, ``prefetch_tool_callback`` schedules them from search
+results and ``prefetch_lookup_callback`` answers ``confluence_get_page``
+calls for prefetched pages from the client instead of the toolset's
+session.
+
+Prefetches are grouped by session and cancelled when the session's turn
+ends (see ``cancel_prefetch_callback``). Opt in with
+CONFLUENCE_PREFETCH_TOP_K > 0.
+"""
+
+import asyncio
+import json
+import os
+from typing import Any, Dict, List, Optional, Set
+
+from .mcp_client import get_mcp_client
+from .mirror import get_mirror
+
+# MCP tool that reads a page by id (see ConfluenceMCPClient.get_page)
+PAGE_TOOL = "confluence_get_page"
+
+
+class PagePrefetcher:
+    """Background fetcher that warms the page cache with likely next reads."""
+
+    def __init__(self, top_k: int = 0, max_in_flight: int = 8):
+        """Initialize the prefetcher.
+
+        Args:
+            top_k: Number of top search hits to prefetch (0 disables prefetching)
+            max_in_flight: Cap on concurrent prefetches across all sessions;
+                           hits beyond the cap are skipped, not queued
+        """
+        self.top_k = top_k
+        self.max_in_flight = max_in_flight
+
+        self._in_flight: Dict[str, "asyncio.Task[Any]"] = {}
+        self._sessions: Dict[str, Set[str]] = {}
+        self._ready: Set[str] = set()
+
+        self.scheduled = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.skipped = 0
+        self.hits = 0
+
+    @classmethod
+    def from_env(cls) -> "PagePrefetcher":
+        """Create a prefetcher from CONFLUENCE_PREFETCH_* variables."""
+        return cls(
+            top_k=int(os.getenv("CONFLUENCE_PREFETCH_TOP_K", "0")),
+            max_in_flight=int(os.getenv("CONFLUENCE_PREFETCH_MAX_IN_FLIGHT", "8")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        # Prefetched pages are parked in the client's result cache, so
+        # prefetching is pointless when that cache is disabled
+        return self.top_k > 0 and get_mcp_client().cache is not None
+
+    def schedule(self, results: List[Dict[str, Any]], session_id: Optional[str] = None):
+        """Start background fetches for the top-k search results.
+
+        Pages already held by the mirror, already prefetched or currently
+        in flight are skipped.
+
+        Args:
+            results: Ranked search results (dictionaries with an "id")
+            session_id: Owner of the prefetches, for cancellation
+        """
+        if not self.enabled:
+            return
+
+        mirror = get_mirror()
+        loop = asyncio.get_running_loop()
+        for result in results[:self.top_k]:
+            page_id = str(result.get("id") or "")
+            if not page_id or page_id in self._in_flight or page_id in self._ready:
+                continue
+            if mirror is not None and mirror.get_page(page_id) is not None:
+                continue
+            if len(self._in_flight) >= self.max_in_flight:
+                self.skipped += 1
+                continue
+
+            task = loop.create_task(get_mcp_client().get_page(page_id))
+            task.add_done_callback(lambda done, pid=page_id: self._finish(pid, done))
+            self._in_flight[page_id] = task
+            self.scheduled += 1
+            if session_id:
+                self._sessions.setdefault(session_id, set()).add(page_id)
+                task.add_done_callback(
+                    lambda _, sid=session_id, pid=page_id: self._forget(sid, pid)
+                )
+
+    def record_access(self, page_id: str) -> bool:
+        """Note that the agent asked for a page; counts prefetch hits.
+
+        Returns:
+            True if the page had been (or is being) prefetched
+        """
+        if page_id in self._ready:
+            self._ready.discard(page_id)
+            self.hits += 1
+            return True
+        if page_id in self._in_flight:
+            self.hits += 1
+            return True
+        return False
+
+    def cancel_session(self, session_id: str):
+        """Cancel every in-flight prefetch started for a session."""
+        for page_id in self._sessions.pop(session_id, set()):
+            task = self._in_flight.get(page_id)
+            if task is not None and not task.done():
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return prefetch counters and the hit rate (used / issued)."""
+        return {
+            "top_k": self.top_k,
+            "in_flight": len(self._in_flight),
+            "scheduled": self.scheduled,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "skipped": self.skipped,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.scheduled if self.scheduled else 0.0,
+        }
+
+    def _finish(self, page_id: str, task: "asyncio.Task[Any]"):
+        # Runs as a done callback so it also fires for tasks cancelled
+        # before they ever started
+        self._in_flight.pop(page_id, None)
+        if task.cancelled():
+            self.cancelled += 1
+        elif task.exception() is not None:
+            self.failed += 1
+            print(f"Prefetch of page {page_id} failed: {task.exception()}")
+        else:
+            self.completed += 1
+            self._ready.add(page_id)
+            # Bound the set of unread prefetched pages
+            if len(self._ready) > self.max_in_flight * 16:
+                self._ready.pop()
+
+    def _forget(self, session_id: str, page_id: str):
+        pages = self._sessions.get(session_id)
+        if pages is not None:
+            pages.discard(page_id)
+            if not pages:
+                del self._sessions[session_id]
+
+
+# Shared prefetcher instance
+prefetcher = PagePrefetcher.from_env()
+
+
+def session_id_of(context: Any) -> Optional[str]:
+    """Session id from an ADK ToolContext/CallbackContext, if available."""
+    if context is None:
+        return None
+    session = getattr(context, "session", None)
+    if session is None:
+        session = getattr(getattr(context, "_invocation_context", None), "session", None)
+    return getattr(session, "id", None) or getattr(context, "invocation_id", None)
+
+
+def cancel_prefetch_callback(callback_context: Any) -> None:
+    """after_agent_callback for the root agent: drop the turn's leftover prefetches."""
+    session_id = session_id_of(callback_context)
+    if session_id:
+        prefetcher.cancel_session(session_id)
+    return None
+
+
+def _search_results(response: Any) -> List[Dict[str, Any]]:
+    # Ranked results of a search, from a plain dict or an MCP CallToolResult
+    # dump carrying the JSON payload in text content parts
+    if not isinstance(response, dict):
+        return []
+    if isinstance(response.get("content"), list):
+        for part in response["content"]:
+            text = part.get("text") if isinstance(part, dict) else None
+            if not text:
+                continue
+            try:
+                results = _search_results(json.loads(text))
+            except ValueError:
+                continue
+            if results:
+                return results
+        return []
+    results = response.get("results")
+    if not isinstance(results, list):
+        return []
+    return [result for result in results if isinstance(result, dict)]
+
+
+def prefetch_tool_callback(tool: Any, args: Dict[str, Any], tool_context: Any, tool_response: Any):
+    """after_tool_callback for document_searcher: prefetch the top hits of MCP searches."""
+    # Function tools return strings and schedule their own prefetches
+    if not prefetcher.enabled or isinstance(tool_response, str):
+        return None
+    results = _search_results(tool_response)
+    if results:
+        prefetcher.schedule(results, session_id_of(tool_context))
+    return None
+
+
+async def prefetch_lookup_callback(tool: Any, args: Dict[str, Any], tool_context: Any):
+    """before_tool_callback for document_searcher: serve prefetched pages to the MCP toolset."""
+    if getattr(tool, "name", None) != PAGE_TOOL or not prefetcher.enabled:
+        return None
+    page_id = str((args or {}).get("pageId") or "")
+    if not page_id or not prefetcher.record_access(page_id):
+        return None
+    # Joins the prefetch if it is still in flight, else hits the page cache
+    try:
+        return await get_mcp_client().get_page(page_id)
+    except Exception as e:
+        print(f"⚠️  Prefetched page {page_id} unavailable, calling the MCP tool: {e}")
+        return None
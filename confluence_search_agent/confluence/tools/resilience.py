@@ -0,0 +1,471 @@
+"""Tail-latency control for MCP tool calls
+
+A single slow Confluence backend response used to stall the whole
+multi-agent turn for up to the flat 30 s client timeout. ResilientCaller
+wraps each tool call with:
+
+- Hedged requests: for idempotent tools, if the call has not answered
+  within the tool's observed p95 latency, a second identical request is
+  sent and the first answer wins
+- Retries with full-jitter exponential backoff for transport errors,
+  timeouts and 5xx/429 responses
+- A retry budget (token bucket): retries and hedges spend tokens that
+  successful calls earn back, so a struggling server never sees a retry
+  storm
+- A per-tool circuit breaker: after consecutive failures the tool fails
+  fast for a cooldown period, then lets one probe through. The client
+  answers from stale cache entries while the breaker is open
+- Per-tool deadlines: each attempt gets the smaller of the tool's timeout
+  and what is left of the A2A request budget (minus a reserve for the
+  answer synthesis)
+
+The request budget lives in a context variable. RequestBudgetMiddleware
+starts it for every A2A HTTP request (``X-Request-Timeout`` header, or
+CONFLUENCE_REQUEST_BUDGET); scripts can use ``request_budget()``.
+
+References:
+- The Tail at Scale: https://research.google/pubs/the-tail-at-scale/
+- Exponential backoff and jitter: https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import os
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, Optional, TypeVar
+
+import httpx
+
+T = TypeVar("T")
+
+# Read-only MCP tools that are safe to hedge and retry
+IDEMPOTENT_TOOLS = frozenset({
+    "confluence_search",
+    "confluence_get_page",
+    "confluence_get_page_by_title",
+    "confluence_list_recent_pages",
+    "confluence_list_spaces",
+})
+
+_request_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "confluence_request_deadline", default=None
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the server while a tool's circuit is open."""
+
+
+class DeadlineExceededError(Exception):
+    """Raised when the request budget leaves no time for another MCP call."""
+
+
+def _parse_timeouts(value: str) -> Dict[str, float]:
+    timeouts = {}
+    for item in value.split(","):
+        name, _, seconds = item.partition("=")
+        if name.strip() and seconds.strip():
+            timeouts[name.strip()] = float(seconds)
+    return timeouts
+
+
+@dataclass
+class ResiliencePolicy:
+    """Settings for ResilientCaller.
+
+    Attributes:
+        timeout: Default per-attempt timeout in seconds
+        tool_timeouts: Per-tool overrides of ``timeout``
+        hedge: Send hedged requests for idempotent tools
+        hedge_percentile: Latency percentile after which a hedge is sent
+        hedge_min_delay: Lower bound on the hedge delay in seconds
+        hedge_min_samples: Latency samples needed before hedging starts
+        max_retries: Retries per call after the first attempt
+        backoff_base: Backoff of the first retry in seconds (before jitter)
+        backoff_max: Cap on the backoff in seconds
+        retry_budget_ratio: Tokens earned per successful call
+        retry_budget_min: Tokens available with no successes (and the floor
+                          the bucket refills from)
+        breaker_failures: Consecutive failures that open a tool's circuit
+        breaker_cooldown: Seconds a circuit stays open before a probe
+        deadline_reserve: Seconds of the request budget kept for the LLM
+                          after the last tool call
+    """
+
+    timeout: float = 30.0
+    tool_timeouts: Dict[str, float] = field(default_factory=dict)
+    hedge: bool = True
+    hedge_percentile: float = 95.0
+    hedge_min_delay: float = 0.05
+    hedge_min_samples: int = 20
+    max_retries: int = 2
+    backoff_base: float = 0.1
+    backoff_max: float = 2.0
+    retry_budget_ratio: float = 0.1
+    retry_budget_min: float = 10.0
+    breaker_failures: int = 5
+    breaker_cooldown: float = 30.0
+    deadline_reserve: float = 5.0
+
+    @classmethod
+    def from_env(cls, timeout: float = 30.0) -> "ResiliencePolicy":
+        """Build a policy from CONFLUENCE_MCP_* environment variables."""
+        return cls(
+            timeout=timeout,
+            tool_timeouts=_parse_timeouts(os.getenv("CONFLUENCE_MCP_TOOL_TIMEOUTS", "")),
+            hedge=os.getenv("CONFLUENCE_MCP_HEDGE", "true").lower() == "true",
+            hedge_percentile=float(os.getenv("CONFLUENCE_MCP_HEDGE_PERCENTILE", "95")),
+            hedge_min_delay=float(os.getenv("CONFLUENCE_MCP_HEDGE_MIN_DELAY_MS", "50")) / 1000,
+            max_retries=int(os.getenv("CONFLUENCE_MCP_MAX_RETRIES", "2")),
+            retry_budget_ratio=float(os.getenv("CONFLUENCE_MCP_RETRY_BUDGET_RATIO", "0.1")),
+            breaker_failures=int(os.getenv("CONFLUENCE_MCP_BREAKER_FAILURES", "5")),
+            breaker_cooldown=float(os.getenv("CONFLUENCE_MCP_BREAKER_COOLDOWN", "30")),
+            deadline_reserve=float(os.getenv("CONFLUENCE_MCP_DEADLINE_RESERVE", "5")),
+        )
+
+
+# Request budget
+
+def start_request_budget(seconds: float) -> contextvars.Token:
+    """Start a request budget in the current context; returns a reset token."""
+    return _request_deadline.set(time.monotonic() + seconds)
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left in the current request budget, or None without one."""
+    deadline = _request_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+@contextlib.contextmanager
+def request_budget(seconds: float) -> Iterator[None]:
+    """Run a block under a request budget."""
+    token = start_request_budget(seconds)
+    try:
+        yield
+    finally:
+        _request_deadline.reset(token)
+
+
+class RequestBudgetMiddleware:
+    """ASGI middleware that starts a request budget for every HTTP request.
+
+    The budget comes from the ``X-Request-Timeout`` header (seconds) when
+    the caller sends one, otherwise from ``default_budget``. Work spawned
+    while handling the request (the agent run) inherits it.
+    """
+
+    def __init__(self, app: Any, default_budget: float = 60.0):
+        self.app = app
+        self.default_budget = default_budget
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        budget = self.default_budget
+        header = dict(scope.get("headers") or []).get(b"x-request-timeout")
+        if header:
+            try:
+                budget = float(header)
+            except ValueError:
+                pass
+        with request_budget(budget):
+            await self.app(scope, receive, send)
+
+
+# Building blocks
+
+class LatencyTracker:
+    """Sliding window of successful call latencies."""
+
+    def __init__(self, window: int = 256):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Latency at percentile ``p`` (0-100), or None without samples."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+
+class RetryBudget:
+    """Token bucket limiting retries and hedges to a fraction of successes."""
+
+    def __init__(self, ratio: float = 0.1, minimum: float = 10.0):
+        self.ratio = ratio
+        self.minimum = minimum
+        self.capacity = max(minimum, 100 * ratio)
+        self.tokens = minimum
+        self.rejected = 0
+
+    def deposit(self):
+        self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        self.rejected += 1
+        return False
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failures: int = 5, cooldown: float = 30.0):
+        self.failure_threshold = failures
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opened = 0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        """Whether a call may go to the server now."""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def release(self):
+        """Free the half-open probe without a verdict (cancelled or never sent)."""
+        self._probe_in_flight = False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.opened += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Transport failures, timeouts, 429 and 5xx are retryable; tool errors are not."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError, TimeoutError))
+
+
+# Caller
+
+class ResilientCaller:
+    """Runs MCP tool calls with hedging, retries, circuit breaking and deadlines."""
+
+    def __init__(self, policy: Optional[ResiliencePolicy] = None):
+        self.policy = policy or ResiliencePolicy()
+        self.budget = RetryBudget(self.policy.retry_budget_ratio, self.policy.retry_budget_min)
+        self._latency: Dict[str, LatencyTracker] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.fast_failures = 0
+        self.deadline_failures = 0
+
+    async def call(self, tool_name: str, send: Callable[[], Awaitable[T]]) -> T:
+        """Run ``send`` (one request to the server) under the policy.
+
+        Args:
+            tool_name: MCP tool name (selects tracker, breaker and timeout)
+            send: Coroutine factory issuing one request
+
+        Returns:
+            The first successful result
+
+        Raises:
+            CircuitOpenError: The tool's circuit is open
+            DeadlineExceededError: The request budget is exhausted
+            Whatever the last attempt raised, once retries are exhausted
+        """
+        self.calls += 1
+        breaker = self._breaker(tool_name)
+        if not breaker.allow():
+            self.fast_failures += 1
+            raise CircuitOpenError(
+                f"Circuit open for {tool_name} after {breaker.failures} failures; "
+                f"retrying in {self.policy.breaker_cooldown:.0f}s"
+            )
+
+        idempotent = tool_name in IDEMPOTENT_TOOLS
+        probe = breaker.state == CircuitBreaker.HALF_OPEN
+        attempt = 0
+        try:
+            while True:
+                timeout = self.timeout_for(tool_name)
+                try:
+                    result = await self._attempt(tool_name, send, timeout, hedge=idempotent)
+                except Exception as e:
+                    if not is_retryable(e):
+                        breaker.record_success()  # the server answered; the tool failed
+                        raise
+                    breaker.record_failure()
+
+                    delay = random.uniform(
+                        0, min(self.policy.backoff_max, self.policy.backoff_base * 2 ** attempt)
+                    )
+                    remaining = remaining_budget()
+                    if (not idempotent or attempt >= self.policy.max_retries
+                            or breaker.state == CircuitBreaker.OPEN
+                            or (remaining is not None and remaining - delay <= self.policy.deadline_reserve)
+                            or not self.budget.withdraw()):
+                        self.failures += 1
+                        raise
+                    attempt += 1
+                    self.retries += 1
+                    await asyncio.sleep(delay)
+                    continue
+
+                breaker.record_success()
+                self.budget.deposit()
+                return result
+        finally:
+            # A probe that was cancelled or ran out of request budget says
+            # nothing about the server; let the next call probe instead of
+            # leaving the circuit half-open for good
+            if probe:
+                breaker.release()
+
+    def timeout_for(self, tool_name: str) -> float:
+        """Per-attempt timeout: the tool's timeout, capped by the request budget.
+
+        Raises:
+            DeadlineExceededError: No budget left beyond the reserve
+        """
+        timeout = self.policy.tool_timeouts.get(tool_name, self.policy.timeout)
+        remaining = remaining_budget()
+        if remaining is None:
+            return timeout
+        available = remaining - self.policy.deadline_reserve
+        if available <= 0:
+            self.deadline_failures += 1
+            raise DeadlineExceededError(
+                f"Request budget exhausted ({max(remaining, 0):.1f}s left) before {tool_name}"
+            )
+        return min(timeout, available)
+
+    def hedge_delay(self, tool_name: str) -> Optional[float]:
+        """Delay before hedging, or None while the tool has too few samples."""
+        tracker = self._latency.get(tool_name)
+        if not self.policy.hedge or tracker is None or len(tracker) < self.policy.hedge_min_samples:
+            return None
+        return max(self.policy.hedge_min_delay, tracker.percentile(self.policy.hedge_percentile))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return call counters plus per-tool latency percentiles and breaker states."""
+        tools = {}
+        for name in sorted(set(self._latency) | set(self._breakers)):
+            tracker = self._latency.get(name)
+            breaker = self._breakers.get(name)
+            tools[name] = {
+                "samples": len(tracker) if tracker else 0,
+                "p50_ms": _ms(tracker.percentile(50)) if tracker else None,
+                "p95_ms": _ms(tracker.percentile(95)) if tracker else None,
+                "p99_ms": _ms(tracker.percentile(99)) if tracker else None,
+                "circuit": breaker.state if breaker else CircuitBreaker.CLOSED,
+                "circuit_opened": breaker.opened if breaker else 0,
+            }
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "fast_failures": self.fast_failures,
+            "deadline_failures": self.deadline_failures,
+            "retry_tokens": round(self.budget.tokens, 2),
+            "retry_budget_rejections": self.budget.rejected,
+            "tools": tools,
+        }
+
+    async def _attempt(
+        self,
+        tool_name: str,
+        send: Callable[[], Awaitable[T]],
+        timeout: float,
+        hedge: bool
+    ) -> T:
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        deadline = loop.time() + timeout
+        primary = loop.create_task(send())
+        pending = {primary}
+        error: Optional[BaseException] = None
+
+        try:
+            delay = self.hedge_delay(tool_name) if hedge else None
+            if delay is not None and delay < timeout:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done and self.budget.withdraw():
+                    pending.add(loop.create_task(send()))
+                    self.hedges += 1
+
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError(f"{tool_name} timed out after {timeout:.1f}s")
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        self._tracker(tool_name).record(time.perf_counter() - started)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _tracker(self, tool_name: str) -> LatencyTracker:
+        tracker = self._latency.get(tool_name)
+        if tracker is None:
+            tracker = self._latency[tool_name] = LatencyTracker()
+        return tracker
+
+    def _breaker(self, tool_name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(tool_name)
+        if breaker is None:
+            breaker = self._breakers[tool_name] = CircuitBreaker(
+                self.policy.breaker_failures, self.policy.breaker_cooldown
+            )
+        return breaker
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 1)
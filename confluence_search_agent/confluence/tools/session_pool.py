@@ -0,0 +1,406 @@
+"""Pool of MCP SSE sessions shared across agent invocations
+
+McpToolset keeps one MCP session per toolset, so concurrent
+document_searcher runs either queue behind the same SSE stream or each
+open their own stream and pay the SSE + ``initialize`` handshake.
+MCPSessionPool keeps a set of initialized sessions that tool calls check
+out and return:
+
+- Between ``min_sessions`` and ``max_sessions`` open sessions; when all
+  are busy and the pool is full, callers wait for a free one
+- A maintenance loop pings idle sessions (health check), closes sessions
+  idle for longer than ``idle_timeout`` (down to ``min_sessions``) and
+  replaces dead ones
+- A call that fails because its stream dropped is retried once on a fresh
+  session (every Confluence MCP tool is read-only, so this is safe)
+
+Each session lives in its own owner task, because the SSE transport must
+be entered and exited in the same task.
+
+Configuration:
+- CONFLUENCE_MCP_SESSION_POOL_ENABLED: Use the pool for MCP tools (default: true)
+- CONFLUENCE_MCP_SESSION_POOL_MIN: Sessions kept open (default: 1)
+- CONFLUENCE_MCP_SESSION_POOL_MAX: Maximum open sessions (default: 8)
+- CONFLUENCE_MCP_SESSION_IDLE_TIMEOUT: Seconds before an idle session is closed (default: 300)
+- CONFLUENCE_MCP_SESSION_HEALTH_INTERVAL: Seconds between health checks (default: 30)
+- CONFLUENCE_MCP_SESSION_CHECKOUT_TIMEOUT: Seconds to wait for a free session (default: 30)
+"""
+
+import asyncio
+import contextlib
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import anyio
+import httpx
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+try:
+    from mcp.shared.exceptions import McpError
+except ImportError:  # renamed in mcp 2.x
+    from mcp.shared.exceptions import MCPError as McpError
+
+# mcp.types.CONNECTION_CLOSED
+_CONNECTION_CLOSED = -32000
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """Whether an exception means the MCP stream dropped (vs. a tool error)."""
+    if isinstance(error, BaseExceptionGroup):
+        return any(is_connection_error(inner) for inner in error.exceptions)
+    if isinstance(error, McpError):
+        return getattr(error.error, "code", None) == _CONNECTION_CLOSED
+    return isinstance(error, (
+        anyio.ClosedResourceError,
+        anyio.BrokenResourceError,
+        anyio.EndOfStream,
+        httpx.TransportError,
+        ConnectionError,
+    ))
+
+
+class _PooledSession:
+    """One MCP session and the task that owns its SSE stream."""
+
+    def __init__(self):
+        self.session: Optional[ClientSession] = None
+        self.task: Optional["asyncio.Task[Any]"] = None
+        self.ready = asyncio.Event()
+        self.closing = asyncio.Event()
+        self.error: Optional[BaseException] = None
+        self.in_use = False
+        self.broken = False
+        self.last_used = time.monotonic()
+
+    @property
+    def alive(self) -> bool:
+        return (self.session is not None and not self.broken
+                and self.task is not None and not self.task.done())
+
+
+class MCPSessionPool:
+    """Checkout/return pool of initialized MCP SSE sessions."""
+
+    def __init__(
+        self,
+        url: str,
+        min_sessions: int = 1,
+        max_sessions: int = 8,
+        idle_timeout: float = 300,
+        health_interval: float = 30,
+        checkout_timeout: float = 30,
+        connect_timeout: float = 10
+    ):
+        """Initialize the pool. Sessions are opened on demand or by start().
+
+        Args:
+            url: MCP SSE endpoint
+            min_sessions: Sessions kept open by the maintenance loop
+            max_sessions: Upper bound on open sessions
+            idle_timeout: Seconds before an idle session above min_sessions is closed
+            health_interval: Seconds between maintenance passes
+            checkout_timeout: Seconds a caller waits for a free session
+            connect_timeout: Seconds allowed for the SSE + initialize handshake
+        """
+        self.url = url
+        self.min_sessions = min_sessions
+        self.max_sessions = max(1, max_sessions)
+        self.idle_timeout = idle_timeout
+        self.health_interval = health_interval
+        self.checkout_timeout = checkout_timeout
+        self.connect_timeout = connect_timeout
+
+        self._sessions: List[_PooledSession] = []
+        self._opening = 0
+        self._waiting = 0
+        self._available: Optional[asyncio.Condition] = None
+        self._maintenance: Optional["asyncio.Task[Any]"] = None
+        self._sweep: Optional["asyncio.Task[Any]"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.checkouts = 0
+        self.waits = 0
+        self.total_wait = 0.0
+        self.handshakes = 0
+        self.handshake_failures = 0
+        self.total_handshake = 0.0
+        self.last_handshake = 0.0
+        self.reconnects = 0
+        self.health_failures = 0
+        self.reaped = 0
+
+    @classmethod
+    def from_env(cls, url: str) -> Optional["MCPSessionPool"]:
+        """Create a pool from CONFLUENCE_MCP_SESSION_* variables (None if disabled)."""
+        if os.getenv("CONFLUENCE_MCP_SESSION_POOL_ENABLED", "true").lower() != "true":
+            return None
+        return cls(
+            url,
+            min_sessions=int(os.getenv("CONFLUENCE_MCP_SESSION_POOL_MIN", "1")),
+            max_sessions=int(os.getenv("CONFLUENCE_MCP_SESSION_POOL_MAX", "8")),
+            idle_timeout=float(os.getenv("CONFLUENCE_MCP_SESSION_IDLE_TIMEOUT", "300")),
+            health_interval=float(os.getenv("CONFLUENCE_MCP_SESSION_HEALTH_INTERVAL", "30")),
+            checkout_timeout=float(os.getenv("CONFLUENCE_MCP_SESSION_CHECKOUT_TIMEOUT", "30")),
+        )
+
+    async def start(self):
+        """Open min_sessions and start the maintenance loop."""
+        self._bind_loop()
+        if self._maintenance is None or self._maintenance.done():
+            self._maintenance = asyncio.get_running_loop().create_task(self._maintain())
+        await self._fill()
+
+    @contextlib.asynccontextmanager
+    async def session(self, fresh: bool = False) -> AsyncIterator[ClientSession]:
+        """Check out a session for the duration of the block.
+
+        Args:
+            fresh: Open a new session instead of reusing an idle one
+        """
+        pooled = await self._acquire(fresh)
+        try:
+            yield pooled.session
+        except BaseException as e:
+            if is_connection_error(e):
+                pooled.broken = True
+            raise
+        finally:
+            await self._release(pooled)
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+        """Call an MCP tool on a pooled session, reconnecting once if the stream dropped.
+
+        Args:
+            name: MCP tool name
+            arguments: Tool arguments
+
+        Returns:
+            mcp.types.CallToolResult
+        """
+        try:
+            async with self.session() as session:
+                return await session.call_tool(name, arguments=arguments)
+        except Exception as e:
+            if not is_connection_error(e):
+                raise
+            self.reconnects += 1
+            print(f"⚠️  MCP session dropped during {name}, retrying on a new session: {e}")
+            # Streams tend to drop together (server restart); sweep the idle ones
+            self._sweep = asyncio.get_running_loop().create_task(self._check())
+        async with self.session(fresh=True) as session:
+            return await session.call_tool(name, arguments=arguments)
+
+    async def list_tools(self) -> Any:
+        """List the server's tools on a pooled session (mcp.types.ListToolsResult)."""
+        async with self.session() as session:
+            return await session.list_tools()
+
+    async def close(self):
+        """Stop the maintenance loop and close every session."""
+        if self._maintenance is not None:
+            self._maintenance.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._maintenance
+            self._maintenance = None
+        sessions, self._sessions = self._sessions, []
+        for pooled in sessions:
+            await self._close_session(pooled)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool saturation and handshake latency metrics."""
+        in_use = sum(1 for pooled in self._sessions if pooled.in_use)
+        return {
+            "open": len(self._sessions),
+            "opening": self._opening,
+            "in_use": in_use,
+            "idle": len(self._sessions) - in_use,
+            "waiting": self._waiting,
+            "min": self.min_sessions,
+            "max": self.max_sessions,
+            "saturation": in_use / self.max_sessions,
+            "checkouts": self.checkouts,
+            "waits": self.waits,
+            "avg_wait_ms": self.total_wait / self.waits * 1000 if self.waits else 0.0,
+            "handshakes": self.handshakes,
+            "handshake_failures": self.handshake_failures,
+            "avg_handshake_ms": self.total_handshake / self.handshakes * 1000 if self.handshakes else 0.0,
+            "last_handshake_ms": self.last_handshake * 1000,
+            "reconnects": self.reconnects,
+            "health_failures": self.health_failures,
+            "reaped": self.reaped,
+        }
+
+    def _bind_loop(self):
+        # Sessions belong to the event loop that opened them; a new loop
+        # (e.g. a second asyncio.run in scripts) starts from an empty pool
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._sessions = []
+            self._opening = 0
+            self._waiting = 0
+            self._available = asyncio.Condition()
+            self._maintenance = None
+
+    async def _acquire(self, fresh: bool = False) -> _PooledSession:
+        self._bind_loop()
+        deadline = time.monotonic() + self.checkout_timeout
+        waited_since: Optional[float] = None
+
+        async with self._available:
+            while True:
+                if fresh and len(self._sessions) + self._opening >= self.max_sessions:
+                    # Make room for the new session by closing an idle one
+                    idle = next((p for p in self._sessions if not p.in_use), None)
+                    if idle is not None:
+                        self._discard(idle)
+
+                for pooled in reversed(self._sessions):  # most recently used first
+                    if pooled.in_use or fresh:
+                        continue
+                    if not pooled.alive:
+                        self._discard(pooled)
+                        continue
+                    pooled.in_use = True
+                    break
+                else:
+                    pooled = None
+
+                if pooled is not None:
+                    break
+
+                if len(self._sessions) + self._opening < self.max_sessions:
+                    self._opening += 1
+                    self._available.release()
+                    try:
+                        pooled = await self._open()
+                    finally:
+                        await self._available.acquire()
+                        self._opening -= 1
+                    pooled.in_use = True
+                    self._sessions.append(pooled)
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"No MCP session available after {self.checkout_timeout}s "
+                        f"({self.max_sessions} sessions busy)"
+                    )
+                if waited_since is None:
+                    waited_since = time.perf_counter()
+                self._waiting += 1
+                try:
+                    await asyncio.wait_for(self._available.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    self._waiting -= 1
+
+        self.checkouts += 1
+        if waited_since is not None:
+            self.waits += 1
+            self.total_wait += time.perf_counter() - waited_since
+        return pooled
+
+    async def _release(self, pooled: _PooledSession):
+        pooled.in_use = False
+        pooled.last_used = time.monotonic()
+        if not pooled.alive:
+            self._discard(pooled)
+        async with self._available:
+            self._available.notify()
+
+    async def _open(self) -> _PooledSession:
+        pooled = _PooledSession()
+        started = time.perf_counter()
+        pooled.task = asyncio.get_running_loop().create_task(self._own(pooled))
+        try:
+            await asyncio.wait_for(pooled.ready.wait(), self.connect_timeout)
+        except asyncio.TimeoutError:
+            pooled.task.cancel()
+            self.handshake_failures += 1
+            raise TimeoutError(f"MCP handshake with {self.url} timed out after {self.connect_timeout}s")
+        if pooled.session is None:
+            self.handshake_failures += 1
+            raise ConnectionError(f"Could not open MCP session to {self.url}: {pooled.error}")
+
+        self.last_handshake = time.perf_counter() - started
+        self.total_handshake += self.last_handshake
+        self.handshakes += 1
+        return pooled
+
+    async def _own(self, pooled: _PooledSession):
+        # Enters and exits the SSE transport in this one task
+        try:
+            async with sse_client(self.url, timeout=self.connect_timeout) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    pooled.session = session
+                    pooled.ready.set()
+                    await pooled.closing.wait()
+        except Exception as e:
+            pooled.error = e
+        finally:
+            pooled.broken = True
+            pooled.ready.set()
+
+    async def _close_session(self, pooled: _PooledSession):
+        pooled.closing.set()
+        if pooled.task is not None and not pooled.task.done():
+            try:
+                await asyncio.wait_for(pooled.task, 5)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+
+    def _discard(self, pooled: _PooledSession):
+        if pooled in self._sessions:
+            self._sessions.remove(pooled)
+        pooled.closing.set()
+
+    async def _fill(self):
+        while len(self._sessions) + self._opening < self.min_sessions:
+            self._opening += 1
+            try:
+                pooled = await self._open()
+            finally:
+                self._opening -= 1
+            self._sessions.append(pooled)
+        async with self._available:
+            self._available.notify_all()
+
+    async def _maintain(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self._check()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  MCP session pool maintenance failed: {e}")
+
+    async def _check(self):
+        now = time.monotonic()
+        for pooled in list(self._sessions):
+            if pooled.in_use:
+                continue
+            if not pooled.alive:
+                self._discard(pooled)
+                continue
+            if now - pooled.last_used > self.idle_timeout and len(self._sessions) > self.min_sessions:
+                self._discard(pooled)
+                self.reaped += 1
+                continue
+
+            pooled.in_use = True  # keep it from being checked out mid-ping
+            try:
+                await asyncio.wait_for(pooled.session.send_ping(), self.connect_timeout)
+            except Exception as e:
+                self.health_failures += 1
+                pooled.broken = True
+                print(f"⚠️  MCP session failed health check: {e}")
+            finally:
+                await self._release(pooled)
+        await self._fill()
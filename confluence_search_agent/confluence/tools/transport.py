@@ -0,0 +1,227 @@
+"""Pooled HTTP transport for the Confluence MCP client
+
+Every A2A session in the process shares the same MCP client, so the
+transport is where connection reuse is decided. This module provides:
+- Explicit connection pool limits and keepalive expiry
+- Optional HTTP/2 multiplexing (requires the ``h2`` package)
+- One ``httpx.AsyncClient`` per event loop (httpx clients are loop-bound)
+- Pool statistics: in-use, idle, waiting requests and pool wait time
+
+References:
+- httpx resource limits: https://www.python-httpx.org/advanced/resource-limits/
+- httpx HTTP/2 support: https://www.python-httpx.org/http2/
+"""
+
+import asyncio
+import os
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import httpx
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() == "true"
+
+
+@dataclass
+class TransportConfig:
+    """Connection pool settings for the MCP transport.
+
+    Attributes:
+        max_connections: Maximum concurrent connections to the MCP server
+        max_keepalive_connections: Idle connections kept open for reuse
+        keepalive_expiry: Seconds an idle connection is kept before closing
+        pool_timeout: Seconds to wait for a free connection before failing
+        http2: Negotiate HTTP/2 so many requests share one connection
+    """
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    pool_timeout: float = 10.0
+    http2: bool = False
+
+    @classmethod
+    def from_env(cls) -> "TransportConfig":
+        """Build a config from CONFLUENCE_MCP_* environment variables."""
+        return cls(
+            max_connections=int(os.getenv("CONFLUENCE_MCP_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("CONFLUENCE_MCP_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("CONFLUENCE_MCP_KEEPALIVE_EXPIRY", "30")),
+            pool_timeout=float(os.getenv("CONFLUENCE_MCP_POOL_TIMEOUT", "10")),
+            http2=_env_bool("CONFLUENCE_MCP_HTTP2", "false"),
+        )
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _LoopState:
+    """HTTP client and pool accounting bound to a single event loop."""
+
+    def __init__(self, client: httpx.AsyncClient, max_connections: int):
+        self.client = client
+        self.slots = asyncio.Semaphore(max_connections)
+        self.in_use = 0
+        self.waiting = 0
+
+
+class MCPTransport:
+    """Pooled, loop-aware HTTP transport to the MCP server.
+
+    httpx clients cannot be shared between event loops, so one client is
+    created lazily per running loop and dropped when the loop goes away.
+    Requests acquire a pool slot before being sent, which lets us measure
+    how long callers queue for a connection.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 30,
+        config: Optional[TransportConfig] = None
+    ):
+        """Initialize the transport.
+
+        Args:
+            base_url: MCP server base URL
+            headers: Default headers sent with every request
+            timeout: Read/write/connect timeout in seconds
+            config: Pool settings (defaults to TransportConfig.from_env())
+        """
+        self.base_url = base_url
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.config = config or TransportConfig.from_env()
+
+        self.http2 = self.config.http2
+        if self.http2 and not _http2_available():
+            print("MCP Transport: HTTP/2 requested but 'h2' is not installed, using HTTP/1.1")
+            self.http2 = False
+
+        self._states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+        # Aggregate counters across all loops
+        self._requests = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _create_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.config.max_connections,
+            max_keepalive_connections=self.config.max_keepalive_connections,
+            keepalive_expiry=self.config.keepalive_expiry,
+        )
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            timeout=httpx.Timeout(self.timeout, pool=self.config.pool_timeout),
+            limits=limits,
+            http2=self.http2,
+        )
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None or state.client.is_closed:
+            state = _LoopState(self._create_client(), self.config.max_connections)
+            self._states[loop] = state
+        return state
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client bound to the currently running event loop."""
+        return self._state().client
+
+    async def post(self, path: str, **kwargs: Any) -> httpx.Response:
+        """POST to the MCP server through the pool.
+
+        Args:
+            path: Request path relative to the base URL
+            **kwargs: Passed through to ``httpx.AsyncClient.post``
+
+        Returns:
+            The HTTP response
+
+        Raises:
+            httpx.PoolTimeout: If no connection frees up within pool_timeout
+        """
+        state = self._state()
+
+        started = time.perf_counter()
+        state.waiting += 1
+        try:
+            await asyncio.wait_for(state.slots.acquire(), self.config.pool_timeout)
+        except asyncio.TimeoutError:
+            raise httpx.PoolTimeout(
+                f"No MCP connection available within {self.config.pool_timeout}s"
+            )
+        finally:
+            state.waiting -= 1
+
+        waited = time.perf_counter() - started
+        self._requests += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+
+        state.in_use += 1
+        try:
+            return await state.client.post(path, **kwargs)
+        finally:
+            state.in_use -= 1
+            state.slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool statistics aggregated over all live event loops.
+
+        Returns:
+            Dictionary with in_use, idle, waiting, requests and wait times (ms)
+        """
+        in_use = waiting = idle = connections = 0
+        for state in list(self._states.values()):
+            in_use += state.in_use
+            waiting += state.waiting
+            # httpcore exposes pooled connections on the transport; this is
+            # best-effort introspection and is skipped if the layout changes.
+            pool = getattr(getattr(state.client, "_transport", None), "_pool", None)
+            for conn in getattr(pool, "connections", []) or []:
+                connections += 1
+                try:
+                    if conn.is_idle():
+                        idle += 1
+                except Exception:
+                    pass
+
+        return {
+            "loops": len(self._states),
+            "http2": self.http2,
+            "max_connections": self.config.max_connections,
+            "connections": connections,
+            "in_use": in_use,
+            "idle": idle,
+            "waiting": waiting,
+            "requests": self._requests,
+            "avg_wait_ms": (self._wait_total / self._requests * 1000) if self._requests else 0.0,
+            "max_wait_ms": self._wait_max * 1000,
+        }
+
+    async def aclose(self):
+        """Close every client whose event loop is still usable."""
+        current = asyncio.get_running_loop()
+        for loop, state in list(self._states.items()):
+            if loop is current:
+                await state.client.aclose()
+            elif not loop.is_closed() and loop.is_running():
+                asyncio.run_coroutine_threadsafe(state.client.aclose(), loop)
+        self._states.clear()
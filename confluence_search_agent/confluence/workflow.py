@@ -0,0 +1,146 @@
+"""Deterministic workflow root agent (AGENT_WORKFLOW=pipeline)
+
+In the default ``llm`` workflow the root coordinator is an LlmAgent that
+picks the next sub-agent with ``transfer_to_agent``. Every routing decision
+is one more model call, and sub-agents have to hand control back to the
+coordinator to continue.
+
+``ConfluenceWorkflowAgent`` replaces that with a fixed route per turn:
+
+- Documentation questions run query_analyzer -> document_searcher ->
+  answer_synthesizer in order, with no routing calls in between
+- Greetings, thanks, follow-ups about the previous answer and clearly
+  out-of-scope requests go to a lightweight coordinator LlmAgent, the only
+  place the coordinator model is still used
+
+Routing is a local rule check (``route_question``) plus the fast query
+analyzer's keyword extraction, so it costs microseconds. When the fast
+analyzer is confident, its analysis is emitted as the query_analyzer's
+turn and the stage is skipped (a before_agent_callback returning content
+would end the whole invocation, so the pipeline does this itself).
+
+References:
+- Custom agents: https://google.github.io/adk-docs/agents/custom-agents/
+"""
+
+import re
+import threading
+from collections import Counter
+from typing import AsyncGenerator, Dict, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from .fast_analyzer import FastQueryAnalyzer, fast_analyzer
+
+PIPELINE = "pipeline"
+COORDINATOR = "coordinator"
+
+# Whole-message small talk
+_SMALL_TALK_RE = re.compile(
+    r"^\s*(hi|hello|hey|yo|thanks|thank you|thx|cheers|ok|okay|great|cool|bye|goodbye|"
+    r"good (morning|afternoon|evening)|who are you|what can you do|help)\b[\s!.?]*$",
+    re.I
+)
+
+# Turns that refer back to the previous answer instead of asking anew
+_FOLLOW_UP_RE = re.compile(
+    r"^\s*((can|could) you )?(elaborate|rephrase|summari[sz]e (that|it|this)|explain (that|it|this)|"
+    r"tell me more|more details?|what do you mean|shorter|in other words|that'?s (wrong|not right))\b",
+    re.I
+)
+
+# Requests that are not documentation lookups at all
+_OUT_OF_SCOPE_RE = re.compile(
+    r"\b(tell me a joke|write (me )?(a )?(poem|story|song)|weather|stock price|translate this)\b",
+    re.I
+)
+
+
+def route_question(question: str, analyzer: Optional[FastQueryAnalyzer] = None) -> str:
+    """Pick the route for a user turn.
+
+    Args:
+        question: User message text
+        analyzer: Query analyzer used to check for search keywords
+
+    Returns:
+        ``pipeline`` for documentation questions, ``coordinator`` otherwise
+    """
+    if not question.strip():
+        return COORDINATOR
+    if _SMALL_TALK_RE.match(question) or _FOLLOW_UP_RE.match(question) or _OUT_OF_SCOPE_RE.search(question):
+        return COORDINATOR
+    analysis = (analyzer or fast_analyzer).analyze(question)
+    return PIPELINE if analysis.keywords or analysis.phrases else COORDINATOR
+
+
+class ConfluenceWorkflowAgent(BaseAgent):
+    """Root agent that runs the sub-agents as a fixed pipeline.
+
+    ``sub_agents`` are the pipeline stages in order, followed by the
+    coordinator used for turns that are not documentation questions.
+    """
+
+    # Stage answered by the fast query analyzer when it is confident
+    fast_path_stage: Optional[str] = None
+
+    def __init__(self, *, stages: list, coordinator: BaseAgent, **kwargs):
+        super().__init__(sub_agents=[*stages, coordinator], **kwargs)
+
+    @property
+    def stages(self) -> list:
+        return self.sub_agents[:-1]
+
+    @property
+    def coordinator(self) -> BaseAgent:
+        return self.sub_agents[-1]
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        user_content = ctx.user_content
+        question = " ".join(
+            part.text for part in (user_content.parts or []) if getattr(part, "text", None)
+        ) if user_content else ""
+
+        route = route_question(question)
+        route_counter.record(route)
+
+        agents = self.stages if route == PIPELINE else [self.coordinator]
+        for agent in agents:
+            if agent.name == self.fast_path_stage:
+                analysis = fast_analyzer.try_fast_path(question)
+                if analysis is not None:
+                    yield Event(
+                        invocation_id=ctx.invocation_id,
+                        author=agent.name,
+                        branch=ctx.branch,
+                        content=types.Content(role="model", parts=[types.Part(text=analysis.to_text())]),
+                        actions=EventActions(state_delta={"query_analysis": analysis.to_dict()}),
+                    )
+                    continue
+            async for event in agent.run_async(ctx):
+                yield event
+            if ctx.end_invocation:
+                return
+
+
+class RouteCounter:
+    """Counts how turns were routed."""
+
+    def __init__(self):
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, route: str):
+        with self._lock:
+            self._counts[route] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {PIPELINE: self._counts[PIPELINE], COORDINATOR: self._counts[COORDINATOR]}
+
+
+# Shared route statistics
+route_counter = RouteCounter()
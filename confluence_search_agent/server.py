@@ -1,20 +1,65 @@
 """A2A Server for Confluence Search Agent"""
 import os
+from contextlib import asynccontextmanager
 from google.adk.a2a.utils.agent_to_a2a import to_a2a
 from confluence.agent import root_agent
+from confluence.config import (
+    confluence_mcp_toolset,
+    llm_scheduler,
+    A2A_STREAMING_ENABLED,
+    LLM_SCHEDULER_ENABLED,
+)
+from confluence.fast_analyzer import fast_analyzer
+from confluence.tools.mirror import get_mirror_sync
+from confluence.scheduler import AdmissionMiddleware
+from confluence.streaming import StreamingA2aAgentExecutor
+from confluence.tools.resilience import RequestBudgetMiddleware
 
 # A2A Server configuration
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", "8002"))
 PROTOCOL = os.getenv("PROTOCOL", "JSONRPC")  # JSONRPC or REST
+# Time budget per A2A request; MCP call deadlines are derived from what is left
+REQUEST_BUDGET = float(os.getenv("CONFLUENCE_REQUEST_BUDGET", "60"))
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Start background services (local Confluence mirror sync) with the server."""
+    try:
+        await confluence_mcp_toolset.warm_up()
+    except Exception as e:
+        print(f"⚠️  MCP tool discovery failed at startup, retrying on first request: {e}")
+    mirror_sync = get_mirror_sync()  # None unless CONFLUENCE_MIRROR_DB is set
+    if mirror_sync is not None:
+        mirror_sync.start()
+    try:
+        await fast_analyzer.refresh_spaces()
+    except Exception as e:
+        print(f"⚠️  Could not load Confluence spaces for fast-path analysis: {e}")
+    yield
+    if mirror_sync is not None:
+        await mirror_sync.stop()
+    await confluence_mcp_toolset.close()
+
 
 # Convert ADK agent to A2A-compatible FastAPI app
+# message/stream requests get answer tokens and progress updates as they
+# happen (see confluence/streaming.py)
 app = to_a2a(
     root_agent,
     host=HOST,
     port=PORT,
     protocol=PROTOCOL,
+    lifespan=lifespan,
+    agent_executor_factory=(
+        (lambda runner: StreamingA2aAgentExecutor(runner=runner)) if A2A_STREAMING_ENABLED else None
+    ),
 )
+app.add_middleware(RequestBudgetMiddleware, default_budget=REQUEST_BUDGET)
+if LLM_SCHEDULER_ENABLED:
+    # Fast 429 instead of a timeout while the LLM call queue is saturated
+    app.add_middleware(AdmissionMiddleware, scheduler=llm_scheduler)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,116 @@
+"""In-process stand-ins for the Confluence MCP server used by the tests"""
+
+import asyncio
+import json
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from confluence.tools.cache import ToolResultCache
+from confluence.tools.mcp_client import ConfluenceMCPClient
+from confluence.tools.transport import MCPTransport, TransportConfig
+
+BASE_URL = "http://mcp.test"
+
+
+class FakeMCPServer:
+    """JSON-RPC ``tools/call`` endpoint over an in-memory set of pages.
+
+    Attributes:
+        pages: Page id -> page dictionary (get_page_content format)
+        calls: Tool name -> number of calls answered
+        requests: Number of HTTP requests received
+        batch_status: HTTP status returned for batch arrays (None: answer them)
+        delay: Seconds each HTTP request takes
+    """
+
+    def __init__(self, pages: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.pages = pages if pages is not None else {}
+        self.calls: Counter = Counter()
+        self.requests = 0
+        self.batches: List[int] = []
+        self.batch_status: Optional[int] = None
+        self.max_batch: Optional[int] = None
+        self.delay = 0.0
+        self.release: Optional[asyncio.Event] = None
+
+    def add_page(self, page_id: str, title: str, content: str, space: str = "ENG",
+                 last_modified: str = "2024-01-15T10:00:00Z"):
+        self.pages[page_id] = {
+            "id": page_id,
+            "title": title,
+            "url": f"https://confluence.example.com/pages/{page_id}",
+            "space": space,
+            "lastModified": last_modified,
+            "author": "alice",
+            "content": content,
+        }
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.release is not None:
+            await self.release.wait()
+        body = json.loads(request.content)
+        if isinstance(body, list):
+            self.batches.append(len(body))
+            if self.batch_status is not None:
+                return httpx.Response(self.batch_status, json={"error": "batch rejected"})
+            if self.max_batch is not None and len(body) > self.max_batch:
+                return httpx.Response(413)
+            # Answer out of order; the client matches responses by id
+            return httpx.Response(200, json=[self._answer(item) for item in reversed(body)])
+        return httpx.Response(200, json=self._answer(body))
+
+    def _answer(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        name = payload["params"]["name"]
+        arguments = payload["params"]["arguments"]
+        self.calls[name] += 1
+        try:
+            result = self.call(name, arguments)
+        except KeyError as e:
+            return {"jsonrpc": "2.0", "id": payload["id"], "error": {"code": -32602, "message": f"Not found: {e}"}}
+        return {"jsonrpc": "2.0", "id": payload["id"], "result": result}
+
+    def call(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        if name == "confluence_get_page":
+            return dict(self.pages[arguments["pageId"]])
+        if name == "confluence_search":
+            words = arguments["query"].lower().split()
+            hits = [
+                {key: page[key] for key in ("id", "title", "url", "space", "lastModified")}
+                for page in self.pages.values()
+                if (not arguments.get("spaceKey") or page["space"] == arguments["spaceKey"])
+                and any(word in (page["title"] + " " + page["content"]).lower() for word in words)
+            ][:arguments.get("limit", 5)]
+            return {"results": hits, "total": len(hits), "query": arguments["query"]}
+        if name == "confluence_list_spaces":
+            return {"spaces": [{"key": key, "name": key} for key in sorted({p["space"] for p in self.pages.values()})]}
+        raise KeyError(name)
+
+
+def make_transport(
+    handler: Callable[[httpx.Request], Any],
+    config: Optional[TransportConfig] = None
+) -> MCPTransport:
+    """MCPTransport whose per-loop clients send to ``handler``."""
+    transport = MCPTransport(BASE_URL, config=config or TransportConfig())
+    transport._create_client = lambda: httpx.AsyncClient(
+        base_url=BASE_URL, transport=httpx.MockTransport(handler)
+    )
+    return transport
+
+
+def make_client(server: FakeMCPServer, cache: Optional[ToolResultCache] = None) -> ConfluenceMCPClient:
+    """ConfluenceMCPClient talking to ``server``, without resilience wrapping.
+
+    Pass a cache to enable result caching; without one caching is off.
+    """
+    client = ConfluenceMCPClient(BASE_URL, cache=cache)
+    if cache is None:
+        client.cache = None
+    client.resilience = None
+    client.transport = make_transport(server.handle)
+    return client
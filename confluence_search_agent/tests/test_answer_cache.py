@@ -0,0 +1,83 @@
+"""Tests for the semantic answer cache (confluence.answer_cache)"""
+
+import unittest
+
+from confluence.answer_cache import AnswerCache, normalize_question
+
+QUESTION = "How do I request VPN access?"
+ANSWER = "File a ticket, see https://wiki/pages/1 (VPN Access Requests)."
+PAGES = {"1": "2024-01-15"}
+
+
+class NormalizeQuestionTest(unittest.TestCase):
+    def test_stopwords_filler_and_suffixes(self):
+        self.assertEqual(normalize_question("How do I request VPN access?"), ["request", "vpn", "access"])
+        self.assertEqual(normalize_question("VPN access requesting process"), ["vpn", "access", "request"])
+
+
+class AnswerCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = AnswerCache(max_entries=2, threshold=0.85)
+        self.assertTrue(self.cache.store(QUESTION, ANSWER, PAGES))
+
+    def test_paraphrase_hits_and_unrelated_question_misses(self):
+        entry, similarity = self.cache.lookup("VPN access request process")
+        self.assertEqual(entry.answer, ANSWER)
+        self.assertGreaterEqual(similarity, 0.85)
+        self.assertIsNone(self.cache.lookup("How do I reset my password?"))
+        self.assertIsNone(self.cache.lookup("how do I"))
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_uncited_answers_are_not_stored(self):
+        self.assertFalse(self.cache.store("What is the office wifi password?", "Ask IT.", {}))
+
+    def test_new_page_version_invalidates(self):
+        self.cache.observe_version("1", "2024-01-15")
+        self.assertIsNotNone(self.cache.lookup(QUESTION))
+        self.cache.observe_result({"results": [{"id": "1", "lastModified": "2024-03-01"}]})
+        self.assertIsNone(self.cache.lookup(QUESTION))
+        self.assertEqual(self.cache.stats()["invalidations"], 1)
+
+    def test_revalidation(self):
+        entry, similarity = self.cache.lookup(QUESTION)
+        self.assertFalse(self.cache.needs_revalidation(entry))
+        entry.validated_at -= 301
+        self.assertTrue(self.cache.needs_revalidation(entry))
+
+        self.assertTrue(self.cache.confirm(entry, similarity, {"1": "2024-01-15"}))
+        self.assertFalse(self.cache.needs_revalidation(entry))
+
+        # A page that could not be fetched counts as changed
+        self.assertFalse(self.cache.confirm(entry, similarity, {}))
+        self.assertIsNone(self.cache.lookup(QUESTION))
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["revalidation_misses"]), (0, 1))
+
+    def test_ttl_expiry(self):
+        entry, _ = self.cache.lookup(QUESTION)
+        entry.created_at -= self.cache.ttl + 1
+        self.assertIsNone(self.cache.lookup(QUESTION))
+        self.assertEqual(self.cache.stats()["expirations"], 1)
+
+    def test_lru_eviction_and_replacement(self):
+        self.cache.store("Where is the expense policy?", "See https://wiki/pages/2", {"2": "v1"})
+        self.cache.lookup(QUESTION)
+        self.cache.store("Who approves travel?", "See https://wiki/pages/3", {"3": "v1"})
+        self.assertIsNone(self.cache.lookup("Where is the expense policy?"))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+        self.cache.store("how do I request vpn access", "Newer answer https://wiki/pages/1", PAGES)
+        self.assertEqual(self.cache.lookup(QUESTION)[0].answer, "Newer answer https://wiki/pages/1")
+        self.assertEqual(self.cache.stats()["entries"], 2)
+
+    def test_cited_pages_of_a_turn(self):
+        self.cache.record_pages("turn", {"results": [
+            {"id": "1", "url": "https://wiki/pages/1", "title": "VPN Access Requests", "lastModified": "v1"},
+            {"id": "2", "url": "https://wiki/pages/2", "title": "Expense Policy", "lastModified": "v7"},
+        ]})
+        self.assertEqual(self.cache.cited_pages("turn", ANSWER), {"1": "v1"})
+        self.assertEqual(self.cache.cited_pages("turn", ANSWER), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
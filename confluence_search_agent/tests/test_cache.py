@@ -0,0 +1,122 @@
+"""Tests for the TTL/LRU tool result cache (confluence.tools.cache)"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import httpx
+
+from confluence.tools.cache import ToolResultCache, make_cache_key
+
+from .mcp_fakes import FakeMCPServer, make_client, make_transport
+
+PAGE_KEY = make_cache_key("confluence_get_page", {"pageId": "1"})
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ToolResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch("confluence.tools.cache.time.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = ToolResultCache(max_entries=2, ttl=60, max_stale=600)
+
+    def test_keys_are_normalized(self):
+        self.assertEqual(
+            make_cache_key("confluence_search", {"query": "  VPN   Access ", "limit": 5, "spaceKey": None}),
+            make_cache_key("confluence_search", {"limit": 5, "query": "vpn access"}),
+        )
+        self.assertNotEqual(
+            make_cache_key("confluence_get_page_by_title", {"title": "VPN"}),
+            make_cache_key("confluence_get_page_by_title", {"title": "vpn"}),
+        )
+
+    def test_ttl_expiry_and_stale_reads(self):
+        self.cache.set("a", {"v": 1})
+        self.assertEqual(self.cache.get("a"), {"v": 1})
+
+        self.clock.now += 61
+        self.assertIsNone(self.cache.get("a"))
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.stats()["expirations"], 1)
+        self.assertEqual(self.cache.get_stale("a"), {"v": 1})
+
+        self.clock.now += 600
+        self.assertIsNone(self.cache.get_stale("a"))
+
+    def test_lru_eviction(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")  # "b" is now the least recently used
+        self.cache.set("c", 3)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual((self.cache.get("a"), self.cache.get("c")), (1, 3))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_newer_page_version_invalidates(self):
+        self.cache.set(PAGE_KEY, {"id": "1"}, page_id="1", version="2024-01-01")
+        self.cache.observe_result({"results": [{"id": "1", "lastModified": "2024-01-01"}]})
+        self.assertIsNotNone(self.cache.get(PAGE_KEY))
+
+        self.cache.observe_result({"results": [{"id": "1", "lastModified": "2024-02-01"}]})
+        self.assertIsNone(self.cache.get(PAGE_KEY))
+        self.assertIsNone(self.cache.get_stale(PAGE_KEY))
+        self.assertEqual(self.cache.stats()["invalidations"], 1)
+
+    def test_disk_tier(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        path = os.path.join(directory, "cache.sqlite")
+
+        ToolResultCache(db_path=path).set(PAGE_KEY, {"id": "1"}, page_id="1", version="2024-01-01")
+        restarted = ToolResultCache(db_path=path)
+        self.assertEqual(restarted.get(PAGE_KEY), {"id": "1"})
+        self.assertEqual(restarted.stats()["disk_hits"], 1)
+
+        restarted.observe_version("1", "2024-02-01")
+        self.assertIsNone(ToolResultCache(db_path=path).get(PAGE_KEY))
+
+
+class ClientCacheTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = FakeMCPServer()
+        self.server.add_page("1", "VPN Setup", "Install the VPN client", last_modified="2024-01-01")
+        self.client = make_client(self.server, cache=ToolResultCache(ttl=60))
+
+    async def asyncTearDown(self):
+        await self.client.transport.aclose()
+
+    async def test_page_fetches_are_cached_until_a_newer_version_shows_up(self):
+        await self.client.get_page("1")
+        await self.client.get_page("1")
+        self.assertEqual(self.server.calls["confluence_get_page"], 1)
+
+        self.server.add_page("1", "VPN Setup", "Install the new VPN client", last_modified="2024-02-01")
+        await self.client.search_content("vpn")
+        page = await self.client.get_page("1")
+        self.assertEqual(page["content"], "Install the new VPN client")
+        self.assertEqual(self.server.calls["confluence_get_page"], 2)
+
+    async def test_stale_entry_served_while_the_server_fails(self):
+        self.client.cache.ttl = 0  # stored already expired
+        await self.client.get_page("1")
+        await self.client.transport.aclose()
+        self.client.transport = make_transport(lambda request: httpx.Response(503))
+
+        page = await self.client.get_page("1")
+        self.assertTrue(page["stale"])
+        self.assertEqual(page["title"], "VPN Setup")
+
+
+if __name__ == "__main__":
+    unittest.main()
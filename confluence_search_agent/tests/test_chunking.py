@@ -0,0 +1,88 @@
+"""Tests for section chunking and selection (confluence.tools.chunking)"""
+
+import unittest
+
+from confluence.tools.chunking import SectionCache, select_sections, split_sections
+
+PAGE = """Company VPN guide.
+
+# Install
+Download the VPN client from the portal.
+
+## Windows
+Run the installer as administrator.
+
+```
+# not a heading
+```
+
+# Troubleshooting
+If the VPN drops, restart the client.
+
+# Install
+Second install section.
+"""
+
+
+class SplitSectionsTest(unittest.TestCase):
+    def test_sections_follow_headings(self):
+        sections = split_sections(PAGE)
+        self.assertEqual(
+            [section.id for section in sections],
+            ["introduction", "install", "windows", "troubleshooting", "install-2"],
+        )
+        windows = sections[2]
+        self.assertEqual(windows.path, ["Install", "Windows"])
+        self.assertEqual(windows.to_dict()["heading"], "Install > Windows")
+        self.assertIn("# not a heading", windows.text)
+
+    def test_text_is_kept_verbatim(self):
+        sections = split_sections(PAGE)
+        self.assertTrue(all(section.text in PAGE for section in sections))
+
+    def test_oversized_sections_split_on_paragraphs(self):
+        body = "\n\n".join(f"Paragraph {i} " + "word " * 40 for i in range(6))
+        sections = split_sections("# Big\n" + body, max_tokens=120)
+        self.assertGreater(len(sections), 1)
+        self.assertEqual(sections[1].id, "big-2")
+        self.assertTrue(all(section.tokens <= 120 for section in sections))
+
+
+class SelectSectionsTest(unittest.TestCase):
+    def setUp(self):
+        self.sections = split_sections(PAGE)
+
+    def test_best_match_first_within_budget(self):
+        chosen = select_sections(self.sections, "restart vpn drops", token_budget=15)
+        self.assertEqual([section.id for section in chosen], ["troubleshooting"])
+
+    def test_selection_is_in_document_order(self):
+        chosen = select_sections(self.sections, "install client administrator", token_budget=1000)
+        ids = [section.id for section in chosen]
+        order = [section.id for section in self.sections]
+        self.assertEqual(ids, sorted(ids, key=order.index))
+        self.assertNotIn("introduction", ids)
+
+    def test_at_least_one_section(self):
+        self.assertEqual(len(select_sections(self.sections, "restart", token_budget=1)), 1)
+        self.assertEqual(len(select_sections(self.sections, "unrelated", token_budget=1)), 1)
+        self.assertEqual(select_sections([], "vpn", token_budget=100), [])
+
+
+class SectionCacheTest(unittest.TestCase):
+    def test_pages_are_rechunked_only_when_they_change(self):
+        cache = SectionCache(max_pages=2)
+        first = cache.get_sections("1", "v1", PAGE)
+        self.assertIs(cache.get_sections("1", "v1", "ignored on a hit"), first)
+
+        updated = cache.get_sections("1", "v2", "# New\nNew body")
+        self.assertEqual([section.id for section in updated], ["new"])
+        self.assertEqual(cache.stats(), {"pages": 1, "hits": 1, "misses": 2})
+
+        cache.get_sections("2", "v1", PAGE)
+        cache.get_sections("3", "v1", PAGE)
+        self.assertEqual(cache.stats()["pages"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
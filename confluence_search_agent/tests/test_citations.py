@@ -0,0 +1,125 @@
+"""Tests for quote extraction and enforcement in confluence.citations"""
+
+import unittest
+
+from confluence.citations import NOT_FOUND_ANSWER, CitationVerifier
+from confluence.document_store import StoredPage
+from confluence.tools.chunking import split_sections
+
+VPN_URL = "https://confluence.example.com/display/IT/VPN"
+ONBOARDING_URL = "https://confluence.example.com/display/HR/Onboarding"
+
+VPN_TEXT = (
+    "VPN access is requested through the IT service portal. "
+    "Requests are approved by your manager within two business days."
+)
+ONBOARDING_TEXT = (
+    "New hires receive their laptop on the first day. "
+    "The buddy program pairs every new hire with a senior colleague."
+)
+
+
+def _page(page_id: str, title: str, url: str, text: str) -> StoredPage:
+    return StoredPage(
+        id=page_id,
+        title=title,
+        url=url,
+        last_modified="2024-01-15",
+        sections=split_sections(text),
+        size=len(text.encode()),
+    )
+
+
+PAGES = [
+    _page("IT-1", "VPN", VPN_URL, VPN_TEXT),
+    _page("HR-1", "Onboarding", ONBOARDING_URL, ONBOARDING_TEXT),
+]
+
+
+class ExtractQuotesTest(unittest.TestCase):
+    def setUp(self):
+        self.verifier = CitationVerifier()
+
+    def test_format_citations_layout(self):
+        # "Format citations" in answer_synthesizer_instruction: the source
+        # follows the quote on its own line
+        answer = (
+            "## Answer\n"
+            "\"VPN access is requested through the IT service portal\"\n"
+            f"- Source: [VPN]({VPN_URL})\n"
+            "- Last updated: 2024-01-15\n"
+            "\n"
+            "\"The buddy program pairs every new hire with a senior colleague\"\n"
+            f"- Source: [Onboarding]({ONBOARDING_URL})\n"
+            "- Last updated: 2024-01-15\n"
+        )
+        quotes = self.verifier.extract_quotes(answer)
+        self.assertEqual([quote.url for quote in quotes], [VPN_URL, ONBOARDING_URL])
+
+        _, quotes = self.verifier.verify(answer, PAGES)
+        self.assertEqual([quote.status for quote in quotes], ["verified", "verified"])
+
+    def test_sources_layout(self):
+        # "## Sources" in answer_synthesizer_instruction: the excerpt sits
+        # under its source, and the next source's link follows it
+        answer = (
+            "## Sources\n"
+            f"1. [VPN]({VPN_URL}) - Last updated: 2024-01-15\n"
+            "   - Relevant excerpt: \"Requests are approved by your manager within two business days\"\n"
+            f"2. [Onboarding]({ONBOARDING_URL}) - Last updated: 2024-01-15\n"
+            "   - Relevant excerpt: \"New hires receive their laptop on the first day\"\n"
+        )
+        quotes = self.verifier.extract_quotes(answer)
+        self.assertEqual([quote.url for quote in quotes], [VPN_URL, ONBOARDING_URL])
+
+        _, quotes = self.verifier.verify(answer, PAGES)
+        self.assertEqual([quote.status for quote in quotes], ["verified", "verified"])
+
+    def test_link_on_the_same_line(self):
+        answer = (
+            f"Per [Onboarding]({ONBOARDING_URL}): \"New hires receive their laptop on the first day\".\n"
+            f"See also [VPN]({VPN_URL})."
+        )
+        quotes = self.verifier.extract_quotes(answer)
+        self.assertEqual([quote.url for quote in quotes], [ONBOARDING_URL])
+
+    def test_short_quotes_are_ignored(self):
+        self.assertEqual(self.verifier.extract_quotes("Open the \"IT portal\" page."), [])
+
+
+class EnforcementTest(unittest.TestCase):
+    def test_default_mode_keeps_the_answer(self):
+        verifier = CitationVerifier()
+        self.assertEqual(verifier.mode, "flag")
+        answer = f"\"VPN access is requested by carrier pigeon\"\n- Source: [VPN]({VPN_URL})\n"
+        checked, quotes = verifier.verify(answer, PAGES)
+        self.assertEqual(quotes[0].status, "unverified")
+        self.assertTrue(checked.startswith("\"VPN access is requested by carrier pigeon\""))
+        self.assertNotIn(NOT_FOUND_ANSWER, checked)
+
+    def test_answer_without_quotes_is_flagged_not_replaced(self):
+        verifier = CitationVerifier(mode="strip")
+        answer = f"Request VPN access in the IT service portal ([VPN]({VPN_URL}))."
+        checked, quotes = verifier.verify(answer, PAGES)
+        self.assertEqual(quotes, [])
+        self.assertTrue(checked.startswith(answer))
+        self.assertIn("_Note:", checked)
+
+    def test_strip_replaces_answer_when_no_quote_verifies(self):
+        verifier = CitationVerifier(mode="strip")
+        answer = f"\"VPN access is requested by carrier pigeon\"\n- Source: [VPN]({VPN_URL})\n"
+        checked, _ = verifier.verify(answer, PAGES)
+        self.assertTrue(checked.startswith(NOT_FOUND_ANSWER))
+
+    def test_strip_keeps_answer_with_a_verified_quote(self):
+        verifier = CitationVerifier(mode="strip")
+        answer = (
+            "\"VPN access is requested through the IT service portal\"\n"
+            f"- Source: [VPN]({VPN_URL})\n"
+        )
+        checked, _ = verifier.verify(answer, PAGES)
+        self.assertEqual(checked, answer)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""Tests for single-flight coalescing (confluence.tools.coalesce)"""
+
+import asyncio
+import unittest
+
+from confluence.tools.coalesce import SingleFlight
+
+from .mcp_fakes import FakeMCPServer, make_client
+
+
+class SingleFlightTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.release = asyncio.Event()
+        self.runs = 0
+        self.cancelled = 0
+
+    async def call(self):
+        self.runs += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self.runs
+
+    async def test_concurrent_callers_share_one_call(self):
+        waiters = [asyncio.create_task(self.flight.do("k", self.call)) for _ in range(3)]
+        await asyncio.sleep(0)
+        self.release.set()
+        self.assertEqual(await asyncio.gather(*waiters), [1, 1, 1])
+        self.assertEqual(self.runs, 1)
+
+        stats = self.flight.stats()
+        self.assertEqual((stats["calls"], stats["coalesced"], stats["in_flight"]), (3, 2, 0))
+
+        # Once finished, the next caller starts a new flight
+        self.assertEqual(await self.flight.do("k", self.call), 2)
+
+    async def test_errors_reach_every_caller(self):
+        async def fail():
+            await self.release.wait()
+            raise RuntimeError("boom")
+
+        waiters = [asyncio.create_task(self.flight.do("k", fail)) for _ in range(2)]
+        await asyncio.sleep(0)
+        self.release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+
+    async def test_cancelling_one_caller_keeps_the_call_for_the_others(self):
+        first = asyncio.create_task(self.flight.do("k", self.call))
+        second = asyncio.create_task(self.flight.do("k", self.call))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+        self.release.set()
+        self.assertEqual(await second, 1)
+        self.assertEqual(self.cancelled, 0)
+        self.assertEqual(self.flight.stats()["abandoned"], 0)
+
+    async def test_last_caller_leaving_cancels_and_forgets_the_flight(self):
+        first = asyncio.create_task(self.flight.do("k", self.call))
+        await asyncio.sleep(0)
+        first.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+        self.assertEqual(self.flight.stats()["in_flight"], 0)
+        self.assertEqual(self.flight.stats()["abandoned"], 1)
+
+        # A caller arriving right away starts a fresh call
+        second = asyncio.create_task(self.flight.do("k", self.call))
+        await asyncio.sleep(0)
+        self.release.set()
+        self.assertEqual(await second, 2)
+        self.assertEqual(self.cancelled, 1)
+
+
+class ClientCoalesceTest(unittest.IsolatedAsyncioTestCase):
+    async def test_identical_calls_send_one_request(self):
+        server = FakeMCPServer()
+        server.add_page("1", "VPN Setup", "Install the VPN client")
+        server.release = asyncio.Event()
+        client = make_client(server)
+
+        fetches = [asyncio.create_task(client.get_page("1")) for _ in range(4)]
+        await asyncio.sleep(0.01)
+        server.release.set()
+        pages = await asyncio.gather(*fetches)
+
+        self.assertEqual({page["title"] for page in pages}, {"VPN Setup"})
+        self.assertEqual(server.requests, 1)
+        self.assertEqual(client.coalesce_stats()["coalesced"], 3)
+        await client.transport.aclose()
+
+
+if __name__ == "__main__":
+    unittest.main()
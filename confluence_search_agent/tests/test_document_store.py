@@ -0,0 +1,88 @@
+"""Tests for the per-session document store (confluence.document_store)"""
+
+import json
+import unittest
+
+from confluence.document_store import DocumentStore
+
+BODY = (
+    "# Install\n" + "Download the VPN client from the portal and run it. " * 8 + "\n\n"
+    "# Troubleshooting\n" + "If the VPN drops, restart the client and sign in again. " * 8
+)
+PAGE = {
+    "id": "1",
+    "title": "VPN Setup",
+    "url": "https://wiki/pages/1",
+    "lastModified": "2024-01-15",
+    "content": BODY,
+}
+
+
+class DocumentStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.store = DocumentStore(max_sessions=2, max_session_bytes=10_000)
+
+    def test_long_bodies_become_outlines(self):
+        outline = self.store.compact("s1", dict(PAGE), invocation_id="turn")
+        self.assertNotIn("content", outline)
+        self.assertEqual(outline["handle"], "doc:1")
+        self.assertEqual([section["id"] for section in outline["sections"]], ["install", "troubleshooting"])
+        self.assertTrue(outline["sections"][0]["preview"].startswith("Download the VPN client"))
+        self.assertEqual(self.store.get("s1", "1").text, BODY)
+
+    def test_short_bodies_stay_inline_but_are_recorded(self):
+        short = {**PAGE, "content": "Short page."}
+        self.assertIsNone(self.store.compact("s1", short))
+        self.assertEqual(self.store.get("s1", "1").text, "Short page.")
+
+    def test_mcp_results_and_search_excerpts(self):
+        search = {"results": [{"id": "2", "title": "FAQ", "excerpt": "Common VPN questions"}]}
+        response = {"content": [
+            {"type": "text", "text": json.dumps(PAGE)},
+            {"type": "text", "text": json.dumps(search)},
+        ]}
+        compacted = self.store.compact("s1", response)
+        self.assertEqual(json.loads(compacted["content"][0]["text"])["handle"], "doc:1")
+        self.assertEqual(compacted["content"][1], response["content"][1])
+        self.assertTrue(self.store.get("s1", "2").partial)
+
+        # An excerpt never replaces a full body
+        self.store.put("s1", {"id": "1", "excerpt": "VPN"}, partial=True)
+        self.assertFalse(self.store.get("s1", "1").partial)
+
+    def test_resolve_expands_each_section_once(self):
+        self.store.put("s1", PAGE)
+        text = self.store.resolve("s1", "See [[doc:1#troubleshooting]] and [[doc:1]] and [[doc:9]].")
+        self.assertEqual(text.count("If the VPN drops"), 8)
+        self.assertEqual(text.count("Download the VPN client"), 8)
+        self.assertIn('<document handle="doc:1" title="VPN Setup" url="https://wiki/pages/1"', text)
+        self.assertIn("[[doc:9]]", text)
+
+        again = self.store.resolve("s1", "[[doc:1#install]]", expanded={("1", "install")})
+        self.assertEqual(again, "[[doc:1#install]]")
+        self.assertEqual(self.store.stats()["unknown_handles"], 1)
+
+    def test_turn_documents_fallback(self):
+        self.store.put("s1", PAGE, invocation_id="turn")
+        self.store.put("s1", {"id": "2", "excerpt": "FAQ"}, invocation_id="turn", partial=True)
+        documents = self.store.turn_documents("s1", "turn")
+        self.assertIn('handle="doc:1"', documents)
+        self.assertNotIn('handle="doc:2"', documents)
+        self.assertIsNone(self.store.turn_documents("s1", "other turn"))
+
+    def test_memory_bounds(self):
+        self.store.max_session_bytes = len(BODY) + 10
+        self.store.put("s1", PAGE)
+        self.store.put("s1", {**PAGE, "id": "2"})
+        self.assertIsNone(self.store.get("s1", "1"))
+        self.assertIsNotNone(self.store.get("s1", "2"))
+
+        self.store.put("s2", PAGE)
+        self.store.put("s3", PAGE)
+        self.assertEqual(self.store.session_pages("s1"), [])
+        stats = self.store.stats()
+        self.assertEqual((stats["sessions"], stats["page_evictions"], stats["session_evictions"]), (2, 1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Tests for tool output encoding and field projection (confluence.tools.encoding)"""
+
+import json
+import unittest
+
+from confluence.tools.encoding import ToolOutputEncoder, decode, project
+
+SEARCH = {
+    "results": [
+        {"id": "1", "title": "VPN Setup", "url": "https://wiki/1", "excerpt": "Install the client", "score": 0.9},
+        {"id": "2", "title": "VPN FAQ", "url": "https://wiki/2", "excerpt": "Common questions", "score": 0.7},
+    ],
+    "total": 2,
+    "query": "vpn",
+}
+
+SECTIONS = {
+    "id": "1",
+    "title": "VPN Setup",
+    "url": "https://wiki/1",
+    "lastModified": "2024-01-15",
+    "sections": [
+        {"id": "install", "heading": "Install", "text": "Download the client.", "tokens": 4},
+        {"id": "login", "heading": "Log in", "text": "Use your SSO account.", "tokens": 5},
+    ],
+    "total_sections": 4,
+    "page_tokens": 40,
+    "returned_tokens": 9,
+}
+
+
+class ProjectTest(unittest.TestCase):
+    def test_records_are_projected_and_bookkeeping_kept(self):
+        projected = project(SEARCH, ["title"])
+        self.assertEqual(projected["results"], [{"id": "1", "title": "VPN Setup"}, {"id": "2", "title": "VPN FAQ"}])
+        self.assertEqual((projected["total"], projected["query"]), (2, "vpn"))
+
+    def test_single_page(self):
+        page = {"id": "1", "title": "VPN Setup", "content": "long text", "url": "https://wiki/1"}
+        self.assertEqual(project(page, ["url"]), {"id": "1", "url": "https://wiki/1"})
+        self.assertIs(project(page, None), page)
+        error = {"error": "not found", "page_id": "1"}
+        self.assertEqual(project(error, ["url"]), error)
+
+    def test_page_sections(self):
+        projected = project(SECTIONS, ["url", "text"])
+        self.assertEqual(projected, {
+            "id": "1",
+            "url": "https://wiki/1",
+            "sections": [
+                {"id": "install", "text": "Download the client."},
+                {"id": "login", "text": "Use your SSO account."},
+            ],
+            "total_sections": 4,
+            "page_tokens": 40,
+            "returned_tokens": 9,
+        })
+
+
+class EncoderTest(unittest.TestCase):
+    def test_compact_round_trip_with_short_keys(self):
+        text = ToolOutputEncoder("compact").encode(SEARCH)
+        self.assertIn('"keys"', text)
+        self.assertLess(len(text), len(ToolOutputEncoder("pretty").encode(SEARCH)))
+        self.assertEqual(decode(text), SEARCH)
+
+    def test_single_page_has_no_legend(self):
+        page = {"id": "1", "title": "VPN Setup"}
+        self.assertEqual(json.loads(ToolOutputEncoder("compact").encode(page)), page)
+
+    def test_pretty(self):
+        text = ToolOutputEncoder("pretty").encode(SEARCH)
+        self.assertIn("\n  ", text)
+        self.assertEqual(decode(text), SEARCH)
+
+    def test_table(self):
+        text = ToolOutputEncoder("table").encode(SEARCH, ["title"])
+        self.assertEqual(text.splitlines(), [
+            '{"total":2,"query":"vpn"}',
+            "results:",
+            "id\ttitle",
+            "1\tVPN Setup",
+            "2\tVPN FAQ",
+        ])
+        self.assertIsNone(decode(text))
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            ToolOutputEncoder("yaml")
+
+
+if __name__ == "__main__":
+    unittest.main()
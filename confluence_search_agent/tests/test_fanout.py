@@ -0,0 +1,69 @@
+"""Tests for the multi-space fan-out search (search_across_spaces)"""
+
+import unittest
+from unittest import mock
+
+import httpx
+
+from confluence.tools import confluence_mcp
+from confluence.tools.encoding import decode
+
+RESULTS = {
+    "ENG": [
+        {"id": "1", "title": "VPN Setup", "space": "ENG", "score": 12.0},
+        {"id": "2", "title": "VPN FAQ", "space": "ENG", "score": 4.0},
+    ],
+    "HR": [
+        {"id": "3", "title": "Remote work policy", "score": 0.8},
+        {"id": "2", "title": "VPN FAQ", "space": "ENG", "score": 0.7},
+        {"id": "4", "title": "Travel", "score": 0.1},
+    ],
+}
+
+
+async def fake_search(query, space_key, max_results):
+    if space_key == "OPS":
+        raise httpx.ConnectError("connection refused")
+    return {"results": RESULTS.get(space_key, []), "total": 0, "query": query}
+
+
+class SearchAcrossSpacesTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.search = mock.AsyncMock(side_effect=fake_search)
+        self.schedule = mock.Mock()
+        for patcher in (
+            mock.patch.object(confluence_mcp, "_search", self.search),
+            mock.patch.object(confluence_mcp.prefetcher, "schedule", self.schedule),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def run_search(self, space_keys, max_results=5):
+        return decode(await confluence_mcp.search_across_spaces("vpn", space_keys, max_results))
+
+    async def test_scores_are_normalized_and_duplicates_merged(self):
+        found = await self.run_search(["ENG", "HR"])
+        self.assertEqual([result["id"] for result in found["results"]], ["1", "3", "2", "4"])
+        scores = {result["id"]: result["score"] for result in found["results"]}
+        self.assertEqual((scores["1"], scores["3"], scores["4"]), (1.0, 1.0, 0.0))
+        # Page 2 ranks last in ENG but near the top in HR; the better score wins
+        self.assertAlmostEqual(scores["2"], 6 / 7, places=4)
+        self.assertEqual(found["total"], 4)
+        self.assertEqual(found["results"][1]["space"], "HR")
+
+    async def test_failed_space_is_reported_not_fatal(self):
+        found = await self.run_search(["ENG", "OPS", "ENG"], max_results=1)
+        self.assertEqual([result["id"] for result in found["results"]], ["1"])
+        self.assertEqual(found["total"], 2)
+        self.assertEqual(found["spaces"]["ENG"]["results"], 2)
+        self.assertIn("connection refused", found["spaces"]["OPS"]["error"])
+        self.assertEqual(self.search.await_count, 2)
+
+    async def test_merged_ranking_is_prefetched(self):
+        await self.run_search(["ENG", "HR"], max_results=2)
+        ranked = self.schedule.call_args.args[0]
+        self.assertEqual([result["id"] for result in ranked], ["1", "3", "2", "4"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""Tests for confluence.fast_analyzer and its wiring into the agent tree"""
+
+import unittest
+from types import SimpleNamespace
+
+from google.adk.models import LlmRequest
+from google.genai import types
+
+from confluence.agent import build_root_agent
+from confluence.fast_analyzer import FastQueryAnalyzer, fast_path_model_callback
+
+CONFIDENT = "How do I configure the VPN client on macOS?"
+VAGUE = "Should I compare the VPN options, and why?"
+
+
+def _context(question: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        user_content=types.Content(role="user", parts=[types.Part(text=question)]),
+        state={},
+    )
+
+
+def _request() -> LlmRequest:
+    return LlmRequest(config=types.GenerateContentConfig(system_instruction="Analyze the question."))
+
+
+class FastQueryAnalyzerTest(unittest.TestCase):
+    def setUp(self):
+        self.analyzer = FastQueryAnalyzer(min_confidence=0.6)
+        self.analyzer.set_spaces([{"key": "ENG", "name": "Engineering"}])
+
+    def test_keywords_phrases_and_space(self):
+        analysis = self.analyzer.analyze('Where is the "release checklist" in the ENG space?')
+        self.assertEqual(analysis.phrases, ["release checklist"])
+        self.assertEqual(analysis.space_key, "ENG")
+        self.assertEqual(analysis.keywords, ["release", "checklist"])
+        self.assertEqual(analysis.intent, "location")
+
+    def test_complex_questions_fall_back_to_the_llm(self):
+        self.assertIsNotNone(self.analyzer.try_fast_path(CONFIDENT))
+        self.assertIsNone(self.analyzer.try_fast_path(VAGUE))
+        self.assertEqual(self.analyzer.stats()["fast_path"], 1)
+        self.assertEqual(self.analyzer.stats()["queries"], 2)
+
+
+class FastPathModelCallbackTest(unittest.TestCase):
+    def test_confident_analysis_becomes_a_draft(self):
+        context, request = _context(CONFIDENT), _request()
+        self.assertIsNone(fast_path_model_callback(context, request))
+        self.assertEqual(context.state["query_analysis"]["keywords"], ["configure", "vpn", "client", "macos"])
+        self.assertIn("- Keywords: configure, vpn, client, macos", request.config.system_instruction)
+
+    def test_vague_question_leaves_the_request_alone(self):
+        context, request = _context(VAGUE), _request()
+        self.assertIsNone(fast_path_model_callback(context, request))
+        self.assertEqual(context.state, {})
+        self.assertEqual(request.config.system_instruction, "Analyze the question.")
+
+    def test_llm_workflow_never_ends_the_invocation_in_the_analyzer(self):
+        # A before_agent_callback returning content would end the invocation
+        # with the analysis as the final reply
+        analyzer = build_root_agent("llm").find_sub_agent("query_analyzer")
+        self.assertIsNone(analyzer.before_agent_callback)
+        self.assertIn(fast_path_model_callback, analyzer.before_model_callback)
+
+        analyzer = build_root_agent("pipeline").find_sub_agent("query_analyzer")
+        self.assertNotIn(fast_path_model_callback, analyzer.before_model_callback)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+"""Tests for the LLM response cache and record/replay mode (confluence.llm_cache)"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from confluence import llm_cache as llm_cache_module
+from confluence.llm_cache import (
+    LlmCacheMissError,
+    LlmCachePolicy,
+    LlmResponseCache,
+    llm_cache_lookup_callback,
+    llm_cache_store_callback,
+    make_request_key,
+)
+
+
+def make_request(question="How do I get VPN access?", call_id="call-1", temperature=0.0):
+    return LlmRequest(
+        model="gemini-2.0-flash",
+        contents=[
+            types.Content(role="user", parts=[types.Part(text=question)]),
+            types.Content(role="model", parts=[types.Part(
+                function_call=types.FunctionCall(id=call_id, name="search_confluence", args={"query": "vpn"})
+            )]),
+        ],
+        config=types.GenerateContentConfig(system_instruction="Analyze the question.", temperature=temperature),
+    )
+
+
+def make_response(text="Keywords: vpn, access"):
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+def make_context(agent="query_analyzer", invocation="turn-1", after_model_callbacks=()):
+    agent_obj = SimpleNamespace(canonical_after_model_callbacks=list(after_model_callbacks))
+    return SimpleNamespace(
+        agent_name=agent,
+        invocation_id=invocation,
+        _invocation_context=SimpleNamespace(agent=agent_obj),
+    )
+
+
+class MakeRequestKeyTest(unittest.TestCase):
+    def test_run_specific_ids_are_ignored(self):
+        self.assertEqual(make_request_key(make_request(call_id="a")), make_request_key(make_request(call_id="b")))
+
+    def test_content_and_sampling_change_the_key(self):
+        key = make_request_key(make_request())
+        self.assertNotEqual(key, make_request_key(make_request(question="VPN?")))
+        self.assertNotEqual(key, make_request_key(make_request(temperature=0.7)))
+
+
+class LlmResponseCacheTest(unittest.TestCase):
+    def test_ttl_and_lru(self):
+        cache = LlmResponseCache(max_entries=2, ttl=60)
+        cache.set("a", "agent", {"v": 1})
+        cache.set("b", "agent", {"v": 2})
+        cache.get("a", "agent")
+        cache.set("c", "agent", {"v": 3})
+        self.assertIsNone(cache.get("b", "agent"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+        with mock.patch("confluence.llm_cache.time.time", return_value=cache._entries["a"][1] + 61):
+            self.assertIsNone(cache.get("a", "agent"))
+            self.assertEqual(cache.get("c", "agent", ttl=0), {"v": 3})
+
+    def test_disk_tier_survives_restarts(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        path = os.path.join(directory, "llm.sqlite")
+        LlmResponseCache(db_path=path).set("k", "query_analyzer", {"v": 1})
+
+        restarted = LlmResponseCache(db_path=path)
+        self.assertEqual(restarted.get("k", "query_analyzer"), {"v": 1})
+        stats = restarted.stats()
+        self.assertEqual((stats["disk_hits"], stats["agents"]["query_analyzer"]["hits"]), (1, 1))
+
+
+class LlmCachePolicyTest(unittest.TestCase):
+    def test_modes(self):
+        self.assertFalse(LlmCachePolicy("off", ["query_analyzer"]).applies_to("query_analyzer"))
+        on = LlmCachePolicy("on", ["query_analyzer"])
+        self.assertTrue(on.applies_to("query_analyzer"))
+        self.assertFalse(on.applies_to("answer_synthesizer"))
+        record = LlmCachePolicy("record")
+        self.assertTrue(record.applies_to("answer_synthesizer"))
+        self.assertFalse(record.reads)
+        self.assertEqual(LlmCachePolicy("replay").ttl, 0)
+        with self.assertRaises(ValueError):
+            LlmCachePolicy("sometimes")
+
+
+class CallbackTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.cache = LlmResponseCache()
+        for patcher in (
+            mock.patch.object(llm_cache_module, "llm_cache", self.cache),
+            mock.patch.object(llm_cache_module, "llm_cache_policy", LlmCachePolicy("record")),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def use_mode(self, mode, agents=()):
+        llm_cache_module.llm_cache_policy = LlmCachePolicy(mode, agents)
+
+    async def record(self, response):
+        self.use_mode("record")
+        context = make_context()
+        self.assertIsNone(await llm_cache_lookup_callback(context, make_request()))
+        llm_cache_store_callback(context, response)
+
+    async def test_record_then_replay(self):
+        await self.record(make_response())
+        self.use_mode("replay")
+        hit = await llm_cache_lookup_callback(make_context(invocation="turn-2"), make_request(call_id="other"))
+        self.assertEqual(hit.content.parts[0].text, "Keywords: vpn, access")
+        self.assertEqual(hit.custom_metadata["llm_cache"], "hit")
+
+        with self.assertRaises(LlmCacheMissError):
+            await llm_cache_lookup_callback(make_context(), make_request(question="Something new"))
+
+    async def test_partial_and_error_responses_are_not_stored(self):
+        await self.record(LlmResponse(partial=True, content=make_response().content))
+        await self.record(LlmResponse(error_code="RESOURCE_EXHAUSTED", content=make_response().content))
+        self.assertEqual(self.cache.stats()["stores"], 0)
+
+    async def test_uncached_agents_pass_through(self):
+        self.use_mode("on", ["query_analyzer"])
+        context = make_context(agent="answer_synthesizer")
+        self.assertIsNone(await llm_cache_lookup_callback(context, make_request()))
+        llm_cache_store_callback(context, make_response())
+        self.assertEqual(self.cache.stats()["stores"], 0)
+
+    async def test_hits_run_the_other_after_model_callbacks(self):
+        await self.record(make_response())
+        self.use_mode("on", ["query_analyzer"])
+
+        def verify(callback_context, llm_response):
+            return make_response(llm_response.content.parts[0].text + " (verified)")
+
+        context = make_context(after_model_callbacks=[llm_cache_store_callback, verify])
+        hit = await llm_cache_lookup_callback(context, make_request())
+        self.assertEqual(hit.content.parts[0].text, "Keywords: vpn, access (verified)")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""Tests for JSON-RPC batching in ConfluenceMCPClient.call_tools_many"""
+
+import unittest
+
+from confluence.tools.mcp_client import MCPError
+
+from .mcp_fakes import FakeMCPServer, make_client
+
+
+def _page_calls(*page_ids):
+    return [("confluence_get_page", {"pageId": page_id}) for page_id in page_ids]
+
+
+class CallToolsManyTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = FakeMCPServer()
+        for page_id in ("1", "2", "3", "4", "5"):
+            self.server.add_page(page_id, f"Page {page_id}", f"Body of page {page_id}")
+        self.client = make_client(self.server)
+        self.client.max_batch_size = 2
+
+    async def asyncTearDown(self):
+        await self.client.transport.aclose()
+
+    async def test_batches_in_call_order(self):
+        results = await self.client.call_tools_many(_page_calls("1", "2", "3", "4", "5"))
+        self.assertEqual([result["id"] for result in results], ["1", "2", "3", "4", "5"])
+        self.assertEqual(self.server.batches, [2, 2, 1])
+        self.assertEqual(self.server.requests, 3)
+        self.assertTrue(self.client.batch_supported)
+
+    async def test_item_errors_stay_per_item(self):
+        results = await self.client.call_tools_many(_page_calls("1", "missing"))
+        self.assertEqual(results[0]["id"], "1")
+        self.assertIsInstance(results[1], MCPError)
+
+    async def test_unsupported_batches_fall_back_to_single_calls(self):
+        self.server.batch_status = 405
+        results = await self.client.call_tools_many(_page_calls("1", "2", "3"))
+        self.assertEqual([result["id"] for result in results], ["1", "2", "3"])
+        self.assertFalse(self.client.batch_supported)
+
+        self.server.batches.clear()
+        await self.client.call_tools_many(_page_calls("4", "5"))
+        self.assertEqual(self.server.batches, [])
+
+    async def test_rejected_batch_keeps_batching_enabled(self):
+        self.server.batch_status = 400
+        results = await self.client.call_tools_many(_page_calls("1", "2"))
+        self.assertEqual([result["id"] for result in results], ["1", "2"])
+        self.assertTrue(self.client.batch_supported)
+
+    async def test_oversized_batch_is_split(self):
+        self.client.max_batch_size = 4
+        self.server.max_batch = 2
+        results = await self.client.call_tools_many(_page_calls("1", "2", "3", "4"))
+        self.assertEqual([result["id"] for result in results], ["1", "2", "3", "4"])
+        self.assertEqual(self.server.batches, [4, 2, 2])
+        self.assertTrue(self.client.batch_supported)
+
+    async def test_get_pages(self):
+        pages = await self.client.get_pages(["2", "1"])
+        self.assertEqual([page["title"] for page in pages], ["Page 2", "Page 1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""Tests for the persisted MCP tool-schema cache (confluence.tools.mcp_toolset)"""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+
+from google.adk.tools.mcp_tool.mcp_session_manager import SseConnectionParams
+from mcp.types import Tool as McpBaseTool
+
+from confluence.tools.mcp_toolset import CachedMcpToolset, ToolSchemaCache, schema_hash
+
+URL = "http://mcp.test/sse"
+
+
+def make_tool(name, description="A Confluence tool"):
+    return McpBaseTool(name=name, description=description, inputSchema={"type": "object", "properties": {}})
+
+
+class FakePool:
+    """Stands in for MCPSessionPool: answers tools/list without a network."""
+
+    def __init__(self, tools):
+        self.tools = tools
+        self.listed = 0
+        self.release = None
+
+    async def list_tools(self):
+        self.listed += 1
+        if self.release is not None:
+            await self.release.wait()
+        return SimpleNamespace(tools=list(self.tools))
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    def stats(self):
+        return {}
+
+
+class SchemaHashTest(unittest.TestCase):
+    def test_order_independent(self):
+        a, b = {"name": "a", "x": 1}, {"name": "b"}
+        self.assertEqual(schema_hash([a, b]), schema_hash([b, a]))
+        self.assertNotEqual(schema_hash([a]), schema_hash([{"name": "a", "x": 2}]))
+
+
+class CachedMcpToolsetTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        self.path = os.path.join(directory, "tools.json")
+        self.pool = FakePool([make_tool("confluence_search"), make_tool("confluence_get_page")])
+
+    def make_toolset(self, revalidate_interval=3600):
+        return CachedMcpToolset(
+            server_url=URL,
+            cache=ToolSchemaCache(self.path),
+            revalidate_interval=revalidate_interval,
+            session_pool=self.pool,
+            connection_params=SseConnectionParams(url=URL),
+        )
+
+    async def test_cold_start_discovers_once_and_persists(self):
+        toolset = self.make_toolset()
+        self.pool.release = asyncio.Event()
+        sessions = [asyncio.create_task(toolset.get_tools()) for _ in range(3)]
+        await asyncio.sleep(0)
+        self.pool.release.set()
+        for tools in await asyncio.gather(*sessions):
+            self.assertEqual([tool.name for tool in tools], ["confluence_get_page", "confluence_search"])
+        self.assertEqual(self.pool.listed, 1)
+        self.assertIsNotNone(ToolSchemaCache(self.path).load(URL))
+
+    async def test_warm_start_uses_the_cache(self):
+        await self.make_toolset().warm_up()
+        toolset = self.make_toolset()
+        tools = await toolset.get_tools()
+        self.assertEqual(len(tools), 2)
+        self.assertEqual(self.pool.listed, 1)
+        stats = toolset.stats()
+        self.assertEqual((stats["cache_hits"], stats["discoveries"]), (1, 0))
+
+    async def test_stale_cache_is_revalidated_in_the_background(self):
+        await self.make_toolset().warm_up()
+        self.pool.tools.append(make_tool("confluence_list_spaces"))
+
+        toolset = self.make_toolset(revalidate_interval=0)
+        self.assertEqual(len(await toolset.get_tools()), 2)
+        await toolset._revalidation
+        self.assertEqual(len(await toolset.get_tools()), 3)
+        self.assertEqual(toolset.stats()["schema_changes"], 1)
+        self.assertEqual(len(ToolSchemaCache(self.path).load(URL)["tools"]), 3)
+
+    async def test_unchanged_revalidation_only_touches_the_file(self):
+        await self.make_toolset().warm_up()
+        cache = ToolSchemaCache(self.path)
+        before = cache.load(URL)
+        toolset = self.make_toolset()
+        await toolset.warm_up()
+        time.sleep(0.01)
+        self.assertFalse(await toolset.revalidate())
+        after = cache.load(URL)
+        self.assertEqual(after["hash"], before["hash"])
+        self.assertGreater(after["fetched_at"], before["fetched_at"])
+
+    async def test_tampered_cache_is_ignored(self):
+        await self.make_toolset().warm_up()
+        with open(self.path) as f:
+            entries = json.load(f)
+        entries[URL]["tools"].pop()
+        with open(self.path, "w") as f:
+            json.dump(entries, f)
+
+        self.assertIsNone(ToolSchemaCache(self.path).load(URL))
+        self.assertEqual(len(await self.make_toolset().get_tools()), 2)
+        self.assertEqual(self.pool.listed, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
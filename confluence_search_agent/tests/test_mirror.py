@@ -0,0 +1,130 @@
+"""Tests for the local Confluence mirror and its sync (confluence.tools.mirror)"""
+
+import unittest
+from typing import Any, Dict, List, Set
+
+from confluence.tools.mcp_client import MCPError
+from confluence.tools.mirror import ConfluenceMirror, MirrorSync
+
+
+class FakeConfluence:
+    """Stand-in for ConfluenceMCPClient over an in-memory page set."""
+
+    def __init__(self):
+        self.spaces = [{"key": "ENG", "name": "Engineering"}, {"key": "HR", "name": "People"}]
+        self.pages: Dict[str, Dict[str, Any]] = {}
+        self.failing: Set[str] = set()
+        self.fetched: List[str] = []
+
+    def put(self, page_id: str, space: str, modified: str, content: str):
+        self.pages[page_id] = {
+            "id": page_id, "title": f"Page {page_id}", "space": space, "lastModified": modified,
+            "url": f"https://confluence.example.com/pages/{page_id}", "content": content,
+        }
+
+    async def list_spaces(self):
+        return {"spaces": self.spaces}
+
+    async def list_recent_pages(self, space_key=None, limit=10, start=0):
+        pages = sorted(
+            (page for page in self.pages.values() if page["space"] == space_key),
+            key=lambda page: page["lastModified"], reverse=True
+        )
+        return {"pages": [
+            {key: page[key] for key in ("id", "title", "lastModified")} for page in pages[start:start + limit]
+        ]}
+
+    async def get_pages(self, page_ids):
+        self.fetched.extend(page_ids)
+        return [
+            MCPError(f"fetch of {page_id} failed") if page_id in self.failing else dict(self.pages[page_id])
+            for page_id in page_ids
+        ]
+
+
+class MirrorSyncTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.confluence = FakeConfluence()
+        self.confluence.put("1", "ENG", "2024-01-01", "Deploy with the release pipeline")
+        self.confluence.put("2", "ENG", "2024-01-02", "VPN access is requested in the portal")
+        self.confluence.put("3", "ENG", "2024-01-03", "Incident escalation goes to the on-call lead")
+        self.mirror = ConfluenceMirror(":memory:")
+        self.addCleanup(self.mirror.close)
+        self.sync = MirrorSync(self.mirror, client=self.confluence, spaces=["ENG"], page_size=2)
+
+    async def test_incremental_sync_fetches_changed_pages_only(self):
+        self.assertEqual(await self.sync.sync_space("ENG"), 3)
+        self.assertEqual(self.mirror.watermark("ENG"), "2024-01-03")
+
+        self.confluence.put("2", "ENG", "2024-02-01", "VPN access is requested by email")
+        self.confluence.fetched.clear()
+        self.assertEqual(await self.sync.sync_space("ENG"), 1)
+        self.assertEqual(self.confluence.fetched, ["2"])
+        self.assertEqual(self.mirror.get_page("2")["content"], "VPN access is requested by email")
+
+    async def test_failed_fetch_is_retried(self):
+        self.confluence.failing = {"2"}
+        self.assertEqual(await self.sync.sync_space("ENG"), 2)
+        self.assertIsNone(self.mirror.get_page("2"))
+        # Not past page 2, which was modified on 2024-01-02
+        self.assertEqual(self.mirror.watermark("ENG"), "2024-01-01")
+
+        self.confluence.failing = set()
+        self.confluence.fetched.clear()
+        await self.sync.sync_space("ENG")
+        self.assertEqual(sorted(self.confluence.fetched), ["2", "3"])
+        self.assertIsNotNone(self.mirror.get_page("2"))
+        self.assertEqual(self.mirror.watermark("ENG"), "2024-01-03")
+
+    async def test_deleted_pages_are_removed_on_reconciliation(self):
+        self.sync.reconcile_interval = 0
+        await self.sync.sync_space("ENG")
+        del self.confluence.pages["1"]
+
+        await self.sync.sync_space("ENG")
+        self.assertIsNone(self.mirror.get_page("1"))
+        self.assertIsNone(self.mirror.search("release pipeline", space_key="ENG"))
+        self.assertEqual(self.mirror.page_count(), 2)
+
+    async def test_deleted_pages_wait_for_the_reconcile_interval(self):
+        await self.sync.sync_space("ENG")
+        del self.confluence.pages["1"]
+        await self.sync.sync_space("ENG")
+        self.assertIsNotNone(self.mirror.get_page("1"))
+
+    async def test_unscoped_search_needs_every_space_mirrored(self):
+        await self.sync.sync_all()
+        self.assertIsNotNone(self.mirror.search("vpn", space_key="ENG"))
+        # HR is known from list_spaces but not mirrored
+        self.assertIsNone(self.mirror.search("vpn"))
+
+        self.sync.spaces = None
+        await self.sync.sync_all()
+        self.assertEqual(self.mirror.search("vpn")["results"][0]["id"], "2")
+
+
+class ConfluenceMirrorTest(unittest.TestCase):
+    def setUp(self):
+        self.mirror = ConfluenceMirror(":memory:")
+        self.addCleanup(self.mirror.close)
+        self.mirror.upsert_pages([
+            {"id": "1", "title": "VPN Setup", "space": "IT", "content": "Install the VPN client"},
+            {"id": "2", "title": "Onboarding", "space": "HR", "content": "Laptops are handed out on day one"},
+        ])
+
+    def test_unsynced_space_is_a_miss(self):
+        self.assertIsNone(self.mirror.search("vpn", space_key="IT"))
+        self.mirror.set_watermark("IT", None)
+        self.assertEqual(self.mirror.search("vpn client", space_key="IT")["results"][0]["id"], "1")
+
+    def test_lookups(self):
+        self.assertEqual(self.mirror.get_page_by_title("vpn setup")["id"], "1")
+        self.assertIsNone(self.mirror.get_page_by_title("VPN Setup", space_key="HR"))
+        self.assertEqual(self.mirror.document_frequency("laptops"), 1)
+        self.mirror.delete_pages(["1"])
+        self.assertIsNone(self.mirror.get_page("1"))
+        self.assertEqual(self.mirror.document_frequency("vpn"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Tests for speculative page prefetching (confluence.tools.prefetch)"""
+
+import asyncio
+import json
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from confluence.tools import prefetch
+from confluence.tools.cache import ToolResultCache
+from confluence.tools.prefetch import PagePrefetcher
+
+from .mcp_fakes import FakeMCPServer, make_client
+
+HITS = [{"id": "1"}, {"id": "2"}, {"id": "3"}]
+
+
+class PrefetchTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = FakeMCPServer()
+        for page_id in ("1", "2", "3"):
+            self.server.add_page(page_id, f"Page {page_id}", f"Body {page_id}")
+        self.client = make_client(self.server, cache=ToolResultCache())
+        self.prefetcher = PagePrefetcher(top_k=2)
+        for patcher in (
+            mock.patch.object(prefetch, "get_mcp_client", lambda: self.client),
+            mock.patch.object(prefetch, "get_mirror", lambda: None),
+            mock.patch.object(prefetch, "prefetcher", self.prefetcher),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self):
+        await self.client.transport.aclose()
+
+    async def settle(self):
+        await asyncio.gather(*self.prefetcher._in_flight.values(), return_exceptions=True)
+
+    async def test_top_hits_land_in_the_page_cache(self):
+        self.prefetcher.schedule(HITS, "session")
+        self.prefetcher.schedule(HITS, "session")  # already in flight
+        await self.settle()
+        self.assertEqual(self.server.calls["confluence_get_page"], 2)
+
+        self.assertTrue(self.prefetcher.record_access("1"))
+        self.assertFalse(self.prefetcher.record_access("3"))
+        await self.client.get_page("1")
+        self.assertEqual(self.server.calls["confluence_get_page"], 2)
+
+        stats = self.prefetcher.stats()
+        self.assertEqual((stats["scheduled"], stats["completed"], stats["hits"]), (2, 2, 1))
+
+    async def test_disabled_without_a_result_cache(self):
+        self.client.cache = None
+        self.prefetcher.schedule(HITS, "session")
+        self.assertEqual(self.prefetcher.stats()["scheduled"], 0)
+
+    async def test_in_flight_cap_skips_extra_hits(self):
+        self.prefetcher.max_in_flight = 1
+        self.server.release = asyncio.Event()
+        self.prefetcher.schedule(HITS)
+        self.assertEqual(self.prefetcher.stats()["skipped"], 1)
+        self.server.release.set()
+        await self.settle()
+
+    async def test_cancel_session(self):
+        self.server.release = asyncio.Event()
+        self.prefetcher.schedule(HITS, "session")
+        await asyncio.sleep(0)
+        prefetch.cancel_prefetch_callback(SimpleNamespace(session=SimpleNamespace(id="session")))
+        await self.settle()
+
+        stats = self.prefetcher.stats()
+        self.assertEqual((stats["cancelled"], stats["in_flight"]), (2, 0))
+        self.assertEqual(self.prefetcher._sessions, {})
+
+    async def test_mcp_toolset_callbacks(self):
+        search = SimpleNamespace(name="confluence_search")
+        response = {"content": [{"type": "text", "text": json.dumps({"results": HITS})}]}
+        prefetch.prefetch_tool_callback(search, {}, None, response)
+        await self.settle()
+        self.assertEqual(self.prefetcher.stats()["scheduled"], 2)
+
+        get_page = SimpleNamespace(name=prefetch.PAGE_TOOL)
+        page = await prefetch.prefetch_lookup_callback(get_page, {"pageId": "2"}, None)
+        self.assertEqual(page["title"], "Page 2")
+        self.assertIsNone(await prefetch.prefetch_lookup_callback(get_page, {"pageId": "3"}, None))
+        self.assertIsNone(await prefetch.prefetch_lookup_callback(search, {"pageId": "1"}, None))
+        self.assertEqual(self.server.calls["confluence_get_page"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+"""Tests for hedging, retries, deadlines and circuit breaking in confluence.tools.resilience"""
+
+import asyncio
+import unittest
+
+import httpx
+
+from confluence.tools.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceededError,
+    ResiliencePolicy,
+    ResilientCaller,
+    request_budget,
+)
+
+TOOL = "confluence_search"
+
+
+def _policy(**overrides) -> ResiliencePolicy:
+    settings = dict(
+        timeout=1.0, hedge=False, max_retries=2, backoff_base=0.0, backoff_max=0.0,
+        breaker_failures=2, breaker_cooldown=0.0, deadline_reserve=0.0,
+    )
+    settings.update(overrides)
+    return ResiliencePolicy(**settings)
+
+
+def _flaky(failures: int, error: Exception = None):
+    """A send() that fails ``failures`` times, then answers "ok"."""
+    calls = []
+
+    async def send():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise error or httpx.ConnectError("connection refused")
+        return "ok"
+
+    return send, calls
+
+
+async def _ok():
+    return "ok"
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_opens_after_consecutive_failures_then_probes_once(self):
+        breaker = CircuitBreaker(failures=2, cooldown=0.0)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+        self.assertTrue(breaker.allow())  # the probe
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(breaker.allow())  # everyone else while it runs
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_cooldown_keeps_the_circuit_open(self):
+        breaker = CircuitBreaker(failures=1, cooldown=60.0)
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+
+
+class ResilientCallerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_retries_transport_errors(self):
+        caller = ResilientCaller(_policy(breaker_failures=5))
+        send, calls = _flaky(2)
+        self.assertEqual(await caller.call(TOOL, send), "ok")
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(caller.stats()["retries"], 2)
+
+    async def test_tool_errors_are_not_retried(self):
+        caller = ResilientCaller(_policy())
+        send, calls = _flaky(1, ValueError("no such page"))
+        with self.assertRaises(ValueError):
+            await caller.call(TOOL, send)
+        self.assertEqual(len(calls), 1)
+
+    async def test_non_idempotent_tools_are_not_retried(self):
+        caller = ResilientCaller(_policy(breaker_failures=5))
+        send, calls = _flaky(1)
+        with self.assertRaises(httpx.ConnectError):
+            await caller.call("confluence_create_page", send)
+        self.assertEqual(len(calls), 1)
+
+    async def test_open_circuit_fails_fast(self):
+        caller = ResilientCaller(_policy(max_retries=0, breaker_cooldown=60.0))
+        for _ in range(2):
+            with self.assertRaises(httpx.ConnectError):
+                await caller.call(TOOL, _flaky(1)[0])
+        send, calls = _flaky(0)
+        with self.assertRaises(CircuitOpenError):
+            await caller.call(TOOL, send)
+        self.assertEqual(calls, [])
+
+    async def _open_circuit(self, caller: ResilientCaller):
+        for _ in range(2):
+            with self.assertRaises(httpx.ConnectError):
+                await caller.call(TOOL, _flaky(1)[0])
+        self.assertEqual(caller.stats()["tools"][TOOL]["circuit"], CircuitBreaker.OPEN)
+
+    async def test_cancelled_probe_frees_the_half_open_circuit(self):
+        caller = ResilientCaller(_policy(max_retries=0))
+        await self._open_circuit(caller)
+
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(60)
+
+        probe = asyncio.create_task(caller.call(TOOL, hang))
+        await started.wait()
+        probe.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await probe
+
+        self.assertEqual(await caller.call(TOOL, _ok), "ok")
+        self.assertEqual(await caller.call(TOOL, _ok), "ok")
+        self.assertEqual(caller.stats()["tools"][TOOL]["circuit"], CircuitBreaker.CLOSED)
+
+    async def test_probe_out_of_budget_frees_the_half_open_circuit(self):
+        caller = ResilientCaller(_policy(max_retries=0, deadline_reserve=5.0))
+        await self._open_circuit(caller)
+
+        with request_budget(1.0):
+            with self.assertRaises(DeadlineExceededError):
+                await caller.call(TOOL, _ok)
+
+        self.assertEqual(await caller.call(TOOL, _ok), "ok")
+        self.assertEqual(caller.stats()["tools"][TOOL]["circuit"], CircuitBreaker.CLOSED)
+
+    async def test_attempts_time_out(self):
+        caller = ResilientCaller(_policy(timeout=0.01, max_retries=0, breaker_failures=5))
+
+        async def slow():
+            await asyncio.sleep(1)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await caller.call(TOOL, slow)
+
+    async def test_hedge_answers_a_slow_primary(self):
+        caller = ResilientCaller(_policy(hedge=True, hedge_min_samples=1, hedge_min_delay=0.01))
+        await caller.call(TOOL, _ok)  # one latency sample
+        calls = []
+
+        async def send():
+            calls.append(1)
+            if len(calls) == 1:
+                await asyncio.sleep(1)
+            return len(calls)
+
+        self.assertEqual(await caller.call(TOOL, send), 2)
+        self.assertEqual(caller.stats()["hedge_wins"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+"""Tests for LLM call scheduling and admission control (confluence.scheduler)"""
+
+import asyncio
+import json
+import unittest
+
+import httpx
+
+from confluence.scheduler import SERVER_BUSY_CODE, AdmissionMiddleware, LlmScheduler, parse_priorities
+
+
+class LlmSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.scheduler = LlmScheduler(
+            max_concurrency=1,
+            priorities={"answer_synthesizer": 0, "query_analyzer": 2},
+        )
+        self.order = []
+        self.gate = asyncio.Event()
+
+    async def call(self, session, agent, label=None):
+        async with self.scheduler.slot(session, agent):
+            self.order.append(label or f"{session}:{agent}")
+            await self.gate.wait()
+
+    async def run_queued(self, calls):
+        """Start ``calls`` behind a blocker holding the only slot, then let them all run."""
+        blocker = asyncio.create_task(self.call("blocker", "coordinator"))
+        await asyncio.sleep(0)
+        tasks = []
+        for call in calls:
+            tasks.append(asyncio.create_task(self.call(*call)))
+            await asyncio.sleep(0)
+        self.assertEqual(self.scheduler.queue_depth, len(calls))
+        self.gate.set()
+        await asyncio.gather(blocker, *tasks)
+        return self.order[1:]
+
+    async def test_lower_priority_value_runs_first(self):
+        order = await self.run_queued([
+            ("s1", "query_analyzer"),
+            ("s2", "document_searcher"),
+            ("s3", "answer_synthesizer"),
+        ])
+        self.assertEqual(order, ["s3:answer_synthesizer", "s2:document_searcher", "s1:query_analyzer"])
+
+    async def test_sessions_take_turns_within_a_priority(self):
+        order = await self.run_queued([
+            ("a", "document_searcher", "a1"),
+            ("a", "document_searcher", "a2"),
+            ("a", "document_searcher", "a3"),
+            ("b", "document_searcher", "b1"),
+            ("c", "document_searcher", "c1"),
+        ])
+        self.assertEqual(order, ["a1", "b1", "c1", "a2", "a3"])
+
+    async def test_cancelled_waiter_leaves_the_queue(self):
+        blocker = asyncio.create_task(self.call("blocker", "coordinator"))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(self.call("s1", "query_analyzer"))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+        self.assertEqual(self.scheduler.queue_depth, 0)
+        self.gate.set()
+        await blocker
+        self.assertEqual(self.scheduler.stats()["in_flight"], 0)
+
+    async def test_token_bucket_delays_calls(self):
+        scheduler = LlmScheduler(max_concurrency=4, tokens_per_minute=600)
+        async with scheduler.slot("s1", "coordinator", tokens=600):
+            pass
+
+        async def next_call():
+            async with scheduler.slot("s2", "coordinator", tokens=1):
+                pass
+
+        waiting = asyncio.create_task(next_call())
+        await asyncio.sleep(0)
+        self.assertFalse(waiting.done())
+        self.assertEqual(scheduler.stats()["token_waits"], 1)
+        await asyncio.wait_for(waiting, 1)  # 1 token refills in 0.1s
+
+        scheduler.settle(estimated=100, actual=50)
+        self.assertGreaterEqual(scheduler.stats()["tokens_available"], 50)
+
+
+class AdmissionMiddlewareTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.scheduler = LlmScheduler(max_concurrency=1, max_queue=0)
+
+        async def app(scope, receive, send):
+            body = (await receive())["body"]
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": body})
+
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=AdmissionMiddleware(app, self.scheduler)),
+            base_url="http://agent.test",
+        )
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    def rpc(self, method):
+        return {"jsonrpc": "2.0", "id": 7, "method": method, "params": {}}
+
+    async def test_agent_runs_are_rejected_while_saturated(self):
+        response = await self.client.post("/", json=self.rpc("message/send"))
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response.headers["retry-after"]), 1)
+        self.assertEqual(response.json()["error"]["code"], SERVER_BUSY_CODE)
+        self.assertEqual(response.json()["id"], 7)
+
+    async def test_other_calls_go_through_with_their_body(self):
+        response = await self.client.post("/", json=self.rpc("tasks/get"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["method"], "tasks/get")
+
+    async def test_admitted_runs_are_counted_until_done(self):
+        self.scheduler.max_queue = 1
+        response = await self.client.post("/", json=self.rpc("message/stream"))
+        self.assertEqual(response.status_code, 200)
+        stats = self.scheduler.stats()
+        self.assertEqual((stats["admitted"], stats["requests"]), (1, 0))
+
+
+class ParsePrioritiesTest(unittest.TestCase):
+    def test_pairs(self):
+        self.assertEqual(parse_priorities("answer_synthesizer:0, query_analyzer:2,bad"),
+                         {"answer_synthesizer": 0, "query_analyzer": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
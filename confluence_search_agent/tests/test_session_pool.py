@@ -0,0 +1,137 @@
+"""Tests for the pooled MCP SSE sessions (confluence.tools.session_pool)"""
+
+import asyncio
+import unittest
+
+import anyio
+
+from confluence.tools.session_pool import MCPSessionPool, is_connection_error
+
+
+class FakeSession:
+    def __init__(self, number):
+        self.number = number
+        self.dropped = False
+        self.release = None
+
+    async def call_tool(self, name, arguments):
+        if self.dropped:
+            raise anyio.ClosedResourceError()
+        if self.release is not None:
+            await self.release.wait()
+        return {"session": self.number, "name": name}
+
+    async def list_tools(self):
+        return []
+
+    async def send_ping(self):
+        if self.dropped:
+            raise anyio.BrokenResourceError()
+
+
+class FakePool(MCPSessionPool):
+    """MCPSessionPool whose sessions are in-memory fakes instead of SSE streams."""
+
+    def __init__(self, **kwargs):
+        super().__init__("http://mcp.test/sse", **kwargs)
+        self.opened = []
+
+    async def _own(self, pooled):
+        try:
+            pooled.session = FakeSession(len(self.opened) + 1)
+            self.opened.append(pooled.session)
+            pooled.ready.set()
+            await pooled.closing.wait()
+        finally:
+            pooled.broken = True
+            pooled.ready.set()
+
+
+class SessionPoolTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.pool = FakePool(min_sessions=1, max_sessions=2, checkout_timeout=0.05)
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+
+    async def test_sessions_are_reused(self):
+        await self.pool.start()
+        for _ in range(3):
+            self.assertEqual((await self.pool.call_tool("confluence_search", {}))["session"], 1)
+        stats = self.pool.stats()
+        self.assertEqual((stats["open"], stats["handshakes"], stats["checkouts"]), (1, 1, 3))
+
+    async def test_pool_grows_to_max_then_callers_wait(self):
+        release = asyncio.Event()
+
+        async def hold():
+            async with self.pool.session() as session:
+                session.release = release
+                await release.wait()
+                return session.number
+
+        holders = [asyncio.create_task(hold()) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.pool.stats()["in_use"], 2)
+
+        with self.assertRaises(TimeoutError):
+            await self.pool.call_tool("confluence_search", {})
+
+        waiter = asyncio.create_task(self.pool.call_tool("confluence_search", {}))
+        await asyncio.sleep(0)
+        release.set()
+        self.assertEqual(sorted(await asyncio.gather(*holders)), [1, 2])
+        self.assertIn((await waiter)["session"], (1, 2))
+        self.assertEqual(len(self.pool.opened), 2)
+        self.assertGreaterEqual(self.pool.stats()["waits"], 1)
+
+    async def test_dropped_stream_is_retried_on_a_fresh_session(self):
+        await self.pool.start()
+        self.pool.opened[0].dropped = True
+        result = await self.pool.call_tool("confluence_get_page", {"pageId": "1"})
+        self.assertEqual(result["session"], 2)
+        self.assertEqual(self.pool.stats()["reconnects"], 1)
+        self.assertEqual(self.pool.stats()["open"], 1)
+
+    async def test_tool_errors_are_not_retried(self):
+        await self.pool.start()
+
+        async def fail(name, arguments):
+            raise ValueError("bad arguments")
+
+        self.pool.opened[0].call_tool = fail
+        with self.assertRaises(ValueError):
+            await self.pool.call_tool("confluence_get_page", {})
+        self.assertEqual(len(self.pool.opened), 1)
+
+    async def test_health_check_replaces_dead_and_reaps_idle_sessions(self):
+        self.pool.min_sessions = 0
+        self.pool.idle_timeout = 0
+        await self.pool.start()
+        async with self.pool.session():
+            async with self.pool.session():
+                pass
+        self.assertEqual(self.pool.stats()["open"], 2)
+
+        await self.pool._check()
+        self.assertEqual(self.pool.stats()["open"], 0)
+        self.assertEqual(self.pool.stats()["reaped"], 2)
+
+        self.pool.min_sessions, self.pool.idle_timeout = 1, 300
+        await self.pool._fill()
+        self.pool.opened[-1].dropped = True
+        await self.pool._check()
+        self.assertEqual(self.pool.stats()["health_failures"], 1)
+        self.assertEqual(self.pool.stats()["open"], 1)
+        self.assertFalse(self.pool._sessions[0].session.dropped)
+
+
+class IsConnectionErrorTest(unittest.TestCase):
+    def test_classification(self):
+        self.assertTrue(is_connection_error(anyio.ClosedResourceError()))
+        self.assertTrue(is_connection_error(BaseExceptionGroup("g", [ConnectionError()])))
+        self.assertFalse(is_connection_error(ValueError()))
+
+
+if __name__ == "__main__":
+    unittest.main()
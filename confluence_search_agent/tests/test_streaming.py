@@ -0,0 +1,135 @@
+"""Tests for streamed A2A responses (confluence.streaming)"""
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from google.adk.events import Event
+from google.genai import types
+
+from confluence.streaming import (
+    DELTA,
+    PROGRESS,
+    STREAM_METADATA_KEY,
+    BackpressureQueue,
+    StreamingEventConverter,
+    describe_tool_calls,
+)
+
+
+def a2a_event(kind=None, text="", author="answer_synthesizer"):
+    metadata = {"adk_author": author}
+    if kind:
+        metadata[STREAM_METADATA_KEY] = kind
+    return SimpleNamespace(
+        metadata=metadata,
+        status=SimpleNamespace(message=SimpleNamespace(parts=[text])),
+    )
+
+
+class SlowConsumer:
+    """A2A event queue that only accepts events while ``open`` is set."""
+
+    def __init__(self):
+        self.received = []
+        self.open = asyncio.Event()
+
+    async def enqueue_event(self, event):
+        await self.open.wait()
+        self.received.append(event)
+
+
+class BackpressureQueueTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.consumer = SlowConsumer()
+        self.queue = BackpressureQueue(self.consumer, max_pending=4, flush_interval=0)
+
+    async def test_deltas_merge_while_the_client_is_behind(self):
+        await self.queue.enqueue_event(a2a_event(DELTA, "Hel"))
+        await asyncio.sleep(0)  # the pump takes the first delta and blocks
+        for text in ("lo", " wor", "ld"):
+            await self.queue.enqueue_event(a2a_event(DELTA, text))
+        await self.queue.enqueue_event(a2a_event(DELTA, "Hi", author="coordinator"))
+
+        self.consumer.open.set()
+        await self.queue.close()
+        self.assertEqual(
+            [event.status.message.parts for event in self.consumer.received],
+            [["Hel"], ["lo", " wor", "ld"], ["Hi"]],
+        )
+
+    async def test_progress_is_superseded_and_other_events_kept_in_order(self):
+        await self.queue.enqueue_event(a2a_event(text="first"))
+        await asyncio.sleep(0)
+        await self.queue.enqueue_event(a2a_event(PROGRESS, "Searching…"))
+        await self.queue.enqueue_event(a2a_event(PROGRESS, "Reading 2 pages…"))
+        await self.queue.enqueue_event(a2a_event(text="final"))
+
+        self.consumer.open.set()
+        await self.queue.close()
+        self.assertEqual(
+            [event.status.message.parts[0] for event in self.consumer.received],
+            ["first", "Reading 2 pages…", "final"],
+        )
+
+    async def test_producer_waits_when_the_backlog_is_full(self):
+        await self.queue.enqueue_event(a2a_event(text="0"))
+        await asyncio.sleep(0)
+        for i in range(1, 5):
+            await self.queue.enqueue_event(a2a_event(text=str(i)))
+
+        blocked = asyncio.create_task(self.queue.enqueue_event(a2a_event(text="5")))
+        await asyncio.sleep(0.01)
+        self.assertFalse(blocked.done())
+
+        self.consumer.open.set()
+        await blocked
+        await self.queue.close()
+        self.assertEqual([event.status.message.parts[0] for event in self.consumer.received],
+                         [str(i) for i in range(6)])
+
+    async def test_failing_consumer_drops_the_rest(self):
+        class Broken:
+            calls = 0
+
+            async def enqueue_event(self, event):
+                self.calls += 1
+                raise RuntimeError("queue closed")
+
+        broken = Broken()
+        queue = BackpressureQueue(broken, flush_interval=0)
+        await queue.enqueue_event(a2a_event(text="a"))
+        await asyncio.sleep(0)
+        await queue.enqueue_event(a2a_event(text="b"))
+        await queue.close()
+        self.assertEqual(broken.calls, 1)
+
+
+class DescribeToolCallsTest(unittest.TestCase):
+    def test_progress_text(self):
+        search = types.FunctionCall(name="search_in_space", args={"space_key": "ENG", "query": "vpn"})
+        self.assertEqual(describe_tool_calls([search]), "Searching ENG space for “vpn”…")
+        self.assertEqual(describe_tool_calls([search, search]), "Searching ENG space for “vpn” (+1 more searches)…")
+
+        pages = [types.FunctionCall(name="get_page_content", args={"page_id": str(i)}) for i in range(3)]
+        self.assertEqual(describe_tool_calls(pages), "Reading 3 pages…")
+
+        transfer = types.FunctionCall(name="transfer_to_agent", args={"agent_name": "answer_synthesizer"})
+        self.assertEqual(describe_tool_calls([transfer]), "Writing the answer…")
+        self.assertIsNone(describe_tool_calls([]))
+
+
+class StreamingEventConverterTest(unittest.TestCase):
+    def test_partial_output_of_internal_stages_is_dropped(self):
+        converter = StreamingEventConverter(frozenset({"answer_synthesizer"}))
+        partial = Event(
+            invocation_id="turn",
+            author="query_analyzer",
+            partial=True,
+            content=types.Content(role="model", parts=[types.Part(text="Keywords: vpn")]),
+        )
+        self.assertEqual(converter(partial, None), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
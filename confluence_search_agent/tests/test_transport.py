@@ -0,0 +1,76 @@
+"""Tests for the pooled, loop-aware MCP transport (confluence.tools.transport)"""
+
+import asyncio
+import unittest
+
+import httpx
+
+from confluence.tools.transport import TransportConfig
+
+from .mcp_fakes import make_transport
+
+
+class TransportTest(unittest.IsolatedAsyncioTestCase):
+    async def test_requests_wait_for_a_free_slot(self):
+        release = asyncio.Event()
+        active, peak = [0], [0]
+
+        async def handler(request):
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await release.wait()
+            active[0] -= 1
+            return httpx.Response(200, json={})
+
+        transport = make_transport(handler, TransportConfig(max_connections=2, pool_timeout=5))
+        requests = [asyncio.create_task(transport.post("/mcp/v1/call", json={})) for _ in range(5)]
+        await asyncio.sleep(0.01)
+
+        stats = transport.stats()
+        self.assertEqual((stats["in_use"], stats["waiting"]), (2, 3))
+        release.set()
+        await asyncio.gather(*requests)
+
+        self.assertEqual(peak[0], 2)
+        stats = transport.stats()
+        self.assertEqual((stats["requests"], stats["in_use"], stats["waiting"]), (5, 0, 0))
+        self.assertGreater(stats["max_wait_ms"], 0)
+        await transport.aclose()
+
+    async def test_pool_timeout(self):
+        release = asyncio.Event()
+
+        async def handler(request):
+            await release.wait()
+            return httpx.Response(200, json={})
+
+        transport = make_transport(handler, TransportConfig(max_connections=1, pool_timeout=0.01))
+        first = asyncio.create_task(transport.post("/mcp/v1/call", json={}))
+        await asyncio.sleep(0)
+        with self.assertRaises(httpx.PoolTimeout):
+            await transport.post("/mcp/v1/call", json={})
+        self.assertEqual(transport.stats()["waiting"], 0)
+        release.set()
+        await first
+        await transport.aclose()
+
+    async def test_one_client_per_loop(self):
+        transport = make_transport(lambda request: httpx.Response(200, json={}))
+        client = transport.client
+        self.assertIs(transport.client, client)
+
+        other = await asyncio.to_thread(lambda: asyncio.run(_client_of(transport)))
+        self.assertIsNot(other, client)
+        self.assertTrue(other.is_closed)
+        await transport.aclose()
+        self.assertTrue(client.is_closed)
+
+
+async def _client_of(transport):
+    client = transport.client
+    await client.aclose()
+    return client
+
+
+if __name__ == "__main__":
+    unittest.main()
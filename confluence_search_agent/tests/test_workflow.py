@@ -0,0 +1,79 @@
+"""Tests for the deterministic pipeline root agent (confluence.workflow)"""
+
+import unittest
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from confluence.workflow import COORDINATOR, PIPELINE, ConfluenceWorkflowAgent, route_question
+
+CONFIDENT = "How do I configure the VPN client on macOS?"
+VAGUE = "Should I compare the VPN options, and why?"
+
+
+class StubAgent(BaseAgent):
+    """Sub-agent that answers with its own name."""
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=f"{self.name} ran")]),
+        )
+
+
+class RouteQuestionTest(unittest.TestCase):
+    def test_documentation_questions_take_the_pipeline(self):
+        self.assertEqual(route_question(CONFIDENT), PIPELINE)
+        self.assertEqual(route_question("Where is the release checklist?"), PIPELINE)
+
+    def test_everything_else_goes_to_the_coordinator(self):
+        for message in ("Hello!", "thanks", "can you elaborate", "tell me a joke about VPNs", "", "why?"):
+            with self.subTest(message=message):
+                self.assertEqual(route_question(message), COORDINATOR)
+
+
+class WorkflowAgentTest(unittest.IsolatedAsyncioTestCase):
+    async def run_turn(self, question):
+        root = ConfluenceWorkflowAgent(
+            name="confluence_root",
+            stages=[StubAgent(name="query_analyzer"), StubAgent(name="document_searcher"),
+                    StubAgent(name="answer_synthesizer")],
+            coordinator=StubAgent(name="coordinator"),
+        )
+        root.fast_path_stage = "query_analyzer"
+        runner = InMemoryRunner(agent=root, app_name="test")
+        session = await runner.session_service.create_session(app_name="test", user_id="user")
+        events = [
+            event async for event in runner.run_async(
+                user_id="user", session_id=session.id,
+                new_message=types.Content(role="user", parts=[types.Part(text=question)]),
+            )
+        ]
+        session = await runner.session_service.get_session(app_name="test", user_id="user", session_id=session.id)
+        return events, session
+
+    async def test_confident_question_skips_the_analyzer_stage(self):
+        events, session = await self.run_turn(CONFIDENT)
+        self.assertEqual([event.author for event in events],
+                         ["query_analyzer", "document_searcher", "answer_synthesizer"])
+        self.assertNotEqual(events[0].content.parts[0].text, "query_analyzer ran")
+        self.assertEqual(session.state["query_analysis"]["keywords"], ["configure", "vpn", "client", "macos"])
+
+    async def test_vague_question_runs_the_analyzer(self):
+        events, session = await self.run_turn(VAGUE)
+        self.assertEqual(events[0].content.parts[0].text, "query_analyzer ran")
+        self.assertNotIn("query_analysis", session.state)
+
+    async def test_small_talk_goes_to_the_coordinator(self):
+        events, _ = await self.run_turn("Thanks!")
+        self.assertEqual([event.author for event in events], ["coordinator"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""Synthetic WebShop-style product catalogs for the benchmarks
+
+Products get a brand, a title built from category-specific nouns and
+adjectives, a ``product_category`` path, a price, attributes, color/size
+options and a few reviews. Word choice is skewed (a few common words,
+a long tail of rare ones), like real catalog text.
+
+Usage:
+    python benchmarks/catalog_gen.py OUTPUT.jsonl [--products 1000000]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+CATEGORIES = {
+    "Clothing, Shoes & Jewelry › Women › Clothing › Dresses": ["dress", "sundress", "maxi dress", "midi dress", "gown"],
+    "Clothing, Shoes & Jewelry › Women › Clothing › Tops": ["blouse", "tank top", "t-shirt", "tunic", "cardigan"],
+    "Clothing, Shoes & Jewelry › Men › Clothing › Shirts": ["polo shirt", "dress shirt", "henley", "flannel shirt", "t-shirt"],
+    "Clothing, Shoes & Jewelry › Men › Clothing › Pants": ["chino pants", "jeans", "cargo pants", "joggers", "shorts"],
+    "Clothing, Shoes & Jewelry › Women › Shoes": ["running shoes", "sandals", "ankle boots", "flats", "sneakers"],
+    "Clothing, Shoes & Jewelry › Men › Shoes": ["hiking boots", "loafers", "running shoes", "slippers", "work boots"],
+    "Beauty & Personal Care › Skin Care": ["moisturizer", "serum", "face wash", "sunscreen", "eye cream"],
+    "Beauty & Personal Care › Hair Care": ["shampoo", "conditioner", "hair oil", "hair mask", "dry shampoo"],
+    "Beauty & Personal Care › Personal Care": ["deodorant", "body wash", "lip balm", "toothpaste", "hand cream"],
+    "Grocery & Gourmet Food › Beverages": ["green tea", "coffee beans", "herbal tea", "cold brew", "matcha powder"],
+    "Grocery & Gourmet Food › Snacks": ["granola", "protein bar", "trail mix", "popcorn", "rice crackers"],
+    "Electronics › Headphones": ["earbuds", "headphones", "headset", "neckband earphones", "sport earbuds"],
+    "Electronics › Accessories": ["usb c charger", "power bank", "charging cable", "phone case", "screen protector"],
+    "Electronics › Computers & Accessories": ["wireless mouse", "keyboard", "laptop stand", "usb hub", "webcam"],
+    "Home & Kitchen › Bedding": ["pillow", "comforter", "sheet set", "mattress topper", "throw blanket"],
+    "Home & Kitchen › Kitchen & Dining": ["frying pan", "water bottle", "knife set", "cutting board", "coffee mug"],
+    "Home & Kitchen › Home Décor": ["candle", "picture frame", "wall art", "vase", "throw pillow cover"],
+    "Sports & Outdoors › Exercise & Fitness": ["yoga mat", "dumbbells", "resistance bands", "jump rope", "foam roller"],
+    "Sports & Outdoors › Camping & Hiking": ["tent", "sleeping bag", "camping lantern", "hiking backpack", "trekking poles"],
+    "Toys & Games › Kids": ["building blocks", "puzzle", "plush toy", "board game", "kids backpack"],
+}
+ADJECTIVES = (
+    "lightweight breathable waterproof organic premium classic slim soft stretch vintage casual "
+    "portable wireless ergonomic durable eco friendly natural vegan gluten free insulated "
+    "non slip quick dry heavy duty compact foldable rechargeable hypoallergenic fragrance free "
+    "long lasting extra large mini deluxe professional adjustable reusable handmade luxury"
+).split()
+AUDIENCES = ["women", "men", "kids", "girls", "boys", "adults", "teens", "travel", "home", "office", "gym", "outdoor"]
+ATTRIBUTES = (
+    "machine wash|hand wash|cotton|polyester|leather|stainless steel|bpa free|paraben free|cruelty free|"
+    "water resistant|fast charging|bluetooth 5.3|noise cancelling|memory foam|non gmo|sugar free|"
+    "recycled materials|uv protection|spf 50|dishwasher safe|oven safe|lifetime warranty|travel size|"
+    "easy to clean|anti slip|moisture wicking|low calorie|high protein|caffeine free|pet friendly"
+).split("|")
+COLORS = ["black", "white", "navy", "grey", "red", "blue", "green", "pink", "beige", "brown", "purple", "teal"]
+SIZES = ["x-small", "small", "medium", "large", "x-large", "xx-large"]
+REVIEWS = [
+    (5, "Love it", "Exactly as described and great quality for the price."),
+    (4, "Good value", "Works well and arrived quickly. Would buy again."),
+    (3, "Okay", "Does the job but not as nice as the pictures."),
+    (2, "Disappointed", "Stopped working after a few weeks."),
+    (5, "Perfect gift", "My family loved it, fits perfectly."),
+]
+_SYLLABLES = "ka lo mi ra ven tor zu sa bel fin gro nex qua vi do".split()
+
+
+def _skewed(rng, items):
+    # Earlier items are picked far more often (roughly Zipf-like)
+    return items[min(len(items) - 1, int(rng.paretovariate(1.2)) - 1)]
+
+
+def make_product(rng, product_id, brands):
+    category = rng.choice(list(CATEGORIES))
+    noun = _skewed(rng, CATEGORIES[category])
+    adjectives = " ".join(_skewed(rng, ADJECTIVES).title() for _ in range(rng.randint(1, 3)))
+    brand = _skewed(rng, brands)
+    title = f"{brand} {adjectives} {noun.title()} for {rng.choice(AUDIENCES).title()} {rng.choice(COLORS).title()}"
+    price = round(rng.lognormvariate(3.2, 0.7), 2)
+    options = {}
+    if "Clothing" in category:
+        options["size"] = [{"value": size, "image": None} for size in rng.sample(SIZES, rng.randint(2, 5))]
+    options["color"] = [{"value": color, "image": None} for color in rng.sample(COLORS, rng.randint(1, 4))]
+    attributes = rng.sample(ATTRIBUTES, rng.randint(2, 5))
+    return {
+        "asin": f"B0{product_id:08X}",
+        "name": title,
+        "product_category": f"{category} › {noun.title()}",
+        "pricing": f"${price:.2f}",
+        "attributes": attributes,
+        "customization_options": options,
+        "small_description": [f"{adjectives} {noun} with {attributes[0]}."],
+        "full_description": f"{title}. Made with {', '.join(attributes)}.",
+        "average_rating": round(rng.uniform(3.0, 5.0), 1),
+        "reviews": [
+            {"score": score, "title": review_title, "body": body}
+            for score, review_title, body in rng.sample(REVIEWS, rng.randint(0, 3))
+        ],
+    }
+
+
+def generate_catalog(path, n_products, seed=0):
+    """Write ``n_products`` products to ``path`` as JSON Lines."""
+    rng = random.Random(seed)
+    brands = ["".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 3))).title() for _ in range(5000)]
+    with open(path, "w", encoding="utf-8") as f:
+        for product_id in range(n_products):
+            f.write(json.dumps(make_product(rng, product_id, brands), ensure_ascii=False))
+            f.write("\n")
+    return path
+
+
+def cached_catalog(n_products, seed=0):
+    """Path of a generated catalog in the temp directory (generated once)."""
+    path = os.path.join(tempfile.gettempdir(), f"shopping_catalog_{n_products}_{seed}.jsonl")
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        generate_catalog(path + ".tmp", n_products, seed)
+        os.replace(path + ".tmp", path)
+        print(f"Generated {n_products:,} products in {time.perf_counter() - started:.1f}s -> {path}", file=sys.stderr)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output")
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate_catalog(args.output, args.products, args.seed)
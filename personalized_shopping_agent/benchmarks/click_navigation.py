@@ -0,0 +1,114 @@
+"""Click navigation throughput per worker, with and without the page cache
+
+Runs scripted shopping sessions against a synthetic WebShop-style catalog
+(``catalog_gen.py``) through the search and click tools' navigation
+(``shared_libraries/navigation.py``) with ADK session state:
+
+    search -> product -> Description -> < Prev -> Features -> < Prev ->
+    Reviews -> < Prev -> (size) -> (color) -> Buy Now -> Back to Search
+
+Queries come from a pool with a skewed popularity, so sessions share
+results and product pages as real traffic does. Each run is single
+process (one worker); the page cache is off (size 0) in the first run
+and at its default size in the second.
+
+Usage:
+    python benchmarks/click_navigation.py [--products 100000] [--sessions 2000]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from catalog_gen import cached_catalog  # noqa: E402
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+def make_queries(catalog, n_queries, rng):
+    queries = []
+    for _ in range(n_queries):
+        words = catalog.title(rng.randrange(len(catalog))).split()[1:]
+        queries.append(" ".join(rng.sample(words, min(len(words), 2))).lower())
+    return queries
+
+
+def run_session(navigation, state, query, rng, timings, state_bytes):
+    def timed(action, *args):
+        started = time.perf_counter()
+        page = action(state, *args)
+        timings.append(time.perf_counter() - started)
+        state_bytes.append(len(json.dumps(state.to_dict())))
+        return page
+
+    timed(navigation.search, query)
+    _, buttons = navigation.render(navigation.current_page(state))
+    asins = buttons[buttons.index(navigation.BACK_TO_SEARCH) + 1:]
+    asins = [asin for asin in asins if asin not in (navigation.PREV, navigation.NEXT)]
+    if not asins:
+        return
+    timed(navigation.click, rng.choice(asins[:5]))
+    for section in navigation.SECTIONS:
+        timed(navigation.click, section)
+        timed(navigation.click, navigation.PREV)
+    options = navigation.get_search_engine().catalog.options(
+        navigation.get_search_engine().catalog.product_id(navigation.current_page(state)[1])
+    )
+    for values in list(options.values())[:2]:
+        timed(navigation.click, rng.choice(values))
+    timed(navigation.click, navigation.BUY_NOW)
+    timed(navigation.click, navigation.BACK_TO_SEARCH)
+
+
+def run(navigation, State, queries, sessions, cache_size):
+    navigation.page_cache = navigation.PageCache(cache_size)
+    rng = random.Random(1)
+    timings, state_bytes = [], []
+    for _ in range(sessions):
+        state = State(value={}, delta={})
+        query = queries[min(len(queries) - 1, int(rng.paretovariate(1.0)) - 1)]
+        run_session(navigation, state, query, rng, timings, state_bytes)
+    stats = navigation.page_cache.stats()
+    print(f"{cache_size:10d} {len(timings):8,} {len(timings) / sum(timings):9,.0f} "
+          f"{statistics.mean(timings) * 1000:7.3f}ms {percentile(timings, 50) * 1000:7.3f}ms "
+          f"{percentile(timings, 95) * 1000:7.3f}ms {stats['hit_rate']:9.1%} {max(state_bytes):9d} B")
+
+
+def main(args):
+    os.environ["SHOPPING_CATALOG_PATH"] = cached_catalog(args.products)
+    os.environ.setdefault("SHOPPING_INDEX_DIR", os.path.join(tempfile.gettempdir(), "shopping_search_indexes"))
+    from google.adk.sessions.state import State
+    from personalized_shopping.shared_libraries import navigation
+
+    engine = navigation.get_search_engine()
+    queries = make_queries(engine.catalog, args.queries, random.Random(0))
+    for query in queries[:20]:
+        engine.search(query)  # warm up page cache and the score buffer
+    navigation.get_review_index()  # summarizes reviews on first use
+
+    print(f"\n{args.sessions:,} sessions over {len(engine.catalog):,} products, "
+          f"{len(queries)} distinct queries (skewed)\n")
+    print(f"{'page cache':>10} {'actions':>8} {'clicks/s':>9} {'mean':>9} {'p50':>9} {'p95':>9} "
+          f"{'hit rate':>9} {'max state':>11}")
+    run(navigation, State, queries, args.sessions, 0)
+    run(navigation, State, queries, args.sessions, args.cache_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--cache-size", type=int, default=1024)
+    main(parser.parse_args())
@@ -0,0 +1,129 @@
+"""Product exploration: explore_product against click-by-click
+
+Runs the shopping agent (its real tools, prompt and callbacks) with a
+scripted model that pays ``--llm-latency`` per call, starting each session
+on a results page of a synthetic WebShop-style catalog (``catalog_gen.py``),
+and explores the top product two ways:
+
+- clicks: the product, then Description, "< Prev", Features, "< Prev",
+  Reviews, "< Prev", then the summary (the flow the prompt used to ask for)
+- explore: one explore_product call, then the summary
+
+Reports per exploration the LLM calls, the estimated prompt tokens sent
+(every call resends the conversation so far), the wall time, and the page
+each session ends on.
+
+Usage:
+    python benchmarks/explore_product.py [--products 100000] [--explorations 20]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from catalog_gen import cached_catalog  # noqa: E402
+
+logging.getLogger("google_adk").setLevel(logging.ERROR)
+
+CLICKS = ["{asin}", "Description", "< Prev", "Features", "< Prev", "Reviews", "< Prev"]
+
+
+def scripted_model_class():
+    from google.adk.models import BaseLlm, LlmResponse
+    from google.genai import types
+
+    from personalized_shopping.scheduler import estimate_request_tokens
+
+    class ScriptedLlm(BaseLlm):
+        """Calls the planned tools in order, then answers."""
+
+        latency: float = 0.5
+        plan: List[tuple] = []
+        calls: int = 0
+        prompt_tokens: int = 0
+
+        async def generate_content_async(self, llm_request, stream=False):
+            self.calls += 1
+            self.prompt_tokens += estimate_request_tokens(llm_request)
+            await asyncio.sleep(self.latency)
+            step = sum(1 for content in llm_request.contents for part in content.parts or [] if part.function_call)
+            if step < len(self.plan):
+                name, args = self.plan[step]
+                part = types.Part(function_call=types.FunctionCall(name=name, args=args))
+            else:
+                part = types.Part(text="Here is a summary of the product.")
+            yield LlmResponse(content=types.Content(role="model", parts=[part]))
+
+    return ScriptedLlm
+
+
+async def explore(runner, model, plan, results_page):
+    from google.genai import types
+
+    from personalized_shopping.shared_libraries.navigation import PAGE_STACK_KEY
+
+    session = await runner.session_service.create_session(
+        app_name="bench", user_id="bench", state={PAGE_STACK_KEY: [results_page]}
+    )
+    model.plan, model.calls, model.prompt_tokens = plan, 0, 0
+    started = time.perf_counter()
+    async for _ in runner.run_async(
+        user_id="bench", session_id=session.id,
+        new_message=types.Content(role="user", parts=[types.Part(text="Tell me more about the first one")])
+    ):
+        pass
+    elapsed = time.perf_counter() - started
+    session = await runner.session_service.get_session(app_name="bench", user_id="bench", session_id=session.id)
+    return model.calls, model.prompt_tokens, elapsed, session.state[PAGE_STACK_KEY][-1][0]
+
+
+async def main(args):
+    os.environ["SHOPPING_CATALOG_PATH"] = cached_catalog(args.products)
+    os.environ.setdefault("SHOPPING_INDEX_DIR", os.path.join(tempfile.gettempdir(), "shopping_search_indexes"))
+    from google.adk.runners import InMemoryRunner
+
+    from personalized_shopping.agent import root_agent
+    from personalized_shopping.shared_libraries.navigation import get_search_engine
+
+    engine = get_search_engine()
+    rng = random.Random(0)
+    targets = []
+    while len(targets) < args.explorations:
+        keywords = " ".join(engine.catalog.title(rng.randrange(len(engine.catalog))).split()[1:3]).lower()
+        page = engine.search(keywords)
+        if page.hits:
+            targets.append((["results", keywords, 1, ""], page.hits[0].asin))
+
+    model = scripted_model_class()(model="scripted", latency=args.llm_latency)
+    runner = InMemoryRunner(agent=root_agent.clone(update={"model": model}), app_name="bench")
+    flows = {
+        "clicks": lambda asin: [("click", {"button_name": button.format(asin=asin)}) for button in CLICKS],
+        "explore": lambda asin: [("explore_product", {"asin": asin})],
+    }
+
+    print(f"{args.explorations} explorations over {len(engine.catalog):,} products, "
+          f"{args.llm_latency * 1000:.0f} ms per LLM call\n")
+    print(f"{'flow':8} {'LLM calls':>9} {'prompt tokens':>13} {'time':>8} {'ends on':>8}")
+    for name, flow in flows.items():
+        rows = [await explore(runner, model, flow(asin), results_page) for results_page, asin in targets]
+        ends = {row[3] for row in rows}
+        print(f"{name:8} {statistics.mean(r[0] for r in rows):9.1f} {statistics.mean(r[1] for r in rows):13,.0f} "
+              f"{statistics.mean(r[2] for r in rows):7.2f}s {'/'.join(sorted(ends)):>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--explorations", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,131 @@
+"""Review summaries: full build, incremental updates, extraction quality, tokens
+
+Summarizes the reviews of a synthetic WebShop-style catalog
+(``catalog_gen.py``) into a fresh review store
+(``shared_libraries/search_engine/reviews.py``), then streams new reviews
+into ``--hot-products`` products, ``--batch`` at a time. Each of those
+products gets two hidden pros and two hidden cons (from shared pools, so
+other products mention them too) that its reviews talk about. Before
+the build, ``--background`` other products get ten reviews each that
+mention random pros and cons, so the corpus has the same phrasing.
+
+Reports:
+
+1. Full build time and store size
+2. add_reviews() latency per batch, against rebuilding everything
+3. How many hidden pros / cons the summaries recover (recall), and how
+   many extracted pros / cons are hidden ones (precision)
+4. Reviews view size in tokens, every review against the summary
+
+Usage:
+    python benchmarks/review_summaries.py [--products 100000] [--hot-products 200]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from catalog_gen import cached_catalog  # noqa: E402
+
+PROS = ["soft fabric", "true to size", "long battery life", "easy to clean", "sturdy zipper", "bright colors",
+        "comfortable straps", "quick setup", "quiet motor", "fresh scent", "strong grip", "deep pockets"]
+CONS = ["runs small", "thin material", "loose stitching", "weak battery", "strong smell", "stopped charging",
+        "arrived damaged", "cheap buttons", "leaks water", "itchy seams", "flimsy lid", "noisy fan"]
+FILLER = ["Arrived on time.", "Great quality for the price.", "Would buy again.", "Ordered two of these.",
+          "My daughter uses it every day.", "Packaging was fine.", "Not what I expected at first."]
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+def make_review(rng, pros, cons):
+    score = rng.choices([5, 4, 3, 2, 1], weights=[35, 25, 10, 15, 15])[0]
+    if score >= 4:
+        sentences = [f"Love the {rng.choice(pros)}.", f"{rng.choice(pros).capitalize()}, really happy with it."]
+    elif score <= 2:
+        sentences = [f"Returned it because of the {rng.choice(cons)}.", f"{rng.choice(cons).capitalize()}, sadly."]
+    else:
+        sentences = [f"{rng.choice(pros).capitalize()} but {rng.choice(cons)}."]
+    sentences = rng.sample(sentences, rng.randint(1, len(sentences))) + rng.sample(FILLER, rng.randint(0, 2))
+    rng.shuffle(sentences)
+    return {"score": score, "title": rng.choice(["Review", "Update", "My take"]), "body": " ".join(sentences)}
+
+
+def matches(phrase, hidden):
+    return any(phrase in other or other in phrase for other in hidden)
+
+
+def main(args):
+    os.environ["SHOPPING_CATALOG_PATH"] = cached_catalog(args.products)
+    os.environ.setdefault("SHOPPING_INDEX_DIR", os.path.join(tempfile.gettempdir(), "shopping_search_indexes"))
+    from personalized_shopping.scheduler import estimate_tokens
+    from personalized_shopping.shared_libraries.navigation import render_review_summary
+    from personalized_shopping.shared_libraries.search_engine import ReviewIndex, get_search_engine
+
+    catalog = get_search_engine().catalog
+    # Keep the synthetic reviews out of the catalog's real added-review store
+    directory = tempfile.mkdtemp(prefix="shopping-reviews-")
+    index = ReviewIndex(
+        catalog, os.path.join(directory, "reviews.sqlite"), os.path.join(directory, "added_reviews.sqlite")
+    )
+    rng = random.Random(0)
+    products = rng.sample(range(len(catalog)), args.hot_products + args.background)
+    for product_id in products[args.hot_products:]:
+        index.add_reviews(product_id, [make_review(rng, PROS, CONS) for _ in range(10)])
+    build_seconds = index.build()
+    stats = index.stats()
+    print(f"\nFull build over {len(catalog):,} products: {build_seconds:.1f}s "
+          f"({stats['phrases']:,} phrases, {stats['bytes'] / 2 ** 20:.1f} MB)")
+
+    hot = {product_id: (rng.sample(PROS, 2), rng.sample(CONS, 2)) for product_id in products[:args.hot_products]}
+    timings = []
+    for _ in range(args.reviews // args.batch):
+        for product_id, (pros, cons) in hot.items():
+            batch = [make_review(rng, pros, cons) for _ in range(args.batch)]
+            started = time.perf_counter()
+            index.add_reviews(product_id, batch)
+            timings.append(time.perf_counter() - started)
+    print(f"{len(timings):,} add_reviews() calls of {args.batch} reviews: "
+          f"p50 {percentile(timings, 50) * 1000:.1f} ms, p95 {percentile(timings, 95) * 1000:.1f} ms "
+          f"(a full rebuild: {build_seconds:.1f}s)")
+
+    recall, precision = {"pros": [], "cons": []}, {"pros": [], "cons": []}
+    raw_tokens, summary_tokens = [], []
+    for product_id, (pros, cons) in hot.items():
+        summary = index.summary(product_id)
+        for name, extracted, hidden in (("pros", summary.pros, pros), ("cons", summary.cons, cons)):
+            recall[name].append(sum(any(matches(p, [h]) for p in extracted) for h in hidden) / len(hidden))
+            precision[name].extend(matches(p, hidden) for p in extracted)
+        reviews = index.reviews(product_id)
+        raw_tokens.append(estimate_tokens("\n".join(
+            f"{review.get('score', '?')}/5 {review.get('title', '')}: {review.get('body', '')}" for review in reviews
+        )))
+        summary_tokens.append(estimate_tokens(render_review_summary(summary)))
+    print(f"\n{args.hot_products} products with {args.reviews}+ new reviews:")
+    for name in ("pros", "cons"):
+        print(f"  {name}: recall {statistics.mean(recall[name]):.0%}, "
+              f"precision {statistics.mean(precision[name]) if precision[name] else 0:.0%}")
+    print(f"  Reviews view: {statistics.mean(raw_tokens):,.0f} tokens with every review, "
+          f"{statistics.mean(summary_tokens):,.0f} as a summary")
+    example = next(iter(hot))
+    print(f"\nExample ({catalog.asin(example)}, hidden pros {hot[example][0]}, cons {hot[example][1]}):")
+    print(render_review_summary(index.summary(example)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--hot-products", type=int, default=200)
+    parser.add_argument("--background", type=int, default=2000)
+    parser.add_argument("--reviews", type=int, default=40, help="new reviews per hot product")
+    parser.add_argument("--batch", type=int, default=5, help="reviews per add_reviews() call")
+    main(parser.parse_args())
@@ -0,0 +1,183 @@
+"""Faceted filters and memory of the columnar catalog
+
+Opens a synthetic WebShop-style catalog (``catalog_gen.py``) and reports:
+
+1. Filter masks: time to evaluate each filter over the whole catalog, and
+   the latency of filtered searches (random title words as keywords)
+2. Filtering vs paging: how many of the products an unfiltered search
+   ranks (all ``max_results`` of them, i.e. every "Next >" page) satisfy
+   the filter, against a filtered search of the same keywords
+3. Memory: the catalog columns against the same fields held as one Python
+   dict per product (measured on a sample and scaled up), and the resident
+   / proportional set size of ``--workers`` processes that memory-map the
+   same cached catalog and index (Linux ``/proc/self/smaps_rollup``)
+
+Usage:
+    python benchmarks/search_filters.py [--products 1000000] [--workers 4]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from catalog_gen import cached_catalog  # noqa: E402
+from personalized_shopping.shared_libraries.search_engine import (  # noqa: E402
+    SearchEngine,
+    filter_mask,
+    parse_filters,
+    tokenize,
+)
+from personalized_shopping.shared_libraries.search_engine.catalog import (  # noqa: E402
+    iter_products,
+    parse_price,
+    parse_rating,
+    product_category,
+    product_options,
+    product_title,
+)
+
+FILTERS = [
+    "price < 30",
+    "color == red",
+    "size == M",
+    "rating >= 4.5 and category == shoes",
+    "price < 30 and color == red and size == M",
+]
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+def make_queries(engine, n_queries, seed=0):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n_queries):
+        words = [word for word in engine.catalog.title(rng.randrange(len(engine.catalog))).split() if tokenize(word)]
+        queries.append(" ".join(rng.sample(words, min(len(words), rng.randint(1, 2)))).lower())
+    return queries
+
+
+def memory_mb():
+    """(RSS, PSS) of this process in MB."""
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in ("Rss", "Pss"):
+                values[name] = int(rest.split()[0]) / 1024
+    return values.get("Rss", 0.0), values.get("Pss", 0.0)
+
+
+def worker(path, index_dir, queries, barrier, results):
+    engine = SearchEngine.open(path, index_dir=index_dir)
+    for query, filters in zip(queries, FILTERS * len(queries)):
+        engine.search(query, filters=filters)
+    for filters in FILTERS:
+        filter_mask(engine.catalog, parse_filters(filters))
+    barrier.wait()  # every worker has the catalog and index mapped
+    results.put(memory_mb())
+    barrier.wait()
+
+
+def dict_catalog_mb(path, sample):
+    """MB of Python heap for ``sample`` products held as dicts."""
+    tracemalloc.start()
+    products = []
+    for _, product in iter_products(path):
+        products.append({
+            "asin": product["asin"],
+            "title": product_title(product),
+            "price": parse_price(product.get("pricing")),
+            "rating": parse_rating(product.get("average_rating")),
+            "category": product_category(product),
+            "options": product_options(product),
+        })
+        if len(products) == sample:
+            break
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / 2 ** 20
+
+
+def main(args):
+    path = cached_catalog(args.products)
+    index_dir = os.path.join(tempfile.gettempdir(), "shopping_search_indexes")
+    engine = SearchEngine.open(path, index_dir=index_dir)
+    n = len(engine.catalog)
+    print(f"{n:,} products; opened in {engine.load_seconds:.2f}s "
+          f"({'cached' if engine.index_cached else 'new'} catalog and index)\n")
+
+    queries = make_queries(engine, args.queries)
+    for query in queries[:50]:
+        engine.search(query)  # warm up page cache and the score buffer
+
+    print(f"{'filter':44} {'matches':>9} {'mask':>8} {'search p50':>11} {'p95':>8}")
+    for filters in FILTERS:
+        conditions = parse_filters(filters)
+        mask_times = []
+        for _ in range(20):
+            started = time.perf_counter()
+            mask = filter_mask(engine.catalog, conditions)
+            mask_times.append((time.perf_counter() - started) * 1000)
+        times = []
+        for query in queries:
+            started = time.perf_counter()
+            engine.search(query, filters=filters)
+            times.append((time.perf_counter() - started) * 1000)
+        print(f"{filters:44} {int(mask.sum()):9,} {statistics.median(mask_times):6.2f}ms "
+              f"{percentile(times, 50):9.2f}ms {percentile(times, 95):6.2f}ms")
+
+    filters = FILTERS[-1]
+    mask = filter_mask(engine.catalog, parse_filters(filters))
+    paged, filtered = [], []
+    for query in queries:
+        doc_ids, _, _ = engine.index.search(query, limit=engine.max_results)
+        paged.append(int(mask[doc_ids].sum()))
+        filtered.append(engine.search(query, filters=filters).total)
+    pages = engine.max_results // 10
+    print(f"\n{filters!r}, {len(queries)} queries:")
+    print(f"  paging all {pages} unfiltered pages finds {statistics.mean(paged):.1f} matching products per query "
+          f"(none for {sum(count == 0 for count in paged)} queries)")
+    print(f"  one filtered search finds {statistics.mean(filtered):.1f} (none for "
+          f"{sum(count == 0 for count in filtered)} queries)")
+
+    sample = min(n, 100_000)
+    dict_mb = dict_catalog_mb(path, sample) * n / sample
+    catalog_mb = engine.catalog.stats()["bytes"] / 2 ** 20
+    index_mb = engine.index.stats()["bytes"] / 2 ** 20
+    print(f"\nCatalog fields as Python dicts: {dict_mb:,.0f} MB per process (scaled from {sample:,} products)")
+    print(f"Catalog columns: {catalog_mb:,.0f} MB + index {index_mb:,.0f} MB, memory-mapped and shared")
+
+    context = multiprocessing.get_context("fork")
+    barrier, results = context.Barrier(args.workers), context.Queue()
+    processes = [
+        context.Process(target=worker, args=(path, index_dir, queries[:200], barrier, results))
+        for _ in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    memory = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    print(f"{args.workers} workers: RSS {statistics.mean(rss for rss, _ in memory):,.0f} MB each, "
+          f"PSS {statistics.mean(pss for _, pss in memory):,.0f} MB each "
+          f"({sum(pss for _, pss in memory):,.0f} MB in total)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4)
+    main(parser.parse_args())
@@ -0,0 +1,62 @@
+"""Product search index: build time, size and cached reload
+
+For each catalog size, loads a synthetic WebShop-style catalog
+(``catalog_gen.py``) with ``SearchEngine.open`` twice:
+
+- cold: parse the catalog, write its columns and build the BM25 index,
+  then cache both on disk
+- warm: memory-map the cached catalog columns and index
+
+Reports wall time, catalog column and index sizes, terms/postings and the
+process's peak RSS.
+
+Usage:
+    python benchmarks/search_index_build.py [--sizes 10000,100000,1000000]
+"""
+
+import argparse
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from catalog_gen import cached_catalog  # noqa: E402
+from personalized_shopping.shared_libraries.search_engine import SearchEngine  # noqa: E402
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main(args):
+    sizes = [int(size) for size in args.sizes.split(",")]
+    paths = {size: cached_catalog(size) for size in sizes}
+    print(f"{'products':>10} {'cold':>8} {'warm':>8} {'terms':>8} {'postings':>11} "
+          f"{'catalog MB':>11} {'index MB':>9} {'peak RSS MB':>12}")
+    with tempfile.TemporaryDirectory() as index_dir:
+        for size in sizes:
+            started = time.perf_counter()
+            cold = SearchEngine.open(paths[size], index_dir=index_dir)
+            cold_seconds = time.perf_counter() - started
+
+            stats, catalog_stats = cold.index.stats(), cold.catalog.stats()
+            del cold
+            started = time.perf_counter()
+            warm = SearchEngine.open(paths[size], index_dir=index_dir)
+            warm_seconds = time.perf_counter() - started
+            assert warm.index_cached
+            del warm
+            print(f"{size:10,} {cold_seconds:7.1f}s {warm_seconds:7.2f}s {stats['terms']:8,} "
+                  f"{stats['postings']:11,} {catalog_stats['bytes'] / 2 ** 20:11.1f} {stats['bytes'] / 2 ** 20:9.1f} "
+                  f"{peak_rss_mb():12.0f}")
+    print("\ncold = parse catalog + write columns + tokenize + build + save index; "
+          "warm = mmap cached columns and index")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    main(parser.parse_args())
@@ -0,0 +1,82 @@
+"""Product search query latency
+
+Opens a synthetic WebShop-style catalog (``catalog_gen.py``) with
+``SearchEngine.open`` (catalog columns and index cached on disk after the
+first run) and times
+``search()`` for queries of one to four words taken from product titles,
+categories and attributes, so they range from very common terms ("women",
+"black") to rare ones (brand names). Pages 1 and 3 are timed separately.
+
+Usage:
+    python benchmarks/search_latency.py [--products 1000000] [--queries 2000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from catalog_gen import cached_catalog  # noqa: E402
+from personalized_shopping.shared_libraries.search_engine import SearchEngine, tokenize  # noqa: E402
+
+
+def make_queries(engine, n_queries, seed=0):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n_queries):
+        product_id = rng.randrange(len(engine.catalog))
+        words = (engine.catalog.title(product_id) + " " + engine.catalog.category(product_id)).split()
+        words = [word for word in words if tokenize(word)]
+        queries.append(" ".join(rng.sample(words, min(len(words), rng.randint(1, 4)))).lower())
+    return queries
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+def main(args):
+    path = cached_catalog(args.products)
+    index_dir = os.path.join(tempfile.gettempdir(), "shopping_search_indexes")
+    engine = SearchEngine.open(path, index_dir=index_dir)
+    print(f"{len(engine.catalog):,} products, {engine.index.stats()['terms']:,} terms, "
+          f"{engine.index.stats()['postings']:,} postings; opened in {engine.load_seconds:.1f}s "
+          f"({'cached' if engine.index_cached else 'new'} index)\n")
+
+    queries = make_queries(engine, args.queries)
+    for query in queries[:50]:
+        engine.search(query)  # warm up page cache and the score buffer
+
+    print(f"{'words':>5} {'page':>4} {'queries':>7} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'matches':>9}")
+    for page in (1, 3):
+        by_words = {}
+        for query in queries:
+            started = time.perf_counter()
+            engine.search(query, page=page)
+            elapsed = (time.perf_counter() - started) * 1000
+            _, _, total = engine.index.search(query, limit=1)
+            by_words.setdefault(len(query.split()), []).append((elapsed, total))
+        for words, rows in sorted(by_words.items()):
+            times = [elapsed for elapsed, _ in rows]
+            print(f"{words:5d} {page:4d} {len(rows):7d} {statistics.mean(times):6.2f}ms {percentile(times, 50):6.2f}ms "
+                  f"{percentile(times, 95):6.2f}ms {percentile(times, 99):6.2f}ms "
+                  f"{statistics.mean(total for _, total in rows):9,.0f}")
+
+    sample = queries[0]
+    page = engine.search(sample, page=1)
+    print(f"\nExample: {sample!r} -> {page.total} results (of {engine.index.search(sample, 1)[2]:,} matches), "
+          f"top hit {page.hits[0].asin if page.hits else '-'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    main(parser.parse_args())
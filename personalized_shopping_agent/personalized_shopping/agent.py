@@ -16,8 +16,11 @@ from google.adk.agents import Agent
 from google.adk.tools import FunctionTool
 
 from .config import llm_model
+from .llm_cache import llm_cache_lookup_callback, llm_cache_store_callback
+from .scheduler import llm_schedule_callback
 from .tools.search import search
 from .tools.click import click
+from .tools.explore import explore_product
 from .prompt import personalized_shopping_agent_instruction
 
 root_agent = Agent(
@@ -31,5 +34,13 @@ root_agent = Agent(
         FunctionTool(
             func=click,
         ),
+        FunctionTool(
+            func=explore_product,
+        ),
     ],
+    # Model calls are attributed to their session for fair scheduling
+    # (see scheduler.py); repeated model requests are answered from the LLM
+    # response cache (see llm_cache.py)
+    before_model_callback=[llm_schedule_callback, llm_cache_lookup_callback],
+    after_model_callback=llm_cache_store_callback,
 )
@@ -13,19 +13,79 @@
 # limitations under the License.
 
 import os
-from google.adk.models.lite_llm import LiteLlm
+from .scheduler import LlmScheduler, ScheduledLiteLlm, parse_priorities
 
 # Get model configuration from environment variables
 AGENT_MODEL = os.getenv("AGENT_MODEL", "gemini/gemini-2.5-flash")
 AGENT_API_KEY = os.getenv("AGENT_API_KEY", "sk-4444")
 AGENT_API_BASE = os.getenv("AGENT_API_BASE", "http://localhost:4444")
 
+# Admission control and fair scheduling of model calls across A2A sessions
+# (see scheduler.py)
+LLM_SCHEDULER_ENABLED = os.getenv("LLM_SCHEDULER_ENABLED", "true").lower() == "true"
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))
+LLM_PRIORITIES = parse_priorities(os.getenv("LLM_PRIORITIES", ""))
+
+llm_scheduler = LlmScheduler(
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+    max_queue=LLM_MAX_QUEUE,
+    priorities=LLM_PRIORITIES,
+)
+
 # Create LiteLLM model
 # Note: custom_llm_provider="openai" forces OpenAI-compatible API call to proxy
 # api_base should include /v1 for OpenAI-compatible endpoints
-llm_model = LiteLlm(
+llm_model = ScheduledLiteLlm(
     model=AGENT_MODEL,
     api_key=AGENT_API_KEY,
     api_base=f"{AGENT_API_BASE}/v1" if not AGENT_API_BASE.endswith("/v1") else AGENT_API_BASE,
     custom_llm_provider="openai",
+    scheduler=llm_scheduler if LLM_SCHEDULER_ENABLED else None,
 )
+
+# Streaming A2A responses: token deltas and progress updates, coalesced for
+# slow clients (see streaming.py)
+A2A_STREAMING_ENABLED = os.getenv("A2A_STREAMING_ENABLED", "true").lower() == "true"
+A2A_STREAM_MAX_PENDING = int(os.getenv("A2A_STREAM_MAX_PENDING", "64"))
+A2A_STREAM_FLUSH_MS = float(os.getenv("A2A_STREAM_FLUSH_MS", "50"))
+
+# LLM response cache for repeated model requests, with record/replay for
+# regression runs without the LLM proxy (see llm_cache.py):
+# off | on | record | replay
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "off").lower()
+LLM_CACHE_AGENTS = [
+    name.strip() for name in os.getenv(
+        "LLM_CACHE_AGENTS", "personalized_shopping_agent"
+    ).split(",") if name.strip()
+]
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB") or None
+
+# Product search engine: WebShop-style JSON/JSONL catalog, converted once to
+# memory-mapped columns plus a BM25 index cached on disk (see
+# shared_libraries/search_engine/); an empty SHOPPING_INDEX_DIR uses a
+# temporary directory
+_SHARED_LIBRARIES = os.path.join(os.path.dirname(__file__), "shared_libraries")
+SHOPPING_CATALOG_PATH = os.getenv(
+    "SHOPPING_CATALOG_PATH", os.path.join(_SHARED_LIBRARIES, "data", "sample_products.jsonl")
+)
+SHOPPING_INDEX_DIR = os.getenv(
+    "SHOPPING_INDEX_DIR", os.path.join(_SHARED_LIBRARIES, "search_engine", "indexes")
+)
+SHOPPING_SEARCH_PAGE_SIZE = int(os.getenv("SHOPPING_SEARCH_PAGE_SIZE", "10"))
+SHOPPING_SEARCH_MAX_RESULTS = int(os.getenv("SHOPPING_SEARCH_MAX_RESULTS", "50"))
+
+# Rendered webshop pages memoized across sessions (see
+# shared_libraries/navigation.py)
+SHOPPING_PAGE_CACHE_SIZE = int(os.getenv("SHOPPING_PAGE_CACHE_SIZE", "1024"))
+# Token budget of the Description/Features/Reviews text returned by the
+# explore_product tool
+SHOPPING_EXPLORE_MAX_TOKENS = int(os.getenv("SHOPPING_EXPLORE_MAX_TOKENS", "1500"))
+# Reviews view shows each product's precomputed rating histogram, pros/cons
+# and review snippets instead of every review (see
+# shared_libraries/search_engine/reviews.py)
+SHOPPING_REVIEW_SUMMARIES = os.getenv("SHOPPING_REVIEW_SUMMARIES", "true").lower() == "true"
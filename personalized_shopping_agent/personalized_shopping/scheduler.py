@@ -0,0 +1,486 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Admission control and fair scheduling for LLM calls
+
+Every A2A request runs several model calls (one per search/click step),
+and nothing limited how many of them hit the LLM proxy at once. A burst
+of requests tripped the proxy's rate limits, and every request slowed
+down while LiteLLM retried.
+LlmScheduler sits in front of the model (ScheduledLiteLlm) for the whole
+process:
+
+- Concurrency cap: at most LLM_MAX_CONCURRENCY model calls are in flight;
+  the rest wait in the scheduler
+- Token bucket: each call spends its estimated prompt tokens from a bucket
+  refilled at LLM_TOKENS_PER_MINUTE. The estimate is corrected with the
+  reported prompt token count when the response carries usage metadata
+- Priority: waiting calls are served by agent priority (LLM_PRIORITIES,
+  lower first) when several agents share the process
+- Fairness: within a priority, sessions take turns (round robin), so one
+  session issuing many calls cannot starve the others
+
+AdmissionMiddleware answers new agent runs (A2A ``message/send`` and
+``message/stream`` calls) with a fast HTTP ``429``, a ``Retry-After``
+header and a JSON-RPC server error while the scheduler is saturated
+(LLM_MAX_QUEUE calls waiting, or more requests running than the cap plus
+the queue can serve), instead of letting them queue until they time out.
+Other calls (task lookups, cancellation) always go through.
+
+Calls are attributed to a session by ``llm_schedule_callback``
+(before_model_callback) and to an agent by ADK's ``adk_agent_name`` label.
+``llm_scheduler.stats()`` reports queue depth, in-flight calls, admissions
+and wait times per priority.
+
+Configuration:
+- LLM_SCHEDULER_ENABLED: Schedule model calls and reject when saturated
+  (default: true)
+- LLM_MAX_CONCURRENCY: Model calls in flight (default: 8)
+- LLM_TOKENS_PER_MINUTE: Prompt tokens per minute, 0 for no limit (default: 0)
+- LLM_MAX_QUEUE: Waiting calls before new A2A requests get 429 (default: 32)
+- LLM_PRIORITIES: ``agent:priority`` pairs, lower runs first
+  (default: none, every agent 1)
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import json
+import math
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Callable, Deque, Dict, List, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.models.lite_llm import LiteLlm
+
+# ADK labels every model request with the calling agent
+AGENT_LABEL = "adk_agent_name"
+DEFAULT_PRIORITY = 1
+
+_current_session: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "llm_scheduler_session", default=""
+)
+
+
+def parse_priorities(value: str) -> Dict[str, int]:
+    """Parse ``agent:priority`` pairs (comma separated)."""
+    priorities = {}
+    for item in value.split(","):
+        name, _, priority = item.partition(":")
+        if name.strip() and priority.strip():
+            priorities[name.strip()] = int(priority)
+    return priorities
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the LLM token count of a text (~4 characters per token)."""
+    return int(max(len(text) / 4, len(text.split()) * 1.3)) + 1 if text else 0
+
+
+def estimate_request_tokens(llm_request: LlmRequest) -> int:
+    """Estimate the prompt tokens of a model request.
+
+    Counts the system instruction, the conversation contents and the tool
+    declarations.
+    """
+    config = llm_request.config
+    text = [str(config.system_instruction or "")] if config else []
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            if part.text:
+                text.append(part.text)
+            elif part.function_call:
+                text.append(json.dumps(part.function_call.args or {}, default=str))
+            elif part.function_response:
+                text.append(json.dumps(part.function_response.response or {}, default=str))
+    if config and config.tools:
+        text.extend(tool.model_dump_json(exclude_none=True) for tool in config.tools)
+    return estimate_tokens("\n".join(text))
+
+
+class LatencyTracker:
+    """Sliding window of latencies."""
+
+    def __init__(self, window: int = 256):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Latency at percentile ``p`` (0-100), or None without samples."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+
+@dataclass(eq=False)
+class _Waiter:
+    session: str
+    priority: int
+    tokens: int
+    enqueued_at: float
+    future: asyncio.Future = field(repr=False)
+
+
+class LlmScheduler:
+    """Process-wide admission control and fair queueing for model calls.
+
+    Not thread-safe: all calls are expected on the server's event loop.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        tokens_per_minute: int = 0,
+        max_queue: int = 32,
+        priorities: Optional[Dict[str, int]] = None
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            max_concurrency: Model calls allowed in flight
+            tokens_per_minute: Prompt token budget per minute (0 = unlimited)
+            max_queue: Waiting calls at which new requests are rejected
+            priorities: Agent name -> priority (lower is served first)
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.tokens_per_minute = tokens_per_minute
+        self.max_queue = max_queue
+        self.priorities = priorities or {}
+
+        # priority -> session -> waiting calls (session order = round robin)
+        self._queues: Dict[int, "OrderedDict[str, Deque[_Waiter]]"] = {}
+        self._queued = 0
+        self._in_flight = 0
+        self._requests = 0
+        self._tokens = float(tokens_per_minute)
+        self._refilled_at = time.monotonic()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        self.calls = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+        self.token_waits = 0
+        self._waits: Dict[int, LatencyTracker] = {}
+        self._durations = LatencyTracker()
+
+    # Admission
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    def saturated(self) -> bool:
+        """Whether new requests should be turned away."""
+        return (
+            self._queued >= self.max_queue
+            or self._requests >= self.max_concurrency + self.max_queue
+        )
+
+    def try_admit(self) -> bool:
+        """Admit a new request unless saturated; pair with ``request_done()``."""
+        if self.saturated():
+            self.rejected += 1
+            return False
+        self.admitted += 1
+        self._requests += 1
+        return True
+
+    def request_done(self):
+        self._requests = max(0, self._requests - 1)
+
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait before retrying."""
+        per_call = self._durations.percentile(50) or 1.0
+        return max(1, math.ceil(per_call * (self._queued + 1) / self.max_concurrency))
+
+    # Scheduling
+
+    def priority_of(self, agent: str) -> int:
+        return self.priorities.get(agent, DEFAULT_PRIORITY)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, session: str, agent: str, tokens: int = 0) -> AsyncGenerator[None, None]:
+        """Hold one model call slot.
+
+        Args:
+            session: Fairness key (ADK session id)
+            agent: Calling agent, for its priority
+            tokens: Estimated prompt tokens to spend from the bucket
+        """
+        if self.tokens_per_minute:
+            tokens = min(tokens, self.tokens_per_minute)
+        priority = self.priority_of(agent)
+        waiter = _Waiter(session, priority, tokens, time.monotonic(), asyncio.get_running_loop().create_future())
+        self._queues.setdefault(priority, OrderedDict()).setdefault(session, deque()).append(waiter)
+        self._queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self._queued)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release()
+            else:
+                self._remove(waiter)
+                self._dispatch()
+            raise
+
+        started = time.monotonic()
+        self._waits.setdefault(priority, LatencyTracker()).record(started - waiter.enqueued_at)
+        try:
+            yield
+        finally:
+            self._durations.record(time.monotonic() - started)
+            self._release()
+
+    def settle(self, estimated: int, actual: int):
+        """Correct the bucket once the real prompt token count is known."""
+        if self.tokens_per_minute:
+            self._refill()
+            self._tokens = min(float(self.tokens_per_minute), self._tokens + estimated - actual)
+
+    async def schedule(
+        self,
+        llm_request: LlmRequest,
+        generate: Callable[[], AsyncGenerator[LlmResponse, None]]
+    ) -> AsyncGenerator[LlmResponse, None]:
+        """Run a model call (``generate()``) under a scheduler slot.
+
+        Args:
+            llm_request: The request, for its agent label and token estimate
+            generate: Starts the underlying model call
+
+        Yields:
+            The model's responses
+        """
+        labels = (llm_request.config.labels if llm_request.config else None) or {}
+        tokens = estimate_request_tokens(llm_request) if self.tokens_per_minute else 0
+        async with self.slot(_current_session.get(), labels.get(AGENT_LABEL, ""), tokens):
+            async with contextlib.aclosing(generate()) as responses:
+                async for response in responses:
+                    usage = response.usage_metadata
+                    if usage and usage.prompt_token_count and not response.partial:
+                        self.settle(tokens, usage.prompt_token_count)
+                        tokens = usage.prompt_token_count
+                    yield response
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            float(self.tokens_per_minute),
+            self._tokens + (now - self._refilled_at) * self.tokens_per_minute / 60
+        )
+        self._refilled_at = now
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        for priority in sorted(self._queues):
+            sessions = self._queues[priority]
+            if sessions:
+                return next(iter(sessions.values()))[0]
+        return None
+
+    def _dispatch(self):
+        while self._in_flight < self.max_concurrency:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            if self.tokens_per_minute:
+                self._refill()
+                if self._tokens < waiter.tokens:
+                    # Wake up once the bucket holds enough for the next call
+                    if self._timer is None:
+                        delay = (waiter.tokens - self._tokens) * 60 / self.tokens_per_minute
+                        self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+                        self.token_waits += 1
+                    return
+                self._tokens -= waiter.tokens
+            self._remove(waiter, rotate=True)
+            self._in_flight += 1
+            self.calls += 1
+            waiter.future.set_result(None)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def _remove(self, waiter: _Waiter, rotate: bool = False):
+        sessions = self._queues.get(waiter.priority)
+        calls = sessions.get(waiter.session) if sessions else None
+        if not calls or waiter not in calls:
+            return
+        calls.remove(waiter)
+        self._queued -= 1
+        if not calls:
+            del sessions[waiter.session]
+        elif rotate:
+            # The session had its turn; the others go next
+            sessions.move_to_end(waiter.session)
+
+    def _release(self):
+        self._in_flight -= 1
+        self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue, admission and wait-time metrics."""
+        if self.tokens_per_minute:
+            self._refill()
+        return {
+            "in_flight": self._in_flight,
+            "queue_depth": self._queued,
+            "max_queue_depth": self.max_queue_depth,
+            "requests": self._requests,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "calls": self.calls,
+            "tokens_available": int(self._tokens) if self.tokens_per_minute else None,
+            "token_waits": self.token_waits,
+            "wait_ms": {
+                priority: {
+                    "p50": round(tracker.percentile(50) * 1000, 1),
+                    "p95": round(tracker.percentile(95) * 1000, 1),
+                }
+                for priority, tracker in sorted(self._waits.items()) if len(tracker)
+            },
+        }
+
+
+class ScheduledLiteLlm(LiteLlm):
+    """LiteLlm whose calls go through an LlmScheduler.
+
+    A subclass rather than a wrapper, so ADK keeps treating it as LiteLlm
+    (function call id pairing).
+    """
+
+    scheduler: Optional[LlmScheduler] = None
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        generate = super().generate_content_async
+        if self.scheduler is None:
+            async for response in generate(llm_request, stream):
+                yield response
+            return
+        async for response in self.scheduler.schedule(llm_request, lambda: generate(llm_request, stream)):
+            yield response
+
+
+def llm_schedule_callback(
+    callback_context: CallbackContext,
+    llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """before_model_callback: attribute the model call to its session."""
+    _current_session.set(callback_context.session.id)
+    return None
+
+
+# A2A JSON-RPC methods that start an agent run and are subject to admission
+ADMITTED_METHODS = frozenset({"message/send", "message/stream"})
+
+# JSON-RPC implementation-defined server error (-32000..-32099) sent while
+# saturated
+SERVER_BUSY_CODE = -32000
+
+
+async def _read_body(receive: Any) -> Tuple[bytes, Callable]:
+    """Read a request body; returns it with a receive callable that replays it."""
+    messages: List[Dict[str, Any]] = []
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request" or not message.get("more_body"):
+            break
+    body = b"".join(message.get("body", b"") for message in messages)
+
+    async def replay() -> Dict[str, Any]:
+        if messages:
+            return messages.pop(0)
+        return await receive()
+
+    return body, replay
+
+
+def _run_request_id(body: bytes) -> Tuple[bool, Any]:
+    """(starts an agent run, JSON-RPC id) of a request body."""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return False, None
+    calls = payload if isinstance(payload, list) else [payload]
+    for call in calls:
+        if isinstance(call, dict) and call.get("method") in ADMITTED_METHODS:
+            return True, call.get("id")
+    return False, None
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that rejects new agent runs while saturated.
+
+    Only JSON-RPC ``message/send`` and ``message/stream`` calls are subject
+    to admission; the body is read to find the method and replayed to the
+    app. The agent card, task lookups and cancellations always go through.
+    """
+
+    def __init__(self, app: Any, scheduler: LlmScheduler):
+        self.app = app
+        self.scheduler = scheduler
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any):
+        if scope["type"] != "http" or scope.get("method") != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        request_body, receive = await _read_body(receive)
+        starts_run, request_id = _run_request_id(request_body)
+        if not starts_run:
+            await self.app(scope, receive, send)
+            return
+
+        if not self.scheduler.try_admit():
+            retry_after = self.scheduler.retry_after()
+            body = json.dumps({
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "error": {
+                    "code": SERVER_BUSY_CODE,
+                    "message": f"Server busy: too many LLM calls queued, retry in {retry_after}s",
+                },
+            }).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"retry-after", str(retry_after).encode()),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.scheduler.request_done()
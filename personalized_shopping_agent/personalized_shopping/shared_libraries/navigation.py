@@ -0,0 +1,422 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Stateful WebShop-style page navigation for the search and click tools
+
+Each session has a page stack in its state (``tool_context.state``). A
+page is a small JSON list, not the rendered text, so the stack stays a
+few hundred bytes:
+
+- ``["home"]``: the search page (after "Back to Search")
+- ``["results", keywords, page, filters]``: a results page
+- ``["item", asin, {option: value}]``: a product page with the selected options
+- ``["section", asin, view, {option: value}]``: Description, Features or Reviews
+- ``["done", asin, {option: value}]``: after "Buy Now"
+
+``search()`` starts a new stack with a results page; ``click()`` checks
+that the button is on the current page, then moves: a result's ASIN,
+"Next >" and the Description/Features/Reviews buttons push a page, "< Prev"
+pops one, option buttons select an option on the product page in place,
+"Buy Now" pushes the purchase page and "Back to Search" goes home.
+
+``explore()`` opens a product page and returns it together with its
+Description, Features and Reviews sections (rendered concurrently and cut
+to a token budget), replacing six click round trips with one tool call;
+the session is left on the product page, where the buying options are.
+
+Rendered pages (text and buttons) are memoized process-wide by their
+descriptor, i.e. by (product, view, selected options) or by (keywords,
+page, filters), so going back and forth between pages renders each once.
+The Reviews view and the product page are the exception when review
+summaries are on: they read the stored summary each time (the product
+page takes its rating from it), so reviews added since (possibly by
+another process) show up at once.
+
+Configuration:
+- SHOPPING_PAGE_CACHE_SIZE: Rendered pages kept in memory (default: 1024)
+- SHOPPING_EXPLORE_MAX_TOKENS: Token budget of the three sections in an
+  explore() result (default: 1500)
+- SHOPPING_REVIEW_SUMMARIES: Reviews view shows the product's review
+  summary instead of every review (default: true)
+"""
+
+import asyncio
+import json
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, MutableMapping, Optional, Tuple
+
+from ..config import (
+    SHOPPING_EXPLORE_MAX_TOKENS,
+    SHOPPING_PAGE_CACHE_SIZE,
+    SHOPPING_REVIEW_SUMMARIES,
+    SHOPPING_SEARCH_PAGE_SIZE,
+)
+from ..scheduler import estimate_tokens
+from .search_engine import ReviewSummary, SearchPage, get_review_index, get_search_engine
+
+# Session state key of the page stack
+PAGE_STACK_KEY = "webshop_pages"
+
+# Pages kept per session; the oldest are dropped beyond that
+MAX_STACK_DEPTH = 20
+
+BACK_TO_SEARCH = "Back to Search"
+PREV = "< Prev"
+NEXT = "Next >"
+BUY_NOW = "Buy Now"
+SECTIONS = ("Description", "Features", "Reviews")
+
+# Spellings the model uses for buttons
+_BUTTON_ALIASES = {
+    "descriptions": "description",
+    "feature": "features",
+    "review": "reviews",
+    "prev": "< prev",
+    "previous": "< prev",
+    "next": "next >",
+    "buy": "buy now",
+}
+
+HOME_TEXT = "Search page. Use the search tool with your keywords (and optional filters) to find products."
+
+Page = List[Any]
+Rendered = Tuple[str, Tuple[str, ...]]
+
+
+def format_price(price: float) -> str:
+    return "Price unavailable" if math.isnan(price) else f"${price:,.2f}"
+
+
+def render_results(results: SearchPage) -> str:
+    """Render a results page the way the WebShop search page reads."""
+    query = f"'{results.keywords}'" + (f" with {results.filters}" if results.filters else "")
+    if not results.hits:
+        if results.total:
+            return f"Page {results.page} is past the last page ({results.pages}) of results for {query}.\n\n[{BACK_TO_SEARCH}]"
+        return f"No products found for {query}.\n\n[{BACK_TO_SEARCH}]"
+
+    lines = [f"[{BACK_TO_SEARCH}]", f"Page {results.page} of {results.pages} (Total results: {results.total})"]
+    if results.filters:
+        lines.append(f"Filters: {results.filters}")
+    if results.page > 1:
+        lines.append(f"[{PREV}]")
+    if results.page < results.pages:
+        lines.append(f"[{NEXT}]")
+    for hit in results.hits:
+        lines.extend(["", f"[{hit.asin}]", hit.title, format_price(hit.price)])
+    return "\n".join(lines)
+
+
+def render_review_summary(summary: ReviewSummary) -> str:
+    """Render a product's review summary for the Reviews view."""
+    if not summary.count and not summary.snippets:
+        return "No reviews yet."
+    lines = []
+    if summary.count:
+        lines.append(f"Rating: {summary.mean:.1f} out of 5 ({summary.count} review{'s' * (summary.count != 1)})")
+        lines.append(", ".join(
+            f"{stars} star{'s' * (stars != 1)}: {summary.histogram[stars - 1]}" for stars in range(5, 0, -1)
+        ))
+    if summary.pros:
+        lines.append("Pros: " + ", ".join(summary.pros))
+    if summary.cons:
+        lines.append("Cons: " + ", ".join(summary.cons))
+    for stars, sentence in summary.snippets:
+        lines.append(f'- {stars or "?"}/5 "{sentence}"')
+    return "\n".join(lines)
+
+
+def _normalize(button: str) -> str:
+    name = " ".join(button.strip().strip("[]").split()).lower()
+    return _BUTTON_ALIASES.get(name, name)
+
+
+class PageCache:
+    """LRU of rendered pages by page descriptor. Thread-safe."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Rendered]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Rendered]:
+        with self._lock:
+            rendered = self._entries.get(key)
+            if rendered is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return rendered
+
+    def set(self, key: str, rendered: Rendered):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = rendered
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+# Shared rendered-page cache
+page_cache = PageCache(SHOPPING_PAGE_CACHE_SIZE)
+
+
+def render(page: Page) -> Rendered:
+    """Text and buttons of a page, memoized in ``page_cache``."""
+    if SHOPPING_REVIEW_SUMMARIES and (page[0] == "item" or page[0] == "section" and page[2] == "Reviews"):
+        return _render(page)
+    key = json.dumps(page, sort_keys=True, ensure_ascii=False)
+    rendered = page_cache.get(key)
+    if rendered is None:
+        rendered = _render(page)
+        page_cache.set(key, rendered)
+    return rendered
+
+
+def _render(page: Page) -> Rendered:
+    kind = page[0]
+    if kind == "home":
+        return HOME_TEXT, ()
+
+    engine = get_search_engine()
+    if kind == "results":
+        _, keywords, number, filters = page
+        results = engine.search(keywords, page=number, page_size=SHOPPING_SEARCH_PAGE_SIZE, filters=filters)
+        buttons = [BACK_TO_SEARCH]
+        if results.hits and results.page > 1:
+            buttons.append(PREV)
+        if results.hits and results.page < results.pages:
+            buttons.append(NEXT)
+        buttons.extend(hit.asin for hit in results.hits)
+        return render_results(results), tuple(buttons)
+
+    asin, selected = page[1], page[-1]
+    product_id = engine.catalog.product_id(asin)
+    if product_id is None:
+        return f"Product {asin} is no longer available.\n\n[{BACK_TO_SEARCH}]", (BACK_TO_SEARCH,)
+    title = engine.catalog.title(product_id)
+    price = format_price(float(engine.catalog.prices[product_id]))
+
+    if kind == "item":
+        lines, buttons = [f"[{BACK_TO_SEARCH}]", f"[{PREV}]"], [BACK_TO_SEARCH, PREV]
+        for name, values in engine.catalog.options(product_id).items():
+            lines.append(f"{name}: " + " ".join(
+                f"[{value}]" + (" (selected)" if selected.get(name) == value else "") for value in values
+            ))
+            buttons.extend(values)
+        rating = engine.catalog.ratings[product_id]
+        if SHOPPING_REVIEW_SUMMARIES:
+            # Agree with the Reviews view, which includes added reviews
+            summary = get_review_index().summary(product_id)
+            if summary.count:
+                rating = summary.mean
+        lines.extend([title, f"Price: {price}", f"Rating: {'N.A.' if math.isnan(rating) else f'{rating:.1f}'}"])
+        lines.extend(f"[{button}]" for button in (*SECTIONS, BUY_NOW))
+        buttons.extend((*SECTIONS, BUY_NOW))
+        return "\n".join(lines), tuple(buttons)
+
+    if kind == "section":
+        view = page[2]
+        lines = [f"[{BACK_TO_SEARCH}]", f"[{PREV}]", f"{title} - {view}", ""]
+        if view == "Reviews" and SHOPPING_REVIEW_SUMMARIES:
+            lines.append(render_review_summary(get_review_index().summary(product_id)))
+            return "\n".join(lines), (BACK_TO_SEARCH, PREV)
+
+        product = engine.catalog.product(product_id)
+        if view == "Description":
+            lines.append(str(product.get("full_description") or "No description available."))
+        elif view == "Features":
+            features = product.get("small_description") or []
+            features = [features] if isinstance(features, str) else features
+            features = [*features, *(product.get("attributes") or [])]
+            lines.extend(f"- {feature}" for feature in features) if features else lines.append("No features listed.")
+        else:
+            reviews = product.get("reviews") or []
+            for review in reviews:
+                lines.append(f"{review.get('score', '?')}/5 {review.get('title', '')}: {review.get('body', '')}")
+            if not reviews:
+                lines.append("No reviews yet.")
+        return "\n".join(lines), (BACK_TO_SEARCH, PREV)
+
+    options = ", ".join(f"{name}: {value}" for name, value in selected.items()) or "none selected"
+    text = (f"Thank you for shopping with us!\n\nPurchased: {title}\nASIN: {asin}\n"
+            f"Options: {options}\nPrice: {price}\n\n[{BACK_TO_SEARCH}]")
+    return text, (BACK_TO_SEARCH,)
+
+
+def _stack(state: MutableMapping[str, Any]) -> List[Page]:
+    return list(state.get(PAGE_STACK_KEY) or [["home"]])
+
+
+def _save(state: MutableMapping[str, Any], stack: List[Page]):
+    # Assign a new list so the session records the change
+    state[PAGE_STACK_KEY] = stack[-MAX_STACK_DEPTH:]
+
+
+def current_page(state: MutableMapping[str, Any]) -> Page:
+    """The session's current page descriptor."""
+    return _stack(state)[-1]
+
+
+def search(state: MutableMapping[str, Any], keywords: str, page: int = 1, filters: str = "") -> str:
+    """Open a results page as the start of a new navigation stack.
+
+    Raises:
+        FilterError: If the filters cannot be parsed or applied
+    """
+    results_page = ["results", keywords, max(1, page), filters]
+    text, _ = render(results_page)
+    _save(state, [results_page])
+    return text
+
+
+def click(state: MutableMapping[str, Any], button: str) -> str:
+    """Click a button on the session's current page.
+
+    Args:
+        state: Session state holding the page stack
+        button: Button label, with or without the brackets
+
+    Returns:
+        The page after the click, or an error naming the clickable buttons
+    """
+    stack = _stack(state)
+    page = stack[-1]
+    _, buttons = render(page)
+    wanted = _normalize(button)
+    label = next((label for label in buttons if _normalize(label) == wanted), None)
+    if label is None:
+        if page[0] == "home":
+            return f"There is no '{button}' button on the search page. {HOME_TEXT}"
+        listed = ", ".join(f"[{label}]" for label in buttons)
+        return f"There is no '{button}' button on the current page. Clickable buttons: {listed}"
+
+    if label == BACK_TO_SEARCH:
+        stack = [["home"]]
+    elif label == PREV:
+        if len(stack) > 1:
+            stack.pop()
+        elif page[0] == "results":
+            # Opened on a later page by search(page=...)
+            stack[-1] = [*page[:2], page[2] - 1, page[3]]
+        else:
+            # The page behind this one was dropped (MAX_STACK_DEPTH)
+            stack = [["home"]]
+    elif label == NEXT:
+        stack.append([*page[:2], page[2] + 1, page[3]])
+    elif page[0] == "results":
+        stack.append(["item", label, {}])
+    elif label in SECTIONS:
+        stack.append(["section", page[1], label, page[2]])
+    elif label == BUY_NOW:
+        stack.append(["done", page[1], page[2]])
+    else:
+        stack[-1] = ["item", page[1], {**page[2], _option_name(page[1], label): label}]
+
+    _save(state, stack)
+    return render(stack[-1])[0]
+
+
+async def explore(state: MutableMapping[str, Any], asin: str = "", max_tokens: int = SHOPPING_EXPLORE_MAX_TOKENS) -> str:
+    """Open a product and return its page with all three sections.
+
+    Args:
+        state: Session state holding the page stack
+        asin: Product to explore; a result on the current results page, or
+              empty for the product currently open
+        max_tokens: Token budget shared by the three sections
+
+    Returns:
+        The product page followed by its Description, Features and
+        Reviews, or an error naming the clickable buttons
+    """
+    stack = _stack(state)
+    page = stack[-1]
+    wanted = _normalize(asin)
+    if page[0] in ("item", "section") and wanted in ("", page[1].lower()):
+        # Back to the product page from a section (keeps the options)
+        while stack[-1][0] == "section" and len(stack) > 1:
+            stack.pop()
+        if stack[-1][0] != "item":
+            stack[-1] = ["item", page[1], page[-1]]
+    elif page[0] == "results" and wanted:
+        _, buttons = render(page)
+        label = next((label for label in buttons if label.lower() == wanted), None)
+        if label is None:
+            return f"Product '{asin}' is not on the current page. Clickable buttons: " + \
+                ", ".join(f"[{label}]" for label in buttons)
+        stack.append(["item", label, {}])
+    else:
+        return "Open a product first: search, then explore one of the listed products."
+
+    item = stack[-1]
+    sections = [["section", item[1], view, item[2]] for view in SECTIONS]
+    rendered = await asyncio.gather(*(asyncio.to_thread(render, page) for page in [item, *sections]))
+    _save(state, stack)
+
+    # Sections render as "[Back to Search]\n[< Prev]\n<title> - <view>\n\n<body>"
+    bodies = [text.partition("\n\n")[2] for text, _ in rendered[1:]]
+    budgets = _share_budget([estimate_tokens(body) for body in bodies], max_tokens)
+    parts = [rendered[0][0]]
+    for view, body, budget in zip(SECTIONS, bodies, budgets):
+        parts.append(f"=== {view} ===\n{_truncate(body, budget)}")
+    return "\n\n".join(parts)
+
+
+def _share_budget(needs: List[int], total: int) -> List[int]:
+    """Split a token budget; what a short section leaves goes to the others."""
+    budgets = [0] * len(needs)
+    remaining = total
+    for count, i in enumerate(sorted(range(len(needs)), key=needs.__getitem__)):
+        budgets[i] = min(needs[i], remaining // (len(needs) - count))
+        remaining -= budgets[i]
+    return budgets
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = text[:max(0, max_tokens) * 4]
+    cut = cut[:cut.rfind("\n")] if "\n" in cut else cut.rsplit(" ", 1)[0]
+    return f"{cut}\n… (truncated)"
+
+
+def _option_name(asin: str, value: str) -> str:
+    engine = get_search_engine()
+    for name, values in engine.catalog.options(engine.catalog.product_id(asin)).items():
+        if value in values:
+            return name
+    return "option"
@@ -0,0 +1,43 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""In-process product search engine (columnar catalog, BM25 inverted index, faceted filters, pagination, review summaries)"""
+
+from .catalog import Catalog, parse_price, parse_rating
+from .engine import SearchEngine, SearchHit, SearchPage, get_search_engine
+from .filters import Condition, FilterError, filter_mask, parse_filters
+from .index import IndexBuilder, InvertedIndex, build_index, tokenize
+from .reviews import ReviewIndex, ReviewSummary, get_review_index
+
+__all__ = [
+    "Catalog",
+    "Condition",
+    "FilterError",
+    "IndexBuilder",
+    "InvertedIndex",
+    "ReviewIndex",
+    "ReviewSummary",
+    "SearchEngine",
+    "SearchHit",
+    "SearchPage",
+    "build_index",
+    "filter_mask",
+    "get_review_index",
+    "get_search_engine",
+    "parse_filters",
+    "parse_price",
+    "parse_rating",
+    "tokenize",
+]
@@ -0,0 +1,75 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""Review summary maintenance for the configured catalog
+
+Usage:
+    python -m personalized_shopping.shared_libraries.search_engine build-reviews
+    python -m personalized_shopping.shared_libraries.search_engine add-reviews NEW_REVIEWS.jsonl
+
+``add-reviews`` reads one review per line (``asin``, ``score``, ``title``,
+``body``) and updates the summaries of the reviewed products only.
+Servers using the same SHOPPING_INDEX_DIR show the new summaries on the
+next Reviews view. Added reviews are kept by ASIN outside the catalog's
+cache directory, so an index rebuilt for a changed catalog replays them.
+"""
+
+import argparse
+import json
+import time
+from collections import defaultdict
+
+from .engine import get_search_engine
+from .reviews import ReviewIndex, get_review_index, reviews_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("build-reviews", help="summarize the reviews of every product again")
+    add = commands.add_parser("add-reviews", help="add new reviews from a JSONL file")
+    add.add_argument("path")
+    args = parser.parse_args()
+
+    catalog = get_search_engine().catalog
+    if args.command == "build-reviews":
+        index = ReviewIndex(catalog, reviews_path(catalog))
+        print(f"Summarized {len(catalog):,} products in {index.build():.1f}s")
+        return
+
+    index = get_review_index()
+    reviews = defaultdict(list)
+    with open(args.path) as f:
+        for line in f:
+            if line.strip():
+                review = json.loads(line)
+                reviews[review.pop("asin")].append(review)
+    started, added, unknown = time.perf_counter(), 0, []
+    for asin, product_reviews in reviews.items():
+        product_id = catalog.product_id(asin)
+        if product_id is None:
+            unknown.append(asin)
+            continue
+        index.add_reviews(product_id, product_reviews)
+        added += len(product_reviews)
+    print(f"Added {added:,} reviews of {len(reviews) - len(unknown):,} products "
+          f"in {time.perf_counter() - started:.2f}s")
+    if unknown:
+        print(f"⚠️ Skipped reviews of {len(unknown)} unknown products: {', '.join(unknown[:10])}")
+
+
+if __name__ == "__main__":
+    main()
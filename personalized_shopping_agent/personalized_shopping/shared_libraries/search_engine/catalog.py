@@ -0,0 +1,395 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""WebShop-style product catalog in a columnar, memory-mapped format
+
+The source catalog is either a JSON array (like WebShop's
+``items_shuffle.json``) or JSON Lines with one product per line. It is
+read once and written to a directory of flat columns, which every worker
+process memory-maps; the OS page cache then holds one copy for all of
+them, and reopening the catalog costs no JSON parsing:
+
+- ``asins.npy``: fixed-width ASINs, plus ``asin_order.npy`` for lookups
+- ``titles.bin`` / ``title_offsets.npy``: UTF-8 titles and their offsets
+- ``prices.npy`` / ``ratings.npy``: float64, NaN when unknown
+- ``categories.npy``: dictionary-encoded category codes (values in
+  ``meta.json``)
+- ``option_*.npy``: customization options (color, size, ...) as postings
+  per option value. Each option's values are dictionary-encoded and get
+  consecutive ids (option ``k`` starts at ``option_bases[k]``);
+  ``option_offsets[v]:option_offsets[v + 1]`` is value ``v``'s slice of
+  ``option_products``, the ids of the products offering it (ascending)
+- ``record_offsets.npy``: byte offset of every full product record in the
+  JSONL catalog (for JSON arrays, in a ``records.jsonl`` written alongside)
+
+Recognized product fields (WebShop names first):
+- asin
+- name / title
+- product_category (``A › B › C``) / category
+- pricing (``$12.99``, ``$12.99 to $15.00`` or a list) / price
+- average_rating
+- attributes, customization_options (option values) and small_description
+"""
+
+import contextlib
+import json
+import math
+import os
+import re
+import shutil
+import tempfile
+from array import array
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent cold builds are not serialized
+    fcntl = None
+
+CATALOG_FORMAT_VERSION = 1
+
+_NUMBER_RE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+_ARRAYS = (
+    "asins", "asin_order", "title_offsets", "prices", "ratings", "categories",
+    "option_offsets", "option_products", "record_offsets",
+)
+
+
+def _first_number(value: Any) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, (list, tuple)):
+        return _first_number(value[0]) if value else math.nan
+    match = _NUMBER_RE.search(str(value or ""))
+    return float(match.group().replace(",", "")) if match else math.nan
+
+
+def parse_price(value: Any) -> float:
+    """First price in a WebShop ``pricing`` value, or NaN if there is none."""
+    return _first_number(value)
+
+
+def parse_rating(value: Any) -> float:
+    """Star rating from ``average_rating`` (``4.5`` or ``"4.5 out of 5 stars"``), or NaN."""
+    return _first_number(value)
+
+
+def product_title(product: Dict[str, Any]) -> str:
+    return str(product.get("name") or product.get("title") or "")
+
+
+def product_category(product: Dict[str, Any]) -> str:
+    return str(product.get("product_category") or product.get("category") or "")
+
+
+def product_options(product: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Customization options of a product: option name -> values."""
+    options = {}
+    for name, values in (product.get("customization_options") or {}).items():
+        options[str(name)] = [
+            str(value.get("value", "")) if isinstance(value, dict) else str(value)
+            for value in values or []
+        ]
+    return options
+
+
+def product_attributes(product: Dict[str, Any]) -> List[str]:
+    """Attribute text of a product: attributes, option values, short bullets."""
+    texts = [str(attribute) for attribute in product.get("attributes") or []]
+    for values in product_options(product).values():
+        texts.extend(values)
+    small_description = product.get("small_description") or []
+    if isinstance(small_description, str):
+        small_description = [small_description]
+    texts.extend(str(line) for line in small_description)
+    return texts
+
+
+def iter_products(path: str) -> Iterator[Tuple[Optional[int], Dict[str, Any]]]:
+    """Yield ``(byte offset or None, product)`` for every product in a catalog file."""
+    with open(path, "rb") as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == b"[":
+            for product in json.load(f):
+                yield None, product
+            return
+
+        offset = 0
+        for line in f:
+            if line.strip():
+                yield offset, json.loads(line)
+            offset += len(line)
+
+
+@contextlib.contextmanager
+def build_lock(directory: str) -> Iterator[None]:
+    """Hold an exclusive lock on ``<directory>.lock``, across processes.
+
+    Worker processes starting on a cold cache take it before building, so
+    only the first one builds and the others load what it published.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(directory)), exist_ok=True)
+    with open(f"{directory}.lock", "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def publish_directory(tmp: str, directory: str):
+    """Move a fully written ``tmp`` directory to ``directory``.
+
+    Callers hold ``build_lock()``, so an existing ``directory`` is a stale
+    one that failed to load, not one another worker has just published. It
+    is renamed aside first, since ``os.replace`` cannot replace a non-empty
+    directory.
+    """
+    stale = None
+    if os.path.isdir(directory):
+        stale = tempfile.mkdtemp(prefix=".stale-", dir=os.path.dirname(os.path.abspath(directory)))
+        os.replace(directory, stale)
+    os.replace(tmp, directory)
+    if stale is not None:
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def _codes(values: array, size: int) -> np.ndarray:
+    """Dictionary codes in the smallest unsigned dtype that holds them."""
+    dtype = np.uint8 if size <= 1 << 8 else np.uint16 if size <= 1 << 16 else np.uint32
+    return np.frombuffer(values, dtype=np.uint32).astype(dtype)
+
+
+class Catalog:
+    """Memory-mapped columnar product catalog by product id.
+
+    Product ids are the positions in the catalog file and double as the
+    search index's document ids. Use ``build()`` to convert a catalog file
+    and ``load()`` to open a converted one.
+    """
+
+    def __init__(self, directory: str, meta: Dict[str, Any], arrays: Dict[str, np.ndarray], titles: np.ndarray):
+        self.directory = directory
+        self.asins = arrays["asins"]
+        self.asin_order = arrays["asin_order"]
+        self.title_offsets = arrays["title_offsets"]
+        self.prices = arrays["prices"]
+        self.ratings = arrays["ratings"]
+        self.categories = arrays["categories"]
+        self.option_offsets = arrays["option_offsets"]
+        self.option_products = arrays["option_products"]
+        self.record_offsets = arrays["record_offsets"]
+        self.titles = titles
+
+        # Dictionaries of the encoded columns
+        self.category_values: List[str] = meta["categories"]
+        self.option_names: List[str] = meta["option_names"]
+        self.option_value_names: Dict[str, List[str]] = meta["option_values"]
+        self.option_bases: Dict[str, int] = {}
+        base = 0
+        for name in self.option_names:
+            self.option_bases[name] = base
+            base += len(self.option_value_names[name])
+        self.records_path = meta["records_path"]
+        if not os.path.isabs(self.records_path):
+            self.records_path = os.path.join(directory, self.records_path)
+
+    @classmethod
+    def build(
+        cls,
+        path: str,
+        directory: str,
+        on_product: Optional[Callable[[int, Dict[str, Any]], None]] = None
+    ) -> "Catalog":
+        """Convert a catalog file into columns under ``directory`` (replaced atomically).
+
+        Hold ``build_lock(directory)`` when other processes may build it too.
+
+        Args:
+            path: JSON array or JSON Lines file of products
+            directory: Output directory
+            on_product: Called with ``(product id, product)`` for every
+                        product, e.g. to build the search index in the same pass
+
+        Returns:
+            The converted catalog, memory-mapped
+        """
+        parent = os.path.dirname(os.path.abspath(directory))
+        os.makedirs(parent, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=".catalog-", dir=parent)
+        try:
+            cls._convert(path, tmp, on_product)
+            publish_directory(tmp, directory)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        catalog = cls.load(directory)
+        if catalog is None:
+            raise OSError(f"Could not open the converted catalog in {directory}")
+        return catalog
+
+    @staticmethod
+    def _convert(path: str, directory: str, on_product) -> Dict[str, Any]:
+        asins: List[bytes] = []
+        title_offsets = array("q", [0])
+        prices, ratings = array("d"), array("d")
+        category_codes, categories = array("I"), {}
+        # option name -> value -> ids of the products offering it
+        options: Dict[str, Dict[str, array]] = {}
+        record_offsets = array("q")
+        records = None
+
+        with open(os.path.join(directory, "titles.bin"), "wb") as titles:
+            for offset, product in iter_products(path):
+                product_id = len(asins)
+                asins.append(str(product.get("asin") or f"P{product_id:09d}").strip().upper().encode())
+                title = product_title(product).encode("utf-8")
+                titles.write(title)
+                title_offsets.append(title_offsets[-1] + len(title))
+                prices.append(parse_price(product.get("pricing", product.get("price"))))
+                ratings.append(parse_rating(product.get("average_rating")))
+                category_codes.append(categories.setdefault(product_category(product), len(categories)))
+                for name, values in product_options(product).items():
+                    postings = options.setdefault(name.strip().lower(), {})
+                    for value in dict.fromkeys(value.strip() for value in values if value.strip()):
+                        postings.setdefault(value, array("I")).append(product_id)
+
+                if offset is None:
+                    # JSON array: keep the records as JSON Lines next to the columns
+                    if records is None:
+                        records = open(os.path.join(directory, "records.jsonl"), "wb")
+                    offset = records.tell()
+                    records.write(json.dumps(product, ensure_ascii=False).encode("utf-8") + b"\n")
+                record_offsets.append(offset)
+                if on_product is not None:
+                    on_product(product_id, product)
+        if records is not None:
+            records.close()
+
+        option_names = sorted(options)
+        option_postings = [postings for name in option_names for postings in options[name].values()]
+        option_offsets = np.zeros(len(option_postings) + 1, dtype=np.int64)
+        np.cumsum([len(postings) for postings in option_postings], out=option_offsets[1:])
+        asin_array = np.array(asins, dtype=f"S{max(map(len, asins), default=1)}")
+        columns = {
+            "asins": asin_array,
+            "asin_order": np.argsort(asin_array, kind="stable").astype(np.int32),
+            "title_offsets": np.frombuffer(title_offsets, dtype=np.int64),
+            "prices": np.frombuffer(prices, dtype=np.float64),
+            "ratings": np.frombuffer(ratings, dtype=np.float64),
+            "categories": _codes(category_codes, len(categories)),
+            "option_offsets": option_offsets,
+            "option_products": np.concatenate(
+                [np.frombuffer(postings, dtype=np.uint32) for postings in option_postings] or [np.empty(0, np.uint32)]
+            ).astype(np.int32),
+            "record_offsets": np.frombuffer(record_offsets, dtype=np.int64),
+        }
+        for name, values in columns.items():
+            np.save(os.path.join(directory, f"{name}.npy"), values)
+
+        meta = {
+            "version": CATALOG_FORMAT_VERSION,
+            "n_products": len(asins),
+            "records_path": "records.jsonl" if records is not None else os.path.abspath(path),
+            "categories": list(categories),
+            "option_names": option_names,
+            "option_values": {name: list(options[name]) for name in option_names},
+        }
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        return meta
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> Optional["Catalog"]:
+        """Open a catalog written by ``build()``, or None if it is missing or stale.
+
+        Args:
+            directory: Catalog directory
+            mmap: Memory-map the columns instead of reading them into memory
+        """
+        try:
+            with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != CATALOG_FORMAT_VERSION:
+                return None
+            arrays = {
+                name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r" if mmap else None)
+                for name in _ARRAYS
+            }
+            titles_path = os.path.join(directory, "titles.bin")
+            if os.path.getsize(titles_path):
+                titles = np.memmap(titles_path, dtype=np.uint8, mode="r") if mmap else np.fromfile(titles_path, dtype=np.uint8)
+            else:
+                titles = np.empty(0, dtype=np.uint8)
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(directory, meta, arrays, titles)
+
+    def __len__(self) -> int:
+        return len(self.asins)
+
+    def asin(self, product_id: int) -> str:
+        return self.asins[product_id].decode()
+
+    def title(self, product_id: int) -> str:
+        start, end = self.title_offsets[product_id], self.title_offsets[product_id + 1]
+        return self.titles[start:end].tobytes().decode("utf-8")
+
+    def category(self, product_id: int) -> str:
+        return self.category_values[self.categories[product_id]]
+
+    def product_id(self, asin: str) -> Optional[int]:
+        """Product id for an ASIN (case-insensitive), or None."""
+        key = asin.strip().upper().encode()
+        position = int(np.searchsorted(self.asins, key, sorter=self.asin_order))
+        if position < len(self.asin_order):
+            product_id = int(self.asin_order[position])
+            if self.asins[product_id] == key:
+                return product_id
+        return None
+
+    def option_products_for(self, name: str, value_codes: List[int]) -> List[np.ndarray]:
+        """Ids of the products offering each of an option's values (by dictionary code)."""
+        base = self.option_bases[name]
+        return [
+            self.option_products[self.option_offsets[base + code]:self.option_offsets[base + code + 1]]
+            for code in value_codes
+        ]
+
+    def options(self, product_id: int) -> Dict[str, List[str]]:
+        """Customization options of a product: option name -> values."""
+        return product_options(self.product(product_id))
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "products": len(self),
+            "categories": len(self.category_values),
+            "options": {name: len(values) for name, values in self.option_value_names.items()},
+            "bytes": sum(getattr(self, name).nbytes for name in _ARRAYS) + self.titles.nbytes,
+        }
+
+    def product(self, product_id: int) -> Dict[str, Any]:
+        """Full product record."""
+        with open(self.records_path, "rb") as f:
+            f.seek(int(self.record_offsets[product_id]))
+            return json.loads(f.readline())
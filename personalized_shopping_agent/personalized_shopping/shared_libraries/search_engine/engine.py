@@ -0,0 +1,206 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Product search over the loaded catalog
+
+SearchEngine pairs the Catalog with its InvertedIndex and answers keyword
+searches, optionally narrowed by faceted filters, with paginated results.
+The columnar catalog and the index are built in one pass over the catalog
+file and cached on disk (SHOPPING_INDEX_DIR), keyed by the file's path,
+size and modification time. A restart, or another worker process,
+memory-maps both instead of parsing the catalog again, and a changed
+catalog gets fresh ones. Workers starting on a cold cache build under a
+file lock, so only the first one builds and the others load its copy.
+
+``get_search_engine()`` loads the configured catalog once per process
+(server startup, or the first search).
+"""
+
+import hashlib
+import math
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from ...config import SHOPPING_CATALOG_PATH, SHOPPING_INDEX_DIR, SHOPPING_SEARCH_MAX_RESULTS
+from .catalog import (
+    CATALOG_FORMAT_VERSION,
+    Catalog,
+    build_lock,
+    product_attributes,
+    product_category,
+    product_title,
+)
+from .filters import filter_mask, parse_filters
+from .index import FIELD_WEIGHTS, FORMAT_VERSION, IndexBuilder, InvertedIndex
+
+
+@dataclass
+class SearchHit:
+    product_id: int
+    asin: str
+    title: str
+    price: float
+    score: float
+
+
+@dataclass
+class SearchPage:
+    """One page of search results."""
+
+    keywords: str
+    page: int
+    page_size: int
+    total: int
+    hits: List[SearchHit] = field(default_factory=list)
+    filters: str = ""
+
+    @property
+    def pages(self) -> int:
+        return max(1, math.ceil(self.total / self.page_size))
+
+
+def index_directory(catalog_path: str, index_dir: str) -> str:
+    """Cache directory of the converted catalog and index for a catalog file."""
+    stat = os.stat(catalog_path)
+    signature = (f"{os.path.abspath(catalog_path)}:{stat.st_size}:{stat.st_mtime_ns}:"
+                 f"{FORMAT_VERSION}:{CATALOG_FORMAT_VERSION}:{FIELD_WEIGHTS}")
+    digest = hashlib.sha1(signature.encode()).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(catalog_path))[0]
+    return os.path.join(index_dir, f"{stem}-{digest}")
+
+
+def _load_cached(catalog_dir: str, index_dir: str) -> Tuple[Optional[Catalog], Optional[InvertedIndex]]:
+    # A converted catalog and its index, or (None, None) unless both are
+    # present and agree
+    catalog = Catalog.load(catalog_dir)
+    index = InvertedIndex.load(index_dir) if catalog is not None else None
+    if index is None or len(catalog) != len(index):
+        return None, None
+    return catalog, index
+
+
+class SearchEngine:
+    """Keyword search with BM25 ranking and pagination."""
+
+    def __init__(self, catalog: Catalog, index: InvertedIndex, max_results: int = 50):
+        """Initialize the engine.
+
+        Args:
+            catalog: Loaded product catalog
+            index: Index whose document ids are the catalog's product ids
+            max_results: Results kept per query (across all pages)
+        """
+        self.catalog = catalog
+        self.index = index
+        self.max_results = max_results
+        self.load_seconds = 0.0
+        self.index_cached = False
+
+    @classmethod
+    def open(cls, catalog_path: str, index_dir: Optional[str] = None, max_results: int = 50) -> "SearchEngine":
+        """Open a catalog and its index, converting and indexing it if needed.
+
+        Args:
+            catalog_path: JSON or JSONL product catalog
+            index_dir: Directory for cached catalogs and indexes (a new
+                       temporary directory if None)
+            max_results: Results kept per query
+        """
+        started = time.perf_counter()
+        directory = index_directory(catalog_path, index_dir or tempfile.mkdtemp(prefix="shopping-search-"))
+        catalog_dir, index_dir = os.path.join(directory, "catalog"), os.path.join(directory, "index")
+        catalog, index = _load_cached(catalog_dir, index_dir)
+        cached = index is not None
+        if not cached:
+            # Workers starting together on a cold cache build it once: the
+            # others wait here and then load what the first one published
+            with build_lock(directory):
+                catalog, index = _load_cached(catalog_dir, index_dir)
+                cached = index is not None
+                if not cached:
+                    builder = IndexBuilder()
+                    catalog = Catalog.build(catalog_path, catalog_dir, on_product=lambda product_id, product: builder.add(product_id, {
+                        "title": product_title(product),
+                        "category": product_category(product),
+                        "attributes": " ".join(product_attributes(product)),
+                    }))
+                    index = builder.finish()
+                    index.save(index_dir)
+                    # Serve from the memory-mapped copy so worker processes share it
+                    index = InvertedIndex.load(index_dir) or index
+
+        engine = cls(catalog, index, max_results=max_results)
+        engine.index_cached = cached
+        engine.load_seconds = time.perf_counter() - started
+        return engine
+
+    def search(self, keywords: str, page: int = 1, page_size: int = 10, filters: str = "") -> SearchPage:
+        """Search the catalog.
+
+        Args:
+            keywords: Free-text query
+            page: 1-based page number
+            page_size: Results per page
+            filters: Faceted filters, e.g. ``price < 30 and color == red``
+                     (see filters.py)
+
+        Returns:
+            The requested page (empty if past the last page)
+
+        Raises:
+            FilterError: If the filters cannot be parsed or applied
+        """
+        page = max(1, page)
+        conditions = parse_filters(filters)
+        mask = filter_mask(self.catalog, conditions)
+        doc_ids, scores, total = self.index.search(keywords, limit=self.max_results, mask=mask)
+        result = SearchPage(
+            keywords=keywords, page=page, page_size=page_size, total=min(total, self.max_results),
+            filters=" and ".join(map(str, conditions)),
+        )
+        start = (page - 1) * page_size
+        for doc_id, score in zip(doc_ids[start:start + page_size].tolist(), scores[start:start + page_size].tolist()):
+            result.hits.append(SearchHit(
+                product_id=doc_id,
+                asin=self.catalog.asin(doc_id),
+                title=self.catalog.title(doc_id),
+                price=float(self.catalog.prices[doc_id]),
+                score=score,
+            ))
+        return result
+
+
+_engine: Optional[SearchEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_search_engine() -> SearchEngine:
+    """Shared search engine over SHOPPING_CATALOG_PATH (loaded on first use)."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = SearchEngine.open(
+                    SHOPPING_CATALOG_PATH,
+                    index_dir=SHOPPING_INDEX_DIR or None,
+                    max_results=SHOPPING_SEARCH_MAX_RESULTS,
+                )
+                print(f"🛒 Loaded {len(_engine.catalog):,} products in {_engine.load_seconds:.1f}s "
+                      f"({'cached' if _engine.index_cached else 'new'} search index)")
+    return _engine
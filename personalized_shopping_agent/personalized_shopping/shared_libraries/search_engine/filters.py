@@ -0,0 +1,166 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Faceted product filters evaluated as vectorized masks
+
+Filters are a small expression language for the search tool, so the agent
+narrows results instead of paging through them:
+
+    price < 30 and color == "red" and size == M
+
+- Conditions are joined with ``and`` (or commas); values may be quoted
+- ``price`` and ``rating``: ``<``, ``<=``, ``>``, ``>=``, ``==``, ``!=``
+  on numbers; products without a price or rating never match
+- ``category``: ``==`` / ``!=`` match a case-insensitive substring of the
+  category path (``category == dresses``)
+- any customization option (``color``, ``size``, ...): ``==`` keeps
+  products offering a value that contains the wanted one as a whole word
+  (case-insensitive; ``color == red`` matches "red floral" but
+  ``size == large`` does not match "x-large"), ``!=`` those that do not;
+  size letters and names match each other (``M`` and "medium")
+
+Each condition becomes a boolean mask over all products. Dictionary-encoded
+columns are matched in their (small) dictionary first: a category match is
+then one table lookup per product, and an option match sets the products
+listed for the matching values.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from .catalog import Catalog
+
+NUMERIC_FIELDS = ("price", "rating")
+
+SIZE_ALIASES = {
+    "xs": "x-small",
+    "s": "small",
+    "m": "medium",
+    "l": "large",
+    "xl": "x-large",
+    "xxl": "xx-large",
+    "2xl": "xx-large",
+}
+
+_CONDITION_RE = re.compile(
+    r"""\s*(?P<field>[A-Za-z_][\w ]*?)\s*(?P<op><=|>=|==|!=|=|<|>)\s*"""
+    r"""(?P<value>"[^"]*"|'[^']*'|.+?)\s*(?:,|\band\b|&&|$)""",
+    re.IGNORECASE
+)
+
+
+class FilterError(ValueError):
+    """Raised for a filter expression that cannot be parsed or applied."""
+
+
+@dataclass(frozen=True)
+class Condition:
+    field: str
+    op: str
+    value: str
+
+    def __str__(self) -> str:
+        return f"{self.field} {self.op} {self.value}"
+
+
+def parse_filters(text: Optional[str]) -> List[Condition]:
+    """Parse a filter expression into conditions.
+
+    Args:
+        text: e.g. ``price < 30 and color == "red"`` (empty for none)
+
+    Returns:
+        The conditions, all of which must hold
+
+    Raises:
+        FilterError: If the expression is malformed
+    """
+    conditions = []
+    text = (text or "").strip()
+    position = 0
+    while position < len(text):
+        match = _CONDITION_RE.match(text, position)
+        if match is None or match.end() == position:
+            raise FilterError(f"Cannot parse filter at {text[position:]!r}; use e.g. price < 30 and color == red")
+        value = match.group("value")
+        if value[:1] in "\"'" and value[-1:] == value[:1]:
+            value = value[1:-1]
+        op = "==" if match.group("op") == "=" else match.group("op")
+        conditions.append(Condition(" ".join(match.group("field").lower().split()), op, value.strip()))
+        position = match.end()
+    return conditions
+
+
+def filter_mask(catalog: Catalog, conditions: List[Condition]) -> Optional[np.ndarray]:
+    """Boolean mask of the products that satisfy every condition.
+
+    Args:
+        catalog: Product catalog
+        conditions: From parse_filters()
+
+    Returns:
+        Mask over product ids, or None without conditions
+
+    Raises:
+        FilterError: For unknown fields or unsupported comparisons
+    """
+    mask = None
+    for condition in conditions:
+        matches = _condition_mask(catalog, condition)
+        mask = matches if mask is None else np.logical_and(mask, matches, out=mask)
+    return mask
+
+
+def _condition_mask(catalog: Catalog, condition: Condition) -> np.ndarray:
+    field, op, value = condition.field, condition.op, condition.value
+
+    if field in NUMERIC_FIELDS:
+        try:
+            number = float(value.lstrip("$").replace(",", ""))
+        except ValueError:
+            raise FilterError(f"{field} needs a number, got {value!r}") from None
+        column = np.asarray(catalog.prices if field == "price" else catalog.ratings)
+        with np.errstate(invalid="ignore"):
+            if op == "!=":
+                return (column != number) & ~np.isnan(column)
+            return {"<": np.less, "<=": np.less_equal, ">": np.greater,
+                    ">=": np.greater_equal, "==": np.equal}[op](column, number)
+
+    if op not in ("==", "!="):
+        raise FilterError(f"{field} supports only == and !=, got {op}")
+
+    if field == "category":
+        needle = value.lower()
+        table = np.array([needle in category.lower() for category in catalog.category_values] or [False])
+        matches = table[catalog.categories]
+    elif field in catalog.option_names:
+        wanted = {value.lower()}
+        if field == "size":
+            # Catalogs spell sizes either way, so look for both
+            wanted.update(name for letter, name in SIZE_ALIASES.items() if letter in wanted)
+            wanted.update(letter for letter, name in SIZE_ALIASES.items() if name in wanted)
+        pattern = re.compile(r"(?<![\w-])(?:%s)(?![\w-])" % "|".join(map(re.escape, sorted(wanted))), re.IGNORECASE)
+        codes = [code for code, name in enumerate(catalog.option_value_names[field]) if pattern.search(name)]
+        matches = np.zeros(len(catalog), dtype=bool)
+        for products in catalog.option_products_for(field, codes):
+            matches[products] = True
+    else:
+        fields = ", ".join([*NUMERIC_FIELDS, "category", *catalog.option_names])
+        raise FilterError(f"Unknown filter field {field!r}; filter on {fields}")
+
+    return ~matches if op == "!=" else matches
@@ -0,0 +1,287 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Inverted index with BM25 ranking over product text
+
+Documents are products; each has a title, a category and attribute text.
+Terms are lowercased alphanumeric words without stopwords, with a light
+plural stemming. Field weights (title counts twice) are folded into the
+term frequencies, a simplified BM25F.
+
+The postings are array-backed (CSR layout) rather than per-term Python
+lists, which keeps a million-product index to a few hundred megabytes and
+lets it be memory-mapped from disk:
+
+- ``terms``: term -> term id
+- ``offsets[t]:offsets[t + 1]``: the postings slice of term ``t``
+- ``doc_ids`` (int32): the postings, sorted by term and then document
+- ``impacts`` (float32): each posting's BM25 score contribution, computed
+  at build time from the weighted term frequency, the term's document
+  frequency and the document length
+
+Because the impacts are precomputed, a query only adds up the impact
+slices of its terms (one vectorized scatter-add per term) and selects the
+top hits with a partial sort.
+"""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+from array import array
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from .catalog import publish_directory
+
+FORMAT_VERSION = 1
+
+# Weight of one occurrence in each field
+FIELD_WEIGHTS = {"title": 2, "category": 1, "attributes": 1}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or the to with".split()
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_UINT16_MAX = np.iinfo(np.uint16).max
+
+
+def _stem(token: str) -> str:
+    # "dresses" -> "dress", "shoes" -> "shoe"; keep "glass", "jeans" -> "jean"
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-2] if token.endswith("sses") else token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into index terms."""
+    return [_stem(token) for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+class IndexBuilder:
+    """Accumulates documents (in product id order) into an InvertedIndex."""
+
+    def __init__(self, field_weights: Mapping[str, int] = FIELD_WEIGHTS):
+        self.field_weights = dict(field_weights)
+        self.terms: Dict[str, int] = {}
+        self._term_ids = array("I")
+        self._doc_ids = array("I")
+        self._tfs = array("H")
+        self._doc_lengths = array("H")
+        self.n_docs = 0
+
+    def add(self, doc_id: int, fields: Mapping[str, str]):
+        """Index one document.
+
+        Args:
+            doc_id: Must equal the number of documents added so far
+            fields: Field name -> text (fields without a weight are ignored)
+        """
+        if doc_id != self.n_docs:
+            raise ValueError(f"Documents must be added in order: got {doc_id}, expected {self.n_docs}")
+        counts: Dict[int, int] = {}
+        length = 0
+        terms = self.terms
+        for name, text in fields.items():
+            weight = self.field_weights.get(name)
+            if not weight or not text:
+                continue
+            for token in tokenize(text):
+                term_id = terms.get(token)
+                if term_id is None:
+                    term_id = terms[token] = len(terms)
+                counts[term_id] = counts.get(term_id, 0) + weight
+                length += weight
+        self._term_ids.extend(counts.keys())
+        self._doc_ids.extend([doc_id] * len(counts))
+        self._tfs.extend(min(tf, _UINT16_MAX) for tf in counts.values())
+        self._doc_lengths.append(min(length, _UINT16_MAX))
+        self.n_docs += 1
+
+    def finish(self, k1: float = K1, b: float = B) -> "InvertedIndex":
+        """Sort the postings into CSR form, score them and return the index."""
+        term_ids = np.frombuffer(self._term_ids, dtype=np.uint32)
+        # Stable sort keeps each term's postings in document order
+        order = np.argsort(term_ids, kind="stable")
+        df = np.bincount(term_ids, minlength=len(self.terms))
+        offsets = np.zeros(len(self.terms) + 1, dtype=np.int64)
+        np.cumsum(df, out=offsets[1:])
+        doc_ids = np.frombuffer(self._doc_ids, dtype=np.uint32)[order].astype(np.int32)
+
+        # BM25: idf(t) * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(d) / avg_len))
+        idf = np.log1p((self.n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        lengths = np.frombuffer(self._doc_lengths, dtype=np.uint16).astype(np.float32)
+        avg_length = float(lengths.mean()) if self.n_docs else 1.0
+        norms = k1 * (1 - b + b * lengths / max(avg_length, 1e-9))
+        tfs = np.frombuffer(self._tfs, dtype=np.uint16)[order].astype(np.float32)
+        impacts = np.repeat(idf, df) * tfs * (k1 + 1) / (tfs + norms[doc_ids])
+        del order, term_ids, tfs
+        self._term_ids = self._doc_ids = self._tfs = self._doc_lengths = None
+        return InvertedIndex(self.terms, offsets, doc_ids, impacts.astype(np.float32), self.n_docs)
+
+
+class InvertedIndex:
+    """BM25-ranked inverted index over array-backed postings."""
+
+    _ARRAYS = ("offsets", "doc_ids", "impacts")
+
+    def __init__(
+        self,
+        terms: Dict[str, int],
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        impacts: np.ndarray,
+        n_docs: int
+    ):
+        self.terms = terms
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.impacts = impacts
+        self.n_docs = n_docs
+        self._scores: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    def search(
+        self,
+        query: str,
+        limit: int = 50,
+        mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Rank documents for a free-text query.
+
+        Args:
+            query: Search keywords
+            limit: Number of top documents to return
+            mask: Optional boolean mask over document ids; documents outside
+                  it are dropped before ranking (faceted filters)
+
+        Returns:
+            ``(doc_ids, scores, total)``: the top documents by descending
+            score (ties by document id) and the number of matching documents
+        """
+        term_ids = sorted({self.terms[t] for t in tokenize(query) if t in self.terms})
+        if not term_ids or limit <= 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32), 0
+
+        if len(term_ids) == 1:
+            docs, scores = self._postings(term_ids[0])
+        else:
+            # Accumulate into a reusable dense buffer. The matching documents
+            # are the union of the postings: sorted out of the postings when
+            # they are few, scanned out of the buffer when they are many
+            if self._scores is None:
+                self._scores = np.zeros(self.n_docs, dtype=np.float32)
+            buffer = self._scores
+            postings = [self._postings(term_id) for term_id in term_ids]
+            for term_docs, term_impacts in postings:
+                np.add.at(buffer, term_docs, term_impacts)
+            sparse = sum(len(term_docs) for term_docs, _ in postings) * 16 < self.n_docs
+            if sparse:
+                docs = np.unique(np.concatenate([term_docs for term_docs, _ in postings]))
+            else:
+                docs = np.flatnonzero(buffer).astype(np.int32)
+            scores = buffer[docs]
+            if sparse:
+                buffer[docs] = 0
+            else:
+                buffer.fill(0)
+
+        if mask is not None:
+            keep = mask[docs]
+            docs, scores = docs[keep], scores[keep]
+        total = len(docs)
+        if total > limit:
+            top = np.argpartition(scores, total - limit)[total - limit:]
+            docs, scores = docs[top], scores[top]
+        order = np.lexsort((docs, -scores))
+        return docs[order], scores[order], total
+
+    def _postings(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = int(self.offsets[term_id]), int(self.offsets[term_id + 1])
+        return np.asarray(self.doc_ids[start:end]), np.asarray(self.impacts[start:end])
+
+    def save(self, directory: str):
+        """Write the index to ``directory`` (replaced atomically).
+
+        Hold ``build_lock(directory)`` when other processes may write it too.
+        """
+        parent = os.path.dirname(os.path.abspath(directory))
+        os.makedirs(parent, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=".index-", dir=parent)
+        try:
+            for name in self._ARRAYS:
+                np.save(os.path.join(tmp, f"{name}.npy"), getattr(self, name))
+            with open(os.path.join(tmp, "terms.txt"), "w", encoding="utf-8") as f:
+                f.write("\n".join(sorted(self.terms, key=self.terms.__getitem__)))
+            with open(os.path.join(tmp, "meta.json"), "w") as f:
+                json.dump({
+                    "version": FORMAT_VERSION,
+                    "n_docs": self.n_docs,
+                    "n_terms": len(self.terms),
+                    "n_postings": len(self.doc_ids),
+                }, f)
+            publish_directory(tmp, directory)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> Optional["InvertedIndex"]:
+        """Load an index written by ``save()``, or None if it is missing or stale.
+
+        Args:
+            directory: Index directory
+            mmap: Memory-map the postings instead of reading them into memory
+        """
+        try:
+            with open(os.path.join(directory, "meta.json")) as f:
+                meta = json.load(f)
+            if meta.get("version") != FORMAT_VERSION:
+                return None
+            with open(os.path.join(directory, "terms.txt"), encoding="utf-8") as f:
+                text = f.read()
+            arrays = {
+                name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r" if mmap else None)
+                for name in cls._ARRAYS
+            }
+        except (OSError, ValueError):
+            return None
+        terms = {term: term_id for term_id, term in enumerate(text.split("\n"))} if text else {}
+        return cls(terms, n_docs=meta["n_docs"], **arrays)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "documents": self.n_docs,
+            "terms": len(self.terms),
+            "postings": len(self.doc_ids),
+            "bytes": sum(getattr(self, name).nbytes for name in self._ARRAYS),
+        }
+
+
+def build_index(documents: Iterable[Mapping[str, str]], field_weights: Mapping[str, int] = FIELD_WEIGHTS) -> InvertedIndex:
+    """Build an index from field dicts, one per document in id order."""
+    builder = IndexBuilder(field_weights)
+    for doc_id, fields in enumerate(documents):
+        builder.add(doc_id, fields)
+    return builder.finish()
@@ -0,0 +1,560 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""Precomputed review aggregates and extractive review summaries
+
+The Reviews view used to print every review of a product, which for a
+popular product is thousands of tokens of mostly repeated praise. Instead
+each product gets a summary, computed once and stored next to the cached
+catalog (``reviews.sqlite`` beside ``catalog/`` and ``index/``):
+
+- a rating histogram (reviews with 1-5 stars) and the mean score
+- pros and cons: two- and three-word phrases that this product's positive
+  (4-5 stars) or negative (1-2 stars) reviews use more often than the
+  positive or negative reviews of all products. Each phrase's rate in the
+  product is shrunk towards its corpus rate (a Dirichlet prior) and ranked
+  by the z-score of the log-odds difference, so a phrase one review
+  mentions once does not outrank one most reviews repeat
+- snippets: whole review sentences picked extractively, the one carrying
+  the strongest pros, the one carrying the strongest cons, then the most
+  typical ones (sharing the most phrases with the product's other reviews)
+
+``ReviewIndex.build()`` processes the whole catalog in two passes (corpus
+phrase counts, then per-product summaries). New reviews go through
+``add_reviews()``: they are stored, added to the corpus counts, and only
+their product's summary is recomputed. Other products' summaries keep the
+corpus counts they were built with until the next full build; counts move
+little with a few reviews. A product without a stored summary gets one on
+first request.
+
+The summaries live in the catalog's cache directory, which is replaced
+whenever the catalog file changes. Added reviews are kept apart, keyed by
+ASIN, in ``<stem>-added_reviews.sqlite`` next to the cache directories
+(attached to the summary store), so a rebuilt store replays them into its
+products; reviews of ASINs the catalog lacks are kept for later catalogs.
+"""
+
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from .catalog import Catalog, iter_products, parse_rating
+from .engine import get_search_engine
+
+# Reviews scored at least / at most this many stars are positive / negative
+POSITIVE_SCORE = 4
+NEGATIVE_SCORE = 2
+
+MAX_PHRASES = 5
+MAX_SNIPPETS = 3
+MAX_SNIPPET_CHARS = 200
+
+# Weight of the corpus rate in a product's phrase rate, in reviews
+PRIOR_WEIGHT = 20.0
+# Pros / cons scoring below this fraction of the best one are left out
+MIN_RELATIVE_SCORE = 0.5
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_SENTENCE_RE = re.compile(r"[^.!?\n]+[.!?]*")
+# Phrases do not cross punctuation or the words joining two phrases
+_CLAUSE_BREAK_RE = re.compile(r"[.!?,;:()\n]|\b(?:and|but|or)\b")
+
+# Words a phrase may contain but not start or end with
+_EDGE_WORDS = frozenset(
+    "a about after an are as at be been before by for from had has have i i'm in is it it's its my me of on so than "
+    "that the their them they this to too was we were with you your "
+    "bought got like liked love loved ordered really returned will would".split()
+)
+
+_BUILD_BATCH = 10_000
+
+
+def review_score(review: Dict[str, Any]) -> Optional[int]:
+    """Stars (1-5) of a review, or None if it has no usable score."""
+    score = parse_rating(review.get("score"))
+    return None if math.isnan(score) else min(5, max(1, round(score)))
+
+
+def phrases(text: str) -> List[str]:
+    """Two- and three-word phrases of a text, not crossing sentences or clauses."""
+    found = []
+    for clause in _CLAUSE_BREAK_RE.split(text.lower()):
+        words = _WORD_RE.findall(clause)
+        inner = [word not in _EDGE_WORDS for word in words]
+        for i in range(len(words) - 1):
+            if inner[i]:
+                if inner[i + 1]:
+                    found.append(f"{words[i]} {words[i + 1]}")
+                if i + 2 < len(words) and inner[i + 2]:
+                    found.append(f"{words[i]} {words[i + 1]} {words[i + 2]}")
+    return found
+
+
+@dataclass
+class _Review:
+    score: Optional[int]
+    sentences: List[Tuple[str, frozenset]]  # (sentence, its phrases)
+    phrases: frozenset
+
+    @classmethod
+    def parse(cls, review: Dict[str, Any]) -> "_Review":
+        title, body = str(review.get("title") or "").strip(), str(review.get("body") or "").strip()
+        sentences = []
+        for sentence in _SENTENCE_RE.findall(body or title):
+            sentence = " ".join(sentence.split())
+            if sentence:
+                sentences.append((sentence, frozenset(phrases(sentence))))
+        found = frozenset().union(*(sentence_phrases for _, sentence_phrases in sentences))
+        if body:
+            found |= frozenset(phrases(title))
+        return cls(review_score(review), sentences, found)
+
+    @property
+    def polarity(self) -> int:
+        """1 for a positive review, -1 for a negative one, 0 otherwise."""
+        if self.score is None:
+            return 0
+        return 1 if self.score >= POSITIVE_SCORE else -1 if self.score <= NEGATIVE_SCORE else 0
+
+
+@dataclass
+class ReviewSummary:
+    """Aggregates and extractive summary of a product's reviews."""
+
+    histogram: List[int] = field(default_factory=lambda: [0] * 5)  # reviews with 1..5 stars
+    pros: List[str] = field(default_factory=list)
+    cons: List[str] = field(default_factory=list)
+    snippets: List[Tuple[Optional[int], str]] = field(default_factory=list)  # (stars, sentence)
+
+    @property
+    def count(self) -> int:
+        return sum(self.histogram)
+
+    @property
+    def mean(self) -> float:
+        return sum(stars * n for stars, n in enumerate(self.histogram, 1)) / self.count if self.count else math.nan
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "histogram": self.histogram, "pros": self.pros, "cons": self.cons, "snippets": self.snippets,
+        }, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text: str) -> "ReviewSummary":
+        data = json.loads(text)
+        data["snippets"] = [tuple(snippet) for snippet in data["snippets"]]
+        return cls(**data)
+
+
+def _distinctive(
+    reviews: Sequence[_Review],
+    others: Sequence[_Review],
+    corpus: Mapping[str, Tuple[int, int]],
+    corpus_reviews: int,
+    side: int,
+) -> List[Tuple[str, float]]:
+    """Phrases of one polarity's reviews ranked by z-score against the corpus.
+
+    Phrases the product's reviews of the other polarity (``others``) use at
+    least as often are left out: they are about the product, not for or
+    against it.
+    """
+    n = len(reviews)
+    if n == 0:
+        return []
+    counts = Counter(phrase for review in reviews for phrase in review.phrases)
+    other_counts = Counter(phrase for review in others for phrase in review.phrases)
+    scored = []
+    for phrase, y in counts.items():
+        if (n > 2 and y < 2) or (others and other_counts[phrase] / len(others) >= y / n):
+            continue
+        # Corpus rate of the phrase in reviews of this polarity (add-one smoothed)
+        rate = (corpus.get(phrase, (0, 0))[side] + 1) / (corpus_reviews + 2)
+        hits, misses = y + PRIOR_WEIGHT * rate, n - y + PRIOR_WEIGHT * (1 - rate)
+        delta = math.log(hits / misses) - math.log(rate / (1 - rate))
+        z = delta / math.sqrt(1 / hits + 1 / misses)
+        if z > 0:
+            scored.append((phrase, z))
+    scored.sort(key=lambda item: (-item[1], item[0]))
+
+    # Drop phrases contained in (or containing) a better one
+    picked: List[Tuple[str, float]] = []
+    for phrase, z in scored:
+        if z < MIN_RELATIVE_SCORE * scored[0][1]:
+            break
+        if not any(phrase in other or other in phrase for other, _ in picked):
+            picked.append((phrase, z))
+            if len(picked) == MAX_PHRASES:
+                break
+    return picked
+
+
+def summarize(
+    reviews: Iterable[Dict[str, Any]], corpus: Mapping[str, Tuple[int, int]], corpus_totals: Tuple[int, int]
+) -> ReviewSummary:
+    """Summarize one product's reviews.
+
+    Args:
+        reviews: The product's reviews (``score``, ``title``, ``body``)
+        corpus: ``(positive, negative)`` review counts of each phrase over
+                all products (at least the phrases of these reviews)
+        corpus_totals: Positive and negative reviews over all products
+
+    Returns:
+        The histogram, pros, cons and snippets
+    """
+    parsed = [_Review.parse(review) for review in reviews]
+    summary = ReviewSummary()
+    if not parsed:
+        return summary
+    for review in parsed:
+        if review.score is not None:
+            summary.histogram[review.score - 1] += 1
+
+    positive, negative = [r for r in parsed if r.polarity > 0], [r for r in parsed if r.polarity < 0]
+    pros = _distinctive(positive, negative, corpus, corpus_totals[0], 0)
+    cons = _distinctive(negative, positive, corpus, corpus_totals[1], 1)
+    summary.pros = [phrase for phrase, _ in pros]
+    summary.cons = [phrase for phrase, _ in cons]
+
+    # Sentences scored by the pros (in positive reviews) or cons (in
+    # negative ones) they mention, and by how typical they are
+    weights = {1: dict(pros), -1: dict(cons)}
+    frequency = Counter(phrase for review in parsed for phrase in review.phrases)
+    candidates = []
+    for i, review in enumerate(parsed):
+        for sentence, sentence_phrases in review.sentences:
+            weight = sum(weights.get(review.polarity, {}).get(phrase, 0.0) for phrase in sentence_phrases)
+            typical = sum(frequency[phrase] - 1 for phrase in sentence_phrases)
+            candidates.append((weight, typical, review.polarity, i, sentence))
+
+    chosen: List[Tuple[float, int, int, int, str]] = []
+    for polarity in (1, -1):
+        best = max((c for c in candidates if c[2] == polarity and c[0] > 0), key=lambda c: c[:2], default=None)
+        if best is not None:
+            chosen.append(best)
+    for candidate in sorted(candidates, key=lambda c: (-c[1], -c[0], c[3])):
+        if len(chosen) >= MAX_SNIPPETS:
+            break
+        if all(candidate[3] != other[3] and candidate[4] != other[4] for other in chosen):
+            chosen.append(candidate)
+    for _, _, _, i, sentence in chosen[:MAX_SNIPPETS]:
+        if len(sentence) > MAX_SNIPPET_CHARS:
+            sentence = sentence[:MAX_SNIPPET_CHARS].rsplit(" ", 1)[0] + "…"
+        summary.snippets.append((parsed[i].score, sentence))
+    return summary
+
+
+def reviews_path(catalog: Catalog) -> str:
+    """Default review store of a catalog, next to its cache directory."""
+    return os.path.join(os.path.dirname(catalog.directory), "reviews.sqlite")
+
+
+def added_reviews_path(catalog: Catalog) -> str:
+    """Default store of added reviews: shared by every cache directory of the catalog file."""
+    cache_dir = os.path.dirname(os.path.abspath(catalog.directory))
+    stem = os.path.basename(cache_dir).rsplit("-", 1)[0]
+    return os.path.join(os.path.dirname(cache_dir), f"{stem}-added_reviews.sqlite")
+
+
+class ReviewIndex:
+    """Review summaries of a catalog's products, stored in SQLite.
+
+    Thread-safe. Holds the corpus phrase counts and the summaries; reviews
+    added after the catalog was built are read from the attached
+    added-review store (``added_seen`` records how far it has been folded
+    into the counts).
+    """
+
+    def __init__(self, catalog: Catalog, path: str, added_path: Optional[str] = None):
+        """Open (or create) the review store of a catalog.
+
+        Args:
+            catalog: Catalog whose product ids the summaries use
+            path: SQLite file
+            added_path: SQLite file of added reviews, keyed by ASIN
+                        (default: added_reviews_path(catalog))
+        """
+        self.catalog = catalog
+        self.path = path
+        self.added_path = added_path or added_reviews_path(catalog)
+        self._lock = threading.RLock()
+        # Autocommit; writes use explicit transactions. WAL lets other
+        # worker processes read while one writes.
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=60)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("ATTACH DATABASE ? AS added", (self.added_path,))
+        self._db.execute("PRAGMA added.journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS phrases ("
+            " phrase TEXT PRIMARY KEY, positive INTEGER NOT NULL, negative INTEGER NOT NULL) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS totals (name TEXT PRIMARY KEY, value INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            " product_id INTEGER PRIMARY KEY, summary TEXT NOT NULL, updated_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS added.reviews ("
+            " asin TEXT NOT NULL, review TEXT NOT NULL, added_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS added.reviews_asin ON reviews (asin);"
+        )
+        self.computed = 0
+
+    @classmethod
+    def open(cls, catalog: Catalog, path: Optional[str] = None) -> "ReviewIndex":
+        """Open a catalog's review store, building it on first use.
+
+        Reviews added since the store was built (e.g. while it served
+        another version of the catalog file) are replayed.
+
+        Args:
+            catalog: Loaded catalog
+            path: SQLite file (default: reviews_path(catalog))
+        """
+        index = cls(catalog, path or reviews_path(catalog))
+        if not index.built:
+            index.build(force=False)
+        index.sync_added()
+        return index
+
+    @property
+    def built(self) -> bool:
+        return self._totals().get("built", 0) > 0
+
+    def build(self, force: bool = True) -> float:
+        """Summarize every product: corpus counts, then summaries.
+
+        Reviews added with add_reviews() are included. Readers keep seeing
+        the previous summaries until the build commits.
+
+        Args:
+            force: Rebuild even if another process built the store already
+
+        Returns:
+            Seconds taken
+        """
+        started = time.perf_counter()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if not force and self.built:
+                    self._db.execute("COMMIT")
+                    return 0.0
+                added: Dict[int, List[Dict[str, Any]]] = {}
+                added_seen = 0
+                for rowid, asin, review in self._db.execute("SELECT rowid, asin, review FROM added.reviews ORDER BY rowid"):
+                    added_seen = rowid
+                    product_id = self.catalog.product_id(asin)
+                    if product_id is not None:
+                        added.setdefault(product_id, []).append(json.loads(review))
+
+                # Pass 1: in how many positive / negative reviews each phrase appears
+                positive, negative = Counter(), Counter()
+                totals = [0, 0]
+                for reviews in self._product_reviews(added):
+                    for review in map(_Review.parse, reviews):
+                        if review.polarity:
+                            (positive if review.polarity > 0 else negative).update(review.phrases)
+                            totals[review.polarity < 0] += 1
+                corpus = {phrase: (positive[phrase], negative[phrase]) for phrase in positive.keys() | negative.keys()}
+
+                self._db.execute("DELETE FROM phrases")
+                self._db.executemany("INSERT INTO phrases VALUES (?, ?, ?)", ((p, *c) for p, c in corpus.items()))
+
+                # Pass 2: per-product summaries
+                self._db.execute("DELETE FROM summaries")
+                now, rows = time.time(), []
+                for product_id, reviews in enumerate(self._product_reviews(added)):
+                    rows.append((product_id, summarize(reviews, corpus, tuple(totals)).to_json(), now))
+                    if len(rows) == _BUILD_BATCH:
+                        self._db.executemany("INSERT INTO summaries VALUES (?, ?, ?)", rows)
+                        rows.clear()
+                self._db.executemany("INSERT INTO summaries VALUES (?, ?, ?)", rows)
+
+                self._db.executemany("INSERT OR REPLACE INTO totals VALUES (?, ?)", [
+                    ("positive", totals[0]), ("negative", totals[1]), ("built", int(now)),
+                    ("added_seen", added_seen),
+                ])
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return time.perf_counter() - started
+
+    def summary(self, product_id: int) -> ReviewSummary:
+        """Stored summary of a product (computed and stored if missing)."""
+        with self._lock:
+            row = self._db.execute("SELECT summary FROM summaries WHERE product_id = ?", (product_id,)).fetchone()
+            if row is not None:
+                return ReviewSummary.from_json(row[0])
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                summary = self._update(product_id)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            return summary
+
+    def add_reviews(self, product_id: int, reviews: List[Dict[str, Any]]) -> ReviewSummary:
+        """Add new reviews of a product and update its summary.
+
+        The reviews are stored under the product's ASIN, their phrases
+        added to the corpus counts, and only this product's summary is
+        recomputed (along with those of reviews other processes added
+        since).
+
+        Args:
+            product_id: Catalog product id
+            reviews: Reviews with ``score`` (1-5), ``title`` and ``body``
+
+        Returns:
+            The product's new summary
+        """
+        now, asin = time.time(), self.catalog.asin(product_id)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany("INSERT INTO added.reviews VALUES (?, ?, ?)", [
+                    (asin, json.dumps(review, ensure_ascii=False), now) for review in reviews
+                ])
+                self._replay()
+                summary = ReviewSummary.from_json(self._db.execute(
+                    "SELECT summary FROM summaries WHERE product_id = ?", (product_id,)
+                ).fetchone()[0])
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            return summary
+
+    def sync_added(self) -> int:
+        """Fold reviews added since the last build or sync into this store.
+
+        Returns:
+            Number of products whose summaries were recomputed
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                updated = self._replay()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            return updated
+
+    def reviews(self, product_id: int) -> List[Dict[str, Any]]:
+        """The catalog's reviews of a product followed by the added ones."""
+        with self._lock:
+            added = [json.loads(review) for review, in self._db.execute(
+                "SELECT review FROM added.reviews WHERE asin = ? ORDER BY rowid", (self.catalog.asin(product_id),)
+            )]
+        return [*(self.catalog.product(product_id).get("reviews") or []), *added]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = {
+                name: self._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for name, table in (("summaries", "summaries"), ("phrases", "phrases"), ("added_reviews", "added.reviews"))
+            }
+            return {
+                **counts,
+                "computed": self.computed,
+                "bytes": sum(os.path.getsize(self.path + suffix)
+                             for suffix in ("", "-wal") if os.path.exists(self.path + suffix)),
+            }
+
+    def _totals(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._db.execute("SELECT name, value FROM totals"))
+
+    def _replay(self) -> int:
+        # Add the reviews stored since added_seen to the corpus counts and
+        # recompute their products' summaries (inside a write transaction)
+        seen = self._totals().get("added_seen", 0)
+        counts: Counter = Counter()
+        totals, products = [0, 0], set()
+        for rowid, asin, review in self._db.execute(
+            "SELECT rowid, asin, review FROM added.reviews WHERE rowid > ? ORDER BY rowid", (seen,)
+        ).fetchall():
+            seen = rowid
+            product_id = self.catalog.product_id(asin)
+            if product_id is None:
+                continue  # kept for a catalog that has the product
+            products.add(product_id)
+            parsed = _Review.parse(json.loads(review))
+            if parsed.polarity:
+                side = int(parsed.polarity < 0)
+                totals[side] += 1
+                for phrase in parsed.phrases:
+                    counts[phrase, side] += 1
+        self._db.executemany(
+            "INSERT INTO phrases VALUES (?, ?, ?) ON CONFLICT (phrase) DO UPDATE SET"
+            " positive = positive + excluded.positive, negative = negative + excluded.negative",
+            [(phrase, n, 0) if side == 0 else (phrase, 0, n) for (phrase, side), n in counts.items()],
+        )
+        self._db.executemany(
+            "INSERT INTO totals VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+            [("positive", totals[0]), ("negative", totals[1])],
+        )
+        self._db.execute("INSERT OR REPLACE INTO totals VALUES ('added_seen', ?)", (seen,))
+        for product_id in sorted(products):
+            self._update(product_id)
+        return len(products)
+
+    def _update(self, product_id: int) -> ReviewSummary:
+        # Recompute one product's summary (inside a write transaction)
+        reviews = self.reviews(product_id)
+        wanted = sorted({phrase for review in reviews for phrase in _Review.parse(review).phrases})
+        corpus = {}
+        for start in range(0, len(wanted), 500):
+            chunk = wanted[start:start + 500]
+            corpus.update((phrase, (positive, negative)) for phrase, positive, negative in self._db.execute(
+                f"SELECT phrase, positive, negative FROM phrases WHERE phrase IN ({','.join('?' * len(chunk))})", chunk
+            ))
+        totals = self._totals()
+        summary = summarize(reviews, corpus, (totals.get("positive", 0), totals.get("negative", 0)))
+        self._db.execute("INSERT OR REPLACE INTO summaries VALUES (?, ?, ?)", (product_id, summary.to_json(), time.time()))
+        self.computed += 1
+        return summary
+
+    def _product_reviews(self, added: Dict[int, List[Dict[str, Any]]]) -> Iterable[List[Dict[str, Any]]]:
+        # Every product's reviews in product id order, read sequentially
+        for product_id, (_, product) in enumerate(iter_products(self.catalog.records_path)):
+            yield [*(product.get("reviews") or []), *added.get(product_id, [])]
+
+
+_review_index: Optional[ReviewIndex] = None
+_review_index_lock = threading.Lock()
+
+
+def get_review_index() -> ReviewIndex:
+    """Review summaries of the shared search engine's catalog (built on first use)."""
+    global _review_index
+    if _review_index is None:
+        with _review_index_lock:
+            if _review_index is None:
+                started = time.perf_counter()
+                _review_index = ReviewIndex.open(get_search_engine().catalog)
+                print(f"💬 Loaded review summaries in {time.perf_counter() - started:.1f}s "
+                      f"({_review_index.stats()['summaries']:,} products)")
+    return _review_index
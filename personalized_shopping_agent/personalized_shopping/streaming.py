@@ -0,0 +1,305 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Streaming A2A responses: reply tokens and progress updates
+
+For ``message/stream`` requests StreamingA2aAgentExecutor runs the agent
+with ``StreamingMode.SSE`` so LiteLlm token deltas reach the client as
+``working`` status updates marked ``streaming: delta`` while the reply is
+being written; the complete message still follows, and clients replace the
+streamed draft with it. Tool calls are announced first as status updates
+marked ``streaming: progress`` ("Searching for “red running shoes”…",
+"Opening “Buy Now”…").
+
+BackpressureQueue forwards events to the A2A queue from its own task so a
+slow SSE client does not stall the agent run: while the client is behind,
+consecutive deltas are merged and a pending progress update is replaced by
+the newer one, and the run only waits once A2A_STREAM_MAX_PENDING events
+are undelivered. A delta also waits A2A_STREAM_FLUSH_MS for the tokens
+behind it, so a reply goes out in a few dozen chunks instead of one event
+per token.
+
+Configuration:
+- A2A_STREAMING_ENABLED: Stream tokens and progress updates (default: true)
+- A2A_STREAM_MAX_PENDING: Undelivered events buffered per request (default: 64)
+- A2A_STREAM_FLUSH_MS: How long a delta waits for the next ones before it is
+  sent (default: 50)
+"""
+
+import asyncio
+import threading
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+from google.adk.a2a.converters.event_converter import convert_event_to_a2a_events
+from google.adk.a2a.converters.request_converter import convert_a2a_request_to_agent_run_request
+from google.adk.a2a.executor.a2a_agent_executor import A2aAgentExecutor
+from google.adk.a2a.executor.config import A2aAgentExecutorConfig
+from google.adk.agents.run_config import StreamingMode
+from google.adk.events import Event
+from google.genai import types
+
+from .config import A2A_STREAM_FLUSH_MS, A2A_STREAM_MAX_PENDING
+
+# A2A event metadata key marking streamed events; the value is DELTA or PROGRESS
+STREAM_METADATA_KEY = "streaming"
+DELTA = "delta"
+PROGRESS = "progress"
+
+# JSON-RPC methods of blocking sends (A2A 0.3 and 1.x names)
+_NON_STREAMING_METHODS = frozenset({"message/send", "SendMessage"})
+
+
+def describe_tool_calls(calls: Iterable[types.FunctionCall]) -> Optional[str]:
+    """Progress text for the tool calls of one model turn.
+
+    Args:
+        calls: Function calls requested by the model
+
+    Returns:
+        Text such as ``Searching for “red running shoes”…``, or None when
+        the calls are not worth announcing
+    """
+    for call in calls:
+        args = call.args or {}
+        if call.name == "search" and args.get("keywords"):
+            return f"Searching for “{args['keywords']}”…"
+        if call.name == "click" and args.get("button_name"):
+            return f"Opening “{args['button_name']}”…"
+        if call.name == "explore_product":
+            return f"Reading the details of “{args['asin']}”…" if args.get("asin") else "Reading the product details…"
+    return None
+
+
+def _mark(a2a_events: List[Any], kind: str) -> List[Any]:
+    for a2a_event in a2a_events:
+        metadata = getattr(a2a_event, "metadata", None)
+        if metadata is not None:
+            metadata[STREAM_METADATA_KEY] = kind
+    return a2a_events
+
+
+def stream_kind(a2a_event: Any) -> Optional[str]:
+    """Return DELTA or PROGRESS for events produced by StreamingEventConverter."""
+    metadata = getattr(a2a_event, "metadata", None)
+    if not metadata or STREAM_METADATA_KEY not in metadata:
+        return None
+    return metadata[STREAM_METADATA_KEY]
+
+
+class StreamingEventConverter:
+    """ADK event -> A2A events converter for streamed runs.
+
+    Complete events are converted exactly like the default executor does;
+    partial text events become token deltas, and tool calls add a progress
+    update in front of the converted event.
+    """
+
+    def __call__(
+        self,
+        event: Event,
+        invocation_context: Any,
+        task_id: Optional[str] = None,
+        context_id: Optional[str] = None,
+        part_converter: Optional[Callable] = None
+    ) -> List[Any]:
+        convert_kwargs = {"part_converter": part_converter} if part_converter else {}
+
+        if event.partial:
+            parts = event.content.parts if event.content else None
+            text_parts = [
+                types.Part(text=part.text) for part in parts or []
+                if part.text and not part.thought
+            ]
+            if not text_parts:
+                return []
+            delta = event.model_copy(update={"content": types.Content(role="model", parts=text_parts)})
+            return _mark(
+                convert_event_to_a2a_events(delta, invocation_context, task_id, context_id, **convert_kwargs),
+                DELTA
+            )
+
+        a2a_events = []
+        progress = describe_tool_calls(event.get_function_calls())
+        if progress:
+            note = Event(
+                invocation_id=event.invocation_id,
+                author=event.author,
+                branch=event.branch,
+                content=types.Content(role="model", parts=[types.Part(text=progress)]),
+            )
+            a2a_events.extend(_mark(
+                convert_event_to_a2a_events(note, invocation_context, task_id, context_id, **convert_kwargs),
+                PROGRESS
+            ))
+        a2a_events.extend(
+            convert_event_to_a2a_events(event, invocation_context, task_id, context_id, **convert_kwargs)
+        )
+        return a2a_events
+
+
+class BackpressureQueue:
+    """Decouples the agent run from a slow A2A event consumer.
+
+    Implements the ``enqueue_event`` side of the A2A EventQueue. Events are
+    forwarded to ``target`` by a pump task; while they wait, streamed
+    deltas coalesce and progress updates are superseded (see module
+    docstring).
+    """
+
+    def __init__(self, target: Any, max_pending: int = 64, flush_interval: float = 0.05):
+        self._target = target
+        self._max_pending = max(1, max_pending)
+        self._flush_interval = flush_interval
+        self._pending: Deque[Any] = deque()
+        self._wakeup = asyncio.Event()
+        self._has_room = asyncio.Event()
+        self._has_room.set()
+        self._closed = False
+        self._failed = False
+        self._pump_task: Optional[asyncio.Task] = None
+
+    async def enqueue_event(self, event: Any):
+        if self._failed:
+            return
+        kind = stream_kind(event)
+        if kind and self._pending and stream_kind(self._pending[-1]) == kind:
+            last = self._pending[-1]
+            if kind == DELTA and _author(last) == _author(event):
+                last.status.message.parts.extend(event.status.message.parts)
+                stream_stats.record("coalesced")
+                return
+            if kind == PROGRESS:
+                self._pending[-1] = event
+                stream_stats.record("superseded")
+                return
+
+        self._pending.append(event)
+        stream_stats.record(kind or "event")
+        if self._pump_task is None:
+            self._pump_task = asyncio.create_task(self._pump())
+        self._wakeup.set()
+        if len(self._pending) > self._max_pending:
+            # Client is far behind: wait until half the backlog is delivered
+            self._has_room.clear()
+            stream_stats.record("producer_waits")
+            await self._has_room.wait()
+
+    async def _pump(self):
+        while True:
+            if not self._pending:
+                if self._closed:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            if self._flush_interval and not self._closed and stream_kind(self._pending[0]) == DELTA:
+                # Let the next few deltas join this one before it goes out
+                await asyncio.sleep(self._flush_interval)
+            event = self._pending.popleft()
+            if len(self._pending) <= self._max_pending // 2:
+                self._has_room.set()
+            try:
+                await self._target.enqueue_event(event)
+            except Exception as e:
+                print(f"⚠️  A2A event queue rejected an event, dropping the rest of the stream: {e}")
+                self._failed = True
+                self._pending.clear()
+                self._has_room.set()
+                return
+
+    async def close(self, drain: bool = True):
+        """Stop the pump, after delivering pending events if ``drain``."""
+        self._closed = True
+        self._wakeup.set()
+        if self._pump_task is None:
+            return
+        if drain:
+            await self._pump_task
+        else:
+            self._pump_task.cancel()
+            try:
+                await self._pump_task
+            except asyncio.CancelledError:
+                pass
+
+
+def _author(a2a_event: Any) -> Optional[str]:
+    metadata = getattr(a2a_event, "metadata", None)
+    return metadata["adk_author"] if metadata and "adk_author" in metadata else None
+
+
+def streaming_request_converter(request: Any, part_converter: Any = None) -> Any:
+    """Default A2A request conversion, with the runner streaming via SSE.
+
+    Blocking ``message/send`` calls keep the non-streaming run; their token
+    deltas would only end up in the task history.
+    """
+    if part_converter is None:
+        run_request = convert_a2a_request_to_agent_run_request(request)
+    else:
+        run_request = convert_a2a_request_to_agent_run_request(request, part_converter)
+    call_state = getattr(getattr(request, "call_context", None), "state", None) or {}
+    if call_state.get("method") not in _NON_STREAMING_METHODS:
+        run_request.run_config.streaming_mode = StreamingMode.SSE
+    return run_request
+
+
+class StreamingA2aAgentExecutor(A2aAgentExecutor):
+    """A2aAgentExecutor that streams token deltas and progress updates."""
+
+    def __init__(
+        self,
+        *,
+        runner: Any,
+        max_pending: int = A2A_STREAM_MAX_PENDING,
+        flush_interval: float = A2A_STREAM_FLUSH_MS / 1000,
+        **kwargs
+    ):
+        config = kwargs.pop("config", None) or A2aAgentExecutorConfig(
+            request_converter=streaming_request_converter,
+            event_converter=StreamingEventConverter(),
+        )
+        super().__init__(runner=runner, config=config, **kwargs)
+        self._max_pending = max_pending
+        self._flush_interval = flush_interval
+
+    async def execute(self, context: Any, event_queue: Any):
+        queue = BackpressureQueue(event_queue, self._max_pending, self._flush_interval)
+        try:
+            await super().execute(context, queue)
+        except BaseException:
+            await queue.close(drain=False)
+            raise
+        await queue.close()
+
+
+class StreamStats:
+    """Counts forwarded, coalesced and superseded stream events."""
+
+    def __init__(self):
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, key: str):
+        with self._lock:
+            self._counts[key] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+# Shared streaming statistics
+stream_stats = StreamStats()
@@ -14,6 +14,8 @@
 
 from google.adk.tools import ToolContext
 
+from ..shared_libraries import navigation
+
 
 async def click(button_name: str, tool_context: ToolContext) -> str:
     """Click the button with the given name.
@@ -25,8 +27,4 @@ async def click(button_name: str, tool_context: ToolContext) -> str:
     Returns:
       str: The webpage after clicking the button.
     """
-    # Simplified stub implementation for demonstration
-    if button_name.lower() == "back to search":
-        return "Returned to search page."
-    else:
-        return f"Clicked '{button_name}'.\n\nProduct Details:\n- Name: Sample Product\n- Price: $29.99\n- Description: A great product matching your needs\n\n[This is a demo agent - full navigation not available]"
+    return navigation.click(tool_context.state, button_name)
@@ -0,0 +1,36 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from google.adk.tools import ToolContext
+
+from ..shared_libraries import navigation
+
+
+async def explore_product(tool_context: ToolContext, asin: str = "") -> str:
+    """Open a product and read its Description, Features and Reviews at once.
+
+    Use this instead of clicking each section and "< Prev" in turn. The
+    current page stays the product page, where the size and color options
+    and the "Buy Now" button are.
+
+    Args:
+      tool_context(ToolContext): The function context.
+      asin(str): The product to explore, one of the products on the current
+        search results page. Leave empty for the product currently open.
+
+    Returns:
+      str: The product page followed by its Description, Features and Reviews.
+    """
+    return await navigation.explore(tool_context.state, asin)
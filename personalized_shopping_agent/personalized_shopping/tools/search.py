@@ -14,16 +14,27 @@
 
 from google.adk.tools import ToolContext
 
+from ..shared_libraries import navigation
+from ..shared_libraries.search_engine import FilterError
 
-async def search(keywords: str, tool_context: ToolContext) -> str:
+
+async def search(keywords: str, tool_context: ToolContext, page: int = 1, filters: str = "") -> str:
     """Search for keywords in the webshop.
 
     Args:
       keywords(str): The keywords to search for.
       tool_context(ToolContext): The function context.
+      page(int): The results page to show (1 for the first page).
+      filters(str): Optional conditions joined with "and", e.g.
+        'price < 30 and color == "red" and size == M'. Filter on price,
+        rating (stars), category (substring) or any product option such
+        as color or size (matches values containing the word, e.g. color
+        == red matches "red floral").
 
     Returns:
       str: The search result displayed in a webpage.
     """
-    # Simplified stub implementation for demonstration
-    return f"Search results for '{keywords}':\n\n1. Product A - Matching your search\n2. Product B - Similar item\n3. Product C - Alternative option\n\n[This is a demo agent - full product database not loaded]"
+    try:
+        return navigation.search(tool_context.state, keywords, page=page, filters=filters)
+    except FilterError as e:
+        return f"Invalid filters: {e}\n\n[{navigation.BACK_TO_SEARCH}]"
@@ -1,8 +1,10 @@
 """
 A2A-compliant server for Personalized Shopping Agent using ADK's to_a2a()
 """
+import asyncio
 import sys
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 # Add personalized_shopping to Python path
@@ -10,26 +12,49 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from google.adk.a2a.utils.agent_to_a2a import to_a2a
 from personalized_shopping.agent import root_agent
+from personalized_shopping.config import A2A_STREAMING_ENABLED, LLM_SCHEDULER_ENABLED, llm_scheduler
+from personalized_shopping.scheduler import AdmissionMiddleware
+from personalized_shopping.shared_libraries.search_engine import get_review_index, get_search_engine
+from personalized_shopping.streaming import StreamingA2aAgentExecutor
 
 # Get configuration from environment variables
 PORT = int(os.getenv("PORT", "8000"))
 HOST = os.getenv("HOST", "localhost")
 PROTOCOL = os.getenv("PROTOCOL", "http")
 
+
+@asynccontextmanager
+async def lifespan(app):
+    """Load the product catalog, search index and review summaries before serving requests."""
+    await asyncio.to_thread(get_search_engine)
+    await asyncio.to_thread(get_review_index)
+    yield
+
+
 # Convert ADK agent to A2A-compatible application
 # This automatically:
 # - Generates AgentCard from agent metadata
 # - Exposes AgentCard at /.well-known/agent-card.json
 # - Provides A2A protocol endpoints
 # - Extracts skills from agent tools
+# - Streams reply tokens and tool progress to message/stream clients
+#   (see personalized_shopping/streaming.py)
 # Note: The AgentCard URL will be constructed as {protocol}://{host}:{port}
 a2a_app = to_a2a(
     root_agent,
     host=HOST,
     port=PORT,
     protocol=PROTOCOL,
+    lifespan=lifespan,
+    agent_executor_factory=(
+        (lambda runner: StreamingA2aAgentExecutor(runner=runner)) if A2A_STREAMING_ENABLED else None
+    ),
     # AgentCard will be auto-generated from agent metadata
 )
+if LLM_SCHEDULER_ENABLED:
+    # Fast 429 instead of a timeout while the LLM call queue is saturated
+    # (see personalized_shopping/scheduler.py)
+    a2a_app.add_middleware(AdmissionMiddleware, scheduler=llm_scheduler)
 
 # The application is now ready to be served with uvicorn
 # uvicorn server:a2a_app --host 0.0.0.0 --port 8000
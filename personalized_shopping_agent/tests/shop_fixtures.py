@@ -0,0 +1,64 @@
+"""Small on-disk product catalog shared by the navigation and review tests"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from typing import Any, Dict, List
+from unittest import mock
+
+from personalized_shopping.shared_libraries import navigation
+from personalized_shopping.shared_libraries.search_engine import ReviewIndex, SearchEngine
+
+REVIEWS = [
+    {"score": 5, "title": "Love it", "body": "Soft fabric and true to size. Soft fabric feels great."},
+    {"score": 5, "title": "Great", "body": "Soft fabric, lovely color."},
+    {"score": 4, "title": "Nice", "body": "True to size and soft fabric."},
+    {"score": 1, "title": "Bad", "body": "The zipper broke after one wash."},
+]
+
+
+def make_products(count: int = 12) -> List[Dict[str, Any]]:
+    """Cotton dresses B000..B0nn; the first one has options, details and reviews."""
+    products = [{
+        "asin": f"B{i:03d}",
+        "name": f"Cotton summer dress {i}",
+        "pricing": f"${20 + i}.00",
+        "product_category": "Clothing › Women › Dresses",
+        "average_rating": 4.0,
+        "reviews": [],
+    } for i in range(count)]
+    products[0].update({
+        "customization_options": {"color": [{"value": "red"}, {"value": "blue"}], "size": ["S", "M"]},
+        "full_description": "A light cotton dress for warm days.",
+        "small_description": ["100% cotton", "Machine washable"],
+        "reviews": list(REVIEWS),
+    })
+    return products
+
+
+class ShopTestCase(unittest.TestCase):
+    """Serves navigation from a temporary catalog instead of the configured one."""
+
+    products = make_products()
+
+    def setUp(self):
+        directory = tempfile.mkdtemp(prefix="shopping-test-")
+        self.addCleanup(shutil.rmtree, directory, True)
+        catalog_path = os.path.join(directory, "items.jsonl")
+        with open(catalog_path, "w") as f:
+            for product in self.products:
+                f.write(json.dumps(product) + "\n")
+
+        self.engine = SearchEngine.open(catalog_path, index_dir=os.path.join(directory, "indexes"))
+        self.reviews = ReviewIndex.open(self.engine.catalog)
+        self.addCleanup(self.reviews._db.close)
+        for patcher in (
+            mock.patch.object(navigation, "get_search_engine", lambda: self.engine),
+            mock.patch.object(navigation, "get_review_index", lambda: self.reviews),
+            mock.patch.object(navigation, "page_cache", navigation.PageCache()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.state: Dict[str, Any] = {}
@@ -0,0 +1,65 @@
+"""Tests for reading a product page with all its sections at once (navigation.explore)"""
+
+import unittest
+
+from personalized_shopping.shared_libraries import navigation
+from personalized_shopping.shared_libraries.navigation import SECTIONS, _share_budget, _truncate, current_page
+
+from .shop_fixtures import ShopTestCase
+
+
+class ExploreTest(ShopTestCase, unittest.IsolatedAsyncioTestCase):
+    async def test_product_page_and_sections(self):
+        navigation.search(self.state, "cotton dress", page=2)
+        text = await navigation.explore(self.state, "b000")
+
+        self.assertTrue(text.startswith("[Back to Search]"))
+        self.assertIn("[Buy Now]", text)
+        positions = [text.index(f"=== {view} ===") for view in SECTIONS]
+        self.assertEqual(positions, sorted(positions))
+        self.assertIn("A light cotton dress", text)
+        self.assertIn("Machine washable", text)
+        self.assertIn("soft fabric", text.lower())
+        self.assertEqual(current_page(self.state), ["item", "B000", {}])
+
+    async def test_from_a_section_keeps_the_options(self):
+        navigation.search(self.state, "cotton dress", page=2)
+        navigation.click(self.state, "B000")
+        navigation.click(self.state, "blue")
+        navigation.click(self.state, "Reviews")
+
+        text = await navigation.explore(self.state)
+        self.assertIn("[blue] (selected)", text)
+        self.assertEqual(current_page(self.state), ["item", "B000", {"color": "blue"}])
+
+    async def test_errors(self):
+        self.assertIn("Open a product first", await navigation.explore(self.state))
+        navigation.search(self.state, "cotton dress")
+        self.assertIn("Open a product first", await navigation.explore(self.state))
+
+        text = await navigation.explore(self.state, "B999")
+        self.assertIn("Product 'B999' is not on the current page", text)
+        self.assertIn("[B001]", text)
+        self.assertEqual(current_page(self.state)[0], "results")
+
+    async def test_sections_share_the_budget(self):
+        navigation.search(self.state, "cotton dress", page=2)
+        text = await navigation.explore(self.state, "B000", max_tokens=6)
+        self.assertIn("… (truncated)", text)
+        self.assertIn("=== Reviews ===", text)
+
+
+class BudgetTest(unittest.TestCase):
+    def test_short_sections_leave_room_for_the_others(self):
+        self.assertEqual(_share_budget([10, 500, 500], 600), [10, 295, 295])
+        self.assertEqual(_share_budget([10, 20, 30], 600), [10, 20, 30])
+        self.assertEqual(sum(_share_budget([100, 200, 300], 90)), 90)
+
+    def test_truncate_cuts_at_a_line(self):
+        text = "first line\n" + "word " * 100
+        self.assertEqual(_truncate(text, 1000), text)
+        self.assertEqual(_truncate(text, 5), "first line\n… (truncated)")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""Tests for the faceted search filters (search_engine/filters.py)"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from personalized_shopping.shared_libraries.search_engine import (
+    Catalog,
+    FilterError,
+    SearchEngine,
+    filter_mask,
+    parse_filters,
+)
+from personalized_shopping.shared_libraries.search_engine.filters import Condition
+
+PRODUCTS = [
+    {"asin": "B001", "name": "Floral summer dress", "pricing": "$29.99", "average_rating": 4.5,
+     "product_category": "Clothing › Women › Dresses",
+     "customization_options": {"Color": [{"value": "red floral"}, {"value": "blue floral"}],
+                               "Size": [{"value": "M"}, {"value": "L"}]}},
+    {"asin": "B002", "name": "Linen maxi dress", "pricing": "$45.00 to $50.00", "average_rating": "3.9 out of 5 stars",
+     "product_category": "Clothing › Women › Dresses",
+     "customization_options": {"color": ["red", "navy"], "size": ["medium", "x-large"]}},
+    {"asin": "B003", "name": "Cotton t-shirt", "pricing": "$12.00",
+     "product_category": "Clothing › Men › Shirts",
+     "customization_options": {"color": ["bored grey"], "size": ["large", "xx-large"]}},
+    {"asin": "B004", "name": "Green tea", "product_category": "Grocery › Beverages"},
+]
+
+
+class FilterTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp(prefix="shopping-filters-")
+        path = os.path.join(cls.directory, "items.jsonl")
+        with open(path, "w") as f:
+            f.writelines(json.dumps(product) + "\n" for product in PRODUCTS)
+        cls.engine = SearchEngine.open(path, index_dir=os.path.join(cls.directory, "indexes"))
+        cls.catalog: Catalog = cls.engine.catalog
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def matching(self, filters: str):
+        mask = filter_mask(self.catalog, parse_filters(filters))
+        return [self.catalog.asin(product_id) for product_id in mask.nonzero()[0]]
+
+    def test_parse(self):
+        self.assertEqual(parse_filters('price < 30 and color = "red floral", size == M'), [
+            Condition("price", "<", "30"),
+            Condition("color", "==", "red floral"),
+            Condition("size", "==", "M"),
+        ])
+        self.assertEqual(parse_filters(""), [])
+        self.assertIsNone(filter_mask(self.catalog, []))
+        with self.assertRaises(FilterError):
+            parse_filters("price")
+
+    def test_numeric_fields(self):
+        self.assertEqual(self.matching("price < 30"), ["B001", "B003"])
+        self.assertEqual(self.matching("price >= 45"), ["B002"])
+        self.assertEqual(self.matching("price != 12"), ["B001", "B002"])  # unknown prices never match
+        self.assertEqual(self.matching("rating > 4"), ["B001"])
+        with self.assertRaises(FilterError):
+            self.matching("price < cheap")
+
+    def test_category_substring(self):
+        self.assertEqual(self.matching("category == dresses"), ["B001", "B002"])
+        self.assertEqual(self.matching("category != clothing"), ["B004"])
+        with self.assertRaises(FilterError):
+            self.matching("category < dresses")
+
+    def test_option_value_matches_as_a_word(self):
+        self.assertEqual(self.matching("color == red"), ["B001", "B002"])
+        self.assertEqual(self.matching('color == "RED FLORAL"'), ["B001"])
+        self.assertEqual(self.matching("color == red and price < 35"), ["B001"])
+        self.assertEqual(self.matching("color != red"), ["B003", "B004"])
+        self.assertEqual(self.matching("color == re"), [])
+
+    def test_size_letters_and_names(self):
+        self.assertEqual(self.matching("size == M"), ["B001", "B002"])
+        self.assertEqual(self.matching("size == medium"), ["B001", "B002"])
+        self.assertEqual(self.matching("size == L"), ["B001", "B003"])
+        self.assertEqual(self.matching("size == xl"), ["B002"])
+
+    def test_unknown_field(self):
+        with self.assertRaises(FilterError):
+            self.matching("material == cotton")
+
+    def test_filtered_search(self):
+        page = self.engine.search("dress", filters='price < 35 and color == "red"')
+        self.assertEqual([hit.asin for hit in page.hits], ["B001"])
+        self.assertEqual(page.filters, "price < 35 and color == red")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""Tests for the BM25 inverted index and search engine (search_engine/index.py, engine.py)"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from personalized_shopping.shared_libraries.search_engine import (
+    IndexBuilder,
+    InvertedIndex,
+    SearchEngine,
+    build_index,
+    tokenize,
+)
+
+DOCUMENTS = [
+    {"title": "Red cotton dress", "category": "Women › Dresses", "attributes": "machine wash"},
+    {"title": "Blue running shoes", "category": "Shoes", "attributes": "red laces"},
+    {"title": "Red running shoes", "category": "Shoes", "attributes": "lightweight"},
+    {"title": "Glass water bottle", "category": "Kitchen", "attributes": "red lid"},
+]
+
+
+class TokenizeTest(unittest.TestCase):
+    def test_stopwords_and_plurals(self):
+        self.assertEqual(tokenize("The Dresses and Shoes for a glass"), ["dress", "shoe", "glass"])
+
+
+class InvertedIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = build_index(DOCUMENTS)
+
+    def test_title_matches_outrank_attribute_matches(self):
+        docs, scores, total = self.index.search("red")
+        self.assertEqual(total, 4)
+        self.assertEqual(set(docs[:2].tolist()), {0, 2})
+        self.assertTrue(np.all(np.diff(scores) <= 0))
+
+    def test_all_terms_add_up(self):
+        docs, _, total = self.index.search("red running shoes")
+        self.assertEqual(docs[0], 2)
+        self.assertEqual(total, 4)
+
+    def test_limit_mask_and_unknown_terms(self):
+        docs, _, total = self.index.search("red", limit=1)
+        self.assertEqual((len(docs), total), (1, 4))
+
+        mask = np.array([False, True, False, True])
+        docs, _, total = self.index.search("red", mask=mask)
+        self.assertEqual((sorted(docs.tolist()), total), ([1, 3], 2))
+
+        self.assertEqual(self.index.search("umbrella")[2], 0)
+
+    def test_documents_must_be_added_in_order(self):
+        with self.assertRaises(ValueError):
+            IndexBuilder().add(1, {"title": "out of order"})
+
+    def test_save_and_load(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        path = os.path.join(directory, "index")
+        self.index.save(path)
+
+        loaded = InvertedIndex.load(path)
+        for query in ("red", "red running shoes", "glass"):
+            expected, got = self.index.search(query), loaded.search(query)
+            np.testing.assert_array_equal(got[0], expected[0])
+            np.testing.assert_allclose(got[1], expected[1])
+
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"version": -1}, f)
+        self.assertIsNone(InvertedIndex.load(path))
+
+
+class SearchEngineTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        catalog_path = os.path.join(self.directory, "items.jsonl")
+        with open(catalog_path, "w") as f:
+            for i in range(25):
+                f.write(json.dumps({
+                    "asin": f"B{i:03d}", "name": f"Cotton shirt {i}", "pricing": f"${i}.50",
+                }) + "\n")
+        self.engine = SearchEngine.open(catalog_path, index_dir=os.path.join(self.directory, "indexes"),
+                                        max_results=20)
+
+    def test_pagination(self):
+        first = self.engine.search("cotton shirts", page=1, page_size=8)
+        last = self.engine.search("cotton shirts", page=3, page_size=8)
+        self.assertEqual((first.total, first.pages), (20, 3))
+        self.assertEqual((len(first.hits), len(last.hits)), (8, 4))
+        self.assertEqual(first.hits[0].asin, self.engine.catalog.asin(first.hits[0].product_id))
+        self.assertEqual(self.engine.search("cotton", page=4, page_size=8).hits, [])
+
+    def test_filters_apply_before_ranking(self):
+        page = self.engine.search("shirt", filters="price < 5")
+        self.assertEqual(page.total, 5)
+        self.assertTrue(all(hit.price < 5 for hit in page.hits))
+        self.assertEqual(page.filters, "price < 5")
+
+
+if __name__ == "__main__":
+    unittest.main()
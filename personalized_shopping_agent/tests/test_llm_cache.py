@@ -0,0 +1,70 @@
+"""Tests for the LLM response cache (personalized_shopping/llm_cache.py)"""
+
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from personalized_shopping import llm_cache as llm_cache_module
+from personalized_shopping.llm_cache import (
+    LlmCacheMissError,
+    LlmCachePolicy,
+    LlmResponseCache,
+    llm_cache_lookup_callback,
+    llm_cache_store_callback,
+    make_request_key,
+)
+
+
+def make_request(query="red running shoes", call_id="call-1"):
+    return LlmRequest(
+        model="gemini-2.0-flash",
+        contents=[
+            types.Content(role="user", parts=[types.Part(text=query)]),
+            types.Content(role="model", parts=[types.Part(
+                function_call=types.FunctionCall(id=call_id, name="search", args={"keywords": query})
+            )]),
+        ],
+        config=types.GenerateContentConfig(system_instruction="Help the user shop."),
+    )
+
+
+def make_context(invocation="turn-1"):
+    return SimpleNamespace(
+        agent_name="personalized_shopping_agent",
+        invocation_id=invocation,
+        _invocation_context=SimpleNamespace(agent=SimpleNamespace(canonical_after_model_callbacks=[])),
+    )
+
+
+class LlmCacheTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.cache = LlmResponseCache(max_entries=8)
+        for patcher in (
+            mock.patch.object(llm_cache_module, "llm_cache", self.cache),
+            mock.patch.object(llm_cache_module, "llm_cache_policy", LlmCachePolicy("record")),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_function_call_ids_do_not_change_the_key(self):
+        self.assertEqual(make_request_key(make_request(call_id="a")), make_request_key(make_request(call_id="b")))
+        self.assertNotEqual(make_request_key(make_request()), make_request_key(make_request("blue dress")))
+
+    async def test_record_then_replay(self):
+        context = make_context()
+        self.assertIsNone(await llm_cache_lookup_callback(context, make_request()))
+        response = LlmResponse(content=types.Content(role="model", parts=[types.Part(text="Here are 3 shoes")]))
+        llm_cache_store_callback(context, response)
+
+        llm_cache_module.llm_cache_policy = LlmCachePolicy("replay")
+        hit = await llm_cache_lookup_callback(make_context("turn-2"), make_request(call_id="other"))
+        self.assertEqual(hit.content.parts[0].text, "Here are 3 shoes")
+        with self.assertRaises(LlmCacheMissError):
+            await llm_cache_lookup_callback(make_context(), make_request("blue dress"))
+
+
+if __name__ == "__main__":
+    unittest.main()
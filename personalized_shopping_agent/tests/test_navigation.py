@@ -0,0 +1,93 @@
+"""Tests for the stateful page navigation behind search and click (shared_libraries/navigation.py)"""
+
+import unittest
+
+from personalized_shopping.shared_libraries import navigation
+from personalized_shopping.shared_libraries.navigation import (
+    BACK_TO_SEARCH,
+    MAX_STACK_DEPTH,
+    NEXT,
+    PAGE_STACK_KEY,
+    PREV,
+    current_page,
+)
+
+from .shop_fixtures import ShopTestCase
+
+
+class NavigationTest(ShopTestCase):
+    def search(self, keywords="cotton dress", **kwargs):
+        return navigation.search(self.state, keywords, **kwargs)
+
+    def click(self, button):
+        return navigation.click(self.state, button)
+
+    def test_results_pages(self):
+        text = self.search()
+        self.assertIn("Page 1 of 2 (Total results: 12)", text)
+        self.assertIn(f"[{NEXT}]", text)
+        self.assertNotIn(f"[{PREV}]", text)
+
+        text = self.click("Next >")
+        self.assertIn("Page 2 of 2", text)
+        self.assertEqual(current_page(self.state), ["results", "cotton dress", 2, ""])
+        self.click("< Prev")
+        self.assertEqual(current_page(self.state), ["results", "cotton dress", 1, ""])
+
+    def test_product_sections_prev_and_options(self):
+        self.search(page=2)  # the longer B000 listing ranks last
+        text = self.click("[B000]")
+        self.assertIn("Cotton summer dress 0", text)
+        self.assertIn("color: [red] [blue]", text)
+
+        self.assertIn("A light cotton dress", self.click("description"))
+        self.click("prev")
+        self.assertEqual(current_page(self.state), ["item", "B000", {}])
+
+        text = self.click("blue")
+        self.assertIn("[blue] (selected)", text)
+        self.click("M")
+        self.assertEqual(current_page(self.state), ["item", "B000", {"color": "blue", "size": "M"}])
+
+        self.click("Features")
+        self.click("< Prev")
+        self.assertEqual(current_page(self.state)[2], {"color": "blue", "size": "M"})
+
+        text = self.click("Buy Now")
+        self.assertIn("Options: color: blue, size: M", text)
+        self.click(BACK_TO_SEARCH)
+        self.assertEqual(self.state[PAGE_STACK_KEY], [["home"]])
+
+    def test_unknown_buttons_list_the_clickable_ones(self):
+        self.assertIn("search page", self.click("B000"))
+        self.search()
+        text = self.click("Checkout")
+        self.assertIn("no 'Checkout' button", text)
+        self.assertIn("[B001]", text)
+        self.assertEqual(current_page(self.state), ["results", "cotton dress", 1, ""])
+
+    def test_prev_on_a_page_opened_directly(self):
+        self.search(page=2)
+        self.click("< Prev")
+        self.assertEqual(current_page(self.state), ["results", "cotton dress", 1, ""])
+
+    def test_stack_depth_is_bounded(self):
+        self.search(page=2)
+        self.click("B000")
+        for _ in range(MAX_STACK_DEPTH):
+            self.click("Reviews")
+            self.state[PAGE_STACK_KEY] = [*self.state[PAGE_STACK_KEY][:-1], ["item", "B000", {}]]
+        self.assertLessEqual(len(self.state[PAGE_STACK_KEY]), MAX_STACK_DEPTH)
+
+    def test_pages_are_rendered_once(self):
+        self.search()
+        self.click("Next >")
+        self.click("< Prev")
+        self.search()
+        stats = navigation.page_cache.stats()
+        self.assertEqual((stats["misses"], stats["entries"]), (2, 2))
+        self.assertGreaterEqual(stats["hits"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
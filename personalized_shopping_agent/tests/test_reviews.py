@@ -0,0 +1,82 @@
+"""Tests for review summaries and incrementally added reviews (search_engine/reviews.py)"""
+
+import math
+import os
+import unittest
+
+from personalized_shopping.shared_libraries.search_engine import ReviewIndex
+from personalized_shopping.shared_libraries.search_engine.reviews import ReviewSummary, phrases, summarize
+
+from .shop_fixtures import REVIEWS, ShopTestCase
+
+NEW_REVIEWS = [
+    {"score": 2, "title": "Runs small", "body": "Runs small in the waist."},
+    {"score": "5.0", "title": "Lovely", "body": "Lovely dress."},
+]
+
+
+class SummarizeTest(unittest.TestCase):
+    def test_phrases_stop_at_clauses(self):
+        self.assertEqual(phrases("Soft fabric, lovely color"), ["soft fabric", "lovely color"])
+
+    def test_histogram_pros_and_snippets(self):
+        summary = summarize(REVIEWS, {}, (0, 0))
+        self.assertEqual(summary.histogram, [1, 0, 0, 1, 2])
+        self.assertEqual((summary.count, summary.mean), (4, 3.75))
+        self.assertIn("soft fabric", summary.pros)
+        self.assertNotIn("soft fabric", summary.cons)
+        self.assertLessEqual(len(summary.snippets), 3)
+        self.assertEqual(ReviewSummary.from_json(summary.to_json()), summary)
+
+    def test_no_reviews(self):
+        summary = summarize([], {}, (0, 0))
+        self.assertEqual(summary.count, 0)
+        self.assertTrue(math.isnan(summary.mean))
+
+
+class ReviewIndexTest(ShopTestCase):
+    def product_id(self, asin):
+        return self.engine.catalog.product_id(asin)
+
+    def open_other(self):
+        """A second store of the same catalog, as another cache directory would have."""
+        other = ReviewIndex(self.engine.catalog, os.path.join(os.path.dirname(self.reviews.path), "other.sqlite"))
+        self.addCleanup(other._db.close)
+        other.build()
+        return other
+
+    def test_build_summarizes_every_product(self):
+        self.assertTrue(self.reviews.built)
+        self.assertEqual(self.reviews.stats()["summaries"], len(self.products))
+        self.assertEqual(self.reviews.summary(self.product_id("B000")).histogram, [1, 0, 0, 1, 2])
+        self.assertEqual(self.reviews.summary(self.product_id("B001")).count, 0)
+
+    def test_add_reviews_updates_only_that_product(self):
+        untouched = self.reviews.summary(self.product_id("B000"))
+        summary = self.reviews.add_reviews(self.product_id("B005"), NEW_REVIEWS)
+
+        self.assertEqual(summary.histogram, [0, 1, 0, 0, 1])
+        self.assertEqual(self.reviews.stats()["computed"], 1)
+        self.assertEqual(self.reviews.summary(self.product_id("B005")), summary)
+        self.assertEqual(self.reviews.summary(self.product_id("B000")), untouched)
+        self.assertEqual(self.reviews.reviews(self.product_id("B005")), NEW_REVIEWS)
+
+    def test_other_stores_pick_up_added_reviews(self):
+        other = self.open_other()
+        self.reviews.add_reviews(self.product_id("B005"), NEW_REVIEWS[:1])
+
+        self.assertEqual(other.summary(self.product_id("B005")).count, 0)
+        self.assertEqual(other.sync_added(), 1)
+        self.assertEqual(other.summary(self.product_id("B005")).count, 1)
+        self.assertEqual(other.sync_added(), 0)
+
+    def test_added_reviews_survive_a_rebuild(self):
+        self.reviews.add_reviews(self.product_id("B005"), NEW_REVIEWS)
+        self.reviews.build()
+        self.assertEqual(self.reviews.summary(self.product_id("B005")).count, 2)
+        self.assertEqual(self.reviews.sync_added(), 0)
+        self.assertEqual(self.open_other().summary(self.product_id("B005")).count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
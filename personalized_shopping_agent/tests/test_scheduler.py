@@ -0,0 +1,52 @@
+"""Tests for LLM call scheduling and admission control (personalized_shopping/scheduler.py)"""
+
+import asyncio
+import unittest
+
+import httpx
+
+from personalized_shopping.scheduler import AdmissionMiddleware, LlmScheduler
+
+
+class LlmSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_priority_then_round_robin(self):
+        scheduler = LlmScheduler(max_concurrency=1, priorities={"urgent": 0})
+        order, gate = [], asyncio.Event()
+
+        async def call(session, agent, label):
+            async with scheduler.slot(session, agent):
+                order.append(label)
+                await gate.wait()
+
+        tasks = []
+        for session, agent, label in [
+            ("blocker", "agent", "blocker"),
+            ("a", "agent", "a1"), ("a", "agent", "a2"), ("b", "agent", "b1"),
+            ("c", "urgent", "c1"),
+        ]:
+            tasks.append(asyncio.create_task(call(session, agent, label)))
+            await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(*tasks)
+        self.assertEqual(order, ["blocker", "c1", "a1", "b1", "a2"])
+
+
+class AdmissionMiddlewareTest(unittest.IsolatedAsyncioTestCase):
+    async def test_only_agent_runs_are_rejected_while_saturated(self):
+        async def app(scope, receive, send):
+            await receive()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        middleware = AdmissionMiddleware(app, LlmScheduler(max_concurrency=1, max_queue=0))
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=middleware),
+                                     base_url="http://agent.test") as client:
+            run = await client.post("/", json={"jsonrpc": "2.0", "id": 1, "method": "message/send"})
+            lookup = await client.post("/", json={"jsonrpc": "2.0", "id": 2, "method": "tasks/get"})
+        self.assertEqual(run.status_code, 429)
+        self.assertIn("retry-after", run.headers)
+        self.assertEqual(lookup.status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""Tests for the on-disk catalog and index cache of the shopping search engine"""
+
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+from personalized_shopping.shared_libraries.search_engine import Catalog, InvertedIndex, SearchEngine
+from personalized_shopping.shared_libraries.search_engine.catalog import publish_directory
+from personalized_shopping.shared_libraries.search_engine.engine import index_directory
+
+PRODUCTS = 20_000
+WORKERS = 6
+
+
+def _write_catalog(path: str, products: int):
+    with open(path, "w") as f:
+        for i in range(products):
+            f.write(json.dumps({
+                "asin": f"B{i:09d}",
+                "name": f"{['red', 'blue', 'green'][i % 3]} cotton dress {i}",
+                "pricing": f"${10 + i % 50}.99",
+                "customization_options": {"color": [{"value": ["red", "blue", "green"][i % 3]}]},
+            }) + "\n")
+
+
+def _open(args):
+    catalog_path, index_dir = args
+    engine = SearchEngine.open(catalog_path, index_dir=index_dir)
+    return len(engine.catalog), engine.search("red dress").total, engine.index_cached
+
+
+class SearchCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="shopping-test-")
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        self.catalog_path = os.path.join(self.directory, "items.jsonl")
+        _write_catalog(self.catalog_path, PRODUCTS)
+        self.index_dir = os.path.join(self.directory, "indexes")
+
+    def test_reopen_uses_the_cache(self):
+        first = SearchEngine.open(self.catalog_path, index_dir=self.index_dir)
+        second = SearchEngine.open(self.catalog_path, index_dir=self.index_dir)
+        self.assertFalse(first.index_cached)
+        self.assertTrue(second.index_cached)
+        self.assertEqual(second.search("green dress").total, first.search("green dress").total)
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "needs fork")
+    def test_workers_on_a_cold_cache_build_it_once(self):
+        with multiprocessing.get_context("fork").Pool(WORKERS) as pool:
+            results = pool.map(_open, [(self.catalog_path, self.index_dir)] * WORKERS)
+
+        self.assertEqual({(products, total) for products, total, _ in results}, {(PRODUCTS, 50)})
+        self.assertEqual(sum(not cached for _, _, cached in results), 1)
+        cache = index_directory(self.catalog_path, self.index_dir)
+        self.assertEqual(sorted(os.listdir(self.index_dir)), sorted([
+            os.path.basename(cache), os.path.basename(cache) + ".lock",
+        ]))
+
+    def test_stale_directory_is_replaced(self):
+        cache = index_directory(self.catalog_path, self.index_dir)
+        os.makedirs(os.path.join(cache, "catalog"))
+        with open(os.path.join(cache, "catalog", "meta.json"), "w") as f:
+            json.dump({"version": -1}, f)
+
+        engine = SearchEngine.open(self.catalog_path, index_dir=self.index_dir)
+        self.assertFalse(engine.index_cached)
+        self.assertIsNotNone(Catalog.load(os.path.join(cache, "catalog")))
+        self.assertIsNotNone(InvertedIndex.load(os.path.join(cache, "index")))
+
+    def test_publish_directory_replaces_a_non_empty_directory(self):
+        target, tmp = os.path.join(self.directory, "target"), os.path.join(self.directory, "tmp")
+        for directory, name in ((target, "old"), (tmp, "new")):
+            os.makedirs(directory)
+            open(os.path.join(directory, name), "w").close()
+
+        publish_directory(tmp, target)
+        self.assertEqual(os.listdir(target), ["new"])
+        self.assertFalse(os.path.exists(tmp))
+        self.assertFalse([name for name in os.listdir(self.directory) if name.startswith(".stale-")])
+
+
+if __name__ == "__main__":
+    unittest.main()
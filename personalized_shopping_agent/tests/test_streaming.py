@@ -0,0 +1,58 @@
+"""Tests for streamed A2A responses (personalized_shopping/streaming.py)"""
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from google.genai import types
+
+from personalized_shopping.streaming import (
+    DELTA,
+    PROGRESS,
+    STREAM_METADATA_KEY,
+    BackpressureQueue,
+    describe_tool_calls,
+)
+
+
+def a2a_event(kind=None, text=""):
+    metadata = {"adk_author": "personalized_shopping_agent"}
+    if kind:
+        metadata[STREAM_METADATA_KEY] = kind
+    return SimpleNamespace(metadata=metadata, status=SimpleNamespace(message=SimpleNamespace(parts=[text])))
+
+
+class BackpressureQueueTest(unittest.IsolatedAsyncioTestCase):
+    async def test_deltas_merge_and_progress_is_superseded(self):
+        received, gate = [], asyncio.Event()
+
+        class SlowConsumer:
+            async def enqueue_event(self, event):
+                await gate.wait()
+                received.append(event)
+
+        queue = BackpressureQueue(SlowConsumer(), flush_interval=0)
+        await queue.enqueue_event(a2a_event(text="start"))
+        await asyncio.sleep(0)
+        for event in (a2a_event(PROGRESS, "Searching…"), a2a_event(PROGRESS, "Opening…"),
+                      a2a_event(DELTA, "Two "), a2a_event(DELTA, "dresses")):
+            await queue.enqueue_event(event)
+        gate.set()
+        await queue.close()
+        self.assertEqual([event.status.message.parts for event in received],
+                         [["start"], ["Opening…"], ["Two ", "dresses"]])
+
+
+class DescribeToolCallsTest(unittest.TestCase):
+    def test_progress_text(self):
+        def describe(name, **args):
+            return describe_tool_calls([types.FunctionCall(name=name, args=args)])
+
+        self.assertEqual(describe("search", keywords="red running shoes"), "Searching for “red running shoes”…")
+        self.assertEqual(describe("click", button_name="Buy Now"), "Opening “Buy Now”…")
+        self.assertEqual(describe("explore_product", asin="B001"), "Reading the details of “B001”…")
+        self.assertIsNone(describe("search"))
+
+
+if __name__ == "__main__":
+    unittest.main()